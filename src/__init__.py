@@ -1,32 +1,39 @@
 """
 Agent Flow Craft - Framework para automação de fluxo de criação de features.
+
+Os nomes exportados são importados sob demanda (PEP 562): ``import src`` não
+carrega os agentes nem os SDKs dos provedores, o que mantém rápida a
+inicialização da CLI.
 """
-from src.agents import (
-    BaseAgent,
-    ConceptGenerationAgent,
-    FeatureConceptAgent,
-    FeatureCoordinatorAgent,
-    GitHubIntegrationAgent,
-    PlanValidator,
-    TDDCriteriaAgent,
-)
-from src.core import (
-    ModelConfig,
-    ModelManager,
-    ModelProvider,
-    get_env_status,
-    get_env_var,
-    get_logger,
-    log_debug,
-    log_error,
-    log_info,
-    log_warning,
-    logger,
-    validate_env,
-)
+import importlib
 
 __version__ = "2025.04.01.1"
 
+# Nome exportado -> módulo que o define
+_EXPORTS = {
+    # Agentes
+    "BaseAgent": "src.agents",
+    "ConceptGenerationAgent": "src.agents",
+    "FeatureConceptAgent": "src.agents",
+    "FeatureCoordinatorAgent": "src.agents",
+    "GitHubIntegrationAgent": "src.agents",
+    "PlanValidator": "src.agents",
+    "TDDCriteriaAgent": "src.agents",
+    # Core
+    "ModelManager": "src.core",
+    "ModelProvider": "src.core",
+    "ModelConfig": "src.core",
+    "get_env_var": "src.core",
+    "get_env_status": "src.core",
+    "validate_env": "src.core",
+    "logger": "src.core",
+    "get_logger": "src.core",
+    "log_error": "src.core",
+    "log_warning": "src.core",
+    "log_info": "src.core",
+    "log_debug": "src.core",
+}
+
 __all__ = [
     # Versão
     "__version__",
@@ -54,3 +61,16 @@ __all__ = [
     "log_info",
     "log_debug",
 ]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,24 +1,44 @@
 #!/usr/bin/env python3
 """
 Módulo de agentes do sistema.
+
+Os agentes são importados sob demanda (PEP 562), no primeiro acesso ao nome.
 """
+import importlib
 
-# Importações essenciais
-from src.agents.agent_concept_generation import ConceptGenerationAgent
-from src.agents.agent_feature_concept import FeatureConceptAgent
-from src.agents.agent_feature_coordinator import FeatureCoordinatorAgent
-from src.agents.agent_github_integration import GitHubIntegrationAgent
-from src.agents.agent_plan_validator import PlanValidator
-from src.agents.agent_tdd_criteria import TDDCriteriaAgent
-from src.agents.base_agent import BaseAgent
+# Nome exportado -> módulo que o define
+_EXPORTS = {
+    "BaseAgent": "src.agents.base_agent",
+    "ConceptGenerationAgent": "src.agents.agent_concept_generation",
+    "FeatureBatchRunner": "src.agents.feature_batch",
+    "FeatureConceptAgent": "src.agents.agent_feature_concept",
+    "FeatureCoordinatorAgent": "src.agents.agent_feature_coordinator",
+    "GitHubIntegrationAgent": "src.agents.agent_github_integration",
+    "PlanValidator": "src.agents.agent_plan_validator",
+    "TDDCriteriaAgent": "src.agents.agent_tdd_criteria",
+}
 
 # Lista de módulos exportados
 __all__ = [
     "BaseAgent",
     "ConceptGenerationAgent",
+    "FeatureBatchRunner",
     "FeatureConceptAgent",
     "FeatureCoordinatorAgent",
     "GitHubIntegrationAgent",
     "PlanValidator",
     "TDDCriteriaAgent",
 ]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -2,23 +2,20 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
+from src.agents.context_storage import atomic_write_json, new_context_id
 from src.core.logger import get_logger, log_execution
+from src.core.utils.hedging import HedgedRequestError, HedgePolicy
+from src.core.utils.model_gateway import get_model_gateway
 
-# Tente importar funções de mascaramento de dados sensíveis
+# Mascaramento de dados sensíveis (somente biblioteca padrão)
+from src.core.masking import mask_sensitive_data
+
+# Tente importar utilitários de ambiente
 try:
-    from src.core.utils import mask_sensitive_data, get_env_status
+    from src.core.utils.env import get_env_var_status
     has_utils = True
 except ImportError:
     has_utils = False
-    # Função básica de fallback para mascaramento
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            # Mostrar parte do início e fim para debugging
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
 
 class ConceptGenerationAgent:
     """
@@ -27,7 +24,8 @@ class ConceptGenerationAgent:
     utilizando a OpenAI para processar a solicitação do usuário.
     """
     
-    def __init__(self, openai_token=None, model="gpt-4", elevation_model=None, force=False):
+    def __init__(self, openai_token=None, model=None, elevation_model=None, force=False, hedge_policy=None,
+                 temperature=0.7, max_tokens=None, timeout=None, max_retries=None):
         self.logger = get_logger(__name__)
         self.logger.info("INÍCIO - ConceptGenerationAgent.__init__")
         
@@ -35,18 +33,28 @@ class ConceptGenerationAgent:
             self.openai_token = openai_token or os.environ.get('OPENAI_KEY', '')
             self.context_dir = Path('agent_context')
             self.context_dir.mkdir(exist_ok=True)
-            self.model = model
+            # Sem modelo explícito, o roteador escolhe um modelo premium (tarefa "concept")
+            self.model = model or "gpt-4"
+            self.routing_task = None if model else "concept"
             self.elevation_model = elevation_model
             self.force = force
+            # Parâmetros das chamadas ao modelo (timeout e max_retries: padrão do modelo no ModelManager)
+            self.temperature = temperature
+            self.max_tokens = max_tokens or 2000
+            self.timeout = timeout
+            self.max_retries = max_retries
+            # Chamadas especulativas ao modelo de elevação (<AGENTE>_HEDGE_* / MODEL_HEDGE_*)
+            self.hedge_policy = hedge_policy or HedgePolicy.from_env(type(self).__name__)
             
             # Se force=True e temos um modelo de elevação, usamos ele diretamente
             if self.force and self.elevation_model:
                 self.logger.info(f"Modo force ativado. Usando diretamente o modelo de elevação: {self.elevation_model}")
                 self.model = self.elevation_model
+                self.routing_task = None
             
             # Logar status do token sem expor dados sensíveis
             if has_utils:
-                token_status = get_env_status('OPENAI_KEY')
+                token_status = get_env_var_status('OPENAI_KEY')
                 self.logger.debug(f"Status do token OpenAI: {token_status}")
             else:
                 token_available = "disponível" if self.openai_token else "ausente"
@@ -76,6 +84,7 @@ class ConceptGenerationAgent:
         """
         self.logger.info(f"INÍCIO - set_model | Modelo anterior: {self.model} | Novo modelo: {model}")
         self.model = model
+        self.routing_task = None
         self.logger.info(f"SUCESSO - Modelo alterado para: {self.model}")
         return self.model
     
@@ -104,6 +113,7 @@ class ConceptGenerationAgent:
             
         self.logger.info(f"Elevando de {self.model} para {self.elevation_model}")
         self.model = self.elevation_model
+        self.routing_task = None
         return True
     
     @log_execution
@@ -130,7 +140,7 @@ class ConceptGenerationAgent:
                 concept["context_id"] = context_id
                 return concept
                 
-            client = OpenAI(api_key=self.openai_token)
+            gateway = get_model_gateway()
             
             context = f"""
             Histórico de commits recentes:
@@ -148,39 +158,51 @@ class ConceptGenerationAgent:
             }}
             """
             
+            # Com hedging, o modelo de elevação é chamado também se o principal demorar
+            hedging = self.hedge_policy.enabled and bool(self.elevation_model) and self.model != self.elevation_model
+            hedge_args = {"elevation_model": self.elevation_model, "hedge": self.hedge_policy} if hedging else {}
+            
             try:
-                response = client.chat.completions.create(
+                suggestion = gateway.generate(
                     model=self.model,
+                    api_key=self.openai_token,
                     messages=[
                         {"role": "system", "content": context},
                         {"role": "user", "content": prompt_text}
                     ],
-                    temperature=0.7,
-                    max_tokens=2000
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    timeout=self.timeout,
+                    max_retries=self.max_retries,
+                    task=self.routing_task,
+                    **hedge_args
                 )
                 
-                suggestion = response.choices[0].message.content
+            except HedgedRequestError:
+                # O modelo de elevação já foi tentado
+                raise
                 
             except Exception as model_error:
                 self.logger.warning(f"Erro ao usar o modelo {self.model}: {str(model_error)}")
                 
                 # Tentar elevar para modelo mais potente se configurado
-                if self.elevation_model and self.model != self.elevation_model:
+                if self.elevation_model and self.model != self.elevation_model and not hedging:
                     self.logger.info(f"Tentando elevação para o modelo {self.elevation_model}")
                     self.model = self.elevation_model
                     
                     # Tentar novamente com o modelo de elevação
-                    response = client.chat.completions.create(
+                    suggestion = gateway.generate(
                         model=self.model,
+                        api_key=self.openai_token,
                         messages=[
                             {"role": "system", "content": context},
                             {"role": "user", "content": prompt_text}
                         ],
-                        temperature=0.7,
-                        max_tokens=2000
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        timeout=self.timeout,
+                        max_retries=self.max_retries
                     )
-                    
-                    suggestion = response.choices[0].message.content
                     self.logger.info(f"Geração bem-sucedida após elevação para {self.model}")
                 else:
                     # Se não temos modelo de elevação ou já estamos usando ele, propagar o erro
@@ -254,7 +276,7 @@ class ConceptGenerationAgent:
         """
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            context_id = f"concept_{timestamp}"
+            context_id = new_context_id("concept")
             context_file = self.context_dir / f"{context_id}.json"
             
             self.logger.info(f"Tentando salvar contexto em: {context_file} (diretório: {self.context_dir.resolve()})")
@@ -278,8 +300,7 @@ class ConceptGenerationAgent:
             }
             
             self.logger.info(f"Escrevendo arquivo: {context_file}")
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2)
+            atomic_write_json(context_file, context_data)
                 
             self.logger.info(f"Contexto salvo com sucesso em {context_file}")
             return context_id
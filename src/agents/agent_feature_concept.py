@@ -2,9 +2,17 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
+from src.agents.context_storage import atomic_write_json, new_context_id
 from src.core.logger import get_logger, log_execution
-from src.core.utils import mask_sensitive_data
+from src.core.masking import mask_sensitive_data
+from src.core.utils.file_cache import get_file_cache
+from src.core.utils.project_index import get_project_index
+from src.core.utils.prompt_budget import TokenCounter
+from src.core.utils.relevance_index import get_relevance_index
+from src.core.utils.model_gateway import get_model_gateway
+
+# Orçamento de tokens de cada arquivo de metadados (README, dependências) no contexto
+PROJECT_FILE_MAX_TOKENS = 125
 
 class FeatureConceptAgent:
     """
@@ -81,12 +89,13 @@ class FeatureConceptAgent:
                 feature_concept["context_id"] = context_id
                 return feature_concept
                 
-            client = OpenAI(api_key=self.openai_token)
-            
             # Analisar contexto adicional do projeto
             project_context = ""
             if project_dir:
-                project_context = self._analyze_project_context(project_dir)
+                project_context = self._analyze_project_context(
+                    project_dir,
+                    query=f"{original_prompt} {json.dumps(original_concept, ensure_ascii=False)}"
+                )
             
             # Enviar para a API para enriquecer o conceito
             context = f"""
@@ -123,8 +132,9 @@ class FeatureConceptAgent:
             }}
             """
             
-            response = client.chat.completions.create(
+            suggestion = get_model_gateway().generate(
                 model=self.model,
+                api_key=self.openai_token,
                 messages=[
                     {"role": "system", "content": context},
                     {"role": "user", "content": f"Enriqueça o seguinte conceito: {original_prompt}"}
@@ -133,8 +143,6 @@ class FeatureConceptAgent:
                 max_tokens=4000
             )
             
-            suggestion = response.choices[0].message.content
-            
             # Mascarar possíveis dados sensíveis na resposta
             safe_suggestion = mask_sensitive_data(suggestion[:100])
             self.logger.info(f"Sugestão recebida do OpenAI: {safe_suggestion}...")
@@ -172,12 +180,14 @@ class FeatureConceptAgent:
         finally:
             self.logger.info("FIM - process_concept")
     
-    def _analyze_project_context(self, project_dir):
+    def _analyze_project_context(self, project_dir, query=None):
         """
         Analisa o contexto do projeto para obter informações relevantes.
         
         Args:
             project_dir (str): Diretório do projeto
+            query (str): Texto do conceito; se informado, inclui os trechos de código
+                mais relevantes segundo o índice BM25 local
             
         Returns:
             str: Contexto do projeto em formato texto
@@ -187,30 +197,53 @@ class FeatureConceptAgent:
             if not project_path.exists():
                 return "Diretório do projeto não encontrado"
                 
-            # Análise simples do projeto (pode ser expandida conforme necessário)
-            readme_files = list(project_path.glob("**/README*"))
-            package_files = list(project_path.glob("**/package.json")) + list(project_path.glob("**/pyproject.toml"))
+            # Análise simples do projeto (pode ser expandida conforme necessário).
+            # Arquivos mais próximos da raiz primeiro; o índice ignora node_modules, .venv etc.
+            indexed = sorted(
+                (entry.path for entry in get_project_index(project_dir).files()),
+                key=lambda path: (path.count("/"), path)
+            )
+            readme_files = [path for path in indexed if path.rsplit("/", 1)[-1].startswith("README")]
+            package_files = [
+                path for path in indexed
+                if path.rsplit("/", 1)[-1] in ("package.json", "pyproject.toml")
+            ]
+            file_cache = get_file_cache()
+            counter = TokenCounter(self.model)
             
             context = []
             
             # Extrair informações de README
             for readme in readme_files[:1]:  # Limitar a 1 arquivo README para não sobrecarregar
                 try:
-                    with open(readme, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        context.append(f"README: {content[:500]}...")  # Primeiros 500 caracteres
+                    # O prefixo lido do disco limita o custo da contagem de tokens
+                    content = counter.truncate(
+                        file_cache.read(str(project_path / readme), PROJECT_FILE_MAX_TOKENS * 8),
+                        PROJECT_FILE_MAX_TOKENS
+                    )
+                    context.append(f"README: {content}...")
                 except Exception:
                     pass
             
             # Extrair informações de package.json ou pyproject.toml
             for pkg in package_files[:1]:  # Limitar a 1 arquivo de dependências
                 try:
-                    with open(pkg, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        context.append(f"Dependências ({pkg.name}): {content[:500]}...")  # Primeiros 500 caracteres
+                    content = counter.truncate(
+                        file_cache.read(str(project_path / pkg), PROJECT_FILE_MAX_TOKENS * 8),
+                        PROJECT_FILE_MAX_TOKENS
+                    )
+                    context.append(f"Dependências ({Path(pkg).name}): {content}...")
                 except Exception:
                     pass
             
+            # Trechos de código relacionados ao conceito
+            if query:
+                for snippet in get_relevance_index(project_dir).search(query, top_k=3, max_tokens=1500, count_tokens=counter.count):
+                    context.append(
+                        f"Código relacionado ({snippet.path}, linhas {snippet.start_line}-{snippet.end_line}):\n"
+                        f"{snippet.text}"
+                    )
+            
             return "\n\n".join(context) if context else "Não foi possível extrair contexto do projeto"
             
         except Exception as e:
@@ -306,7 +339,7 @@ class FeatureConceptAgent:
         """
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            context_id = f"feature_concept_{timestamp}"
+            context_id = new_context_id("feature_concept")
             context_file = self.context_dir / f"{context_id}.json"
             
             self.logger.info(f"Tentando salvar feature concept em: {context_file}")
@@ -327,8 +360,7 @@ class FeatureConceptAgent:
                 "error": error
             }
             
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2)
+            atomic_write_json(context_file, context_data)
                 
             self.logger.info(f"Feature concept salvo com sucesso em {context_file}")
             return context_id
@@ -8,16 +8,28 @@ from .agent_github_integration import GitHubIntegrationAgent
 from .agent_concept_generation import ConceptGenerationAgent
 from .agent_plan_validator import PlanValidator
 from .context_manager import ContextManager
+from .context_storage import new_ulid
 from .agent_tdd_criteria import TDDCriteriaAgent
+from .stage_scheduler import CheckpointStore, Stage, StageExecutionError, StageScheduler
 from .guardrails.out_guardrail_concept_generation_agent import OutGuardrailConceptGenerationAgent
 from .guardrails.out_guardrail_tdd_criteria_agent import OutGuardrailTDDCriteriaAgent
 
 from src.core.logger import get_logger, log_execution
+from src.core.structured_log import bind_log_context, log_context
+from src.core.tracing import span
 
-def mask_sensitive_data(data, mask_str='***'):
-    """Mascara dados sensíveis para logging."""
-    from src.core.logger import mask_sensitive_data as logger_mask_sensitive_data
-    return logger_mask_sensitive_data(data, mask_str)
+class FeatureRunCheckpoints(CheckpointStore):
+    """Checkpoints das etapas de uma execução, persistidos via ContextManager."""
+    
+    def __init__(self, context_manager, run_id):
+        self.context_manager = context_manager
+        self.run_id = run_id
+    
+    def load(self, stage, input_key):
+        return self.context_manager.get_stage_checkpoint(self.run_id, stage, input_key)
+    
+    def save(self, stage, input_key, output):
+        self.context_manager.save_stage_checkpoint(self.run_id, stage, input_key, output)
 
 class FeatureCoordinatorAgent:
     """
@@ -28,7 +40,7 @@ class FeatureCoordinatorAgent:
     parâmetros adequados.
     """
     
-    def __init__(self, openai_token=None, github_token=None, target_dir=None):
+    def __init__(self, openai_token=None, github_token=None, target_dir=None, repo_name=None, model_options=None):
         """
         Inicializa o agente coordenador.
         
@@ -36,6 +48,10 @@ class FeatureCoordinatorAgent:
             openai_token: Token da API da OpenAI
             github_token: Token de acesso ao GitHub
             target_dir: Diretório do projeto onde a feature será implementada
+            repo_name: Nome do repositório GitHub (padrão: GITHUB_REPO)
+            model_options: Parâmetros do modelo repassados ao ConceptGenerationAgent
+                (model, elevation_model, force, timeout, max_retries, temperature,
+                max_tokens); o ``model`` também é usado pelos demais agentes
         """
         self.logger = get_logger(__name__)
         self.logger.info("INÍCIO - __init__ | Inicializando FeatureCoordinatorAgent")
@@ -50,7 +66,10 @@ class FeatureCoordinatorAgent:
         
         # Informações do repositório GitHub
         self.repo_owner = os.environ.get("GITHUB_OWNER", "")
-        self.repo_name = os.environ.get("GITHUB_REPO", "")
+        self.repo_name = repo_name or os.environ.get("GITHUB_REPO", "")
+        
+        # Parâmetros do modelo informados pelo chamador (ex.: opções da CLI)
+        self.model_options = {key: value for key, value in (model_options or {}).items() if value is not None}
         
         # Diretório para arquivos de contexto
         self.context_dir = os.environ.get("AGENT_CONTEXT_DIR", "agent_context")
@@ -73,14 +92,14 @@ class FeatureCoordinatorAgent:
     def concept_agent(self):
         """Obtém ou inicializa o agente de conceito."""
         if self._concept_agent is None:
-            self._concept_agent = ConceptGenerationAgent(openai_token=self.openai_token)
+            self._concept_agent = ConceptGenerationAgent(openai_token=self.openai_token, **self.model_options)
         return self._concept_agent
     
     @property
     def feature_concept_agent(self):
         """Obtém ou inicializa o agente de conceito de feature."""
         if self._feature_concept_agent is None:
-            self._feature_concept_agent = FeatureConceptAgent(openai_token=self.openai_token)
+            self._feature_concept_agent = FeatureConceptAgent(openai_token=self.openai_token, **self._model_kwargs())
         return self._feature_concept_agent
     
     @property
@@ -106,50 +125,168 @@ class FeatureCoordinatorAgent:
     def agent_tdd_criteria_agent(self):
         """Obtém ou inicializa o agente de critérios TDD."""
         if self._agent_tdd_criteria_agent is None:
-            self._agent_tdd_criteria_agent = TDDCriteriaAgent(openai_token=self.openai_token)
+            self._agent_tdd_criteria_agent = TDDCriteriaAgent(openai_token=self.openai_token, **self._model_kwargs())
         return self._agent_tdd_criteria_agent
     
     @property
     def tdd_guardrail_agent(self):
         """Obtém ou inicializa o agente de guardrails de TDD."""
         if self._tdd_guardrail_agent is None:
-            self._tdd_guardrail_agent = OutGuardrailTDDCriteriaAgent(openai_token=self.openai_token)
+            self._tdd_guardrail_agent = OutGuardrailTDDCriteriaAgent(
+                openai_token=self.openai_token, **self._model_kwargs()
+            )
         return self._tdd_guardrail_agent
     
     @property
     def concept_guardrail_agent(self):
         """Obtém ou inicializa o agente de guardrails de conceito."""
         if self._concept_guardrail_agent is None:
-            self._concept_guardrail_agent = OutGuardrailConceptGenerationAgent(openai_token=self.openai_token)
+            self._concept_guardrail_agent = OutGuardrailConceptGenerationAgent(
+                openai_token=self.openai_token, **self._model_kwargs()
+            )
         return self._concept_guardrail_agent
     
+    def _model_kwargs(self):
+        """Modelo explícito para os agentes que aceitam apenas ``model``."""
+        model = self.model_options.get("model")
+        return {"model": model} if model else {}
+    
     @log_execution
-    async def execute_feature_creation(self, prompt_text, execution_plan=None):
+    async def execute_feature_creation(self, prompt_text, execution_plan=None, resume_run_id=None):
         """
         Executa o fluxo completo de criação de feature.
         
+        As etapas são executadas como grafo de dependências (ver
+        _build_feature_stages); etapas independentes rodam em paralelo. A saída
+        de cada etapa é salva como checkpoint da execução, permitindo retomá-la
+        com resume_run_id sem repetir as etapas já concluídas.
+        
         Args:
-            prompt_text: Descrição da feature a ser criada
+            prompt_text: Descrição da feature a ser criada (opcional ao retomar)
             execution_plan: Plano de execução opcional
+            resume_run_id: ID de uma execução anterior a ser retomada
             
         Returns:
-            Dict: Resultado da execução com todos os artefatos gerados
+            Dict: Resultado da execução com todos os artefatos gerados, o
+                "run_id" e o tempo de cada etapa em "stage_timings"
         """
         # Inicialização do rastreamento de contexto
         context_chain = {}
+        run_id = resume_run_id
+        
+        # Registros de log desta execução recebem os campos "run_id" e "agent"; o span
+        # raiz é gravado em TRACE_DIR ao final, quando o rastreamento está ativo
+        with log_context(agent=type(self).__name__), span("feature_creation", export=True) as run_span:
+            try:
+                run_id, prompt_text = self._start_run(prompt_text, resume_run_id)
+                bind_log_context(run_id=run_id)
+                run_span.set_attribute("run_id", run_id)
+                self.logger.info(f"INÍCIO - execute_feature_creation | Run ID: {run_id} | Prompt: '{prompt_text}'")
+            
+                scheduler = StageScheduler(
+                    self._build_feature_stages(prompt_text),
+                    checkpoints=FeatureRunCheckpoints(self.context_manager, run_id)
+                )
+                try:
+                    run = await scheduler.run()
+                except StageExecutionError as e:
+                    context_chain = self._build_context_chain(e.outputs)
+                    raise
+                outputs = run["outputs"]
+                context_chain = self._build_context_chain(outputs)
+                self.context_manager.update_context(f"pipeline_run_{run_id}", {"status": "success"})
+            
+                concept_result = outputs["concept"]
+                feature_concept = outputs["feature_concept"]
+                tdd_criteria = outputs["tdd_criteria"]
+                execution_plan = outputs["plan_validation"]
+                github_result = outputs["github"]
+            
+                # 8. Consolidar resultados
+                result = {
+                    "status": "success",
+                    "run_id": run_id,
+                    "context_chain": context_chain,
+                    "prompt": prompt_text,
+                    "github_info": {
+                        "issue_number": github_result.get("issue_number"),
+                        "branch_name": github_result.get("branch_name"),
+                        "pr_number": github_result.get("pr_number")
+                    },
+                    "concept": concept_result,
+                    "feature_concept": feature_concept,
+                    "tdd_criteria": tdd_criteria,
+                    "execution_plan": execution_plan,
+                    "stage_timings": run["timings"],
+                    "total_duration": run["total_duration"]
+                }
+                self.logger.info(
+                    f"SUCESSO - execute_feature_creation | Fluxo completo executado com sucesso em {run['total_duration']:.2f}s",
+                    extra={"duration": run["total_duration"], "status": "success"}
+                )
+                return result
+            
+            except Exception as e:
+                self.logger.error(f"FALHA - execute_feature_creation | Erro: {str(e)}", exc_info=True)
+            
+                # Retornar o estado parcial em caso de falha
+                error_result = {
+                    "status": "error",
+                    "run_id": run_id,
+                    "context_chain": context_chain,
+                    "prompt": prompt_text,
+                    "error": str(e)
+                }
+                if isinstance(e, StageExecutionError):
+                    error_result["failed_stage"] = e.stage
+                    error_result["stage_timings"] = e.timings
+                    self.context_manager.update_context(
+                        f"pipeline_run_{run_id}", {"status": "error", "failed_stage": e.stage}
+                    )
+            
+                # Adicionar resultados parciais se disponíveis
+                if "concept_id" in context_chain:
+                    error_result["concept"] = self.concept_agent.get_concept_by_id(context_chain["concept_id"])
+                
+                if "feature_concept_id" in context_chain:
+                    error_result["feature_concept"] = self.feature_concept_agent.get_feature_concept_by_id(
+                        context_chain["feature_concept_id"]
+                    )
+                
+                if "tdd_criteria_id" in context_chain:
+                    error_result["tdd_criteria"] = self.agent_tdd_criteria_agent.get_criteria_by_id(
+                        context_chain["tdd_criteria_id"]
+                    )
+                
+                return error_result
+    
+    
+    def _build_feature_stages(self, prompt_text):
+        """
+        Declara as etapas do fluxo de criação de feature e suas dependências.
         
-        self.logger.info(f"INÍCIO - execute_feature_creation | Prompt: '{prompt_text}'")
+        O conceito detalhado e os critérios TDD dependem apenas do conceito
+        (melhorado pelo guardrail) e rodam em paralelo; a validação do plano
+        depende apenas do conceito detalhado. A integração com o GitHub é a
+        última etapa, pois cria artefatos externos.
         
-        try:
+        Args:
+            prompt_text: Descrição da feature a ser criada
+            
+        Returns:
+            List[Stage]: Etapas do pipeline
+        """
+        def generate_concept(outputs):
             # 1. Gerar conceito da feature
             self.logger.info("Etapa 1: Gerando conceito da feature")
             concept_result = self.concept_agent.generate_concept(prompt_text)
-            concept_id = concept_result.get("context_id")
-            context_chain["concept_id"] = concept_id
-            self.logger.info(f"Conceito gerado com ID: {concept_id}")
-            
+            self.logger.info(f"Conceito gerado com ID: {concept_result.get('context_id')}")
+            return concept_result
+        
+        def apply_concept_guardrail(outputs):
             # 2. Aplicar guardrail no conceito gerado
             self.logger.info("Etapa 2: Aplicando guardrail no conceito")
+            concept_id = outputs["concept"].get("context_id")
             guardrail_result = self.concept_guardrail_agent.execute_concept_guardrail(
                 concept_id=concept_id,
                 prompt=prompt_text,
@@ -158,104 +295,135 @@ class FeatureCoordinatorAgent:
             # Usar o conceito melhorado se disponível
             if "improved_concept_id" in guardrail_result:
                 concept_id = guardrail_result.get("improved_concept_id")
-                context_chain["improved_concept_id"] = concept_id
                 self.logger.info(f"Conceito melhorado com ID: {concept_id}")
-            
+            return concept_id
+        
+        def generate_feature_concept(outputs):
             # 3. Gerar conceito de feature detalhado
             self.logger.info("Etapa 3: Gerando conceito detalhado da feature")
-            feature_concept = self.feature_concept_agent.process_concept(concept_id, self.target_dir)
-            feature_concept_id = feature_concept.get("context_id")
-            context_chain["feature_concept_id"] = feature_concept_id
-            self.logger.info(f"Conceito de feature gerado com ID: {feature_concept_id}")
-            
+            feature_concept = self.feature_concept_agent.process_concept(outputs["concept_guardrail"], self.target_dir)
+            self.logger.info(f"Conceito de feature gerado com ID: {feature_concept.get('context_id')}")
+            return feature_concept
+        
+        def generate_tdd_criteria(outputs):
             # 4. Gerar critérios TDD
             self.logger.info("Etapa 4: Gerando critérios TDD")
             tdd_criteria = self.agent_tdd_criteria_agent.generate_tdd_criteria(
-                context_id=concept_id, 
+                context_id=outputs["concept_guardrail"],
                 project_dir=self.target_dir
             )
-            tdd_criteria_id = tdd_criteria.get("context_id")
-            context_chain["tdd_criteria_id"] = tdd_criteria_id
-            self.logger.info(f"Critérios TDD gerados com ID: {tdd_criteria_id}")
-            
+            self.logger.info(f"Critérios TDD gerados com ID: {tdd_criteria.get('context_id')}")
+            return tdd_criteria
+        
+        def apply_tdd_guardrail(outputs):
             # 5. Aplicar guardrail nos critérios TDD
             self.logger.info("Etapa 5: Aplicando guardrail nos critérios TDD")
+            tdd_criteria_id = outputs["tdd_criteria"].get("context_id")
             tdd_guardrail_result = self.tdd_guardrail_agent.execute_tdd_guardrail(
                 criteria_id=tdd_criteria_id,
-                concept_id=concept_id,
+                concept_id=outputs["concept_guardrail"],
                 project_dir=self.target_dir
             )
             # Usar os critérios melhorados se disponíveis
             if "improved_criteria_id" in tdd_guardrail_result:
                 tdd_criteria_id = tdd_guardrail_result.get("improved_criteria_id")
-                context_chain["improved_tdd_criteria_id"] = tdd_criteria_id
                 self.logger.info(f"Critérios TDD melhorados com ID: {tdd_criteria_id}")
-            
+            return tdd_criteria_id
+        
+        def validate_plan(outputs):
             # 6. Validar plano de implementação
             self.logger.info("Etapa 6: Validando plano de implementação")
-            execution_plan = feature_concept.get("execution_plan", {})
+            execution_plan = outputs["feature_concept"].get("execution_plan", {})
             validation_result = self.agent_plan_validator.validate(execution_plan, self.openai_token)
             
             if not validation_result.get("is_valid", False):
                 self.logger.warning("Plano inválido. Solicitando correção.")
-                corrected_plan = self.request_plan_correction(
+                execution_plan = self.request_plan_correction(
                     prompt=prompt_text,
                     current_plan=execution_plan,
                     validation_result=validation_result
                 )
-                execution_plan = corrected_plan
                 self.logger.info("Plano corrigido com sucesso")
-            
+            return execution_plan
+        
+        def integrate_github(outputs):
             # 7. Implementar no GitHub
             self.logger.info("Etapa 7: Implementando no GitHub")
-            github_result = self.github_agent.process_concept(feature_concept_id)
-            context_chain["github_integration_id"] = github_result.get("context_id")
+            github_result = self.github_agent.process_concept(outputs["feature_concept"].get("context_id"))
             self.logger.info(f"Integração GitHub concluída: Issue #{github_result.get('issue_number')}")
+            return github_result
+        
+        return [
+            Stage("concept", generate_concept, inputs={"prompt": prompt_text}),
+            Stage("concept_guardrail", apply_concept_guardrail, ["concept"]),
+            Stage("feature_concept", generate_feature_concept, ["concept_guardrail"]),
+            Stage("tdd_criteria", generate_tdd_criteria, ["concept_guardrail"]),
+            Stage("tdd_guardrail", apply_tdd_guardrail, ["tdd_criteria"]),
+            Stage("plan_validation", validate_plan, ["feature_concept"]),
+            Stage("github", integrate_github, ["plan_validation", "tdd_guardrail"]),
+        ]
+    
+    def _start_run(self, prompt_text, resume_run_id=None):
+        """
+        Registra uma nova execução do pipeline ou carrega uma existente.
+        
+        Args:
+            prompt_text: Descrição da feature (usa o prompt salvo se omitido ao retomar)
+            resume_run_id: ID da execução a ser retomada
             
-            # 8. Consolidar resultados
-            result = {
-                "status": "success",
-                "context_chain": context_chain,
-                "prompt": prompt_text,
-                "github_info": {
-                    "issue_number": github_result.get("issue_number"),
-                    "branch_name": github_result.get("branch_name"),
-                    "pr_number": github_result.get("pr_number")
-                },
-                "concept": concept_result,
-                "feature_concept": feature_concept,
-                "tdd_criteria": tdd_criteria,
-                "execution_plan": execution_plan
-            }
-            self.logger.info("SUCESSO - execute_feature_creation | Fluxo completo executado com sucesso")
-            return result
+        Returns:
+            tuple: (run_id, prompt_text)
             
-        except Exception as e:
-            self.logger.error(f"FALHA - execute_feature_creation | Erro: {str(e)}", exc_info=True)
+        Raises:
+            ValueError: Se a execução a retomar não existir ou não houver prompt
+        """
+        if resume_run_id:
+            run_context = self.context_manager.get_context(f"pipeline_run_{resume_run_id}")
+            if not run_context:
+                raise ValueError(f"Execução não encontrada para retomada: {resume_run_id}")
             
-            # Retornar o estado parcial em caso de falha
-            error_result = {
-                "status": "error",
-                "context_chain": context_chain,
-                "prompt": prompt_text,
-                "error": str(e)
-            }
+            saved_prompt = run_context.get("data", {}).get("prompt")
+            if prompt_text and prompt_text != saved_prompt:
+                self.logger.warning("Prompt diferente do original: etapas afetadas serão executadas novamente")
+            self.logger.info(f"Retomando execução {resume_run_id}")
+            return resume_run_id, prompt_text or saved_prompt
+        
+        if not prompt_text:
+            raise ValueError("Prompt da feature não informado")
+        
+        run_id = new_ulid()
+        self.context_manager.create_context(
+            {"run_id": run_id, "prompt": prompt_text, "status": "running", "stages": {}},
+            context_type="pipeline_run",
+            context_id=f"pipeline_run_{run_id}"
+        )
+        return run_id, prompt_text
+    
+    @staticmethod
+    def _build_context_chain(outputs):
+        """
+        Monta a cadeia de IDs de contexto a partir das saídas das etapas.
+        
+        Args:
+            outputs: Saídas das etapas concluídas (executadas ou restauradas)
             
-            # Adicionar resultados parciais se disponíveis
-            if "concept_id" in context_chain:
-                error_result["concept"] = self.concept_agent.get_concept_by_id(context_chain["concept_id"])
-                
-            if "feature_concept_id" in context_chain:
-                error_result["feature_concept"] = self.feature_concept_agent.get_feature_concept_by_id(
-                    context_chain["feature_concept_id"]
-                )
-                
-            if "tdd_criteria_id" in context_chain:
-                error_result["tdd_criteria"] = self.agent_tdd_criteria_agent.get_criteria_by_id(
-                    context_chain["tdd_criteria_id"]
-                )
-                
-            return error_result
+        Returns:
+            Dict: IDs de contexto gerados pelo fluxo
+        """
+        context_chain = {}
+        if "concept" in outputs:
+            context_chain["concept_id"] = outputs["concept"].get("context_id")
+        if outputs.get("concept_guardrail") not in (None, context_chain.get("concept_id")):
+            context_chain["improved_concept_id"] = outputs["concept_guardrail"]
+        if "feature_concept" in outputs:
+            context_chain["feature_concept_id"] = outputs["feature_concept"].get("context_id")
+        if "tdd_criteria" in outputs:
+            context_chain["tdd_criteria_id"] = outputs["tdd_criteria"].get("context_id")
+        if outputs.get("tdd_guardrail") not in (None, context_chain.get("tdd_criteria_id")):
+            context_chain["improved_tdd_criteria_id"] = outputs["tdd_guardrail"]
+        if "github" in outputs:
+            context_chain["github_integration_id"] = outputs["github"].get("context_id")
+        return context_chain
     
     @log_execution
     def request_plan_correction(self, prompt, current_plan, validation_result):
@@ -374,16 +542,17 @@ class FeatureCoordinatorAgent:
             self.logger.error(f"FALHA - list_features | Erro: {str(e)}", exc_info=True)
             return []
     
-    def create_feature(self, prompt_text, execution_plan=None):
+    def create_feature(self, prompt_text, execution_plan=None, resume_run_id=None):
         """
         Versão síncrona de execute_feature_creation para compatibilidade.
         
         Args:
             prompt_text: Descrição da feature a ser criada
             execution_plan: Plano de execução opcional
+            resume_run_id: ID de uma execução anterior a ser retomada
             
         Returns:
             Dict: Resultado da execução com todos os artefatos gerados
         """
         import asyncio
-        return asyncio.run(self.execute_feature_creation(prompt_text, execution_plan)) 
\ No newline at end of file
+        return asyncio.run(self.execute_feature_creation(prompt_text, execution_plan, resume_run_id)) 
\ No newline at end of file
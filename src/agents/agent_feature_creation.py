@@ -10,11 +10,17 @@ from src.core.logger import get_logger, log_execution
 import yaml
 from .local_agent_runner import LocalAgentRunner, AgentConfig
 import asyncio
-from openai import OpenAI
 import warnings
 
 # Importação das funções de mascaramento de dados sensíveis
-from src.core.utils import mask_sensitive_data
+from src.core.masking import mask_sensitive_data
+from src.core.tracing import run_subprocess
+from src.core.utils.file_cache import get_file_cache
+from src.core.utils.model_gateway import get_model_gateway
+from src.core.utils.prompt_budget import TokenCounter
+
+# Tokens por linha usados para converter ``max_lines`` em orçamento de tokens
+TOKENS_PER_LINE = 20
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -130,7 +136,7 @@ class FeatureCreationAgent(AssistantAgent):
         try:
             # Aumentando o timeout para 30 segundos e adicionando tratamento para falhas de timeout
             try:
-                result = subprocess.run(['gh', 'auth', 'status'], 
+                result = run_subprocess(['gh', 'auth', 'status'], 
                                      check=False, capture_output=True, timeout=30, text=True)
                 
                 if result.returncode == 0:
@@ -156,7 +162,7 @@ class FeatureCreationAgent(AssistantAgent):
         self.logger.info(f"INÍCIO - create_github_issue | Title: {title[:100]}...")
         
         try:
-            result = subprocess.run(
+            result = run_subprocess(
                 ['gh', 'issue', 'create', '--title', title, '--body', body],
                 check=True, capture_output=True, text=True, timeout=30
             )
@@ -178,9 +184,9 @@ class FeatureCreationAgent(AssistantAgent):
         self.logger.info(f"INÍCIO - create_branch | Branch: {branch_name}")
         
         try:
-            subprocess.run(['git', 'checkout', '-b', branch_name], 
+            run_subprocess(['git', 'checkout', '-b', branch_name], 
                          check=True, timeout=30)
-            subprocess.run(['git', 'push', '--set-upstream', 'origin', branch_name], 
+            run_subprocess(['git', 'push', '--set-upstream', 'origin', branch_name], 
                          check=True, timeout=30)
             
             self.logger.info(f"SUCESSO - Branch {branch_name} criada e enviada")
@@ -213,10 +219,10 @@ class FeatureCreationAgent(AssistantAgent):
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            subprocess.run(['git', 'add', file_path], check=True, timeout=30)
-            subprocess.run(['git', 'commit', '-m', f'Add PR plan file for issue #{issue_number}'], 
+            run_subprocess(['git', 'add', file_path], check=True, timeout=30)
+            run_subprocess(['git', 'commit', '-m', f'Add PR plan file for issue #{issue_number}'], 
                          check=True, timeout=30)
-            subprocess.run(['git', 'push'], check=True, timeout=30)
+            run_subprocess(['git', 'push'], check=True, timeout=30)
             
             self.logger.info(f"SUCESSO - Arquivo de plano criado e enviado: {file_path}")
         except Exception as e:
@@ -232,7 +238,7 @@ class FeatureCreationAgent(AssistantAgent):
             logger.info(f"Criando pull request para a issue #{issue_number} da branch {branch_name}")
             
             # Criar PR usando GitHub CLI
-            subprocess.run([
+            run_subprocess([
                 'gh', 'pr', 'create',
                 '--base', 'main',
                 '--head', branch_name,
@@ -290,7 +296,7 @@ class FeatureCreationAgent(AssistantAgent):
         try:
             logger.info("Obtendo histórico de log da branch main")
             try:
-                result = subprocess.run(
+                result = run_subprocess(
                     ['git', 'log', '--oneline', '-n', '10'],
                     check=False, capture_output=True, text=True, timeout=15
                 )
@@ -335,13 +341,17 @@ class FeatureCreationAgent(AssistantAgent):
                 logger.warning(f"AVISO - Erro ao listar arquivos: {str(e)}")
                 important_files = []
             
+            counter = TokenCounter()
+            max_file_tokens = max_lines * TOKENS_PER_LINE
             for file_path in important_files:
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    file_size = len(content)
-                    logger.info(f"Arquivo submetido: {file_path} (tamanho: {file_size} bytes)")
-                    context.append(f"# File: {file_path}\n\n{content[:max_lines * 80]}")
+                    # Apenas o trecho usado no prompt é lido; o cache é reaproveitado entre chamadas
+                    content, truncated = get_file_cache().read_prefix(file_path, max_lines * 80)
+                    limited = counter.truncate(content, max_file_tokens)
+                    truncated = truncated or len(limited) < len(content)
+                    content = limited
+                    logger.info(f"Arquivo submetido: {file_path} (trecho: {counter.count(content)} tokens, truncado: {truncated})")
+                    context.append(f"# File: {file_path}\n\n{content}")
                 except Exception as e:
                     logger.warning(f"Não foi possível ler o arquivo {file_path}: {str(e)}")
             
@@ -367,8 +377,6 @@ class FeatureCreationAgent(AssistantAgent):
             if has_utils:
                 logger.debug(f"Status do token OpenAI: {'disponível' if openai_token else 'não informado'}")
             
-            client = OpenAI(api_key=openai_token)
-            
             context = f"""
             Repositório: {self.repo_owner}/{self.repo_name}
             
@@ -388,8 +396,9 @@ class FeatureCreationAgent(AssistantAgent):
             }}
             """
             
-            response = client.chat.completions.create(
+            suggestion = get_model_gateway().generate(
                 model="gpt-4",
+                api_key=openai_token,
                 messages=[
                     {"role": "system", "content": context},
                     {"role": "user", "content": prompt_text}
@@ -397,8 +406,6 @@ class FeatureCreationAgent(AssistantAgent):
                 temperature=0.7,
                 max_tokens=4000
             )
-            
-            suggestion = response.choices[0].message.content
             # Mascarar possíveis dados sensíveis na resposta
             safe_suggestion = mask_sensitive_data(suggestion[:100])
             logger.info(f"Sugestão recebida do OpenAI: {safe_suggestion}...")
@@ -567,10 +574,9 @@ class FeatureCreationAgent(AssistantAgent):
             logger.debug(f"Mensagem de correção preparada: {len(safe_msg)} caracteres")
             
             # Chamar API para correção
-            client = OpenAI(api_key=openai_token)
-            
-            response = client.chat.completions.create(
+            corrected_plan = get_model_gateway().generate(
                 model="gpt-4",  # Modelo mais avançado para correção
+                api_key=openai_token,
                 messages=[
                     {"role": "system", "content": "Você é um especialista em criar planos de execução de software."},
                     {"role": "user", "content": correction_message}
@@ -578,8 +584,6 @@ class FeatureCreationAgent(AssistantAgent):
                 temperature=0.7,
                 max_tokens=4000
             )
-            
-            corrected_plan = response.choices[0].message.content
             logger.info("Correção do plano recebida")
             return corrected_plan
         except Exception as e:
@@ -1,24 +1,26 @@
 import subprocess
 import json
 import os
+import threading
 import time
 from pathlib import Path
+from src.agents.context_storage import atomic_write_json
 from src.core.logger import get_logger, log_execution
 
-# Tente importar funções de mascaramento de dados sensíveis
+# Mascaramento de dados sensíveis (somente biblioteca padrão)
+from src.core.masking import mask_sensitive_data
+from src.core.tracing import run_subprocess
+
+# Tente importar utilitários de ambiente
 try:
-    from src.core.utils import mask_sensitive_data, get_env_status
+    from src.core.utils.env import get_env_var_status
     has_utils = True
 except ImportError:
     has_utils = False
-    # Função básica de fallback para mascaramento
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            # Mostrar parte do início e fim para debugging
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
+
+# A etapa GitHub troca a branch da árvore de trabalho, grava o plano e faz
+# commit/push: uma feature por vez no processo (lotes com --concurrency)
+_git_lock = threading.RLock()
 
 class GitHubIntegrationAgent:
     """
@@ -39,7 +41,7 @@ class GitHubIntegrationAgent:
             
             # Log seguro do status do token
             if has_utils:
-                token_status = get_env_status('GITHUB_TOKEN')
+                token_status = get_env_var_status('GITHUB_TOKEN')
                 self.logger.debug(f"Status do token GitHub: {token_status}")
             else:
                 token_available = "disponível" if self.github_token else "ausente"
@@ -69,7 +71,7 @@ class GitHubIntegrationAgent:
         try:
             # Aumentando o timeout para 30 segundos e adicionando tratamento para falhas de timeout
             try:
-                result = subprocess.run(['gh', 'auth', 'status'], 
+                result = run_subprocess(['gh', 'auth', 'status'], 
                                      check=False, capture_output=True, timeout=30, text=True)
                 
                 if result.returncode == 0:
@@ -100,31 +102,20 @@ class GitHubIntegrationAgent:
                 # Gerar número simulado baseado no timestamp
                 return int(time.time()) % 10000
                 
-            # Mudar para o diretório alvo, se especificado
-            current_dir = os.getcwd()
-            if self.target_dir:
-                os.chdir(self.target_dir)
-                
-            try:
-                # Criar issue usando GitHub CLI
-                result = subprocess.run(
-                    ['gh', 'issue', 'create', '--title', title, '--body', body],
-                    check=True, capture_output=True, text=True, timeout=30
-                )
-                
-                issue_url = result.stdout.strip()
-                issue_number = int(issue_url.split('/')[-1])
-                
-                self.logger.info(f"SUCESSO - Issue #{issue_number} criada")
-                self.logger.debug(f"URL da issue: {issue_url}")
-                
-                return issue_number
-                
-            finally:
-                # Voltar ao diretório original
-                if self.target_dir:
-                    os.chdir(current_dir)
-                    
+            # Criar issue usando GitHub CLI
+            result = run_subprocess(
+                ['gh', 'issue', 'create', '--title', title, '--body', body],
+                check=True, capture_output=True, text=True, timeout=30, cwd=self.target_dir
+            )
+            
+            issue_url = result.stdout.strip()
+            issue_number = int(issue_url.split('/')[-1])
+            
+            self.logger.info(f"SUCESSO - Issue #{issue_number} criada")
+            self.logger.debug(f"URL da issue: {issue_url}")
+            
+            return issue_number
+
         except Exception as e:
             self.logger.error(f"FALHA - create_github_issue | Erro: {str(e)}", exc_info=True)
             # Gerar número simulado em caso de erro
@@ -140,34 +131,23 @@ class GitHubIntegrationAgent:
                 self.logger.warning("Token GitHub ausente. Operação de branch simulada.")
                 return False
                 
-            # Mudar para o diretório alvo, se especificado
-            current_dir = os.getcwd()
-            if self.target_dir:
-                os.chdir(self.target_dir)
-                
+            # Verificar se estamos em um repositório Git
             try:
-                # Verificar se estamos em um repositório Git
-                try:
-                    subprocess.run(['git', 'rev-parse', '--is-inside-work-tree'], 
-                                check=True, capture_output=True, timeout=15)
-                except subprocess.SubprocessError:
-                    self.logger.error(f"Não estamos em um repositório Git válido.")
-                    return False
-                
-                # Criar e fazer push da branch
-                subprocess.run(['git', 'checkout', '-b', branch_name], 
-                            check=True, timeout=30)
-                subprocess.run(['git', 'push', '--set-upstream', 'origin', branch_name], 
-                            check=True, timeout=30)
-                
-                self.logger.info(f"SUCESSO - Branch {branch_name} criada e enviada")
-                return True
-                
-            finally:
-                # Voltar ao diretório original
-                if self.target_dir:
-                    os.chdir(current_dir)
-                    
+                run_subprocess(['git', 'rev-parse', '--is-inside-work-tree'], 
+                            check=True, capture_output=True, timeout=15, cwd=self.target_dir)
+            except subprocess.SubprocessError:
+                self.logger.error(f"Não estamos em um repositório Git válido.")
+                return False
+            
+            # Criar e fazer push da branch
+            run_subprocess(['git', 'checkout', '-b', branch_name], 
+                        check=True, timeout=30, cwd=self.target_dir)
+            run_subprocess(['git', 'push', '--set-upstream', 'origin', branch_name], 
+                        check=True, timeout=30, cwd=self.target_dir)
+            
+            self.logger.info(f"SUCESSO - Branch {branch_name} criada e enviada")
+            return True
+
         except Exception as e:
             self.logger.error(f"FALHA - create_branch | Erro: {str(e)}", exc_info=True)
             return False
@@ -182,45 +162,35 @@ class GitHubIntegrationAgent:
                 self.logger.warning("Token GitHub ausente. Operação de PR plan simulada.")
                 return False
                 
-            # Mudar para o diretório alvo, se especificado
-            current_dir = os.getcwd()
-            if self.target_dir:
-                os.chdir(self.target_dir)
-                
-            try:
-                timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-                file_path = f"docs/pr/{issue_number}_feature_plan.md"
-                
-                content = (
-                    f"# Plano de Execução - Issue #{issue_number}\n\n"
-                    f"Criado em: {timestamp}\n\n"
-                    f"## Prompt Recebido\n\n{prompt_text}\n\n"
-                    f"## Plano de Execução\n\n{execution_plan}\n\n"
-                    f"## Metadados\n\n"
-                    f"- Issue: #{issue_number}\n"
-                    f"- Branch: `{branch_name}`\n"
-                )
-                
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                self.logger.debug(f"Diretório criado: {os.path.dirname(file_path)}")
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                
-                # Commit e push das alterações
-                subprocess.run(['git', 'add', file_path], check=True, timeout=30)
-                subprocess.run(['git', 'commit', '-m', f'Add PR plan file for issue #{issue_number}'], 
-                            check=True, timeout=30)
-                subprocess.run(['git', 'push'], check=True, timeout=30)
-                
-                self.logger.info(f"SUCESSO - Arquivo de plano criado e enviado: {file_path}")
-                return True
-                
-            finally:
-                # Voltar ao diretório original
-                if self.target_dir:
-                    os.chdir(current_dir)
-                    
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            file_path = f"docs/pr/{issue_number}_feature_plan.md"
+            
+            content = (
+                f"# Plano de Execução - Issue #{issue_number}\n\n"
+                f"Criado em: {timestamp}\n\n"
+                f"## Prompt Recebido\n\n{prompt_text}\n\n"
+                f"## Plano de Execução\n\n{execution_plan}\n\n"
+                f"## Metadados\n\n"
+                f"- Issue: #{issue_number}\n"
+                f"- Branch: `{branch_name}`\n"
+            )
+            
+            full_path = os.path.join(self.target_dir or os.getcwd(), file_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self.logger.debug(f"Diretório criado: {os.path.dirname(full_path)}")
+            
+            with open(full_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            # Commit e push das alterações
+            run_subprocess(['git', 'add', file_path], check=True, timeout=30, cwd=self.target_dir)
+            run_subprocess(['git', 'commit', '-m', f'Add PR plan file for issue #{issue_number}'], 
+                        check=True, timeout=30, cwd=self.target_dir)
+            run_subprocess(['git', 'push'], check=True, timeout=30, cwd=self.target_dir)
+            
+            self.logger.info(f"SUCESSO - Arquivo de plano criado e enviado: {file_path}")
+            return True
+
         except Exception as e:
             self.logger.error(f"FALHA - create_pr_plan_file | Erro: {str(e)}", exc_info=True)
             return False
@@ -235,29 +205,18 @@ class GitHubIntegrationAgent:
                 self.logger.warning("Token GitHub ausente. Operação de PR simulada.")
                 return False
                 
-            # Mudar para o diretório alvo, se especificado
-            current_dir = os.getcwd()
-            if self.target_dir:
-                os.chdir(self.target_dir)
-                
-            try:
-                # Criar PR usando GitHub CLI
-                subprocess.run([
-                    'gh', 'pr', 'create',
-                    '--base', 'main',
-                    '--head', branch_name,
-                    '--title', f'Automated PR for issue #{issue_number}',
-                    '--body', f'This PR closes issue #{issue_number} and includes the execution plan in `docs/pr/{issue_number}_feature_plan.md`.'
-                ], check=True, timeout=30)
-                
-                self.logger.info(f"Pull request criado com sucesso para a issue #{issue_number}")
-                return True
-                
-            finally:
-                # Voltar ao diretório original
-                if self.target_dir:
-                    os.chdir(current_dir)
-                    
+            # Criar PR usando GitHub CLI
+            run_subprocess([
+                'gh', 'pr', 'create',
+                '--base', 'main',
+                '--head', branch_name,
+                '--title', f'Automated PR for issue #{issue_number}',
+                '--body', f'This PR closes issue #{issue_number} and includes the execution plan in `docs/pr/{issue_number}_feature_plan.md`.'
+            ], check=True, timeout=30, cwd=self.target_dir)
+            
+            self.logger.info(f"Pull request criado com sucesso para a issue #{issue_number}")
+            return True
+
         except Exception as e:
             self.logger.error(f"FALHA - create_pull_request | Erro: {str(e)}", exc_info=True)
             return False
@@ -268,38 +227,36 @@ class GitHubIntegrationAgent:
         self.logger.info("INÍCIO - get_git_main_log")
         
         try:
-            # Mudar para o diretório alvo, se especificado
-            current_dir = os.getcwd()
-            if self.target_dir:
-                os.chdir(self.target_dir)
-                
-            try:
-                result = subprocess.run(
-                    ['git', 'log', '--oneline', '-n', '10'],
-                    check=False, capture_output=True, text=True, timeout=15
-                )
-                
-                if result.returncode == 0:
-                    log = result.stdout
-                    self.logger.debug(f"Log Git obtido: {len(log.split(newline))} commits")
-                    return log
-                else:
-                    self.logger.warning(f"AVISO - Comando git log falhou: {result.stderr}")
-                    return "Histórico Git não disponível"
-                    
-            except subprocess.SubprocessError as e:
-                self.logger.warning(f"AVISO - Erro ao executar git log: {str(e)}")
+            result = run_subprocess(
+                ['git', 'log', '--oneline', '-n', '10'],
+                check=False, capture_output=True, text=True, timeout=15, cwd=self.target_dir
+            )
+            
+            if result.returncode == 0:
+                log = result.stdout
+                self.logger.debug(f"Log Git obtido: {len(log.split(newline))} commits")
+                return log
+            else:
+                self.logger.warning(f"AVISO - Comando git log falhou: {result.stderr}")
                 return "Histórico Git não disponível"
                 
-            finally:
-                # Voltar ao diretório original
-                if self.target_dir:
-                    os.chdir(current_dir)
-                    
+        except subprocess.SubprocessError as e:
+            self.logger.warning(f"AVISO - Erro ao executar git log: {str(e)}")
+            return "Histórico Git não disponível"
+
         except Exception as e:
             self.logger.error(f"FALHA - get_git_main_log | Erro: {str(e)}", exc_info=True)
             return "Histórico Git não disponível"
     
+    def _current_branch(self):
+        """Branch atual da árvore de trabalho, ou None fora de um repositório Git."""
+        try:
+            result = run_subprocess(['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
+                                    check=False, capture_output=True, text=True, timeout=15, cwd=self.target_dir)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
     @log_execution
     def process_concept(self, context_id):
         """
@@ -346,17 +303,25 @@ class GitHubIntegrationAgent:
             # Criar nome da branch baseado na issue
             branch_name = f"{branch_type}/{issue_number}/{branch_suffix}"
             
-            # Criar branch
-            branch_created = self.create_branch(branch_name)
-            if not branch_created:
-                self.logger.warning(f"Não foi possível criar a branch {branch_name}")
-            
-            # Criar arquivo com plano para PR
-            plan_created = self.create_pr_plan_file(
-                issue_number, prompt_text, execution_plan, branch_name
-            )
-            if not plan_created:
-                self.logger.warning(f"Não foi possível criar o arquivo de plano para a issue #{issue_number}")
+            with _git_lock:
+                base_branch = self._current_branch()
+                try:
+                    # Criar branch
+                    branch_created = self.create_branch(branch_name)
+                    if not branch_created:
+                        self.logger.warning(f"Não foi possível criar a branch {branch_name}")
+                    
+                    # Criar arquivo com plano para PR
+                    plan_created = self.create_pr_plan_file(
+                        issue_number, prompt_text, execution_plan, branch_name
+                    )
+                    if not plan_created:
+                        self.logger.warning(f"Não foi possível criar o arquivo de plano para a issue #{issue_number}")
+                finally:
+                    # A próxima feature parte da mesma branch base, não desta
+                    if base_branch and base_branch != self._current_branch():
+                        run_subprocess(['git', 'checkout', base_branch],
+                                       check=False, capture_output=True, timeout=30, cwd=self.target_dir)
             
             # Criar PR
             pr_created = self.create_pull_request(branch_name, issue_number)
@@ -376,8 +341,7 @@ class GitHubIntegrationAgent:
             context_data["github_result"] = result
             context_data["status"] = "completed"
             
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2)
+            atomic_write_json(context_file, context_data)
             
             self.logger.info(f"SUCESSO - Conceito processado | Issue: #{issue_number}, Branch: {branch_name}")
             return result
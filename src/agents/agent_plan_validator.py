@@ -1,24 +1,19 @@
 import json
 import os
 import yaml
-from openai import OpenAI
 from src.core.logger import get_logger, log_execution
+from src.core.utils.model_gateway import get_model_gateway
 import logging
 
-# Tente importar funções de mascaramento de dados sensíveis
+# Mascaramento de dados sensíveis (somente biblioteca padrão)
+from src.core.masking import mask_sensitive_data
+
+# Tente importar utilitários de ambiente
 try:
-    from src.core.utils import mask_sensitive_data, get_env_status
+    from src.core.utils.env import get_env_var_status
     has_utils = True
 except ImportError:
     has_utils = False
-    # Função básica de fallback para mascaramento
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            # Mostrar parte do início e fim para debugging
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
 
 class PlanValidator:
     """Classe responsável por validar planos de execução usando modelos de IA mais econômicos"""
@@ -80,27 +75,28 @@ class PlanValidator:
             
             # Não registrar o token OpenAI
             if has_utils:
-                token_status = get_env_status("OPENAI_KEY") 
+                token_status = get_env_var_status("OPENAI_KEY") 
                 self.logger.debug(f"Status do token OpenAI: {token_status}")
             else:
                 self.logger.debug("Token OpenAI disponível para API")
             
-            client = OpenAI(api_key=openai_token)
             prompt = self._create_validation_prompt(plan_content)
             self.logger.debug(f"Prompt gerado com {len(prompt)} caracteres")
             
-            response = client.chat.completions.create(
+            response = get_model_gateway().generate(
                 model=self.model_name,
+                api_key=openai_token,
                 messages=[
                     {"role": "system", "content": "Voce e um validador de planos de execucao."},
                     {"role": "user", "content": prompt}
                 ],
                 response_format={"type": "json_object"},
                 temperature=0.1,
-                max_tokens=1000
+                max_tokens=1000,
+                task="validation"  # O roteador escolhe um modelo econômico com modo JSON
             )
             
-            validation_result = json.loads(response.choices[0].message.content)
+            validation_result = json.loads(response)
             is_valid = validation_result.get("is_valid", False)
             status = "válido" if is_valid else "inválido"
             
@@ -18,11 +18,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 
-try:
-    import openai
-    has_openai = True
-except ImportError:
-    has_openai = False
+from src.core.utils.model_gateway import get_model_gateway
 
 # Tentar importar o logger e funções de logging
 try:
@@ -53,18 +49,58 @@ except ImportError:
                 raise
         return wrapper
 
-# Mascaramento básico de dados sensíveis
+# IDs ordenados por tempo e gravação atômica dos arquivos de contexto
+from src.agents.context_storage import atomic_write_json, new_context_id
+
+# Índice de arquivos do projeto compartilhado entre os agentes
+try:
+    from src.core.utils.project_index import DEFAULT_SOURCE_EXTENSIONS, get_project_index
+    has_project_index = True
+except ImportError:
+    has_project_index = False
+    DEFAULT_SOURCE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.go', '.rb')
+
+# Cache de conteúdo de arquivos compartilhado entre os agentes
+try:
+    from src.core.utils.file_cache import get_file_cache
+    has_file_cache = True
+except ImportError:
+    has_file_cache = False
+
+# Índice BM25 local para selecionar trechos de código relevantes
 try:
-    from src.core.utils import mask_sensitive_data
-    has_utils = True
+    from src.core.utils.relevance_index import get_relevance_index
+    has_relevance_index = True
 except ImportError:
-    has_utils = False
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
+    has_relevance_index = False
+
+# Montagem de prompts dentro do orçamento de tokens do modelo
+try:
+    from src.core.utils.prompt_budget import PromptBudgeter
+    has_prompt_budget = True
+except ImportError:
+    has_prompt_budget = False
+    
+    class PromptBudgeter:
+        """Montagem simples, sem orçamento, quando o módulo principal não está disponível"""
+        def __init__(self, model, max_output_tokens=0, max_input_tokens=None):
+            self.parts = []
+        
+        def add(self, name, text, priority=0, max_tokens=None, required=False):
+            self.parts.append(text)
+        
+        def add_items(self, name, items, priority=0, max_tokens=None, header="", separator="\n",
+                      truncate_items=True):
+            if items:
+                self.parts.append(header + separator.join(items))
+        
+        def build(self):
+            return "".join(self.parts)
+
+# Tokens reservados para a resposta e limites das seções opcionais do prompt
+TDD_MAX_OUTPUT_TOKENS = 4000
+FILE_LIST_MAX_TOKENS = 400
+FILE_BODIES_MAX_TOKENS = 3000
 
 class TDDCriteriaAgent:
     """
@@ -75,14 +111,15 @@ class TDDCriteriaAgent:
     a implementação da feature.
     """
     
-    def __init__(self, openai_token=None, model="gpt-4-turbo"):
+    def __init__(self, openai_token=None, model=None):
         """
         Inicializa o agente TDDCriteriaAgent.
         
         Args:
             openai_token (str, optional): Token de acesso à API da OpenAI. Padrão é None,
                                          nesse caso usará a variável de ambiente OPENAI_KEY.
-            model (str, optional): Modelo OpenAI a ser utilizado. Padrão é "gpt-4-turbo".
+            model (str, optional): Modelo OpenAI a ser utilizado. Se None, o roteador
+                                  escolhe o modelo (tarefa "tdd"), com "gpt-4-turbo" como padrão.
         """
         self.logger = get_logger(__name__)
         self.logger.info(f"INÍCIO - {self.__class__.__name__}.__init__")
@@ -96,7 +133,8 @@ class TDDCriteriaAgent:
         self.logger.info(f"Token OpenAI: {self.token_status}")
         
         # Definir modelo a ser utilizado
-        self.model = model
+        self.model = model or "gpt-4-turbo"
+        self.routing_task = None if model else "tdd"
         self.logger.info(f"Modelo configurado: {self.model}")
         
         # Criar diretório de contexto se não existir
@@ -114,6 +152,7 @@ class TDDCriteriaAgent:
         """
         self.logger.info(f"INÍCIO - set_model | Alterando modelo para: {model}")
         self.model = model
+        self.routing_task = None
         self.logger.info(f"FIM - set_model | Modelo configurado: {self.model}")
     
     @log_execution
@@ -159,40 +198,38 @@ class TDDCriteriaAgent:
             List[str]: Lista de caminhos relativos dos arquivos encontrados.
         """
         if extensions is None:
-            extensions = ['.py', '.js', '.ts', '.java', '.go', '.rb']
+            extensions = DEFAULT_SOURCE_EXTENSIONS
             
         project_path = Path(project_dir)
         if not project_path.exists() or not project_path.is_dir():
             self.logger.error(f"Diretório de projeto não existe: {project_dir}")
             return []
-            
-        # Inicializa lista para guardar os arquivos encontrados
-        files = []
         
-        # Padrões de pastas a ignorar
-        ignore_patterns = ['**/node_modules/**', '**/.git/**', '**/__pycache__/**', '**/.venv/**', '**/venv/**', '**/dist/**', '**/build/**']
-        
-        # Cria uma lista de todos os arquivos desejados que não estão nas pastas ignoradas
-        for ext in extensions:
-            for filepath in project_path.glob(f'**/*{ext}'):
-                # Verifica se o arquivo deve ser ignorado
-                should_ignore = any(filepath.match(pattern) for pattern in ignore_patterns)
-                if not should_ignore:
-                    # Obtém caminho relativo à raiz do projeto
-                    rel_path = filepath.relative_to(project_path)
-                    files.append(str(rel_path))
+        if not has_project_index:
+            self.logger.error("Índice de projeto indisponível; nenhum arquivo listado")
+            return []
+            
+        # O índice é compartilhado entre os agentes e só relê diretórios alterados,
+        # ignorando node_modules, .git, ambientes virtuais e o que estiver no .gitignore
+        files = get_project_index(project_dir).list_files(extensions)
         
         self.logger.info(f"Encontrados {len(files)} arquivos de código-fonte")
         return files
     
     @log_execution
-    def read_file_content(self, project_dir: str, file_path: str) -> str:
+    def read_file_content(self, project_dir: str, file_path: str, max_chars: int = None) -> str:
         """
         Lê o conteúdo de um arquivo específico.
         
+        O conteúdo vem do cache de arquivos compartilhado, validado por mtime e
+        tamanho. Com ``max_chars``, apenas o início do arquivo é lido.
+        
         Args:
             project_dir (str): Caminho para o diretório do projeto.
             file_path (str): Caminho relativo do arquivo a ser lido.
+            max_chars (int, optional): Limite de caracteres. Se informado, retorna no
+                                      máximo ``max_chars + 1`` caracteres, de modo que
+                                      ``len(content) > max_chars`` indica conteúdo truncado.
             
         Returns:
             str: Conteúdo do arquivo, ou string vazia se não foi possível ler.
@@ -203,8 +240,13 @@ class TDDCriteriaAgent:
                 self.logger.warning(f"Arquivo não encontrado: {file_full_path}")
                 return ""
                 
-            with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read()
+            if has_file_cache:
+                content = get_file_cache().read(
+                    str(file_full_path), None if max_chars is None else max_chars + 1
+                )
+            else:
+                with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read() if max_chars is None else f.read(max_chars + 1)
                 
             self.logger.debug(f"Arquivo lido com sucesso: {file_path}")
             return content
@@ -217,10 +259,14 @@ class TDDCriteriaAgent:
         """
         Gera o prompt para o modelo OpenAI com o conceito e informações do projeto.
         
+        As seções são montadas dentro do orçamento de tokens do modelo: conceito e
+        instruções são sempre incluídos; os trechos de código mais relevantes têm
+        prioridade sobre a listagem de arquivos.
+        
         Args:
             concept_data (Dict[str, Any]): Dados do conceito da feature.
             project_dir (str): Caminho para o diretório do projeto.
-            max_files (int, optional): Número máximo de arquivos a incluir. Padrão é 10.
+            max_files (int, optional): Número máximo de arquivos a listar. Padrão é 10.
             
         Returns:
             str: Prompt formatado para envio ao modelo.
@@ -229,8 +275,10 @@ class TDDCriteriaAgent:
         prompt_text = concept_data.get("prompt", "")
         concept = concept_data.get("concept", {})
         
+        budgeter = PromptBudgeter(self.model, max_output_tokens=TDD_MAX_OUTPUT_TOKENS)
+        
         # Monta o cabeçalho do prompt
-        prompt = f"""# Geração de Critérios de Aceitação TDD
+        budgeter.add("concept", f"""# Geração de Critérios de Aceitação TDD
 
 ## Descrição da Feature
 {prompt_text}
@@ -240,47 +288,60 @@ class TDDCriteriaAgent:
 {json.dumps(concept, indent=2, ensure_ascii=False)}
 ```
 
-"""
+""", required=True)
         
         # Lista arquivos do projeto
         files = self.list_source_files(project_dir)
+        file_list = [f"- {file}" for file in files[:max_files]]
         
-        # Adiciona listagem de arquivos ao prompt
-        prompt += "\n## Arquivos do Projeto\n"
-        for file in files[:max_files]:
-            prompt += f"- {file}\n"
-            
         # Se houver muitos arquivos, indica que há mais
         if len(files) > max_files:
-            prompt += f"\n... e mais {len(files) - max_files} arquivos\n"
-            
-        # Adiciona conteúdo de alguns arquivos relevantes
-        # Heurística simples: arquivos que podem ter relação com o título da issue
-        issue_title = concept.get("issue_title", "").lower()
-        keywords = [word for word in issue_title.split() if len(word) > 3]
+            file_list.append(f"\n... e mais {len(files) - max_files} arquivos")
+        budgeter.add_items(
+            "file_list", file_list, priority=1, max_tokens=FILE_LIST_MAX_TOKENS,
+            header="\n## Arquivos do Projeto\n", truncate_items=False
+        )
         
-        # Seleciona arquivos que contêm palavras-chave no caminho
-        relevant_files = [
-            file for file in files
-            if any(keyword in file.lower() for keyword in keywords)
-        ]
+        # Adiciona os trechos de código mais relevantes para o conceito,
+        # ranqueados pelo índice BM25 local; o orçamento decide quantos cabem
+        file_bodies = []
+        if has_relevance_index:
+            query = " ".join([
+                prompt_text,
+                concept.get("issue_title", ""),
+                concept.get("issue_description", ""),
+            ])
+            for result in get_relevance_index(project_dir).search(query, top_k=10):
+                file_bodies.append(
+                    f"\n### Arquivo: {result.path} (linhas {result.start_line}-{result.end_line})\n"
+                    f"```\n{result.text}\n```\n"
+                )
+        else:
+            # Heurística simples: arquivos que podem ter relação com o título da issue
+            issue_title = concept.get("issue_title", "").lower()
+            keywords = [word for word in issue_title.split() if len(word) > 3]
         
-        # Se não encontrou arquivos relevantes, usa os primeiros da lista
-        if not relevant_files and files:
-            relevant_files = files[:min(5, len(files))]
-            
-        # Adiciona conteúdo dos arquivos relevantes
-        prompt += "\n## Conteúdo de Arquivos Relevantes\n"
+            # Seleciona arquivos que contêm palavras-chave no caminho
+            relevant_files = [
+                file for file in files
+                if any(keyword in file.lower() for keyword in keywords)
+            ]
         
-        for file in relevant_files[:5]:  # Limita a 5 arquivos para não exceder limites de tokens
-            content = self.read_file_content(project_dir, file)
-            if content:
-                prompt += f"\n### Arquivo: {file}\n```\n{content[:2000]}```\n"
-                if len(content) > 2000:
-                    prompt += "\n... (conteúdo truncado) ...\n"
+            # Se não encontrou arquivos relevantes, usa os primeiros da lista
+            if not relevant_files and files:
+                relevant_files = files[:min(5, len(files))]
+            
+            for file in relevant_files[:5]:
+                content = self.read_file_content(project_dir, file, max_chars=8000)
+                if content:
+                    file_bodies.append(f"\n### Arquivo: {file}\n```\n{content}\n```\n")
+        budgeter.add_items(
+            "file_bodies", file_bodies, priority=2, max_tokens=FILE_BODIES_MAX_TOKENS,
+            header="\n## Conteúdo de Arquivos Relevantes\n", separator=""
+        )
                     
         # Adiciona instruções para o modelo
-        prompt += """
+        budgeter.add("instructions", """
 ## Instruções
 Com base no conceito da feature e nos arquivos do projeto, gere uma lista completa de critérios de aceitação TDD.
 Cada critério deve:
@@ -311,8 +372,8 @@ Cada critério deve:
   }
 }
 ```
-"""
-        return prompt
+""", required=True)
+        return budgeter.build()
     
     @log_execution
     def generate_tdd_criteria(self, context_id: str, project_dir: str) -> Dict[str, Any]:
@@ -336,7 +397,7 @@ Cada critério deve:
                 default_criteria["context_id"] = context_id
                 
                 # Salva os critérios padrão no diretório de contexto
-                criteria_id = f"tdd_criteria_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                criteria_id = new_context_id("tdd_criteria")
                 self._save_criteria_to_context(criteria_id, default_criteria, context_id)
                 
                 return default_criteria
@@ -350,27 +411,25 @@ Cada critério deve:
             # Gera o prompt para o modelo
             prompt = self.generate_prompt(concept_data, project_dir)
             
-            # Configura o cliente OpenAI
-            openai.api_key = self.openai_token
-            
             # Solicita os critérios TDD ao modelo
             self.logger.info(f"Enviando solicitação à API OpenAI (modelo: {self.model})...")
             
-            response = openai.chat.completions.create(
+            # O modelo que respondeu pode diferir de self.model (roteador ou fallback)
+            response, model_used = get_model_gateway().generate(
                 model=self.model,
+                api_key=self.openai_token,
                 messages=[
                     {"role": "system", "content": "Você é um especialista em Test-Driven Development que gera critérios de aceitação detalhados para novas features."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,  # Baixa temperatura para respostas mais consistentes
-                max_tokens=4000,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
+                max_tokens=TDD_MAX_OUTPUT_TOKENS,
+                task=self.routing_task,
+                return_model=True
             )
             
             # Extrai a resposta da API
-            answer = response.choices[0].message.content.strip()
+            answer = response.strip()
             
             # Tenta extrair o JSON da resposta
             json_start = answer.find('```json')
@@ -383,10 +442,10 @@ Cada critério deve:
                     # Adiciona metadados
                     tdd_criteria["context_id"] = context_id
                     tdd_criteria["generated_at"] = datetime.now().isoformat()
-                    tdd_criteria["model_used"] = self.model
+                    tdd_criteria["model_used"] = model_used
                     
                     # Salva os critérios no diretório de contexto
-                    criteria_id = f"tdd_criteria_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    criteria_id = new_context_id("tdd_criteria")
                     self._save_criteria_to_context(criteria_id, tdd_criteria, context_id)
                     
                     return tdd_criteria
@@ -404,7 +463,7 @@ Cada critério deve:
                     "raw_content": answer,
                     "context_id": context_id,
                     "generated_at": datetime.now().isoformat(),
-                    "model_used": self.model
+                    "model_used": model_used
                 }
                 
         except Exception as e:
@@ -489,8 +548,7 @@ Cada critério deve:
             }
             
             # Salva o arquivo
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            atomic_write_json(context_file, metadata, indent=2, ensure_ascii=False)
                 
             self.logger.info(f"Critérios TDD salvos em: {context_file}")
             return criteria_id
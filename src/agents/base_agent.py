@@ -6,6 +6,7 @@ from typing import Any, Dict, Optional
 import os
 
 from src.core.utils.env import validate_env
+from src.core.utils.hedging import HedgedRequestError, HedgePolicy
 from src.core.utils.model_manager import ModelManager
 
 
@@ -22,6 +23,7 @@ class BaseAgent(ABC):
         max_retries: int = 3,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
     ) -> None:
         """
         Inicializa o agente.
@@ -35,6 +37,8 @@ class BaseAgent(ABC):
             max_retries: Número máximo de tentativas em caso de falha.
             temperature: Temperatura para geração de texto pelo modelo.
             max_tokens: Número máximo de tokens para geração de texto.
+            hedge_policy: Política de chamadas especulativas ao modelo de elevação.
+                Se None, usa as variáveis <AGENTE>_HEDGE_* e MODEL_HEDGE_*.
         """
         # Valida variáveis de ambiente
         validate_env()
@@ -53,6 +57,7 @@ class BaseAgent(ABC):
         self.max_retries = max_retries
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.hedge_policy = hedge_policy or HedgePolicy.from_env(type(self).__name__)
 
         # Verifica se o modelo está disponível
         if not self.model_manager.get_model_config(model_name):
@@ -87,9 +92,13 @@ class BaseAgent(ABC):
                 max_retries=self.max_retries,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
+                hedge=self.hedge_policy,
                 **kwargs,
             )
             return str(response)
+        except HedgedRequestError:
+            # O modelo de elevação já foi tentado
+            raise
         except Exception as e:
             # Se não tiver modelo de elevação ou estiver forçando o modelo, propaga o erro
             if not self.elevation_model or self.force_model:
@@ -153,23 +162,23 @@ class BaseAgent(ABC):
         Raises:
             RuntimeError: Se não houver mais modelos disponíveis
         """
-        # Marca modelo atual como indisponível
-        self.model_manager.mark_model_unavailable(self.model, error)
+        # Abre o circuito do modelo atual: as próximas chamadas já o evitam
+        self.model_manager.mark_model_unavailable(self.model_name, error)
         
         # Se temos modelo de elevação e ainda não tentamos
-        if self.elevation_model and self.model != self.elevation_model:
+        if self.elevation_model and self.model_name != self.elevation_model:
             if self.model_manager.is_model_available(self.elevation_model):
                 self.logger.info(f"Tentando modelo de elevação: {self.elevation_model}")
                 return self.elevation_model
         
         # Procura próximo modelo disponível
-        next_model = self.model_manager.get_next_available_model(self.model)
+        next_model = self.model_manager.get_next_available_model(self.model_name)
         if next_model:
             self.logger.info(f"Tentando próximo modelo disponível: {next_model}")
             return next_model
             
         # Se chegamos aqui, não há mais opções
-        error_msg = self.model_manager.get_error_message(self.model, error)
+        error_msg = self.model_manager.get_error_message(self.model_name, error)
         self.logger.error(f"Sem modelos disponíveis. Último erro: {error_msg}")
         raise RuntimeError(error_msg)
     
@@ -207,6 +216,7 @@ class BaseAgent(ABC):
                 next_model = self.handle_model_error(error_dict)
                 if not next_model:
                     raise RuntimeError("Sem modelos disponíveis para continuar a execução")
+                self.set_model(next_model)
     
     def log_memory_usage(self, label: str, start_time: Optional[float] = None):
         """
@@ -1,36 +1,57 @@
-import json
-import os
+import contextlib
 import time
 from datetime import datetime
 from pathlib import Path
+from src.agents.context_storage import ContextLocks, create_context_storage, new_context_id
 from src.core.logger import get_logger, log_execution
+from src.core.metrics import get_metrics_registry
+from src.core.tracing import traced
 
 class ContextManager:
     """
     Gerenciador de contexto para facilitar a transferência de dados entre agentes.
-    Cria, armazena e recupera arquivos de contexto no formato JSON.
+    Cria, armazena e recupera contextos usando um backend de armazenamento
+    (arquivos JSON ou SQLite, ver src.agents.context_storage).
     """
     
-    def __init__(self, base_dir='agent_context'):
+    def __init__(self, base_dir='agent_context', storage=None):
         self.logger = get_logger(__name__)
         self.logger.info(f"INÍCIO - ContextManager.__init__ | Base dir: {base_dir}")
         
         try:
             self.base_dir = Path(base_dir)
             self.base_dir.mkdir(exist_ok=True)
-            self.logger.info(f"SUCESSO - ContextManager inicializado | Diretório: {self.base_dir}")
+            self.storage = storage or create_context_storage(self.base_dir)
+            self.locks = ContextLocks(self.base_dir)
+            self.logger.info(
+                f"SUCESSO - ContextManager inicializado | Diretório: {self.base_dir}, "
+                f"Backend: {type(self.storage).__name__}"
+            )
         except Exception as e:
             self.logger.error(f"FALHA - ContextManager.__init__ | Erro: {str(e)}", exc_info=True)
             raise
     
+    @contextlib.contextmanager
+    def _timed_storage(self, operation):
+        """Mede a duração de uma operação no backend de armazenamento."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            get_metrics_registry().histogram(
+                "context_store_duration_seconds", "Latência das operações do armazenamento de contextos"
+            ).observe(time.perf_counter() - started, operation=operation, backend=type(self.storage).__name__)
+    
     @log_execution
-    def create_context(self, data, context_type='default'):
+    @traced(name="context.create")
+    def create_context(self, data, context_type='default', context_id=None):
         """
         Cria um novo arquivo de contexto.
         
         Args:
             data (dict): Dados a serem armazenados no contexto
             context_type (str): Tipo de contexto para prefixar o nome do arquivo
+            context_id (str): ID explícito do contexto (opcional, gerado se não informado)
             
         Returns:
             str: ID do contexto criado
@@ -39,7 +60,7 @@ class ContextManager:
         
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            context_id = f"{context_type}_{timestamp}"
+            context_id = context_id or new_context_id(context_type)
             
             # Adicionar metadados ao contexto
             context_data = {
@@ -50,11 +71,10 @@ class ContextManager:
                 "data": data
             }
             
-            context_file = self.base_dir / f"{context_id}.json"
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2)
+            with self._timed_storage("write"):
+                self.storage.write(context_id, context_data)
                 
-            self.logger.info(f"SUCESSO - Contexto criado | ID: {context_id}, Arquivo: {context_file}")
+            self.logger.info(f"SUCESSO - Contexto criado | ID: {context_id}")
             return context_id
             
         except Exception as e:
@@ -62,6 +82,7 @@ class ContextManager:
             return None
     
     @log_execution
+    @traced(name="context.get")
     def get_context(self, context_id):
         """
         Recupera um contexto pelo ID.
@@ -75,14 +96,12 @@ class ContextManager:
         self.logger.info(f"INÍCIO - get_context | ID: {context_id}")
         
         try:
-            context_file = self.base_dir / f"{context_id}.json"
-            if not context_file.exists():
+            with self._timed_storage("read"):
+                context_data = self.storage.read(context_id)
+            if context_data is None:
                 self.logger.warning(f"Contexto não encontrado | ID: {context_id}")
                 return None
                 
-            with open(context_file, 'r', encoding='utf-8') as f:
-                context_data = json.load(f)
-                
             self.logger.info(f"SUCESSO - Contexto recuperado | ID: {context_id}")
             return context_data
             
@@ -91,6 +110,7 @@ class ContextManager:
             return None
     
     @log_execution
+    @traced(name="context.update")
     def update_context(self, context_id, data, merge=True):
         """
         Atualiza um contexto existente.
@@ -106,29 +126,30 @@ class ContextManager:
         self.logger.info(f"INÍCIO - update_context | ID: {context_id}, Merge: {merge}")
         
         try:
-            # Recuperar contexto existente
-            context_data = self.get_context(context_id)
-            if not context_data:
-                self.logger.warning(f"Contexto não encontrado para atualização | ID: {context_id}")
-                return False
-                
-            # Atualizar dados
-            if merge:
-                if isinstance(context_data.get('data', {}), dict) and isinstance(data, dict):
-                    context_data['data'].update(data)
+            # Ler, mesclar e gravar sob o lock do contexto, para não perder
+            # atualizações concorrentes de outras threads ou processos
+            with self.locks.hold(context_id):
+                context_data = self.get_context(context_id)
+                if not context_data:
+                    self.logger.warning(f"Contexto não encontrado para atualização | ID: {context_id}")
+                    return False
+                    
+                # Atualizar dados
+                if merge:
+                    if isinstance(context_data.get('data', {}), dict) and isinstance(data, dict):
+                        context_data['data'].update(data)
+                    else:
+                        # Se um dos dados não for dict, substituir completamente
+                        context_data['data'] = data
                 else:
-                    # Se um dos dados não for dict, substituir completamente
                     context_data['data'] = data
-            else:
-                context_data['data'] = data
+                    
+                # Adicionar metadados de atualização
+                context_data['updated_at'] = datetime.now().isoformat()
                 
-            # Adicionar metadados de atualização
-            context_data['updated_at'] = datetime.now().isoformat()
-            
-            # Salvar contexto atualizado
-            context_file = self.base_dir / f"{context_id}.json"
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2)
+                # Salvar contexto atualizado
+                with self._timed_storage("write"):
+                    self.storage.write(context_id, context_data)
                 
             self.logger.info(f"SUCESSO - Contexto atualizado | ID: {context_id}")
             return True
@@ -138,46 +159,81 @@ class ContextManager:
             return False
     
     @log_execution
-    def list_contexts(self, context_type=None, limit=10):
+    @traced(name="context.save_checkpoint")
+    def save_stage_checkpoint(self, run_id, stage, input_key, output):
+        """
+        Salva a saída de uma etapa do pipeline como checkpoint da execução.
+        
+        Args:
+            run_id (str): ID da execução do pipeline
+            stage (str): Nome da etapa
+            input_key (str): Hash das entradas da etapa
+            output: Saída da etapa (serializável em JSON)
+            
+        Returns:
+            bool: True se o checkpoint foi salvo, False caso contrário
+        """
+        context_id = f"pipeline_run_{run_id}"
+        checkpoint = {
+            "input_key": input_key,
+            "output": output,
+            "completed_at": datetime.now().isoformat()
+        }
+        
+        with self.locks.hold(context_id):
+            context_data = self.get_context(context_id)
+            if not context_data:
+                self.logger.warning(f"Execução não encontrada para checkpoint | Run ID: {run_id}")
+                return False
+            
+            stages = context_data.get("data", {}).get("stages", {})
+            stages[stage] = checkpoint
+            return self.update_context(context_id, {"stages": stages})
+    
+    @log_execution
+    @traced(name="context.get_checkpoint")
+    def get_stage_checkpoint(self, run_id, stage, input_key):
+        """
+        Recupera o checkpoint de uma etapa, se as entradas forem as mesmas.
+        
+        Args:
+            run_id (str): ID da execução do pipeline
+            stage (str): Nome da etapa
+            input_key (str): Hash das entradas atuais da etapa
+            
+        Returns:
+            tuple: (True, saída) se houver checkpoint válido; (False, None) caso contrário
+        """
+        context_data = self.get_context(f"pipeline_run_{run_id}")
+        if not context_data:
+            return False, None
+        
+        checkpoint = context_data.get("data", {}).get("stages", {}).get(stage)
+        if not checkpoint or checkpoint.get("input_key") != input_key:
+            return False, None
+        return True, checkpoint.get("output")
+    
+    @log_execution
+    @traced(name="context.list")
+    def list_contexts(self, context_type=None, limit=10, parent_id=None):
         """
-        Lista os contextos disponíveis, opcionalmente filtrados por tipo.
+        Lista os contextos mais recentes, opcionalmente filtrados por tipo e contexto pai.
+        
+        Os filtros são aplicados antes do limite.
         
         Args:
             context_type (str): Filtrar por tipo de contexto
-            limit (int): Número máximo de contextos a retornar
+            limit (int): Número máximo de contextos a retornar (None para todos)
+            parent_id (str): Filtrar por contexto de origem (ex.: conceito original)
             
         Returns:
-            list: Lista de IDs de contexto
+            list: Resumos dos contextos (id, type, timestamp, parent_id, created_at, updated_at)
         """
         self.logger.info(f"INÍCIO - list_contexts | Tipo: {context_type}, Limite: {limit}")
         
         try:
-            # Listar arquivos JSON no diretório de contexto
-            context_files = list(self.base_dir.glob("*.json"))
-            
-            # Ordenar por data de modificação (mais recentes primeiro)
-            context_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-            
-            contexts = []
-            for file_path in context_files[:limit]:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        
-                    # Filtrar por tipo se especificado
-                    if context_type and data.get('type') != context_type:
-                        continue
-                        
-                    contexts.append({
-                        'id': data.get('id'),
-                        'type': data.get('type'),
-                        'created_at': data.get('created_at'),
-                        'updated_at': data.get('updated_at', data.get('created_at'))
-                    })
-                    
-                except Exception as e:
-                    self.logger.warning(f"Erro ao ler arquivo de contexto {file_path}: {str(e)}")
-                    
+            with self._timed_storage("list"):
+                contexts = self.storage.list(context_type=context_type, limit=limit, parent_id=parent_id)
             self.logger.info(f"SUCESSO - Listagem de contextos | Total: {len(contexts)}")
             return contexts
             
@@ -186,6 +242,7 @@ class ContextManager:
             return []
     
     @log_execution
+    @traced(name="context.delete")
     def delete_context(self, context_id):
         """
         Remove um contexto pelo ID.
@@ -199,12 +256,12 @@ class ContextManager:
         self.logger.info(f"INÍCIO - delete_context | ID: {context_id}")
         
         try:
-            context_file = self.base_dir / f"{context_id}.json"
-            if not context_file.exists():
+            with self._timed_storage("delete"):
+                deleted = self.storage.delete(context_id)
+            if not deleted:
                 self.logger.warning(f"Contexto não encontrado para exclusão | ID: {context_id}")
                 return False
                 
-            os.remove(context_file)
             self.logger.info(f"SUCESSO - Contexto removido | ID: {context_id}")
             return True
             
@@ -213,6 +270,7 @@ class ContextManager:
             return False
     
     @log_execution
+    @traced(name="context.clean")
     def clean_old_contexts(self, days=7):
         """
         Remove contextos mais antigos que X dias.
@@ -226,18 +284,9 @@ class ContextManager:
         self.logger.info(f"INÍCIO - clean_old_contexts | Dias: {days}")
         
         try:
-            now = time.time()
             max_age = days * 24 * 60 * 60  # Converter dias para segundos
-            
-            removed = 0
-            for file_path in self.base_dir.glob("*.json"):
-                file_age = now - os.path.getmtime(file_path)
-                if file_age > max_age:
-                    try:
-                        os.remove(file_path)
-                        removed += 1
-                    except Exception as e:
-                        self.logger.warning(f"Erro ao remover arquivo antigo {file_path}: {str(e)}")
+            with self._timed_storage("delete_older_than"):
+                removed = self.storage.delete_older_than(time.time() - max_age)
                         
             self.logger.info(f"SUCESSO - Limpeza de contextos antigos | Removidos: {removed}")
             return removed
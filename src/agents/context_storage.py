@@ -0,0 +1,497 @@
+"""
+Backends de armazenamento de contextos usados pelo ContextManager.
+
+- JsonFileContextStorage: um arquivo JSON por contexto (formato original).
+- SQLiteContextStorage: contextos em SQLite, com índices por tipo, data de
+  criação e contexto pai. Arquivos JSON gravados diretamente pelos agentes no
+  mesmo diretório são importados sob demanda, de modo que continuem
+  visíveis para listagem e leitura.
+
+O backend é escolhido pela variável de ambiente CONTEXT_STORAGE (json|sqlite).
+
+Também fornece o gerador de IDs de contexto ordenados por tempo, a gravação
+atômica de arquivos JSON e os locks por contexto usados pelo ContextManager e
+pelos agentes, para que pipelines paralelos e vários processos compartilhem o
+mesmo diretório de contextos.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.logger import get_logger
+
+try:
+    import fcntl
+    has_fcntl = True
+except ImportError:
+    # Em plataformas sem fcntl (ex.: Windows) os locks valem apenas entre threads
+    has_fcntl = False
+
+logger = get_logger(__name__)
+
+# Alfabeto Base32 de Crockford, usado pelos ULIDs
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last_ms = -1
+_ulid_last_random = 0
+
+
+def _encode_base32(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(_ULID_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+def new_ulid() -> str:
+    """
+    Gera um ULID (26 caracteres): 48 bits de milissegundos seguidos de 80 bits aleatórios.
+
+    IDs gerados no mesmo milissegundo pelo processo incrementam a parte
+    aleatória, então são únicos e crescentes na ordem de geração. Entre
+    processos, a parte aleatória torna colisões improváveis.
+    """
+    global _ulid_last_ms, _ulid_last_random
+    with _ulid_lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= _ulid_last_ms:
+            now_ms = _ulid_last_ms
+            _ulid_last_random += 1
+            if _ulid_last_random >= 1 << 80:
+                # Parte aleatória esgotada no mesmo milissegundo: avança o relógio lógico
+                now_ms += 1
+                _ulid_last_random = secrets.randbits(79)
+        else:
+            _ulid_last_random = secrets.randbits(80)
+        _ulid_last_ms = now_ms
+        return _encode_base32(now_ms, 10) + _encode_base32(_ulid_last_random, 16)
+
+
+def new_context_id(context_type: str) -> str:
+    """
+    Gera um ID de contexto único e ordenado por tempo.
+
+    Args:
+        context_type: Tipo do contexto, usado como prefixo (ex.: "concept").
+
+    Returns:
+        ID no formato ``<tipo>_<ULID>``.
+    """
+    return f"{context_type}_{new_ulid()}"
+
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs: Any) -> None:
+    """
+    Grava um arquivo JSON de forma atômica.
+
+    O conteúdo é escrito em um arquivo temporário no mesmo diretório e depois
+    renomeado sobre o destino, de modo que leitores nunca vejam um arquivo
+    parcialmente escrito.
+
+    Args:
+        path: Caminho do arquivo.
+        data: Dados serializáveis em JSON.
+        **dump_kwargs: Argumentos para ``json.dump`` (padrão: ``indent=2``).
+    """
+    path = Path(path)
+    dump_kwargs.setdefault("indent", 2)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class _HeldLock:
+    """Estado de um lock de contexto: lock de thread reentrante e lock de arquivo."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.file = None
+
+
+class ContextLocks:
+    """
+    Locks exclusivos por contexto, válidos entre threads e processos.
+
+    Entre threads usa um ``RLock`` por contexto; entre processos, ``flock`` em
+    ``<base_dir>/.locks/<id>.lock``. Os locks são reentrantes na mesma thread.
+    """
+
+    def __init__(self, base_dir: Path):
+        self.lock_dir = Path(base_dir) / ".locks"
+        self._guard = threading.Lock()
+        self._locks = weakref.WeakValueDictionary()
+
+    @contextmanager
+    def hold(self, context_id: str) -> Iterator[None]:
+        """Mantém o lock exclusivo do contexto durante o bloco ``with``."""
+        with self._guard:
+            held = self._locks.get(context_id)
+            if held is None:
+                held = _HeldLock()
+                self._locks[context_id] = held
+
+        with held.lock:
+            if held.depth == 0 and has_fcntl:
+                self.lock_dir.mkdir(exist_ok=True)
+                held.file = open(self.lock_dir / f"{context_id}.lock", "a")
+                fcntl.flock(held.file.fileno(), fcntl.LOCK_EX)
+            held.depth += 1
+            try:
+                yield
+            finally:
+                held.depth -= 1
+                if held.depth == 0 and held.file is not None:
+                    fcntl.flock(held.file.fileno(), fcntl.LOCK_UN)
+                    held.file.close()
+                    held.file = None
+
+
+# Campos que apontam para o contexto de origem, em ordem de prioridade
+PARENT_FIELDS = ("parent_id", "original_concept_id", "original_criteria_id", "concept_id")
+
+
+def _parse_timestamp(record: Dict[str, Any], fallback: float) -> float:
+    """Obtém a data de criação (epoch) de um contexto a partir de seus metadados."""
+    created_at = record.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            return datetime.fromisoformat(created_at).timestamp()
+        except ValueError:
+            pass
+    timestamp = record.get("timestamp")
+    if isinstance(timestamp, str):
+        try:
+            return datetime.strptime(timestamp, "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            pass
+    return fallback
+
+
+def _parent_id(record: Dict[str, Any]) -> Optional[str]:
+    """Obtém o ID do contexto pai, no nível raiz ou em "data"."""
+    for source in (record, record.get("data") if isinstance(record.get("data"), dict) else {}):
+        for field in PARENT_FIELDS:
+            value = source.get(field)
+            if isinstance(value, str) and value:
+                return value
+    return None
+
+
+def _summary(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumo de um contexto retornado pelas listagens."""
+    return {
+        "id": record.get("id"),
+        "type": record.get("type"),
+        "timestamp": record.get("timestamp"),
+        "parent_id": _parent_id(record),
+        "created_at": record.get("created_at"),
+        "updated_at": record.get("updated_at", record.get("created_at")),
+    }
+
+
+class ContextStorage:
+    """Interface dos backends de armazenamento de contextos."""
+
+    def read(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o contexto ou None se não existir."""
+        raise NotImplementedError
+
+    def write(self, context_id: str, record: Dict[str, Any]) -> None:
+        """Cria ou substitui um contexto."""
+        raise NotImplementedError
+
+    def delete(self, context_id: str) -> bool:
+        """Remove um contexto. Retorna False se não existir."""
+        raise NotImplementedError
+
+    def list(
+        self,
+        context_type: Optional[str] = None,
+        limit: Optional[int] = 10,
+        parent_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Lista resumos dos contextos mais recentes, aplicando os filtros antes do limite."""
+        raise NotImplementedError
+
+    def delete_older_than(self, cutoff: float) -> int:
+        """Remove contextos modificados antes de ``cutoff`` (epoch). Retorna o total removido."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera recursos do backend."""
+
+
+class JsonFileContextStorage(ContextStorage):
+    """Um arquivo ``<id>.json`` por contexto no diretório base."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = Path(base_dir)
+
+    def _path(self, context_id: str) -> Path:
+        return self.base_dir / f"{context_id}.json"
+
+    def read(self, context_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(context_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write(self, context_id: str, record: Dict[str, Any]) -> None:
+        atomic_write_json(self._path(context_id), record)
+
+    def delete(self, context_id: str) -> bool:
+        try:
+            os.remove(self._path(context_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _entries(self):
+        """Arquivos JSON do diretório com seu mtime, mais recentes primeiro."""
+        entries = []
+        with os.scandir(self.base_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.is_file():
+                    entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort(reverse=True)
+        return entries
+
+    def list(self, context_type=None, limit=10, parent_id=None):
+        contexts = []
+        for _, path in self._entries():
+            if limit is not None and len(contexts) >= limit:
+                break
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+            except Exception as e:
+                logger.warning(f"Erro ao ler arquivo de contexto {path}: {str(e)}")
+                continue
+
+            summary = _summary(record)
+            if context_type and summary["type"] != context_type:
+                continue
+            if parent_id and summary["parent_id"] != parent_id:
+                continue
+            contexts.append(summary)
+        return contexts
+
+    def delete_older_than(self, cutoff: float) -> int:
+        removed = 0
+        for mtime, path in self._entries():
+            if mtime < cutoff:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except Exception as e:
+                    logger.warning(f"Erro ao remover arquivo antigo {path}: {str(e)}")
+        return removed
+
+
+class SQLiteContextStorage(ContextStorage):
+    """Contextos em SQLite (``contexts.sqlite3`` no diretório base), com listagem indexada."""
+
+    def __init__(self, base_dir: Path, db_path: Optional[Path] = None):
+        self.base_dir = Path(base_dir)
+        self.db_path = Path(db_path) if db_path else self.base_dir / "contexts.sqlite3"
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._synced_dir_mtime: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre (ou reabre após fork) a conexão e cria o esquema."""
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS contexts (
+                id TEXT PRIMARY KEY,
+                type TEXT,
+                parent_id TEXT,
+                created_at REAL NOT NULL,
+                modified_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_contexts_type_created ON contexts(type, created_at);
+            CREATE INDEX IF NOT EXISTS idx_contexts_created ON contexts(created_at);
+            CREATE INDEX IF NOT EXISTS idx_contexts_modified ON contexts(modified_at);
+            CREATE INDEX IF NOT EXISTS idx_contexts_parent ON contexts(parent_id);
+            """
+        )
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        self._synced_dir_mtime = None
+        return conn
+
+    def _upsert(self, conn: sqlite3.Connection, context_id: str, record: Dict[str, Any], modified_at: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO contexts (id, type, parent_id, created_at, modified_at, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                context_id,
+                record.get("type"),
+                _parent_id(record),
+                _parse_timestamp(record, modified_at),
+                modified_at,
+                json.dumps(record),
+            ),
+        )
+
+    def _sync_json_files(self, conn: sqlite3.Connection) -> None:
+        """
+        Importa arquivos JSON gravados diretamente no diretório.
+
+        Só varre o diretório quando seu mtime muda (criação ou remoção de
+        arquivos) e só lê os arquivos cujo ID ainda não está no banco.
+        """
+        dir_mtime = os.stat(self.base_dir).st_mtime_ns
+        if dir_mtime == self._synced_dir_mtime:
+            return
+
+        known = {row[0] for row in conn.execute("SELECT id FROM contexts")}
+        new_files = []
+        with os.scandir(self.base_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json") and entry.name[:-5] not in known and entry.is_file():
+                    new_files.append(entry)
+
+        if new_files:
+            conn.execute("BEGIN")
+            try:
+                for entry in new_files:
+                    try:
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            record = json.load(f)
+                    except Exception as e:
+                        logger.warning(f"Erro ao importar arquivo de contexto {entry.path}: {str(e)}")
+                        continue
+                    self._upsert(conn, entry.name[:-5], record, entry.stat().st_mtime)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            logger.debug(f"Contextos importados de arquivos JSON: {len(new_files)}")
+
+        self._synced_dir_mtime = dir_mtime
+
+    def read(self, context_id):
+        json_path = self.base_dir / f"{context_id}.json"
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, modified_at FROM contexts WHERE id = ?", (context_id,)
+            ).fetchone()
+            try:
+                file_mtime = os.stat(json_path).st_mtime
+            except FileNotFoundError:
+                file_mtime = None
+            # Arquivo novo ou regravado por um agente depois da importação
+            if file_mtime is not None and (row is None or file_mtime > row[1]):
+                with open(json_path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+                self._upsert(conn, context_id, record, file_mtime)
+                return record
+        return json.loads(row[0]) if row else None
+
+    def write(self, context_id, record):
+        with self._lock:
+            self._upsert(self._connect(), context_id, record, time.time())
+
+    def delete(self, context_id):
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM contexts WHERE id = ?", (context_id,)).rowcount > 0
+            # Remover também o arquivo JSON de origem, para que não seja importado novamente
+            json_path = self.base_dir / f"{context_id}.json"
+            if json_path.exists():
+                os.remove(json_path)
+                deleted = True
+        return deleted
+
+    def list(self, context_type=None, limit=10, parent_id=None):
+        query = "SELECT payload FROM contexts"
+        conditions, params = [], []
+        if context_type:
+            conditions.append("type = ?")
+            params.append(context_type)
+        if parent_id:
+            conditions.append("parent_id = ?")
+            params.append(parent_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            conn = self._connect()
+            self._sync_json_files(conn)
+            rows = conn.execute(query, params).fetchall()
+        return [_summary(json.loads(row[0])) for row in rows]
+
+    def delete_older_than(self, cutoff):
+        with self._lock:
+            conn = self._connect()
+            self._sync_json_files(conn)
+            ids = [row[0] for row in conn.execute("SELECT id FROM contexts WHERE modified_at < ?", (cutoff,))]
+            for context_id in ids:
+                self.delete(context_id)
+        return len(ids)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._conn_pid = None
+
+
+def create_context_storage(base_dir: Path, backend: Optional[str] = None) -> ContextStorage:
+    """
+    Cria o backend de armazenamento de contextos.
+
+    Args:
+        base_dir: Diretório de contextos.
+        backend: "json" ou "sqlite". Se None, usa CONTEXT_STORAGE (padrão: json).
+
+    Returns:
+        Instância do backend.
+
+    Raises:
+        ValueError: Se o backend não for suportado.
+    """
+    backend = (backend or os.environ.get("CONTEXT_STORAGE", "json")).lower()
+    if backend == "json":
+        return JsonFileContextStorage(base_dir)
+    if backend == "sqlite":
+        return SQLiteContextStorage(base_dir)
+    raise ValueError(f"Backend de contexto não suportado: {backend}")
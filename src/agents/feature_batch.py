@@ -0,0 +1,240 @@
+"""
+Execução em lote do fluxo de criação de features.
+
+Lê prompts de um arquivo JSONL (um objeto por linha, com ``prompt`` e,
+opcionalmente, ``id`` e ``execution_plan``), executa cada um pelo
+``FeatureCoordinatorAgent`` com no máximo ``concurrency`` execuções
+simultâneas e grava um resultado por linha em outro arquivo JSONL à medida
+que as execuções terminam.
+
+O arquivo de resultados também é o registro de progresso do lote: ao
+executar de novo o mesmo lote, os itens já concluídos com sucesso são
+pulados e os que falharam são retomados pelo ``run_id`` a partir da etapa
+que falhou (ver ``FeatureCoordinatorAgent.execute_feature_creation``).
+
+O limite de chamadas simultâneas a cada provedor é aplicado pelo
+``ModelManager`` (``<PROVEDOR>_MAX_CONCURRENCY``), compartilhado por todas as
+execuções do lote.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from src.core.logger import get_logger
+from src.core.masking import mask_sensitive_data
+
+# Execuções simultâneas quando não informado
+DEFAULT_CONCURRENCY = 4
+
+# Campos do resultado do coordenador copiados para o arquivo de resultados
+RESULT_FIELDS = ("run_id", "error", "failed_stage", "context_chain", "github_info", "total_duration")
+
+
+def read_batch(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os itens do lote de um arquivo JSONL.
+
+    Linhas em branco são ignoradas. Itens sem ``id`` recebem ``line-<n>``;
+    linhas inválidas geram itens com ``error`` preenchido.
+
+    Args:
+        path: Caminho do arquivo JSONL.
+
+    Yields:
+        Dicionários com ``id``, ``prompt`` e, se informado, ``execution_plan``.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item_id = f"line-{number}"
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield {"id": item_id, "error": f"JSON inválido: {e}"}
+                continue
+            if isinstance(item, str):
+                item = {"prompt": item}
+            if not isinstance(item, dict) or not item.get("prompt"):
+                yield {"id": item_id, "error": "Item sem prompt"}
+                continue
+            item["id"] = str(item.get("id") or item_id)
+            yield item
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Carrega o último resultado de cada item de um arquivo de resultados.
+
+    Uma última linha incompleta (ex.: processo interrompido durante a
+    gravação) é ignorada.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                results[record["id"]] = record
+    return results
+
+
+class FeatureBatchRunner:
+    """Executa um lote de prompts pelo fluxo de criação de features."""
+
+    def __init__(
+        self,
+        output_path: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        coordinator_factory: Optional[Callable[[], Any]] = None,
+        resume: bool = True,
+    ) -> None:
+        """
+        Inicializa o executor do lote.
+
+        Args:
+            output_path: Arquivo JSONL de resultados (também usado para retomar o lote).
+            concurrency: Número máximo de execuções simultâneas.
+            coordinator_factory: Cria o coordenador de cada worker (padrão:
+                ``FeatureCoordinatorAgent()``).
+            resume: Se True, pula os itens concluídos e retoma os que falharam;
+                se False, descarta os resultados anteriores.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency deve ser maior que zero")
+        self.logger = get_logger(__name__)
+        self.output_path = output_path
+        self.concurrency = concurrency
+        self.coordinator_factory = coordinator_factory or self._default_coordinator
+        self.resume = resume
+
+    @staticmethod
+    def _default_coordinator() -> Any:
+        from src.agents.agent_feature_coordinator import FeatureCoordinatorAgent
+        return FeatureCoordinatorAgent()
+
+    async def run(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Executa os itens do lote e grava os resultados à medida que terminam.
+
+        Args:
+            items: Itens lidos com ``read_batch``.
+
+        Returns:
+            Dict: Resumo com total, pulados, sucessos, falhas e duração
+        """
+        started = time.perf_counter()
+        previous = load_results(self.output_path) if self.resume else {}
+        summary = {"total": len(items), "skipped": 0, "success": 0, "error": 0}
+
+        queue: asyncio.Queue = asyncio.Queue()
+        seen = set()
+        for item in items:
+            if item["id"] in seen:
+                self.logger.warning(f"ALERTA - feature_batch | Item repetido ignorado: {item['id']}")
+                summary["skipped"] += 1
+                continue
+            seen.add(item["id"])
+            if previous.get(item["id"], {}).get("status") == "success":
+                summary["skipped"] += 1
+                continue
+            queue.put_nowait(item)
+
+        directory = os.path.dirname(self.output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        pending = queue.qsize()
+        self.logger.info(
+            f"INÍCIO - feature_batch | {pending} itens a executar, {summary['skipped']} pulados | "
+            f"Concorrência: {self.concurrency}"
+        )
+
+        with open(self.output_path, "a" if self.resume else "w", encoding="utf-8") as output:
+            def record(result: Dict[str, Any]) -> None:
+                # Gravado no event loop: as linhas não se intercalam
+                output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                output.flush()
+                summary[result["status"]] += 1
+
+            async def worker() -> None:
+                # Cada worker reutiliza o seu coordenador (e os agentes dele) entre itens
+                coordinator = None
+                while True:
+                    try:
+                        item = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    if "error" in item:
+                        record({"id": item["id"], "status": "error", "error": item["error"]})
+                        continue
+                    if coordinator is None:
+                        try:
+                            coordinator = await asyncio.to_thread(self.coordinator_factory)
+                        except Exception as e:
+                            record({"id": item["id"], "status": "error", "error": mask_sensitive_data(str(e))})
+                            continue
+                    record(await self._run_item(coordinator, item, previous.get(item["id"])))
+
+            workers = min(self.concurrency, pending)
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+        summary["duration"] = time.perf_counter() - started
+        self.logger.info(
+            f"SUCESSO - feature_batch | {summary['success']} sucessos, {summary['error']} falhas, "
+            f"{summary['skipped']} pulados em {summary['duration']:.2f}s",
+            extra={"duration": summary["duration"]},
+        )
+        return summary
+
+    async def _run_item(
+        self, coordinator: Any, item: Dict[str, Any], previous: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Executa um item, retomando a execução anterior que falhou, se houver."""
+        resume_run_id = previous.get("run_id") if previous else None
+        started = time.perf_counter()
+        try:
+            result = await coordinator.execute_feature_creation(
+                item["prompt"], item.get("execution_plan"), resume_run_id=resume_run_id
+            )
+        except Exception as e:
+            result = {"status": "error", "run_id": resume_run_id, "error": mask_sensitive_data(str(e))}
+
+        record = {"id": item["id"], "status": "success" if result.get("status") == "success" else "error"}
+        for field in RESULT_FIELDS:
+            if result.get(field) is not None:
+                record[field] = result[field]
+        record["duration"] = time.perf_counter() - started
+        return record
+
+
+def run_feature_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    resume: bool = True,
+    coordinator_factory: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Executa um lote de um arquivo JSONL (versão síncrona, usada pela CLI).
+
+    As etapas síncronas dos agentes rodam em threads (``asyncio.to_thread``);
+    o executor padrão é dimensionado para ``concurrency`` execuções com
+    etapas em paralelo.
+    """
+    items = list(read_batch(input_path))
+    runner = FeatureBatchRunner(output_path, concurrency, coordinator_factory, resume)
+
+    async def run() -> Dict[str, Any]:
+        executor = ThreadPoolExecutor(max_workers=concurrency * 2 + 4, thread_name_prefix="feature-batch")
+        asyncio.get_running_loop().set_default_executor(executor)
+        return await runner.run(items)
+
+    return asyncio.run(run())
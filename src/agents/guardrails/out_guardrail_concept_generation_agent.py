@@ -24,10 +24,7 @@ from datetime import datetime
 from typing import Dict, List, Any
 import tracemalloc
 
-try:
-    has_openai = True
-except ImportError:
-    has_openai = False
+from src.core.utils.model_gateway import get_model_gateway
 
 # Tentar importar o logger e funções de logging
 try:
@@ -58,19 +55,6 @@ except ImportError:
                 raise
         return wrapper
 
-# Mascaramento básico de dados sensíveis
-try:
-    from src.core.utils import mask_sensitive_data
-    has_utils = True
-except ImportError:
-    has_utils = False
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
-
 # Importar utilidades e classe base
 try:
     from src.core.utils import TokenValidator
@@ -83,6 +67,31 @@ except ImportError:
         def __init__(self, *args, **kwargs):
             pass
 
+# IDs ordenados por tempo e gravação atômica dos arquivos de contexto
+from src.agents.context_storage import atomic_write_json, new_context_id
+
+# Índice de arquivos do projeto compartilhado entre os agentes
+try:
+    from src.core.utils.project_index import DEFAULT_SOURCE_EXTENSIONS, get_project_index
+    has_project_index = True
+except ImportError:
+    has_project_index = False
+    DEFAULT_SOURCE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.go', '.rb')
+
+# Cache de conteúdo de arquivos compartilhado entre os agentes
+try:
+    from src.core.utils.file_cache import get_file_cache
+    has_file_cache = True
+except ImportError:
+    has_file_cache = False
+
+# Índice BM25 local para selecionar trechos de código relevantes
+try:
+    from src.core.utils.relevance_index import get_relevance_index
+    has_relevance_index = True
+except ImportError:
+    has_relevance_index = False
+
 class OutGuardrailConceptGenerationAgent(BaseAgent):
     """
     Agente guardrail responsável por validar e aprimorar os conceitos de feature.
@@ -92,14 +101,16 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
     um fluxo determinístico claro ou estão muito genéricos.
     """
     
-    def __init__(self, openai_token=None, model="gpt-4-turbo"):
+    def __init__(self, openai_token=None, model=None):
         """
         Inicializa o agente OutGuardrailConceptGenerationAgent.
         
         Args:
             openai_token (str, optional): Token de acesso à API da OpenAI. Padrão é None,
                                          nesse caso usará a variável de ambiente OPENAI_KEY.
-            model (str, optional): Modelo OpenAI a ser utilizado. Padrão é "gpt-4-turbo".
+            model (str, optional): Modelo OpenAI a ser utilizado. Se None, o roteador
+                                  escolhe um modelo econômico (tarefa "guardrail"), com
+                                  "gpt-4-turbo" como padrão.
                                          
         Raises:
             ValueError: Se o token OpenAI não for fornecido ou for inválido
@@ -118,7 +129,8 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
         self.logger.info(f"Token OpenAI: {self.token_status}")
         
         # Definir modelo a ser utilizado
-        self.model = model
+        self.model = model or "gpt-4-turbo"
+        self.routing_task = None if model else "guardrail"
         self.logger.info(f"Modelo configurado: {self.model}")
         
         # Criar diretório de contexto se não existir
@@ -149,6 +161,7 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
         """
         self.logger.info(f"INÍCIO - set_model | Alterando modelo para: {model}")
         self.model = model
+        self.routing_task = None
         self.logger.info(f"FIM - set_model | Modelo configurado: {self.model}")
     
     @log_execution
@@ -201,41 +214,38 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
             List[str]: Lista de caminhos relativos dos arquivos encontrados.
         """
         if extensions is None:
-            extensions = ['.py', '.js', '.ts', '.java', '.go', '.rb']
+            extensions = DEFAULT_SOURCE_EXTENSIONS
             
         project_path = Path(project_dir)
         if not project_path.exists() or not project_path.is_dir():
             self.logger.error(f"Diretório de projeto não existe: {project_dir}")
             return []
-            
-        # Inicializa lista para guardar os arquivos encontrados
-        files = []
-        
-        # Padrões de pastas a ignorar
-        ignore_patterns = ['**/node_modules/**', '**/.git/**', '**/__pycache__/**', 
-                           '**/.venv/**', '**/venv/**', '**/dist/**', '**/build/**']
         
-        # Cria uma lista de todos os arquivos desejados que não estão nas pastas ignoradas
-        for ext in extensions:
-            for filepath in project_path.glob(f'**/*{ext}'):
-                # Verifica se o arquivo deve ser ignorado
-                should_ignore = any(filepath.match(pattern) for pattern in ignore_patterns)
-                if not should_ignore:
-                    # Obtém caminho relativo à raiz do projeto
-                    rel_path = filepath.relative_to(project_path)
-                    files.append(str(rel_path))
+        if not has_project_index:
+            self.logger.error("Índice de projeto indisponível; nenhum arquivo listado")
+            return []
+            
+        # O índice é compartilhado entre os agentes e só relê diretórios alterados,
+        # ignorando node_modules, .git, ambientes virtuais e o que estiver no .gitignore
+        files = get_project_index(project_dir).list_files(extensions)
         
         self.logger.info(f"Encontrados {len(files)} arquivos de código-fonte")
         return files
     
     @log_execution
-    def read_file_content(self, project_dir: str, file_path: str) -> str:
+    def read_file_content(self, project_dir: str, file_path: str, max_chars: int = None) -> str:
         """
         Lê o conteúdo de um arquivo específico.
         
+        O conteúdo vem do cache de arquivos compartilhado, validado por mtime e
+        tamanho. Com ``max_chars``, apenas o início do arquivo é lido.
+        
         Args:
             project_dir (str): Caminho para o diretório do projeto.
             file_path (str): Caminho relativo do arquivo a ser lido.
+            max_chars (int, optional): Limite de caracteres. Se informado, retorna no
+                                      máximo ``max_chars + 1`` caracteres, de modo que
+                                      ``len(content) > max_chars`` indica conteúdo truncado.
             
         Returns:
             str: Conteúdo do arquivo, ou string vazia se não foi possível ler.
@@ -246,8 +256,13 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
                 self.logger.warning(f"Arquivo não encontrado: {file_full_path}")
                 return ""
                 
-            with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read()
+            if has_file_cache:
+                content = get_file_cache().read(
+                    str(file_full_path), None if max_chars is None else max_chars + 1
+                )
+            else:
+                with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read() if max_chars is None else f.read(max_chars + 1)
                 
             self.logger.debug(f"Arquivo lido com sucesso: {file_path}")
             return content
@@ -450,12 +465,21 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
             try:
                 # Listar arquivos de código-fonte no projeto
                 source_files = self.list_source_files(project_dir)
+                snippets = []
                 
                 # Limitar a 10 arquivos para não sobrecarregar o prompt
-                if len(source_files) > 10:
-                    self.logger.info(f"Limitando análise aos 10 arquivos mais relevantes entre {len(source_files)}")
-                    # Aqui poderíamos implementar alguma heurística para escolher os mais relevantes
-                    # Por enquanto, pegamos apenas os 10 primeiros
+                if has_relevance_index:
+                    # Arquivos e trechos ranqueados pelo índice BM25 local contra o conceito
+                    query = " ".join([
+                        original_prompt,
+                        concept.get("issue_title", ""),
+                        concept.get("issue_description", ""),
+                    ])
+                    relevance_index = get_relevance_index(project_dir)
+                    source_files = relevance_index.rank_files(query, top_k=10) or source_files[:10]
+                    snippets = relevance_index.search(query, top_k=3, max_tokens=2250)
+                elif len(source_files) > 10:
+                    self.logger.info(f"Limitando análise aos 10 primeiros arquivos entre {len(source_files)}")
                     source_files = source_files[:10]
                 
                 # Se temos arquivos, incluir informações sobre eles
@@ -469,9 +493,14 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
                     ### CONTEÚDO DE ARQUIVOS SELECIONADOS ###
                     """
                     
-                    # Adicionar conteúdo de até 3 arquivos para contexto
-                    for i, file_path in enumerate(source_files[:3]):
-                        file_content = self.read_file_content(project_dir, file_path)
+                    # Adicionar até 3 trechos relevantes (ou o início de até 3 arquivos) para contexto
+                    for snippet in snippets:
+                        prompt += (
+                            f"\n**{snippet.path} (linhas {snippet.start_line}-{snippet.end_line})**\n"
+                            f"```\n{snippet.text}\n```\n"
+                        )
+                    for i, file_path in enumerate([] if snippets else source_files[:3]):
+                        file_content = self.read_file_content(project_dir, file_path, max_chars=3000)
                         # Limitar o tamanho do conteúdo para não exceder limites do modelo
                         content_preview = file_content[:3000] + "..." if len(file_content) > 3000 else file_content
                         prompt += f"\n**{file_path}**\n```\n{content_preview}\n```\n"
@@ -526,26 +555,25 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
                 original_prompt, concept, evaluation, project_dir
             )
             
-            # Configurar cliente da OpenAI
-            from openai import OpenAI
-            client = OpenAI(api_key=self.openai_token)
-            
             # Usar modelo de elevação se fornecido
             model_to_use = elevation_model or self.model
             self.logger.info(f"Usando modelo {model_to_use} para melhoria do conceito")
             
             # Gerar conceito melhorado
-            response = client.chat.completions.create(
+            response = get_model_gateway().generate(
                 model=model_to_use,
+                api_key=self.openai_token,
                 messages=[
                     {"role": "system", "content": "Você é um assistente especializado em melhorar conceitos de features para desenvolvimento de software, garantindo que tenham um fluxo determinístico claro."},
                     {"role": "user", "content": improvement_prompt}
                 ],
                 temperature=0.5,  # Menor temperatura para respostas mais determinísticas
-                max_tokens=4000
+                max_tokens=4000,
+                # Com modelo de elevação explícito, não há roteamento
+                task=None if elevation_model else self.routing_task
             )
             
-            improved_concept_text = response.choices[0].message.content.strip()
+            improved_concept_text = response.strip()
             
             # Extrair apenas o JSON - caso haja texto explicativo em torno dele
             json_start = improved_concept_text.find('{')
@@ -609,9 +637,8 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
         try:
             self.logger.info(f"INÍCIO - _save_improved_concept | Original ID: {original_concept_id}")
             
-            # Criar timestamp para o ID do conceito melhorado
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            improved_concept_id = f"improved_concept_{timestamp}"
+            # Criar ID único e ordenado por tempo para o conceito melhorado
+            improved_concept_id = new_context_id("improved_concept")
             
             # Preparar dados de contexto
             context_data = {
@@ -626,8 +653,7 @@ class OutGuardrailConceptGenerationAgent(BaseAgent):
             
             # Salvar no arquivo de contexto
             filepath = self.context_dir / f"{improved_concept_id}.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(context_data, f, indent=2, ensure_ascii=False)
+            atomic_write_json(filepath, context_data, indent=2, ensure_ascii=False)
                 
             self.logger.info(f"Conceito melhorado salvo em: {filepath}")
             
@@ -21,11 +21,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 
-try:
-    import openai
-    has_openai = True
-except ImportError:
-    has_openai = False
+from src.core.utils.model_gateway import get_model_gateway
 
 # Tentar importar o logger e funções de logging
 try:
@@ -56,18 +52,30 @@ except ImportError:
                 raise
         return wrapper
 
-# Mascaramento básico de dados sensíveis
+# IDs ordenados por tempo e gravação atômica dos arquivos de contexto
+from src.agents.context_storage import atomic_write_json, new_context_id
+
+# Índice de arquivos do projeto compartilhado entre os agentes
+try:
+    from src.core.utils.project_index import DEFAULT_SOURCE_EXTENSIONS, get_project_index
+    has_project_index = True
+except ImportError:
+    has_project_index = False
+    DEFAULT_SOURCE_EXTENSIONS = ('.py', '.js', '.ts', '.java', '.go', '.rb')
+
+# Cache de conteúdo de arquivos compartilhado entre os agentes
 try:
-    from src.core.utils import mask_sensitive_data
-    has_utils = True
+    from src.core.utils.file_cache import get_file_cache
+    has_file_cache = True
 except ImportError:
-    has_utils = False
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
+    has_file_cache = False
+
+# Índice BM25 local para selecionar trechos de código relevantes
+try:
+    from src.core.utils.relevance_index import get_relevance_index
+    has_relevance_index = True
+except ImportError:
+    has_relevance_index = False
 
 class OutGuardrailTDDCriteriaAgent:
     """
@@ -78,14 +86,16 @@ class OutGuardrailTDDCriteriaAgent:
     de API/terminal (não em UI).
     """
     
-    def __init__(self, openai_token=None, model="gpt-4-turbo"):
+    def __init__(self, openai_token=None, model=None):
         """
         Inicializa o agente OutGuardrailTDDCriteriaAgent.
         
         Args:
             openai_token (str, optional): Token de acesso à API da OpenAI. Padrão é None,
                                          nesse caso usará a variável de ambiente OPENAI_KEY.
-            model (str, optional): Modelo OpenAI a ser utilizado. Padrão é "gpt-4-turbo".
+            model (str, optional): Modelo OpenAI a ser utilizado. Se None, o roteador
+                                  escolhe um modelo econômico (tarefa "guardrail"), com
+                                  "gpt-4-turbo" como padrão.
         """
         self.logger = get_logger(__name__)
         self.logger.info(f"INÍCIO - {self.__class__.__name__}.__init__")
@@ -99,7 +109,8 @@ class OutGuardrailTDDCriteriaAgent:
         self.logger.info(f"Token OpenAI: {self.token_status}")
         
         # Definir modelo a ser utilizado
-        self.model = model
+        self.model = model or "gpt-4-turbo"
+        self.routing_task = None if model else "guardrail"
         self.logger.info(f"Modelo configurado: {self.model}")
         
         # Criar diretório de contexto se não existir
@@ -117,6 +128,7 @@ class OutGuardrailTDDCriteriaAgent:
         """
         self.logger.info(f"INÍCIO - set_model | Alterando modelo para: {model}")
         self.model = model
+        self.routing_task = None
         self.logger.info(f"FIM - set_model | Modelo configurado: {self.model}")
     
     @log_execution
@@ -162,40 +174,38 @@ class OutGuardrailTDDCriteriaAgent:
             List[str]: Lista de caminhos relativos dos arquivos encontrados.
         """
         if extensions is None:
-            extensions = ['.py', '.js', '.ts', '.java', '.go', '.rb']
+            extensions = DEFAULT_SOURCE_EXTENSIONS
             
         project_path = Path(project_dir)
         if not project_path.exists() or not project_path.is_dir():
             self.logger.error(f"Diretório de projeto não existe: {project_dir}")
             return []
-            
-        # Inicializa lista para guardar os arquivos encontrados
-        files = []
         
-        # Padrões de pastas a ignorar
-        ignore_patterns = ['**/node_modules/**', '**/.git/**', '**/__pycache__/**', '**/.venv/**', '**/venv/**', '**/dist/**', '**/build/**']
-        
-        # Cria uma lista de todos os arquivos desejados que não estão nas pastas ignoradas
-        for ext in extensions:
-            for filepath in project_path.glob(f'**/*{ext}'):
-                # Verifica se o arquivo deve ser ignorado
-                should_ignore = any(filepath.match(pattern) for pattern in ignore_patterns)
-                if not should_ignore:
-                    # Obtém caminho relativo à raiz do projeto
-                    rel_path = filepath.relative_to(project_path)
-                    files.append(str(rel_path))
+        if not has_project_index:
+            self.logger.error("Índice de projeto indisponível; nenhum arquivo listado")
+            return []
+            
+        # O índice é compartilhado entre os agentes e só relê diretórios alterados,
+        # ignorando node_modules, .git, ambientes virtuais e o que estiver no .gitignore
+        files = get_project_index(project_dir).list_files(extensions)
         
         self.logger.info(f"Encontrados {len(files)} arquivos de código-fonte")
         return files
     
     @log_execution
-    def read_file_content(self, project_dir: str, file_path: str) -> str:
+    def read_file_content(self, project_dir: str, file_path: str, max_chars: int = None) -> str:
         """
         Lê o conteúdo de um arquivo específico.
         
+        O conteúdo vem do cache de arquivos compartilhado, validado por mtime e
+        tamanho. Com ``max_chars``, apenas o início do arquivo é lido.
+        
         Args:
             project_dir (str): Caminho para o diretório do projeto.
             file_path (str): Caminho relativo do arquivo a ser lido.
+            max_chars (int, optional): Limite de caracteres. Se informado, retorna no
+                                      máximo ``max_chars + 1`` caracteres, de modo que
+                                      ``len(content) > max_chars`` indica conteúdo truncado.
             
         Returns:
             str: Conteúdo do arquivo, ou string vazia se não foi possível ler.
@@ -206,8 +216,13 @@ class OutGuardrailTDDCriteriaAgent:
                 self.logger.warning(f"Arquivo não encontrado: {file_full_path}")
                 return ""
                 
-            with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read()
+            if has_file_cache:
+                content = get_file_cache().read(
+                    str(file_full_path), None if max_chars is None else max_chars + 1
+                )
+            else:
+                with open(file_full_path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read() if max_chars is None else f.read(max_chars + 1)
                 
             self.logger.debug(f"Arquivo lido com sucesso: {file_path}")
             return content
@@ -367,36 +382,52 @@ class OutGuardrailTDDCriteriaAgent:
         if len(files) > 20:
             prompt += f"\n... e mais {len(files) - 20} arquivos\n"
             
-        # Tenta encontrar arquivos relevantes com base no conceito da feature
-        # e palavras-chave relacionadas a testes/funcionalidades
-        issue_title = concept.get("issue_title", "").lower()
-        keywords = [word for word in issue_title.split() if len(word) > 3]
+        # Adiciona os trechos de código mais relevantes para o conceito e para os
+        # problemas identificados, ranqueados pelo índice BM25 local
+        prompt += "\n## Conteúdo de Arquivos Relevantes\n"
         
-        # Adiciona palavras-chave relacionadas a testes/funcionalidades comuns
-        extra_keywords = ["test", "api", "function", "endpoint", "cli", "command", "terminal", 
-                          "interface", "service", "controller", "model", "agent"]
-        keywords.extend(extra_keywords)
+        if has_relevance_index:
+            query = " ".join([
+                prompt_text,
+                concept.get("issue_title", ""),
+                concept.get("issue_description", ""),
+                json.dumps(evaluation.get("issues", []), ensure_ascii=False),
+            ])
+            # Orçamento equivalente a ~1500 caracteres por arquivo
+            results = get_relevance_index(project_dir).search(query, top_k=max_files, max_tokens=max_files * 375)
+            for result in results:
+                prompt += (
+                    f"\n### Arquivo: {result.path} (linhas {result.start_line}-{result.end_line})\n"
+                    f"```\n{result.text}\n```\n"
+                )
+        else:
+            # Tenta encontrar arquivos relevantes com base no conceito da feature
+            # e palavras-chave relacionadas a testes/funcionalidades
+            issue_title = concept.get("issue_title", "").lower()
+            keywords = [word for word in issue_title.split() if len(word) > 3]
         
-        # Seleciona arquivos que contêm palavras-chave no caminho
-        relevant_files = [
-            file for file in files
-            if any(keyword in file.lower() for keyword in keywords)
-        ]
+            # Adiciona palavras-chave relacionadas a testes/funcionalidades comuns
+            extra_keywords = ["test", "api", "function", "endpoint", "cli", "command", "terminal", 
+                              "interface", "service", "controller", "model", "agent"]
+            keywords.extend(extra_keywords)
         
-        # Se não encontrou arquivos relevantes, usa os primeiros da lista
-        if not relevant_files and files:
-            relevant_files = files[:min(max_files, len(files))]
-            
-        # Adiciona conteúdo dos arquivos relevantes
-        prompt += "\n## Conteúdo de Arquivos Relevantes\n"
+            # Seleciona arquivos que contêm palavras-chave no caminho
+            relevant_files = [
+                file for file in files
+                if any(keyword in file.lower() for keyword in keywords)
+            ]
         
-        for file in relevant_files[:max_files]:
-            content = self.read_file_content(project_dir, file)
-            if content:
+            # Se não encontrou arquivos relevantes, usa os primeiros da lista
+            if not relevant_files and files:
+                relevant_files = files[:min(max_files, len(files))]
+            
+            for file in relevant_files[:max_files]:
                 # Limita o tamanho para não exceder limites de tokens
                 max_chars = 1500
-                truncated = content[:max_chars] + ("..." if len(content) > max_chars else "")
-                prompt += f"\n### Arquivo: {file}\n```\n{truncated}\n```\n"
+                content = self.read_file_content(project_dir, file, max_chars=max_chars)
+                if content:
+                    truncated = content[:max_chars] + ("..." if len(content) > max_chars else "")
+                    prompt += f"\n### Arquivo: {file}\n```\n{truncated}\n```\n"
                     
         # Adiciona instruções específicas para o modelo
         prompt += """
@@ -491,27 +522,25 @@ de critérios de aceitação TDD. Os novos critérios devem:
             # Caso contrário, gera um prompt para melhorar os critérios
             prompt = self.generate_improved_prompt(concept_data, tdd_criteria, evaluation, project_dir)
             
-            # Configura o cliente OpenAI
-            openai.api_key = self.openai_token
-            
             # Solicita os critérios TDD melhorados ao modelo
             self.logger.info(f"Enviando solicitação à API OpenAI (modelo: {self.model}) para melhorar os critérios...")
             
-            response = openai.chat.completions.create(
+            # O modelo que respondeu pode diferir de self.model (roteador ou fallback)
+            response, model_used = get_model_gateway().generate(
                 model=self.model,
+                api_key=self.openai_token,
                 messages=[
                     {"role": "system", "content": "Você é um especialista em Test-Driven Development focado em critérios de aceitação para APIs, CLIs e funcionalidades (não para UI)."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,  # Baixa temperatura para respostas mais consistentes
                 max_tokens=4000,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
+                task=self.routing_task,
+                return_model=True
             )
             
             # Extrai a resposta da API
-            answer = response.choices[0].message.content.strip()
+            answer = response.strip()
             
             # Tenta extrair o JSON da resposta
             json_start = answer.find('```json')
@@ -525,11 +554,11 @@ de critérios de aceitação TDD. Os novos critérios devem:
                     improved_criteria["context_id"] = concept_id
                     improved_criteria["original_criteria_id"] = criteria_id
                     improved_criteria["generated_at"] = datetime.now().isoformat()
-                    improved_criteria["model_used"] = self.model
+                    improved_criteria["model_used"] = model_used
                     improved_criteria["improved"] = True
                     
                     # Salva os critérios melhorados no diretório de contexto
-                    improved_id = f"tdd_improved_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    improved_id = new_context_id("tdd_improved")
                     self._save_improved_to_context(improved_id, improved_criteria, concept_id, criteria_id)
                     
                     improved_criteria["context_id"] = improved_id
@@ -590,8 +619,7 @@ de critérios de aceitação TDD. Os novos critérios devem:
             }
             
             # Salva o arquivo
-            with open(context_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            atomic_write_json(context_file, metadata, indent=2, ensure_ascii=False)
                 
             self.logger.info(f"Critérios TDD melhorados salvos em: {context_file}")
             return criteria_id
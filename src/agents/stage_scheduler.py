@@ -0,0 +1,229 @@
+"""
+Execução de pipelines de agentes como grafo de dependências.
+
+Cada etapa declara de quais outras depende; etapas independentes são
+executadas em paralelo. Funções síncronas rodam em threads para não bloquear
+o event loop. Saídas podem ser salvas como checkpoints, identificados pelas
+entradas da etapa, para retomar uma execução sem repetir etapas concluídas.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.logger import get_logger
+from src.core.structured_log import log_context
+from src.core.tracing import span
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Stage:
+    """
+    Etapa de um pipeline.
+
+    A função recebe um dicionário com as saídas das etapas já concluídas
+    (indexadas pelo nome) e retorna a saída da etapa.
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+    inputs: Any = None  # Entradas fixas da etapa (ex.: prompt), usadas na chave do checkpoint
+
+
+class CheckpointStore:
+    """Armazenamento de checkpoints de etapas. A implementação padrão não persiste nada."""
+
+    def load(self, stage: str, input_key: str) -> Tuple[bool, Any]:
+        """Retorna (True, saída) se houver checkpoint da etapa para as entradas informadas."""
+        return False, None
+
+    def save(self, stage: str, input_key: str, output: Any) -> None:
+        """Persiste a saída da etapa."""
+
+
+def stage_input_key(stage: Stage, outputs: Dict[str, Any]) -> str:
+    """
+    Calcula a chave das entradas de uma etapa.
+
+    Args:
+        stage: Etapa.
+        outputs: Saídas das etapas concluídas.
+
+    Returns:
+        Hash SHA-256 das entradas fixas e das saídas das dependências.
+    """
+    payload = {
+        "stage": stage.name,
+        "inputs": stage.inputs,
+        "dependencies": {dep: outputs.get(dep) for dep in sorted(stage.depends_on)},
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class StageExecutionError(Exception):
+    """Falha de uma etapa, com as saídas e tempos das etapas já concluídas."""
+
+    def __init__(self, stage: str, error: BaseException, outputs: Dict[str, Any], timings: Dict[str, Dict[str, Any]]):
+        super().__init__(f"Etapa '{stage}' falhou: {error}")
+        self.stage = stage
+        self.error = error
+        self.outputs = outputs
+        self.timings = timings
+
+
+class StageScheduler:
+    """Executa etapas respeitando dependências e paralelizando as independentes."""
+
+    def __init__(self, stages: List[Stage], checkpoints: Optional[CheckpointStore] = None):
+        """
+        Inicializa o agendador e valida o grafo.
+
+        Args:
+            stages: Etapas do pipeline.
+            checkpoints: Armazenamento de checkpoints. Se None, nada é persistido.
+
+        Raises:
+            ValueError: Se houver nomes duplicados, dependências inexistentes ou ciclos.
+        """
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Etapa duplicada: {stage.name}")
+            self.stages[stage.name] = stage
+
+        for stage in stages:
+            missing = [dep for dep in stage.depends_on if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Etapa '{stage.name}' depende de etapas inexistentes: {missing}")
+
+        self.order = self._topological_order()
+        self.checkpoints = checkpoints or CheckpointStore()
+
+    def _topological_order(self) -> List[str]:
+        """Retorna uma ordem topológica das etapas, detectando ciclos."""
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        order = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Ciclo de dependências entre as etapas: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    async def run(self, initial_outputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Executa o pipeline.
+
+        Args:
+            initial_outputs: Saídas já conhecidas; as etapas correspondentes não
+                são executadas.
+
+        Returns:
+            Dicionário com ``outputs`` (saída por etapa), ``timings`` (início
+            relativo, duração e status por etapa) e ``total_duration``.
+
+        Raises:
+            StageExecutionError: Se alguma etapa falhar. Etapas em andamento são
+                canceladas e as ainda não iniciadas não são executadas.
+        """
+        outputs: Dict[str, Any] = dict(initial_outputs or {})
+        timings: Dict[str, Dict[str, Any]] = {
+            name: {"started_at": None, "duration": 0.0, "status": "skipped"} for name in outputs
+        }
+        pending = {name for name in self.order if name not in outputs}
+        running: Dict[asyncio.Task, Tuple[str, str]] = {}
+        start = time.perf_counter()
+
+        async def launch_ready():
+            progressed = True
+            while progressed:
+                progressed = False
+                for name in self.order:
+                    stage = self.stages[name]
+                    if name not in pending or not all(dep in outputs for dep in stage.depends_on):
+                        continue
+                    pending.discard(name)
+                    input_key = stage_input_key(stage, outputs)
+                    found, output = await asyncio.to_thread(self.checkpoints.load, name, input_key)
+                    if found:
+                        # Etapa já concluída com as mesmas entradas: reaproveita a saída
+                        logger.info(f"Etapa {name} restaurada do checkpoint")
+                        outputs[name] = output
+                        timings[name] = {"started_at": None, "duration": 0.0, "status": "checkpoint"}
+                        progressed = True
+                        continue
+                    task = asyncio.ensure_future(self._run_stage(stage, dict(outputs), start, timings))
+                    running[task] = (name, input_key)
+
+        await launch_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name, input_key = running.pop(task)
+                error = task.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    await asyncio.gather(*running, return_exceptions=True)
+                    for other_name, _ in running.values():
+                        timings[other_name]["status"] = "cancelled"
+                    raise StageExecutionError(name, error, outputs, timings) from error
+                outputs[name] = task.result()
+                await asyncio.to_thread(self.checkpoints.save, name, input_key, outputs[name])
+            await launch_ready()
+
+        if pending:
+            raise ValueError(f"Etapas não executadas: {sorted(pending)}")
+
+        return {
+            "outputs": outputs,
+            "timings": timings,
+            "total_duration": round(time.perf_counter() - start, 4),
+        }
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        outputs: Dict[str, Any],
+        pipeline_start: float,
+        timings: Dict[str, Dict[str, Any]],
+    ) -> Any:
+        """Executa uma etapa e registra seu tempo."""
+        started = time.perf_counter()
+        timings[stage.name] = {
+            "started_at": round(started - pipeline_start, 4),
+            "duration": None,
+            "status": "running",
+        }
+        # Os registros de log e spans da etapa (inclusive em threads) ficam associados a ela
+        with log_context(stage=stage.name), span(f"stage.{stage.name}"):
+            logger.info(f"INÍCIO - etapa {stage.name}")
+            try:
+                if inspect.iscoroutinefunction(stage.func):
+                    result = await stage.func(outputs)
+                else:
+                    result = await asyncio.to_thread(stage.func, outputs)
+            except BaseException as error:
+                timings[stage.name]["status"] = "error"
+                timings[stage.name]["duration"] = round(time.perf_counter() - started, 4)
+                if isinstance(error, Exception):
+                    logger.info(f"FALHA - etapa {stage.name}",
+                                extra={"duration": timings[stage.name]["duration"], "status": "error"})
+                raise
+
+            timings[stage.name]["duration"] = round(time.perf_counter() - started, 4)
+            timings[stage.name]["status"] = "success"
+            logger.info(f"SUCESSO - etapa {stage.name} | Duração: {timings[stage.name]['duration']:.3f}s",
+                        extra={"duration": timings[stage.name]["duration"], "status": "success"})
+        return result
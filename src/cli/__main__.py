@@ -0,0 +1,6 @@
+"""
+Permite executar a CLI com ``python -m src.cli``.
+"""
+from src.cli.cli import app
+
+app()
@@ -2,29 +2,46 @@
 CLI principal do sistema.
 """
 import asyncio
+import os
 from typing import Optional
 
 import typer
 from rich.console import Console
 from rich.table import Table
 
-from src.agents import (
-    ConceptGenerationAgent,
-    FeatureCoordinatorAgent,
-    GitHubIntegrationAgent,
-    PlanValidator,
-    TDDCriteriaAgent,
-)
-from src.core.utils import (
-    ModelManager,
-    get_env_status,
-    log_error,
-    validate_env,
-)
+from src.cli.daemon import AgentDaemon, DaemonError, DaemonUnavailable, send_command
+from src.core.utils.env import get_env_status, validate_env
+from src.core.utils.logger import log_error
+from src.core.utils.response_cache import CacheMode
+
+# Agentes e ModelManager são importados dentro de cada comando: carregá-los (e os
+# SDKs dos provedores) aqui tornaria lento até o `status` e o `--help`
 
 app = typer.Typer(help="Agent Flow Craft - Framework para automação de fluxo de features")
 console = Console()
 
+daemon_app = typer.Typer(help="Daemon local que mantém agentes e caches carregados entre comandos")
+app.add_typer(daemon_app, name="daemon")
+
+
+def _forward_to_daemon(command: str, args: dict):
+    """
+    Encaminha o comando ao daemon, se houver um em execução e ``AGENT_DAEMON``
+    não for ``off``, exibindo o progresso recebido.
+
+    Returns:
+        Tupla (encaminhado, resultado).
+    """
+    if os.environ.get("AGENT_DAEMON", "auto").lower() in ("off", "false", "0"):
+        return False, None
+    try:
+        result = send_command(
+            command, args, on_progress=lambda event: console.print(f"[dim]{event['message']}[/dim]", highlight=False)
+        )
+    except DaemonUnavailable:
+        return False, None
+    return True, result
+
 
 @app.command()
 def feature(
@@ -77,6 +94,26 @@ def feature(
         "-mt",
         help="Número máximo de tokens para geração de texto",
     ),
+    target: Optional[str] = typer.Option(
+        None,
+        "--target",
+        help="Diretório do projeto onde a feature será criada (padrão: diretório atual)",
+    ),
+    repo: Optional[str] = typer.Option(
+        None,
+        "--repo",
+        help="Nome do repositório GitHub (padrão: GITHUB_REPO)",
+    ),
+    cache_mode: CacheMode = typer.Option(
+        CacheMode.READWRITE,
+        "--cache-mode",
+        help="Uso do cache persistente de respostas (off, read, write, readwrite)",
+    ),
+    resume: Optional[str] = typer.Option(
+        None,
+        "--resume",
+        help="ID de uma execução anterior a ser retomada, pulando etapas concluídas",
+    ),
 ) -> None:
     """
     Cria uma nova feature usando o fluxo completo de agentes.
@@ -85,20 +122,34 @@ def feature(
         # Valida variáveis de ambiente
         validate_env()
 
+        from src.agents import FeatureCoordinatorAgent
+        from src.core.utils.model_gateway import get_model_gateway
+
         # Cria o agente coordenador
         agent = FeatureCoordinatorAgent(
-            model_name=model,
-            elevation_model=elevation_model,
-            force_model=force,
-            api_key=api_key or os.environ.get("API_KEY"),
-            timeout=timeout,
-            max_retries=max_retries,
-            temperature=temperature,
-            max_tokens=max_tokens,
+            openai_token=api_key or os.environ.get("OPENAI_KEY"),
+            target_dir=target,
+            repo_name=repo,
+            model_options={
+                "model": model,
+                "elevation_model": elevation_model,
+                "force": force,
+                "timeout": timeout,
+                "max_retries": max_retries,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
         )
 
-        # Executa o fluxo
-        result = asyncio.run(agent.execute(prompt=prompt))
+        # Executa o fluxo com o modo de cache desta execução
+        with get_model_gateway().cache_mode(cache_mode):
+            result = asyncio.run(agent.execute_feature_creation(prompt, resume_run_id=resume))
+
+        if result.get("status") == "error":
+            console.print(f"[red]Erro ao criar feature: {result.get('error')}[/red]")
+            if result.get("run_id"):
+                console.print(f"[yellow]Para retomar: --resume {result['run_id']}[/yellow]")
+            return
 
         # Exibe o resultado
         console.print("[green]Feature criada com sucesso![/green]")
@@ -109,6 +160,60 @@ def feature(
         console.print(f"[red]Erro ao criar feature: {str(e)}[/red]")
 
 
+@app.command("feature-batch")
+def feature_batch(
+    input_file: str,
+    output: Optional[str] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Arquivo JSONL de resultados (padrão: <entrada>.results.jsonl)",
+    ),
+    concurrency: int = typer.Option(
+        4,
+        "--concurrency",
+        "-c",
+        help="Número máximo de features criadas simultaneamente",
+    ),
+    resume: bool = typer.Option(
+        True,
+        "--resume/--no-resume",
+        help="Pula os itens concluídos e retoma os que falharam em uma execução anterior do lote",
+    ),
+    cache_mode: CacheMode = typer.Option(
+        CacheMode.READWRITE,
+        "--cache-mode",
+        help="Uso do cache persistente de respostas (off, read, write, readwrite)",
+    ),
+) -> None:
+    """
+    Cria várias features a partir de um arquivo JSONL (um objeto com "prompt" e, opcionalmente, "id" por linha).
+    """
+    try:
+        # Valida variáveis de ambiente
+        validate_env()
+
+        from src.agents.feature_batch import run_feature_batch
+        from src.core.utils.model_gateway import get_model_gateway
+
+        output = output or f"{os.path.splitext(input_file)[0]}.results.jsonl"
+        with get_model_gateway().cache_mode(cache_mode):
+            summary = run_feature_batch(input_file, output, concurrency=concurrency, resume=resume)
+
+        color = "green" if summary["error"] == 0 else "yellow"
+        console.print(
+            f"[{color}]Lote concluído: {summary['success']} sucessos, {summary['error']} falhas, "
+            f"{summary['skipped']} pulados em {summary['duration']:.1f}s[/{color}]"
+        )
+        console.print(f"Resultados em {output}")
+        if summary["error"]:
+            console.print("[yellow]Execute o mesmo comando novamente para retomar os itens com falha[/yellow]")
+
+    except Exception as e:
+        log_error(e)
+        console.print(f"[red]Erro ao executar o lote: {str(e)}[/red]")
+
+
 @app.command()
 def concept(
     prompt: str,
@@ -160,6 +265,11 @@ def concept(
         "-mt",
         help="Número máximo de tokens para geração de texto",
     ),
+    cache_mode: CacheMode = typer.Option(
+        CacheMode.READWRITE,
+        "--cache-mode",
+        help="Uso do cache persistente de respostas (off, read, write, readwrite)",
+    ),
 ) -> None:
     """
     Gera um conceito de feature.
@@ -168,20 +278,42 @@ def concept(
         # Valida variáveis de ambiente
         validate_env()
 
-        # Cria o agente
+        # O daemon usa o modo de cache do próprio processo (padrão: readwrite)
+        if cache_mode == CacheMode.READWRITE:
+            forwarded, result = _forward_to_daemon("concept", {
+                "prompt": prompt,
+                "model": model,
+                "elevation_model": elevation_model,
+                "force": force,
+                "api_key": api_key,
+                "timeout": timeout,
+                "max_retries": max_retries,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            })
+            if forwarded:
+                console.print("[green]Conceito gerado com sucesso![/green]")
+                console.print(result)
+                return
+
+        from src.agents import ConceptGenerationAgent
+        from src.core.utils.model_gateway import get_model_gateway
+
+        # Cria o agente (mesmos parâmetros e entrada usados pelo daemon)
         agent = ConceptGenerationAgent(
-            model_name=model,
+            openai_token=api_key,
+            model=model,
             elevation_model=elevation_model,
-            force_model=force,
-            api_key=api_key or os.environ.get("API_KEY"),
+            force=force,
             timeout=timeout,
             max_retries=max_retries,
             temperature=temperature,
             max_tokens=max_tokens,
         )
 
-        # Executa o fluxo
-        result = asyncio.run(agent.execute(prompt=prompt))
+        # Executa o fluxo com o modo de cache desta execução
+        with get_model_gateway().cache_mode(cache_mode):
+            result = agent.generate_concept(prompt)
 
         # Exibe o resultado
         console.print("[green]Conceito gerado com sucesso![/green]")
@@ -251,6 +383,16 @@ def validate(
         # Valida variáveis de ambiente
         validate_env()
 
+        forwarded, result = _forward_to_daemon(
+            "validate", {"plan_file": os.path.abspath(plan_file), "api_key": api_key}
+        )
+        if forwarded:
+            console.print("[green]Plano validado com sucesso![/green]")
+            console.print(result)
+            return
+
+        from src.agents import PlanValidator
+
         # Cria o agente
         agent = PlanValidator(
             model_name=model,
@@ -334,6 +476,8 @@ def github(
         # Valida variáveis de ambiente
         validate_env()
 
+        from src.agents import GitHubIntegrationAgent
+
         # Cria o agente
         agent = GitHubIntegrationAgent(
             model_name=model,
@@ -409,6 +553,11 @@ def tdd(
         "-mt",
         help="Número máximo de tokens para geração de texto",
     ),
+    cache_mode: CacheMode = typer.Option(
+        CacheMode.READWRITE,
+        "--cache-mode",
+        help="Uso do cache persistente de respostas (off, read, write, readwrite)",
+    ),
 ) -> None:
     """
     Gera critérios de TDD para uma feature.
@@ -417,6 +566,9 @@ def tdd(
         # Valida variáveis de ambiente
         validate_env()
 
+        from src.agents import TDDCriteriaAgent
+        from src.core.utils.model_gateway import get_model_gateway
+
         # Cria o agente
         agent = TDDCriteriaAgent(
             model_name=model,
@@ -429,8 +581,9 @@ def tdd(
             max_tokens=max_tokens,
         )
 
-        # Executa o fluxo
-        result = asyncio.run(agent.execute(feature_id=feature_id))
+        # Executa o fluxo com o modo de cache desta execução
+        with get_model_gateway().cache_mode(cache_mode):
+            result = asyncio.run(agent.execute(feature_id=feature_id))
 
         # Exibe o resultado
         console.print("[green]Critérios de TDD gerados com sucesso![/green]")
@@ -447,12 +600,21 @@ def status() -> None:
     Exibe o status do sistema.
     """
     try:
-        # Obtém status das variáveis de ambiente
-        env_status = get_env_status()
-
-        # Obtém modelos disponíveis
-        model_manager = ModelManager()
-        available_models = model_manager.get_available_models()
+        forwarded, system_status = _forward_to_daemon("status", {})
+        if forwarded:
+            env_status, available_models = system_status["env"], system_status["models"]
+            circuits = system_status.get("circuits", [])
+        else:
+            # Obtém status das variáveis de ambiente
+            env_status = get_env_status()
+
+            from src.core.utils.model_manager import ModelManager
+
+            # Obtém modelos disponíveis
+            model_manager = ModelManager()
+            available_models = model_manager.get_available_models()
+            # Fora do daemon, mostra os circuitos abertos gravados pelas execuções recentes
+            circuits = model_manager.health.snapshot()
 
         # Cria tabela de status
         table = Table(title="Status do Sistema")
@@ -476,6 +638,20 @@ def status() -> None:
         # Adiciona modelos disponíveis
         table.add_row("Modelos Disponíveis", ", ".join(available_models))
 
+        # Adiciona a saúde dos provedores (circuit breaker)
+        circuit_styles = {"closed": "green", "half_open": "yellow", "open": "red"}
+        for circuit in circuits:
+            details = f"saúde {circuit['score']:.2f}, {circuit['requests']} chamadas, erros {circuit['error_rate']:.0%}"
+            if circuit.get("p95_latency") is not None:
+                details += f", p95 {circuit['p95_latency']:.2f}s"
+            if circuit.get("retry_in") is not None:
+                details += f", teste em {circuit['retry_in']:.0f}s"
+            style = circuit_styles.get(circuit["state"], "white")
+            table.add_row(
+                f"Circuito {circuit['provider']}/{circuit['model']}",
+                f"[{style}]{circuit['state']}[/{style}] ({details})",
+            )
+
         # Exibe a tabela
         console.print(table)
 
@@ -484,5 +660,62 @@ def status() -> None:
         console.print(f"[red]Erro ao obter status: {str(e)}[/red]")
 
 
+@daemon_app.command("start")
+def daemon_start(
+    socket_path: Optional[str] = typer.Option(
+        None,
+        "--socket",
+        "-s",
+        help="Caminho do socket Unix (padrão: $AGENT_DAEMON_SOCKET)",
+    ),
+) -> None:
+    """
+    Inicia o daemon em primeiro plano (use `&` ou um gerenciador de serviços para mantê-lo em segundo plano).
+    """
+    try:
+        daemon = AgentDaemon(socket_path)
+        console.print(f"[green]Daemon atendendo em {daemon.socket_path}[/green]")
+        daemon.run()
+    except Exception as e:
+        log_error(e)
+        console.print(f"[red]Erro ao iniciar o daemon: {str(e)}[/red]")
+
+
+@daemon_app.command("stop")
+def daemon_stop(
+    socket_path: Optional[str] = typer.Option(None, "--socket", "-s", help="Caminho do socket Unix"),
+) -> None:
+    """
+    Encerra o daemon.
+    """
+    try:
+        result = send_command("shutdown", socket_path=socket_path)
+        console.print(f"[green]Daemon encerrado ({result['commands_served']} comandos atendidos)[/green]")
+    except DaemonUnavailable:
+        console.print("[yellow]Nenhum daemon em execução[/yellow]")
+    except DaemonError as e:
+        console.print(f"[red]Erro ao encerrar o daemon: {str(e)}[/red]")
+
+
+@daemon_app.command("status")
+def daemon_status(
+    socket_path: Optional[str] = typer.Option(None, "--socket", "-s", help="Caminho do socket Unix"),
+) -> None:
+    """
+    Exibe o estado do daemon.
+    """
+    try:
+        result = send_command("ping", socket_path=socket_path, timeout=5)
+        console.print(
+            f"[green]Daemon em execução[/green] (pid {result['pid']}, "
+            f"{result['uptime']:.0f}s, {result['commands_served']} comandos, "
+            f"{result['cached_agents']} objetos em memória)"
+        )
+    except DaemonUnavailable:
+        console.print("[yellow]Nenhum daemon em execução[/yellow]")
+    except DaemonError as e:
+        console.print(f"[red]Erro ao consultar o daemon: {str(e)}[/red]")
+
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -0,0 +1,366 @@
+"""
+Daemon local da CLI.
+
+Cada comando da CLI inicia um interpretador novo: importa os SDKs, relê
+``plan_requirements.yaml``, recria o ``ModelManager`` e varre o projeto de
+novo. O daemon mantém esses objetos aquecidos em um processo de longa
+duração e atende os comandos por um socket Unix; a CLI passa a ser um
+cliente fino que encaminha o comando e exibe o progresso enquanto ele roda.
+
+Protocolo (uma mensagem JSON por linha):
+
+- o cliente envia ``{"command": "<nome>", "args": {...}}``;
+- o daemon responde com zero ou mais ``{"event": "progress", ...}`` (os logs
+  INFO ou acima emitidos durante o comando), seguidos de
+  ``{"event": "result", "result": ...}`` ou ``{"event": "error", "error": ...}``.
+
+O daemon usa as variáveis de ambiente do próprio processo (chaves de API,
+``CACHE_MODE``, ``CONTEXT_STORAGE`` etc.).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.core.masking import mask_sensitive_data, mask_text
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo de uma linha do protocolo
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def default_socket_path() -> str:
+    """Caminho do socket: ``$AGENT_DAEMON_SOCKET`` ou um arquivo por usuário no diretório temporário."""
+    path = os.environ.get("AGENT_DAEMON_SOCKET")
+    if path:
+        return path
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f"agent-flow-craft-{uid}.sock")
+
+
+class DaemonError(Exception):
+    """Erro retornado pelo daemon ao executar um comando."""
+
+
+class DaemonUnavailable(DaemonError):
+    """Não há daemon atendendo no socket."""
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+# Destino dos eventos de progresso do comando em execução no contexto atual
+_progress_sink: contextvars.ContextVar = contextvars.ContextVar("daemon_progress_sink", default=None)
+
+
+class _ProgressHandler(logging.Handler):
+    """Encaminha os logs emitidos durante um comando ao cliente que o pediu."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        sink = _progress_sink.get()
+        if sink is None:
+            return
+        try:
+            sink({
+                "event": "progress",
+                "level": record.levelname,
+                "logger": record.name,
+                "message": mask_text(record.getMessage()),
+            })
+        except Exception:
+            self.handleError(record)
+
+
+class AgentDaemon:
+    """
+    Servidor de comandos em um socket Unix que mantém agentes e caches em memória.
+
+    Os comandos embutidos são ``ping``, ``status``, ``validate``, ``concept`` e
+    ``shutdown``; outros podem ser adicionados com ``register``.
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, warm: bool = True) -> None:
+        self.socket_path = socket_path or default_socket_path()
+        self.warm = warm
+        self.started_at = time.time()
+        self.commands_served = 0
+        self._handlers: Dict[str, Handler] = {
+            "ping": self._ping,
+            "status": self._status,
+            "validate": self._validate,
+            "concept": self._concept,
+            "shutdown": self._shutdown,
+        }
+        self._agents: Dict[Tuple, Tuple[Any, threading.Lock]] = {}
+        self._agents_lock = threading.Lock()
+        self._stop: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+
+    def register(self, command: str, handler: Handler) -> None:
+        """Registra um comando; o handler recebe os argumentos e retorna um valor serializável em JSON."""
+        self._handlers[command] = handler
+
+    def agent(self, key: Tuple, factory: Callable[[], Any]) -> Tuple[Any, threading.Lock]:
+        """
+        Retorna o objeto mantido em memória para ``key``, criando-o na primeira vez.
+
+        O lock acompanha o objeto para serializar chamadas a agentes que guardam
+        estado entre execuções (ex.: o modelo após uma elevação).
+        """
+        with self._agents_lock:
+            entry = self._agents.get(key)
+            if entry is None:
+                entry = self._agents[key] = (factory(), threading.Lock())
+            return entry
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o socket estar aceitando conexões (útil ao iniciar o daemon em uma thread)."""
+        return self._ready.wait(timeout)
+
+    def run(self) -> None:
+        """Executa o daemon até receber ``shutdown`` (ou KeyboardInterrupt)."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self) -> None:
+        """Atende conexões no socket até receber o comando ``shutdown``."""
+        if daemon_available(self.socket_path):
+            raise DaemonError(f"Já existe um daemon em execução em {self.socket_path}")
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # Socket de um daemon que não foi encerrado corretamente
+
+        from src.core.logger import get_logger
+
+        # Configura o logging antes de acrescentar o handler de progresso ao logger raiz
+        get_logger()
+        progress_handler = _ProgressHandler(logging.INFO)
+        root_logger = logging.getLogger()
+        root_logger.addHandler(progress_handler)
+        # O progresso usa os logs INFO dos agentes: não depende do nível configurado pelo host
+        src_logger = logging.getLogger("src")
+        src_level = src_logger.level
+        if src_logger.getEffectiveLevel() > logging.INFO:
+            src_logger.setLevel(logging.INFO)
+
+        self._stop = asyncio.Event()
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path, limit=MAX_MESSAGE_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Daemon atendendo em {self.socket_path} (pid {os.getpid()})")
+        self._ready.set()
+        warm_up = asyncio.create_task(asyncio.to_thread(self.warm_up)) if self.warm else None
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            if warm_up is not None:
+                warm_up.cancel()
+            self._ready.clear()
+            root_logger.removeHandler(progress_handler)
+            src_logger.setLevel(src_level)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            logger.info("Daemon encerrado")
+
+    def warm_up(self) -> None:
+        """Carrega os agentes, o ``ModelManager`` e o índice do projeto antes do primeiro comando."""
+        try:
+            from src.agents import PlanValidator
+            from src.core.utils.model_gateway import get_model_gateway
+            from src.core.utils.project_index import get_project_index
+
+            # Os agentes chamam os modelos pelo gateway compartilhado do processo
+            get_model_gateway().manager
+            self.agent(("PlanValidator",), PlanValidator)
+            get_project_index(os.getcwd()).files()
+            logger.info("Daemon aquecido: agentes, modelos e índice do projeto carregados")
+        except Exception as e:
+            logger.warning(f"ALERTA - Falha ao aquecer o daemon: {mask_sensitive_data(str(e))}")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                command = request["command"]
+                args = request.get("args") or {}
+            except (ValueError, KeyError, TypeError):
+                writer.write(_encode({"event": "error", "error": "Requisição inválida"}))
+                return
+
+            loop = asyncio.get_running_loop()
+            events: asyncio.Queue = asyncio.Queue()
+            # Logs podem vir de threads (asyncio.to_thread): entregues pelo loop, em ordem
+            sink = lambda event: loop.call_soon_threadsafe(events.put_nowait, event)  # noqa: E731
+
+            async def execute() -> None:
+                _progress_sink.set(sink)
+                try:
+                    result = await self._dispatch(command, args)
+                    message = {"event": "result", "result": result}
+                except Exception as e:
+                    logger.error(f"FALHA - daemon {command} | Erro: {mask_sensitive_data(str(e))}", exc_info=True)
+                    message = {"event": "error", "error": mask_sensitive_data(str(e))}
+                # Agendado após os eventos de progresso já enviados pelas threads
+                loop.call_soon_threadsafe(events.put_nowait, message)
+
+            task = asyncio.create_task(execute())
+            while True:
+                message = await events.get()
+                writer.write(_encode(message))
+                await writer.drain()
+                if message["event"] != "progress":
+                    break
+            await task
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # O cliente desistiu; o comando já iniciado é concluído
+        finally:
+            writer.close()
+
+    async def _dispatch(self, command: str, args: Dict[str, Any]) -> Any:
+        handler = self._handlers.get(command)
+        if handler is None:
+            raise DaemonError(f"Comando desconhecido: {command}")
+        self.commands_served += 1
+        logger.debug(f"Daemon executando {command}")
+        return await handler(args)
+
+    # Comandos embutidos
+
+    async def _ping(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started_at,
+            "commands_served": self.commands_served,
+            "cached_agents": len(self._agents),
+        }
+
+    async def _status(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        from src.core.utils.env import get_env_status
+        from src.core.utils.model_gateway import get_model_gateway
+
+        # Mesmo ModelManager usado pelos agentes: os circuitos abertos por eles aparecem aqui
+        model_manager = get_model_gateway().manager
+        return {
+            "env": get_env_status(),
+            "models": model_manager.get_available_models(),
+            "circuits": model_manager.health.snapshot(),
+        }
+
+    async def _validate(self, args: Dict[str, Any]) -> Any:
+        from src.agents import PlanValidator
+
+        # O validador lê plan_requirements.yaml uma única vez
+        validator, _ = self.agent(("PlanValidator",), PlanValidator)
+        with open(args["plan_file"], "r", encoding="utf-8") as f:
+            plan_content = f.read()
+        return await asyncio.to_thread(validator.validate, plan_content, args.get("api_key"))
+
+    async def _concept(self, args: Dict[str, Any]) -> Any:
+        from src.agents import ConceptGenerationAgent
+
+        options = {
+            "openai_token": args.get("api_key"),
+            "model": args.get("model") or "gpt-4",
+            "elevation_model": args.get("elevation_model"),
+            "force": bool(args.get("force")),
+            "temperature": args.get("temperature", 0.7),
+            "max_tokens": args.get("max_tokens"),
+            "timeout": args.get("timeout"),
+            "max_retries": args.get("max_retries"),
+        }
+        agent, lock = self.agent(
+            ("ConceptGenerationAgent",) + tuple(options.values()),
+            lambda: ConceptGenerationAgent(**options),
+        )
+
+        def generate():
+            with lock:
+                agent.model = options["elevation_model"] if options["force"] and options["elevation_model"] else options["model"]
+                return agent.generate_concept(args["prompt"], args.get("git_log"))
+
+        return await asyncio.to_thread(generate)
+
+    async def _shutdown(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        self._stop.set()
+        return {"pid": os.getpid(), "commands_served": self.commands_served}
+
+
+def daemon_available(socket_path: Optional[str] = None) -> bool:
+    """Indica se há um daemon aceitando conexões no socket."""
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path) or not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(1.0)
+            client.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+
+def send_command(
+    command: str,
+    args: Optional[Dict[str, Any]] = None,
+    socket_path: Optional[str] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    timeout: Optional[float] = None,
+) -> Any:
+    """
+    Envia um comando ao daemon e aguarda o resultado.
+
+    Args:
+        command: Nome do comando (ex.: "status", "concept").
+        args: Argumentos do comando.
+        socket_path: Caminho do socket (padrão: ``default_socket_path()``).
+        on_progress: Chamado com cada evento de progresso recebido.
+        timeout: Tempo máximo sem receber mensagens do daemon, em segundos.
+
+    Returns:
+        O resultado do comando.
+
+    Raises:
+        DaemonUnavailable: Se não houver daemon no socket.
+        DaemonError: Se o comando falhar no daemon.
+    """
+    socket_path = socket_path or default_socket_path()
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonUnavailable("Sockets Unix não são suportados nesta plataforma")
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(timeout)
+        try:
+            client.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonUnavailable(f"Nenhum daemon em {socket_path}") from e
+        client.sendall(_encode({"command": command, "args": args or {}}))
+        with client.makefile("rb") as stream:
+            for line in stream:
+                message = json.loads(line)
+                event = message.get("event")
+                if event == "progress":
+                    if on_progress is not None:
+                        on_progress(message)
+                elif event == "result":
+                    return message.get("result")
+                else:
+                    raise DaemonError(message.get("error", "Erro desconhecido no daemon"))
+        raise DaemonError("Conexão encerrada pelo daemon antes do resultado")
+    finally:
+        client.close()
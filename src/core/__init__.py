@@ -1,20 +1,28 @@
 """
 Módulo core do sistema.
+
+Os nomes exportados são importados sob demanda (PEP 562), no primeiro acesso.
 """
-from src.core.utils import (
-    ModelConfig,
-    ModelManager,
-    ModelProvider,
-    get_env_status,
-    get_env_var,
-    get_logger,
-    log_debug,
-    log_error,
-    log_info,
-    log_warning,
-    logger,
-    validate_env,
-)
+import importlib
+
+# Nome exportado -> módulo que o define
+_EXPORTS = {
+    # Ambiente
+    "get_env_var": "src.core.utils.env",
+    "get_env_status": "src.core.utils.env",
+    "validate_env": "src.core.utils.env",
+    # Logging
+    "logger": "src.core.utils.logger",
+    "get_logger": "src.core.utils.logger",
+    "log_error": "src.core.utils.logger",
+    "log_warning": "src.core.utils.logger",
+    "log_info": "src.core.utils.logger",
+    "log_debug": "src.core.utils.logger",
+    # Modelos
+    "ModelManager": "src.core.utils.model_manager",
+    "ModelProvider": "src.core.utils.model_manager",
+    "ModelConfig": "src.core.utils.model_manager",
+}
 
 __all__ = [
     # Ambiente
@@ -33,3 +41,16 @@ __all__ = [
     "ModelProvider",
     "ModelConfig",
 ]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,20 +4,15 @@ import sys
 from pathlib import Path
 from src.core.core.logger import get_logger, log_execution
 
-# Tente importar funções de mascaramento de dados sensíveis
+# Mascaramento de dados sensíveis (somente biblioteca padrão)
+from src.core.masking import mask_sensitive_data
+
+# Tente importar utilitários de ambiente
 try:
-    from src.core.core.utils import mask_sensitive_data, get_env_status
+    from src.core.utils.env import get_env_var_status
     has_utils = True
 except ImportError:
     has_utils = False
-    # Função básica de fallback para mascaramento
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            # Mostrar parte do início e fim para debugging
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
 
 # Adicionar o diretório base ao path para permitir importações
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -66,8 +61,8 @@ class AgentFactory:
             
             # Log seguro do status do token
             if has_utils:
-                github_status = get_env_status('GITHUB_TOKEN')
-                openai_status = get_env_status('OPENAI_KEY')
+                github_status = get_env_var_status('GITHUB_TOKEN')
+                openai_status = get_env_var_status('OPENAI_KEY')
                 logger.debug(f"Status do token GitHub: {github_status}")
                 logger.debug(f"Status do token OpenAI: {openai_status}")
             else:
@@ -117,7 +112,7 @@ class AgentFactory:
             
             # Log seguro do status do token
             if has_utils:
-                token_status = get_env_status('GITHUB_TOKEN')
+                token_status = get_env_var_status('GITHUB_TOKEN')
                 logger.debug(f"Status do token GitHub: {token_status}")
             else:
                 token_available = "disponível" if github_token else "ausente"
@@ -166,7 +161,7 @@ class AgentFactory:
             
             # Log seguro do status do token
             if has_utils:
-                token_status = get_env_status('OPENAI_KEY')
+                token_status = get_env_var_status('OPENAI_KEY')
                 logger.debug(f"Status do token OpenAI: {token_status}")
             else:
                 token_available = "disponível" if openai_token else "ausente"
@@ -199,7 +194,7 @@ class AgentFactory:
             
             # Log seguro do status do token
             if has_utils:
-                token_status = get_env_status('GITHUB_TOKEN')
+                token_status = get_env_var_status('GITHUB_TOKEN')
                 logger.debug(f"Status do token GitHub: {token_status}")
             else:
                 token_available = "disponível" if github_token else "ausente"
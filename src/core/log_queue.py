@@ -0,0 +1,223 @@
+"""
+Pipeline assíncrono de logging.
+
+Os loggers recebem apenas um ``BoundedQueueHandler``, que coloca os registros
+em uma fila limitada; uma thread em segundo plano (``BatchingQueueListener``)
+retira os registros em lotes, repassa-os aos handlers de console e arquivo e
+faz um único flush por lote. Assim, nenhuma escrita em disco ou terminal
+acontece na thread que registra a mensagem (incluindo o loop de eventos do
+coordenador).
+
+Quando a fila está cheia, a política define o comportamento:
+- ``drop``: registros abaixo de WARNING são descartados e contados em
+  ``log_records_dropped_total``; avisos e erros aguardam espaço na fila
+- ``block``: todos os registros aguardam espaço (até ``block_timeout``)
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import List, Optional
+
+from src.core.metrics import get_metrics_registry
+
+POLICY_DROP = "drop"
+POLICY_BLOCK = "block"
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BLOCK_TIMEOUT = 5.0
+
+_exception_formatter = logging.Formatter()
+
+
+class DeferredFlushMixin:
+    """
+    Handler de stream cujo flush é feito pelo listener ao fim de cada lote,
+    e não a cada registro emitido.
+    """
+
+    def flush(self):
+        # Chamado por emit(); o flush real acontece em flush_batch()
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class DeferredFlushStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    """StreamHandler com flush por lote."""
+
+
+class DeferredFlushRotatingFileHandler(DeferredFlushMixin, logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler com flush por lote."""
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler sobre uma fila limitada, com política para fila cheia."""
+
+    def __init__(self, log_queue: queue.Queue, policy: str = POLICY_DROP,
+                 block_timeout: float = DEFAULT_BLOCK_TIMEOUT) -> None:
+        super().__init__(log_queue)
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f"Política de fila de logs inválida: {policy}")
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = get_metrics_registry().counter(
+            "log_records_dropped_total", "Registros de log descartados por fila cheia"
+        )
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Os argumentos são formatados na thread de origem (podem mudar depois); o
+        # traceback fica em exc_text para que os formatadores do listener mantenham
+        # o layout do registro
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.policy == POLICY_DROP and record.levelno < logging.WARNING:
+            self.dropped.inc(level=record.levelname)
+            return
+        try:
+            self.queue.put(record, timeout=self.block_timeout)
+        except queue.Full:
+            self.dropped.inc(level=record.levelname)
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener que processa os registros em lotes e faz um flush por lote."""
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self) -> None:
+        # A fila é limitada: aguarda espaço em vez de falhar com a fila cheia
+        self.queue.put(self._sentinel)
+
+    def _flush_handlers(self) -> None:
+        for handler in self.handlers:
+            try:
+                if isinstance(handler, DeferredFlushMixin):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except Exception:
+                handler.handleError(None)
+
+    def _monitor(self) -> None:
+        log_queue = self.queue
+        has_task_done = hasattr(log_queue, "task_done")
+        stop = False
+        while not stop:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+                if has_task_done:
+                    log_queue.task_done()
+            self._flush_handlers()
+
+
+class AsyncLogPipeline:
+    """Fila, handler de fila e listener de um logger configurado por ``setup_logging``."""
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 policy: str = POLICY_DROP, block_timeout: float = DEFAULT_BLOCK_TIMEOUT,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = BoundedQueueHandler(self.queue, policy, block_timeout)
+        self.listener: Optional[BatchingQueueListener] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self.listener is None:
+                self.listener = BatchingQueueListener(self.queue, *self.handlers, batch_size=self.batch_size)
+                self.listener.start()
+
+    def stop(self) -> None:
+        """Processa os registros pendentes, encerra a thread e fecha os handlers."""
+        with self._lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+        for handler in self.handlers:
+            try:
+                handler.flush()
+                handler.close()
+            except Exception:
+                pass
+
+    def _after_fork_in_child(self) -> None:
+        # A thread do listener não existe no processo filho: recria fila e listener
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.queue_handler.queue = self.queue
+        self._lock = threading.Lock()
+        self.listener = None
+        self.start()
+
+
+_pipelines: List[AsyncLogPipeline] = []
+_pipelines_lock = threading.Lock()
+
+
+def register_pipeline(pipeline: AsyncLogPipeline) -> None:
+    """Registra o pipeline para encerramento na saída do processo e reinício após fork."""
+    with _pipelines_lock:
+        _pipelines.append(pipeline)
+
+
+def unregister_pipeline(pipeline: AsyncLogPipeline) -> None:
+    """Encerra o pipeline e remove-o do registro."""
+    with _pipelines_lock:
+        if pipeline in _pipelines:
+            _pipelines.remove(pipeline)
+    pipeline.stop()
+
+
+def stop_all_pipelines() -> None:
+    """Esvazia as filas de log e encerra as threads; chamado na saída do processo."""
+    with _pipelines_lock:
+        pipelines = list(_pipelines)
+        _pipelines.clear()
+    for pipeline in pipelines:
+        pipeline.stop()
+
+
+def _after_fork_in_child() -> None:
+    global _pipelines_lock
+    _pipelines_lock = threading.Lock()
+    for pipeline in _pipelines:
+        pipeline._after_fork_in_child()
+
+
+atexit.register(stop_all_pipelines)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
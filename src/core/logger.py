@@ -3,18 +3,34 @@ import os
 import sys
 import logging
 import logging.handlers
+import inspect
+import reprlib
 from pathlib import Path
 from functools import wraps
 import time
-import re
+
+from src.core.masking import (  # noqa: F401 - reexportados para compatibilidade
+    SENSITIVE_KEYWORDS,
+    TOKEN_PATTERNS,
+    mask_partially,
+    mask_sensitive_data,
+    mask_text,
+)
+from src.core.metrics import get_metrics_registry
+from src.core.structured_log import JsonFormatter, LogContextFilter
+from src.core.log_queue import (
+    POLICY_DROP,
+    AsyncLogPipeline,
+    DeferredFlushRotatingFileHandler,
+    DeferredFlushStreamHandler,
+    register_pipeline,
+    unregister_pipeline,
+)
 
 # Diretório base do projeto
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 
-# Garantir que o diretório de logs existe
-os.makedirs(LOG_DIR, exist_ok=True)
-
 # Configuração de níveis de log
 LOG_LEVEL_MAP = {
     'DEBUG': logging.DEBUG,
@@ -43,79 +59,19 @@ COLORS = {
     'RESET': '\033[0m'    # Resetar cor
 }
 
-# Lista de palavras-chave para identificar dados sensíveis
-SENSITIVE_KEYWORDS = [
-    'pass', 'senha', 'password', 
-    'token', 'access_token', 'refresh_token', 'jwt', 
-    'secret', 'api_key', 'apikey', 'key', 
-    'auth', 'credential', 'oauth', 
-    'private', 'signature'
-]
-
-# Padrões de tokens a serem mascarados
-TOKEN_PATTERNS = [
-    # OpenAI tokens
-    r'sk-[a-zA-Z0-9]{20,}',
-    r'sk-proj-[a-zA-Z0-9_-]{20,}',
-    # GitHub tokens
-    r'gh[pous]_[a-zA-Z0-9]{20,}',
-    r'github_pat_[a-zA-Z0-9]{20,}',
-    # JWT tokens
-    r'eyJ[a-zA-Z0-9_-]{5,}\.eyJ[a-zA-Z0-9_-]{5,}\.[a-zA-Z0-9_-]{5,}',
-    # Tokens genéricos (sequências longas de caracteres)
-    r'[a-zA-Z0-9_-]{30,}'
-]
-
-def mask_sensitive_data(data, mask_str='***'):
-    """
-    Mascara dados sensíveis em strings e dicionários.
-    
-    Args:
-        data: Dados a serem mascarados (string, dict ou outro tipo)
-        mask_str: String de substituição para dados sensíveis
-        
-    Returns:
-        Dados com informações sensíveis mascaradas
-    """
-    if isinstance(data, dict):
-        # Mascara valores em dicionários
-        return {
-            k: mask_str if any(keyword in k.lower() for keyword in SENSITIVE_KEYWORDS) else 
-               mask_sensitive_data(v, mask_str) if isinstance(v, (dict, str)) else v 
-            for k, v in data.items()
-        }
-    elif isinstance(data, str):
-        # Máscara imediata para strings muito longas (potencialmente tokens)
-        if len(data) > 20 and any(keyword in data.lower() for keyword in SENSITIVE_KEYWORDS):
-            # Se contém palavras-chave sensíveis e é longo, mascarar completamente
-            return mask_partially(data, mask_str)
-            
-        # Mascara padrões em strings (ex: chaves de API, tokens)
-        masked_data = data
-        for pattern in TOKEN_PATTERNS:
-            # Só aplicar regex em strings com comprimento suficiente (evita operações caras)
-            if len(masked_data) > 20 and re.search(pattern, masked_data):
-                # Mascarar parcialmente mantendo começo e fim
-                masked_data = re.sub(pattern, lambda m: mask_partially(m.group(0), mask_str), masked_data)
-        
-        return masked_data
-    else:
-        # Retorna o valor original para outros tipos
-        return data
+# Escrita dos logs em uma thread em segundo plano, a partir de uma fila limitada
+LOG_ASYNC = os.environ.get('LOG_ASYNC', 'true').lower() not in ('0', 'false', 'no')
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_QUEUE_POLICY = os.environ.get('LOG_QUEUE_POLICY', POLICY_DROP).lower()
 
-def mask_partially(text, mask_str='***'):
-    """Mascara parcialmente uma string, deixando alguns caracteres iniciais e finais visíveis"""
-    if len(text) <= 10:
-        return mask_str
-    
-    # Preservar parte inicial e final
-    prefix_len = min(4, len(text) // 4)
-    suffix_len = min(4, len(text) // 4)
-    
-    prefix = text[:prefix_len] 
-    suffix = text[-suffix_len:] if suffix_len > 0 else ""
-    
-    return f"{prefix}{mask_str}{suffix}"
+# Arquivo de log em JSON, um objeto por linha (NDJSON), com campos de correlação
+LOG_JSON = os.environ.get('LOG_JSON', 'false').lower() in ('1', 'true', 'yes')
+
+# Pipelines assíncronos ativos: nome do logger -> (logger, pipeline)
+_pipelines = {}
+
+# Tamanho máximo da representação de argumentos e retornos nos logs do log_execution
+MAX_REPR_CHARS = int(os.environ.get('LOG_MAX_REPR_CHARS', 1000))
 
 class ColoredFormatter(logging.Formatter):
     """Formatador personalizado que adiciona cores aos logs no console."""
@@ -136,6 +92,25 @@ class ColoredFormatter(logging.Formatter):
         record.levelname = levelname
         return result
 
+class _LogDirectoryMixin:
+    """
+    Handler de arquivo aberto apenas no primeiro registro emitido (``delay=True``),
+    quando o diretório de logs é criado; importar o módulo não toca o disco.
+    """
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class _RotatingFileHandler(_LogDirectoryMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _DeferredFlushRotatingFileHandler(_LogDirectoryMixin, DeferredFlushRotatingFileHandler):
+    pass
+
+
 def setup_logging(logger_name=None, log_file=None):
     """
     Configura o sistema de logging com handlers para console e arquivo.
@@ -150,7 +125,8 @@ def setup_logging(logger_name=None, log_file=None):
     # Se não especificado um nome para o arquivo de log, usar timestamp
     if log_file is None:
         timestamp = time.strftime("%Y%m%d")
-        log_file = f"application_{timestamp}.log" 
+        extension = "jsonl" if LOG_JSON else "log"
+        log_file = f"application_{timestamp}.{extension}"
     
     log_path = os.path.join(LOG_DIR, log_file)
     
@@ -163,6 +139,9 @@ def setup_logging(logger_name=None, log_file=None):
     # Redefine handlers se o logger já existir
     if logger.hasHandlers():
         logger.handlers.clear()
+    previous = _pipelines.pop(logger.name, None)
+    if previous is not None:
+        unregister_pipeline(previous[1])
     
     # Configurar nível de log
     logger.setLevel(NUMERIC_LOG_LEVEL)
@@ -170,23 +149,47 @@ def setup_logging(logger_name=None, log_file=None):
     # Criar formatador padrão
     formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
     
+    # No modo assíncrono, o flush dos handlers é feito uma vez por lote pelo listener
+    stream_handler_class = DeferredFlushStreamHandler if LOG_ASYNC else logging.StreamHandler
+    file_handler_class = _DeferredFlushRotatingFileHandler if LOG_ASYNC else _RotatingFileHandler
+    
     # Handler para console com cores
-    console_handler = logging.StreamHandler()
+    console_handler = stream_handler_class()
     console_handler.setLevel(NUMERIC_LOG_LEVEL)
     colored_formatter = ColoredFormatter(LOG_FORMAT, DATE_FORMAT)
     console_handler.setFormatter(colored_formatter)
-    logger.addHandler(console_handler)
     
     # Handler para arquivo com rotação
-    file_handler = logging.handlers.RotatingFileHandler(
+    file_handler = file_handler_class(
         log_path, 
         maxBytes=10*1024*1024,  # 10MB
-        backupCount=7  # 7 arquivos de backup
+        backupCount=7,  # 7 arquivos de backup
+        delay=True
     )
     file_handler.setLevel(NUMERIC_LOG_LEVEL)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    file_handler.setFormatter(JsonFormatter() if LOG_JSON else formatter)
+    
+    if not LOG_ASYNC:
+        if LOG_JSON:
+            file_handler.addFilter(LogContextFilter())
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        if not logger_name:
+            logger.debug(f"Sistema de logging inicializado - Nível: {LOG_LEVEL}")
+        return logger
     
+    # O logger recebe apenas o handler da fila; console e arquivo são escritos pelo listener
+    pipeline = AsyncLogPipeline([console_handler, file_handler], LOG_QUEUE_SIZE, LOG_QUEUE_POLICY)
+    if LOG_JSON:
+        # Os campos de correlação são lidos na thread de origem, antes da fila
+        pipeline.queue_handler.addFilter(LogContextFilter())
+    logger.addHandler(pipeline.queue_handler)
+    pipeline.start()
+    register_pipeline(pipeline)
+    _pipelines[logger.name] = (logger, pipeline)
+    
+    if not logger_name:
+        logger.debug(f"Sistema de logging inicializado - Nível: {LOG_LEVEL}")
     return logger
 
 def get_logger(name=None):
@@ -208,87 +211,135 @@ def get_logger(name=None):
         
     return logger
 
+def flush_logging():
+    """
+    Escreve todos os registros pendentes nas filas de log e encerra os
+    listeners. Chamado automaticamente na saída do processo.
+    """
+    while _pipelines:
+        _, (logger, pipeline) = _pipelines.popitem()
+        logger.removeHandler(pipeline.queue_handler)
+        unregister_pipeline(pipeline)
+
+_repr = reprlib.Repr()
+_repr.maxstring = MAX_REPR_CHARS
+_repr.maxother = MAX_REPR_CHARS
+_repr.maxlevel = 4
+_repr.maxdict = _repr.maxlist = _repr.maxtuple = _repr.maxset = 20
+
+
+class _LazyMasked:
+    """
+    Representação mascarada e limitada de um valor, calculada apenas quando o
+    registro de log é formatado (ou seja, se algum handler o emitir).
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        try:
+            text = _repr.repr(mask_sensitive_data(self.value))
+        except Exception:
+            text = f"<{type(self.value).__name__}>"
+        if len(text) > MAX_REPR_CHARS:
+            text = text[:MAX_REPR_CHARS] + '...'
+        return text
+
+
+class _LazyError(_LazyMasked):
+    """Mensagem de erro mascarada sob demanda (sem aspas de repr)."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return mask_text(str(self.value))
+
+
 def log_execution(func=None, level=logging.INFO):
     """
     Decorador para logar a entrada e saída de funções.
     
+    O custo por chamada é mínimo quando o nível está desabilitado: apenas
+    ``isEnabledFor`` e a medição de tempo. Argumentos são mascarados e
+    limitados a ``LOG_MAX_REPR_CHARS`` caracteres somente quando o registro é
+    emitido. A duração de cada chamada é registrada no histograma
+    ``log_execution_duration_seconds`` (rótulo ``function``) e as falhas no
+    contador ``log_execution_errors_total``.
+    
     Args:
-        func: A função a ser decorada
+        func: A função a ser decorada (síncrona ou assíncrona)
         level: Nível de log (padrão: INFO)
         
     Returns:
         Função decorada
     """
     def decorator(func):
+        logger = get_logger(func.__module__)
+        func_name = func.__qualname__
+        registry = get_metrics_registry()
+        duration = registry.histogram(
+            'log_execution_duration_seconds', 'Duração das funções decoradas com log_execution'
+        ).labels(function=func_name)
+        errors = registry.counter(
+            'log_execution_errors_total', 'Exceções nas funções decoradas com log_execution'
+        ).labels(function=func_name)
+        
+        def log_start(args, kwargs):
+            if logger.isEnabledFor(level):
+                logger.log(level, "Iniciando %s - Args: %s, Kwargs: %s", func_name,
+                           _LazyMasked(list(args)), _LazyMasked(kwargs))
+        
+        def log_end(elapsed):
+            duration.observe(elapsed)
+            if logger.isEnabledFor(level):
+                logger.log(level, "Concluído %s em %.3fs", func_name, elapsed,
+                           extra={"function": func_name, "duration": elapsed, "status": "success"})
+        
+        def log_error(error, elapsed):
+            duration.observe(elapsed)
+            errors.inc()
+            # Mascarar dados sensíveis na mensagem de erro
+            logger.error("Erro em %s após %.3fs: %s", func_name, elapsed,
+                         _LazyError(error), exc_info=True,
+                         extra={"function": func_name, "duration": elapsed, "status": "error"})
+        
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                log_start(args, kwargs)
+                start_time = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    log_error(e, time.perf_counter() - start_time)
+                    raise
+                log_end(time.perf_counter() - start_time)
+                return result
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            logger = get_logger(func.__module__)
-            
-            # Verificação e mascaramento mais agressivo para argumentos
-            safe_args = []
-            for arg in args:
-                if isinstance(arg, str):
-                    # Verificar se é potencialmente um token ou valor sensível
-                    if len(arg) > 16:
-                        # Verificar por padrões de tokens
-                        for pattern in TOKEN_PATTERNS:
-                            if re.match(pattern, arg):
-                                arg = mask_partially(arg)
-                                break
-                        
-                        # Verificar por palavras-chave sensíveis
-                        if any(keyword in str(arg).lower() for keyword in SENSITIVE_KEYWORDS):
-                            arg = mask_partially(arg)
-                
-                # Tentar mascarar objetos complexos
-                elif isinstance(arg, (dict, list)):
-                    arg = mask_sensitive_data(arg)
-                
-                safe_args.append(arg)
-            
-            # Mascaramento mais agressivo para kwargs
-            safe_kwargs = {}
-            for k, v in kwargs.items():
-                # Se a chave contiver palavras sensíveis, mascarar o valor
-                if any(keyword in k.lower() for keyword in SENSITIVE_KEYWORDS):
-                    safe_kwargs[k] = '***'
-                # Para outros valores, tentar mascarar se for string ou complexo
-                elif isinstance(v, str):
-                    if len(v) > 16 and (
-                        any(keyword in v.lower() for keyword in SENSITIVE_KEYWORDS) or
-                        any(re.search(pattern, v) for pattern in TOKEN_PATTERNS)
-                    ):
-                        safe_kwargs[k] = mask_partially(v)
-                    else:
-                        safe_kwargs[k] = v
-                elif isinstance(v, (dict, list)):
-                    safe_kwargs[k] = mask_sensitive_data(v)
-                else:
-                    safe_kwargs[k] = v
-            
-            func_name = func.__qualname__
-            logger.log(level, f"Iniciando {func_name} - Args: {safe_args}, Kwargs: {safe_kwargs}")
-            
-            start_time = time.time()
+            log_start(args, kwargs)
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
-                elapsed = time.time() - start_time
-                logger.log(level, f"Concluído {func_name} em {elapsed:.3f}s")
-                return result
             except Exception as e:
-                elapsed = time.time() - start_time
-                error_msg = str(e)
-                # Mascarar dados sensíveis na mensagem de erro
-                masked_error = mask_sensitive_data(error_msg)
-                logger.error(f"Erro em {func_name} após {elapsed:.3f}s: {masked_error}", 
-                             exc_info=True)
+                log_error(e, time.perf_counter() - start_time)
                 raise
+            log_end(time.perf_counter() - start_time)
+            return result
         return wrapper
     
     if func is None:
         return decorator
     return decorator(func)
 
-# Configuração inicial do logger raiz
-root_logger = setup_logging()
-root_logger.debug(f"Sistema de logging inicializado - Nível: {LOG_LEVEL}")
+def __getattr__(name):
+    # O logger raiz é configurado no primeiro uso (get_logger ou root_logger), e não na importação
+    if name == 'root_logger':
+        get_logger()
+        return logging.getLogger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
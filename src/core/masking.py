@@ -0,0 +1,274 @@
+"""
+Mascaramento de dados sensíveis.
+
+Implementação única usada pelos logs, agentes e utilitários:
+
+- as expressões são compiladas uma única vez; os candidatos a token
+  (chaves OpenAI, tokens GitHub, sequências longas) são encontrados em uma
+  única passada e classificados pelos padrões, e JWT, tokens Bearer e
+  atribuições ``chave=valor`` com chaves sensíveis usam buscas por literal;
+- chaves de dicionários são verificadas por uma única alternação das
+  palavras-chave, com o resultado em cache por chave;
+- estruturas (dict, list, tuple) são percorridas de forma iterativa, sem
+  recursão, o que suporta aninhamentos profundos;
+- ``mask_stream`` processa textos grandes em blocos, sem carregá-los
+  inteiros na memória.
+
+O módulo usa apenas a biblioteca padrão para poder ser importado pelo logger
+e pelos agentes sem dependências opcionais.
+"""
+import functools
+import re
+from typing import Any, Iterable, Iterator, List, Optional
+
+DEFAULT_MASK = '***'
+
+# Palavras-chave que identificam chaves de dicionário sensíveis
+SENSITIVE_KEYWORDS = [
+    'pass', 'senha', 'password',
+    'token', 'access_token', 'refresh_token', 'jwt',
+    'secret', 'api_key', 'apikey', 'key',
+    'auth', 'credential', 'oauth',
+    'private', 'signature'
+]
+
+# Padrões de tokens a serem mascarados
+TOKEN_PATTERNS = [
+    # OpenAI tokens
+    r'sk-[a-zA-Z0-9]{20,}',
+    r'sk-proj-[a-zA-Z0-9_-]{20,}',
+    # GitHub tokens
+    r'gh[pous]_[a-zA-Z0-9]{20,}',
+    r'github_pat_[a-zA-Z0-9_]{20,}',
+    # JWT tokens
+    r'eyJ[a-zA-Z0-9_-]{5,}\.eyJ[a-zA-Z0-9_-]{5,}\.[a-zA-Z0-9_-]{5,}',
+    # Tokens genéricos (sequências longas de caracteres)
+    r'[a-zA-Z0-9_-]{30,}'
+]
+
+# Campos cujo valor é omitido em textos (ex.: OPENAI_API_KEY=..., "password": "...").
+# Cada padrão começa por um literal, o que permite ao módulo ``re`` localizar os
+# candidatos com uma busca rápida; são aplicados ao texto em minúsculas.
+ASSIGNMENT_KEY_PATTERNS = [
+    r'passw(?:ord|d)',
+    r'senha',
+    r'secret',
+    r'token',
+    r'credentials?',
+    r'authorization',
+    r'key(?:(?<=api_key)|(?<=apikey)|(?<=private_key)|(?<=privatekey)|(?<=access_key)|(?<=accesskey))',
+]
+_ASSIGNMENT_VALUE_PATTERN = r'(?![a-z0-9])["\']?[ \t]*[:=][ \t]*["\']?(?!bearer[ \t])(?P<value>[^\s"\',;}]+)'
+
+# Todos os padrões de TOKEN_PATTERNS (exceto JWT, que contém pontos) são sequências de
+# ao menos 20 caracteres [a-zA-Z0-9_-]. Uma única expressão encontra essas sequências em
+# uma passada e cada uma é classificada pelos padrões; no módulo ``re``, uma alternação
+# direta dos padrões é duas vezes mais lenta, pois impede a busca rápida por prefixo.
+_CANDIDATE_REGEX = re.compile(r'[a-zA-Z0-9_-]{20,}')
+_GENERIC_TOKEN_LENGTH = 30
+_SPECIFIC_TOKEN_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in TOKEN_PATTERNS[:-1]))
+_JWT_REGEX = re.compile(TOKEN_PATTERNS[4])
+_ASSIGNMENT_REGEXES = [re.compile(key + _ASSIGNMENT_VALUE_PATTERN) for key in ASSIGNMENT_KEY_PATTERNS]
+_BEARER_REGEX = re.compile(r'((?i:Bearer)[ \t]+)[a-zA-Z0-9_.=-]+')
+_KEY_REGEX = re.compile('|'.join(re.escape(keyword) for keyword in SENSITIVE_KEYWORDS), re.IGNORECASE)
+
+# Textos menores que isso não contêm tokens nem atribuições e não são examinados
+MIN_MASKED_LENGTH = 7
+
+# Tamanho máximo do texto retido entre blocos no modo de streaming
+STREAM_MAX_CARRY = 64 * 1024
+
+
+def mask_partially(text: str, mask_str: str = DEFAULT_MASK) -> str:
+    """Mascara parcialmente uma string, deixando alguns caracteres iniciais e finais visíveis"""
+    if len(text) <= 10:
+        return mask_str
+
+    # Preservar parte inicial e final
+    prefix_len = min(4, len(text) // 4)
+    suffix_len = min(4, len(text) // 4)
+
+    prefix = text[:prefix_len]
+    suffix = text[-suffix_len:] if suffix_len > 0 else ""
+
+    return f"{prefix}{mask_str}{suffix}"
+
+
+@functools.lru_cache(maxsize=4096)
+def is_sensitive_key(key: str) -> bool:
+    """Indica se o nome de um campo contém alguma palavra-chave sensível."""
+    return _KEY_REGEX.search(key) is not None
+
+
+def _mask_assignments(text: str, mask_str: str) -> str:
+    """Omite os valores de atribuições a campos sensíveis."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Raros caracteres mudam de tamanho ao passar para minúsculas: busca sem pré-processamento
+        regexes, lowered = [re.compile(regex.pattern, re.IGNORECASE) for regex in _ASSIGNMENT_REGEXES], text
+    else:
+        regexes = _ASSIGNMENT_REGEXES
+
+    spans = []
+    for regex in regexes:
+        for match in regex.finditer(lowered):
+            start = match.start()
+            if start and lowered[start - 1].isalnum():
+                continue  # Palavra-chave no meio de um identificador (ex.: mytoken)
+            spans.append((match.start('value'), match.end()))
+    if not spans:
+        return text
+
+    parts, last = [], 0
+    for start, end in sorted(spans):
+        if start < last:
+            continue  # Sobreposto a um valor já omitido
+        parts.append(text[last:start])
+        parts.append(mask_str)
+        last = end
+    parts.append(text[last:])
+    return ''.join(parts)
+
+
+def _mask_token(match, mask_str: str) -> str:
+    candidate = match.group(0)
+    if len(candidate) >= _GENERIC_TOKEN_LENGTH:
+        return mask_partially(candidate, mask_str)
+    return _SPECIFIC_TOKEN_REGEX.sub(lambda m: mask_partially(m.group(0), mask_str), candidate)
+
+
+def _mask_segment(text: str, mask_str: str) -> str:
+    """Aplica as expressões de mascaramento a um trecho de texto."""
+    text = _mask_assignments(text, mask_str)
+    if 'earer' in text or 'EARER' in text:
+        text = _BEARER_REGEX.sub(lambda match: match.group(1) + mask_str, text)
+    if 'eyJ' in text:
+        text = _JWT_REGEX.sub(lambda match: mask_partially(match.group(0), mask_str), text)
+    return _CANDIDATE_REGEX.sub(lambda match: _mask_token(match, mask_str), text)
+
+
+def mask_text(text: str, mask_str: str = DEFAULT_MASK) -> str:
+    """
+    Mascara tokens e valores de atribuições sensíveis em um texto.
+
+    Textos grandes são processados em trechos de linhas completas, de modo
+    que apenas os trechos com palavras-chave passam pela expressão completa.
+
+    Args:
+        text: Texto a ser mascarado.
+        mask_str: String de substituição.
+
+    Returns:
+        Texto com tokens parcialmente mascarados e valores sensíveis omitidos.
+    """
+    if len(text) < MIN_MASKED_LENGTH:
+        return text
+    if len(text) <= STREAM_MAX_CARRY:
+        return _mask_segment(text, mask_str)
+    return ''.join(mask_stream(
+        (text[start:start + STREAM_MAX_CARRY] for start in range(0, len(text), STREAM_MAX_CARRY)),
+        mask_str,
+    ))
+
+
+def mask_sensitive_data(data: Any, mask_str: str = DEFAULT_MASK) -> Any:
+    """
+    Mascara dados sensíveis em strings, dicionários, listas e tuplas.
+
+    Valores de chaves sensíveis são substituídos por ``mask_str``; strings
+    passam por ``mask_text``; outros tipos são retornados sem alteração.
+    A estrutura é percorrida iterativamente e não é modificada.
+
+    Args:
+        data: Dados a serem mascarados
+        mask_str: String de substituição para dados sensíveis
+
+    Returns:
+        Cópia dos dados com informações sensíveis mascaradas
+    """
+    if isinstance(data, str):
+        return mask_text(data, mask_str)
+    if not isinstance(data, (dict, list, tuple)):
+        return data
+
+    # Cada entrada: (contêiner de origem, contêiner de destino)
+    root = {} if isinstance(data, dict) else []
+    stack = [(data, root)]
+    # Tuplas são montadas como listas e convertidas no final, das internas para as externas
+    tuples = []
+    if isinstance(data, tuple):
+        tuples.append((root, None, None))
+
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            items = source.items()
+        else:
+            items = enumerate(source)
+            target.extend([None] * len(source))
+
+        for key, value in items:
+            if isinstance(source, dict) and isinstance(key, str) and is_sensitive_key(key):
+                target[key] = mask_str
+            elif isinstance(value, str):
+                target[key] = mask_text(value, mask_str) if len(value) >= MIN_MASKED_LENGTH else value
+            elif isinstance(value, (dict, list, tuple)):
+                child = {} if isinstance(value, dict) else []
+                target[key] = child
+                if isinstance(value, tuple):
+                    tuples.append((child, target, key))
+                stack.append((value, child))
+            else:
+                target[key] = value
+
+    for items, parent, key in reversed(tuples):
+        if parent is None:
+            return tuple(items)
+        parent[key] = tuple(items)
+    return root
+
+
+def mask_stream(chunks: Iterable[str], mask_str: str = DEFAULT_MASK,
+                max_carry: Optional[int] = None) -> Iterator[str]:
+    """
+    Mascara um texto grande recebido em blocos (ex.: leitura de arquivo ou
+    resposta em streaming).
+
+    O texto é cortado em quebras de linha, que nenhum padrão atravessa; o
+    restante da última linha fica retido até o próximo bloco. Linhas maiores
+    que ``max_carry`` são cortadas no último espaço em branco.
+
+    Args:
+        chunks: Blocos de texto, em ordem.
+        mask_str: String de substituição.
+        max_carry: Tamanho máximo do texto retido entre blocos.
+
+    Yields:
+        Blocos mascarados; concatenados, equivalem a ``mask_text`` do texto
+        inteiro (exceto por atribuições cortadas em linhas maiores que ``max_carry``).
+    """
+    limit = max_carry or STREAM_MAX_CARRY
+    pending: List[str] = []
+    pending_size = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        cut = chunk.rfind('\n')
+        if cut < 0 and pending_size + len(chunk) <= limit:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            continue
+
+        text = ''.join(pending) + chunk
+        cut = text.rfind('\n') + 1
+        if not cut:
+            # Linha muito longa: corta no último espaço em branco, ou no limite
+            cut = max(text.rfind(' '), text.rfind('\t')) + 1 or len(text)
+        yield _mask_segment(text[:cut], mask_str)
+        rest = text[cut:]
+        pending = [rest] if rest else []
+        pending_size = len(rest)
+
+    if pending:
+        yield _mask_segment(''.join(pending), mask_str)
@@ -0,0 +1,462 @@
+"""
+Registro de métricas do processo.
+
+Contadores, gauges e histogramas em memória, identificados por nome e
+rótulos. Os histogramas mantêm baldes log-lineares no estilo HDR (erro
+relativo abaixo de 1% em qualquer ordem de grandeza), usados para os
+percentis, e os baldes fixos exportados no formato de texto do Prometheus.
+
+As métricas podem ser gravadas em um arquivo de texto do Prometheus
+(``METRICS_FILE``, gravado na saída do processo ou com
+``write_prometheus_file``) ou servidas em ``/metrics`` por
+``start_metrics_server`` (``METRICS_PORT``, usado no modo daemon).
+
+O registro usa apenas a biblioteca padrão para poder ser importado pelo módulo
+de logging sem dependências circulares.
+"""
+import atexit
+import bisect
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+# Limites (em segundos) dos baldes exportados para o Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Sub-baldes por potência de 2 nos histogramas HDR: erro relativo <= 1/256
+HDR_SUB_BUCKETS = 128
+
+# Percentis incluídos nos snapshots dos histogramas
+SNAPSHOT_PERCENTILES = (50, 90, 95, 99)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _hdr_index(value: float) -> int:
+    """Índice do balde log-linear de um valor positivo."""
+    mantissa, exponent = math.frexp(value)  # mantissa em [0.5, 1)
+    return exponent * HDR_SUB_BUCKETS + int((mantissa - 0.5) * 2 * HDR_SUB_BUCKETS)
+
+
+def _hdr_value(index: int) -> float:
+    """Valor representativo (ponto médio) de um balde log-linear."""
+    exponent, sub_bucket = divmod(index, HDR_SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * HDR_SUB_BUCKETS), exponent)
+
+
+class _CounterChild:
+    """Valor de um contador para uma combinação de rótulos."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    """Valor de um gauge para uma combinação de rótulos."""
+
+    __slots__ = ("_value", "function", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return self._value
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Calcula o valor ao ser lido (ex.: tamanho de uma fila)."""
+        self.function = function
+
+
+class _HistogramChild:
+    """Observações de um histograma para uma combinação de rótulos."""
+
+    __slots__ = ("count", "sum", "min", "max", "bounds", "bucket_counts", "hdr", "zeros", "_lock")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.hdr: Dict[int, int] = {}
+        self.zeros = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+            if value > 0:
+                index = _hdr_index(value)
+                self.hdr[index] = self.hdr.get(index, 0) + 1
+            else:
+                self.zeros += 1
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Valor abaixo do qual está ``percent``% das observações (erro relativo < 1%)."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(self.count * percent / 100))
+            if rank <= self.zeros:
+                return min(self.min, 0.0)
+            seen = self.zeros
+            for index in sorted(self.hdr):
+                seen += self.hdr[index]
+                if seen >= rank:
+                    return min(max(_hdr_value(index), self.min), self.max)
+            return self.max
+
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """Contagens acumuladas por limite, incluindo +Inf (formato do Prometheus)."""
+        with self._lock:
+            counts = list(self.bucket_counts)
+        result, total = [], 0
+        for bound, count in zip(list(self.bounds) + [math.inf], counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            snapshot = {"count": self.count, "sum": self.sum, "min": self.min, "max": self.max}
+        for percent in SNAPSHOT_PERCENTILES:
+            snapshot[f"p{percent}"] = self.percentile(percent)
+        return snapshot
+
+
+class _Metric:
+    """Base das métricas: um valor por combinação de rótulos."""
+
+    type = ""
+    child_class = None
+
+    def __init__(self, name: str, description: str = "") -> None:
+        self.name = name
+        self.description = description
+        self._children: Dict[LabelKey, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, **labels):
+        """
+        Retorna o valor associado aos rótulos, criando-o se necessário.
+
+        O objeto retornado pode ser guardado para evitar a busca a cada chamada.
+        """
+        key = _label_key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def children(self) -> List[Tuple[LabelKey, object]]:
+        """Pares (rótulos, valor) registrados até o momento."""
+        with self._lock:
+            return list(self._children.items())
+
+
+class Counter(_Metric):
+    """Contador monotônico."""
+
+    type = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Incrementa o contador dos rótulos informados."""
+        self.labels(**labels).inc(amount)
+
+    def value(self, **labels) -> float:
+        """Valor atual do contador dos rótulos informados."""
+        child = self._children.get(_label_key(labels))
+        return child.value if child is not None else 0.0
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return {key: child.value for key, child in self._children.items()}
+
+
+class Gauge(_Metric):
+    """Valor que pode subir e descer (ex.: taxa de acerto do cache)."""
+
+    type = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value: float, **labels) -> None:
+        """Define o valor do gauge dos rótulos informados."""
+        self.labels(**labels).set(value)
+
+    def value(self, **labels) -> float:
+        """Valor atual do gauge dos rótulos informados."""
+        child = self._children.get(_label_key(labels))
+        return child.value if child is not None else 0.0
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        return {key: child.value for key, child in self.children()}
+
+
+class Histogram(_Metric):
+    """Distribuição de valores observados (ex.: durações em segundos)."""
+
+    type = "histogram"
+    child_class = _HistogramChild
+
+    def __init__(self, name: str, description: str = "", buckets: Optional[Sequence[float]] = None) -> None:
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets)) if buckets else DEFAULT_BUCKETS
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Registra uma observação para os rótulos informados."""
+        self.labels(**labels).observe(value)
+
+    def percentile(self, percent: float, **labels) -> Optional[float]:
+        """Percentil das observações dos rótulos informados (None se não houver)."""
+        child = self._children.get(_label_key(labels))
+        return child.percentile(percent) if child is not None else None
+
+    def snapshot(self) -> Dict[LabelKey, Dict[str, float]]:
+        return {key: child.snapshot() for key, child in self.children()}
+
+
+class MetricsRegistry:
+    """Conjunto de métricas do processo, indexadas por nome."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name: str, description: str, **options) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, description, **options)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Métrica {name} já registrada como {metric.type}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Retorna o contador com o nome informado, criando-o se necessário."""
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        """Retorna o gauge com o nome informado, criando-o se necessário."""
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "",
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        """
+        Retorna o histograma com o nome informado, criando-o se necessário.
+
+        ``buckets`` define os limites exportados para o Prometheus (padrão:
+        ``DEFAULT_BUCKETS``, em segundos); os percentis não dependem deles.
+        """
+        if buckets is None:
+            return self._get_or_create(Histogram, name, description)
+        return self._get_or_create(Histogram, name, description, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Retorna a métrica registrada com o nome, ou None."""
+        with self._lock:
+            return self._metrics.get(name)
+
+    def metrics(self) -> List[_Metric]:
+        """Métricas registradas, em ordem de nome."""
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def snapshot(self) -> Dict[str, Dict[LabelKey, object]]:
+        """Valores atuais de todas as métricas."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def clear(self) -> None:
+        """Remove todas as métricas."""
+        with self._lock:
+            self._metrics.clear()
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Retorna o registro de métricas compartilhado pelo processo.
+
+    Returns:
+        Instância única de ``MetricsRegistry``.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+            if os.environ.get("METRICS_FILE"):
+                atexit.register(_write_metrics_file_at_exit)
+        return _registry
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """
+    Formata as métricas no formato de texto do Prometheus (versão 0.0.4).
+
+    Args:
+        registry: Registro a ser formatado (padrão: o registro do processo).
+
+    Returns:
+        Texto com ``# HELP``, ``# TYPE`` e as amostras de cada métrica.
+    """
+    registry = registry or get_metrics_registry()
+    lines = []
+    for metric in registry.metrics():
+        if metric.description:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for key, child in metric.children():
+            if isinstance(metric, Histogram):
+                for bound, count in child.cumulative_buckets():
+                    labels = _format_labels(key, ("le", _format_value(bound)))
+                    lines.append(f"{metric.name}_bucket{labels} {count}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_value(child.sum)}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {child.count}")
+            else:
+                lines.append(f"{metric.name}{_format_labels(key)} {_format_value(child.value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_file(path: str, registry: Optional[MetricsRegistry] = None) -> str:
+    """
+    Grava as métricas em um arquivo de texto do Prometheus (ex.: para o
+    textfile collector do node_exporter), com substituição atômica.
+
+    Returns:
+        Caminho do arquivo gravado.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus(registry))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_metrics_file_at_exit() -> None:
+    path = os.environ.get("METRICS_FILE")
+    if path:
+        try:
+            write_prometheus_file(path)
+        except OSError:
+            pass
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1",
+                         registry: Optional[MetricsRegistry] = None):
+    """
+    Serve as métricas em ``http://<host>:<port>/metrics`` em uma thread em segundo plano.
+
+    Args:
+        port: Porta (padrão: ``METRICS_PORT`` ou 9464; 0 escolhe uma porta livre).
+        host: Endereço de escuta (padrão: apenas local).
+        registry: Registro servido (padrão: o registro do processo).
+
+    Returns:
+        O servidor; ``server.shutdown()`` encerra a thread.
+    """
+    # Importado aqui para não pesar na inicialização dos processos que não servem métricas
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        """Responde ``GET /metrics`` com as métricas do registro."""
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus(registry).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    if port is None:
+        port = int(os.environ.get("METRICS_PORT", 9464))
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
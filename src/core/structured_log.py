@@ -0,0 +1,121 @@
+"""
+Logs estruturados em JSON (NDJSON) com campos de correlação por execução.
+
+``log_context`` associa campos como ``run_id``, ``stage``, ``agent`` e
+``model`` ao contexto atual (``contextvars``): valem para a tarefa asyncio e
+para as funções executadas com ``asyncio.to_thread``. ``LogContextFilter``
+copia esses campos para cada registro na thread de origem, antes da fila de
+logs, e ``JsonFormatter`` grava um objeto JSON por linha com os campos de
+correlação e as métricas passadas em ``extra`` (duração e contagens de
+tokens), sem que o coletor de logs precise interpretar o texto da mensagem.
+
+O JSON é serializado com ``orjson`` quando disponível e com ``json`` da
+biblioteca padrão caso contrário.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import time
+from typing import Any, Dict, Iterator, Mapping
+
+from src.core.masking import mask_sensitive_data, mask_text
+
+# Campos de correlação mantidos no contexto de execução
+CONTEXT_FIELDS = ("run_id", "stage", "agent", "model")
+
+# Campos passados em ``extra`` que são copiados para o JSON
+EXTRA_FIELDS = (
+    "duration", "status", "function", "provider", "cached",
+    "prompt_tokens", "completion_tokens", "total_tokens",
+)
+
+_EMPTY: Mapping[str, Any] = {}
+_log_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default=_EMPTY)
+
+
+def get_log_context() -> Mapping[str, Any]:
+    """Retorna os campos de correlação do contexto atual."""
+    return _log_context.get()
+
+
+def bind_log_context(**fields: Any) -> None:
+    """
+    Acrescenta campos ao contexto atual (valores None são ignorados).
+
+    Use dentro de um bloco ``log_context`` para que os campos sejam
+    removidos ao final do bloco.
+    """
+    fields = {key: value for key, value in fields.items() if value is not None}
+    if fields:
+        _log_context.set({**_log_context.get(), **fields})
+
+
+@contextlib.contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    Associa campos de correlação aos registros de log emitidos no bloco.
+
+    Exemplo:
+        with log_context(run_id=run_id, agent="FeatureCoordinatorAgent"):
+            ...
+    """
+    token = _log_context.set(_log_context.get())
+    try:
+        bind_log_context(**fields)
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class LogContextFilter(logging.Filter):
+    """Copia os campos de correlação do contexto atual para o registro."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+_serializer = None
+
+
+def dumps(payload: Dict[str, Any]) -> str:
+    """Serializa em JSON compacto; ``orjson`` é importado no primeiro uso, se instalado."""
+    global _serializer
+    if _serializer is None:
+        try:
+            import orjson
+            _serializer = lambda data: orjson.dumps(data, default=str).decode("utf-8")  # noqa: E731
+        except ImportError:
+            _serializer = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=str).encode
+    return _serializer(payload)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma única linha."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = record.created
+        payload: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(created)) + ".%03dZ" % (created % 1 * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": mask_text(record.getMessage()),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = value
+        for key in EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = mask_sensitive_data(value) if isinstance(value, str) else value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = mask_text(record.exc_text)
+        payload["source"] = f"{record.filename}:{record.lineno}"
+        return dumps(payload)
@@ -0,0 +1,340 @@
+"""
+Rastreamento (tracing) leve em processo.
+
+Spans registram nome, início, duração, atributos, span pai e a variação de
+memória residente (RSS) do processo. O span atual é mantido em
+``contextvars``, de modo que spans abertos em tarefas asyncio e em funções
+executadas com ``asyncio.to_thread`` ficam aninhados ao span que as iniciou.
+
+O rastreamento é desativado por padrão e custa apenas uma verificação por
+span. É ativado com ``TRACE_ENABLED=true`` ou ``TRACE_DIR=<diretório>``; com
+``TRACE_DIR``, cada span raiz criado com ``export=True`` (ex.: uma execução
+do coordenador) é gravado ao terminar como ``trace_<run_id>.json`` no formato
+Chrome trace, que pode ser aberto em ``chrome://tracing`` ou no Perfetto.
+
+A variação de RSS é do processo inteiro: em spans simultâneos, inclui a
+memória alocada pelas outras threads.
+"""
+import collections
+import contextlib
+import contextvars
+import inspect
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de rastros mantidos em memória quando não há TRACE_DIR
+MAX_TRACES = 1000
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_psutil_process = None
+
+
+def current_rss() -> Optional[int]:
+    """Memória residente do processo em bytes, ou None se não for possível medi-la."""
+    global _psutil_process
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        if _psutil_process is None:
+            import psutil
+            _psutil_process = psutil.Process(os.getpid())
+        return _psutil_process.memory_info().rss
+    except Exception:
+        return None
+
+
+class Span:
+    """Intervalo de tempo nomeado, com atributos e span pai."""
+
+    __slots__ = (
+        "name", "span_id", "parent_id", "trace_id", "attributes",
+        "start_ns", "end_ns", "thread_id", "rss_start", "rss_end",
+    )
+
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.span_id = next(Span._ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.rss_start = current_rss()
+        self.rss_end: Optional[int] = None
+        self.end_ns: Optional[int] = None
+        self.start_ns = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duração em segundos (None enquanto o span está aberto)."""
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+    @property
+    def rss_delta(self) -> Optional[int]:
+        if self.rss_start is None or self.rss_end is None:
+            return None
+        return self.rss_end - self.rss_start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "duration": self.duration,
+            "rss_delta": self.rss_delta,
+            "attributes": dict(self.attributes),
+        }
+
+
+class _NoopSpan:
+    """Span usado com o rastreamento desativado."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Retorna o span aberto no contexto atual."""
+    return _current_span.get()
+
+
+class Tracer:
+    """Coleta os spans de cada rastro e exporta-os no formato Chrome trace."""
+
+    def __init__(self, enabled: bool = False, trace_dir: Optional[str] = None,
+                 max_traces: int = MAX_TRACES) -> None:
+        self.enabled = enabled or bool(trace_dir)
+        self.trace_dir = trace_dir
+        self.max_traces = max_traces
+        self._traces: "collections.OrderedDict[int, List[Span]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Referência para converter perf_counter_ns em horário de parede no export
+        self._wall_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    @contextlib.contextmanager
+    def span(self, name: str, export: bool = False, **attributes: Any) -> Iterator[Any]:
+        """
+        Abre um span filho do span atual.
+
+        Args:
+            name: Nome do span (ex.: "stage.concept", "llm.chat").
+            export: Para spans raiz, grava o rastro em ``TRACE_DIR`` ao terminar.
+            **attributes: Atributos iniciais do span.
+
+        Yields:
+            O span aberto (ou um span sem efeito, se o rastreamento estiver desativado).
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        span = Span(name, _current_span.get(), attributes)
+        if span.parent_id is None:
+            with self._lock:
+                self._traces[span.trace_id] = []
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.attributes["error"] = type(error).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span, export)
+
+    def _finish(self, span: Span, export: bool) -> None:
+        span.end_ns = time.perf_counter_ns()
+        span.rss_end = current_rss()
+        is_root = span.parent_id is None
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                return  # O rastro já foi encerrado (ex.: tarefa que sobreviveu à raiz)
+            spans.append(span)
+            if not is_root:
+                return
+            if self.trace_dir:
+                self._traces.pop(span.trace_id)
+            else:
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+
+        if export and self.trace_dir:
+            label = span.attributes.get("run_id") or span.trace_id
+            path = os.path.join(self.trace_dir, f"trace_{label}.json")
+            try:
+                self.write_chrome_trace(path, spans)
+            except OSError as e:
+                logger.warning(f"Não foi possível gravar o rastro em {path}: {e}")
+
+    def spans(self, trace_id: Optional[int] = None) -> List[Span]:
+        """Spans concluídos em memória (de um rastro ou de todos)."""
+        with self._lock:
+            if trace_id is not None:
+                return list(self._traces.get(trace_id, []))
+            return [span for spans in self._traces.values() for span in spans]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def to_chrome_trace(self, spans: List[Span]) -> Dict[str, Any]:
+        """Converte spans em eventos completos ("ph": "X") do formato Chrome trace."""
+        pid = os.getpid()
+        events = []
+        threads = set()
+        for span in spans:
+            if span.end_ns is None:
+                continue
+            args = dict(span.attributes)
+            args["span_id"] = span.span_id
+            if span.parent_id is not None:
+                args["parent_id"] = span.parent_id
+            if span.rss_delta is not None:
+                args["rss_delta_kb"] = span.rss_delta // 1024
+            events.append({
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (span.start_ns + self._wall_offset_ns) / 1000,
+                "dur": (span.end_ns - span.start_ns) / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+            threads.add(span.thread_id)
+
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id in sorted(threads):
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+                "args": {"name": names.get(thread_id, str(thread_id))},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str, spans: Optional[List[Span]] = None) -> str:
+        """
+        Grava os spans (por padrão, todos em memória) em um arquivo Chrome trace.
+
+        Returns:
+            Caminho do arquivo gravado.
+        """
+        if spans is None:
+            spans = self.spans()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(spans), f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Retorna o tracer do processo, configurado por TRACE_ENABLED e TRACE_DIR."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    enabled=os.environ.get("TRACE_ENABLED", "false").lower() in ("1", "true", "yes"),
+                    trace_dir=os.environ.get("TRACE_DIR") or None,
+                )
+    return _tracer
+
+
+def span(name: str, export: bool = False, **attributes: Any):
+    """Abre um span no tracer do processo (ver ``Tracer.span``)."""
+    return get_tracer().span(name, export, **attributes)
+
+
+def traced(func=None, name: Optional[str] = None):
+    """
+    Decorador que executa a função (síncrona ou assíncrona) dentro de um span.
+
+    Args:
+        func: Função a ser decorada
+        name: Nome do span (padrão: nome qualificado da função)
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
+def run_subprocess(args, **kwargs) -> subprocess.CompletedProcess:
+    """
+    Executa ``subprocess.run`` dentro de um span ``subprocess.<programa>`` e
+    registra a duração no histograma ``subprocess_duration_seconds``.
+
+    Apenas o programa e o subcomando (ex.: "git push") são registrados como
+    atributo, pois os demais argumentos podem conter textos de issues e commits.
+    """
+    command = " ".join(str(arg) for arg in args[:2]) if isinstance(args, (list, tuple)) else str(args).split(" ", 1)[0]
+    program = command.split(" ", 1)[0]
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with get_tracer().span(f"subprocess.{os.path.basename(program)}", command=command) as process_span:
+            result = subprocess.run(args, **kwargs)
+            process_span.set_attribute("returncode", result.returncode)
+            status = "success" if result.returncode == 0 else "error"
+            return result
+    finally:
+        get_metrics_registry().histogram(
+            "subprocess_duration_seconds", "Latência dos comandos externos (git, gh)"
+        ).observe(time.perf_counter() - started, command=command, status=status)
@@ -1,22 +1,48 @@
 """
 Utilitários do sistema.
+
+Os nomes exportados são importados sob demanda (PEP 562), no primeiro acesso.
 """
-from src.core.utils.data_masking import mask_sensitive_data
-from src.core.utils.env import get_env_status, get_env_var, validate_env
-from src.core.utils.logger import (
-    get_logger,
-    log_debug,
-    log_error,
-    log_info,
-    log_warning,
-    logger,
-)
-from src.core.utils.model_manager import ModelConfig, ModelManager, ModelProvider
+import importlib
+
+# Nome exportado -> módulo que o define; importado no primeiro acesso (PEP 562)
+_EXPORTS = {
+    "mask_sensitive_data": "src.core.utils.data_masking",
+    "mask_stream": "src.core.utils.data_masking",
+    "mask_text": "src.core.utils.data_masking",
+    "get_env_status": "src.core.utils.env",
+    "get_env_var_status": "src.core.utils.env",
+    "get_env_var": "src.core.utils.env",
+    "validate_env": "src.core.utils.env",
+    "FileContentCache": "src.core.utils.file_cache",
+    "get_file_cache": "src.core.utils.file_cache",
+    "get_logger": "src.core.utils.logger",
+    "log_debug": "src.core.utils.logger",
+    "log_error": "src.core.utils.logger",
+    "log_info": "src.core.utils.logger",
+    "log_warning": "src.core.utils.logger",
+    "logger": "src.core.utils.logger",
+    "ModelGateway": "src.core.utils.model_gateway",
+    "get_model_gateway": "src.core.utils.model_gateway",
+    "ModelConfig": "src.core.utils.model_manager",
+    "ModelManager": "src.core.utils.model_manager",
+    "ModelProvider": "src.core.utils.model_manager",
+    "ProjectIndex": "src.core.utils.project_index",
+    "get_project_index": "src.core.utils.project_index",
+    "PromptBudgeter": "src.core.utils.prompt_budget",
+    "TokenCounter": "src.core.utils.prompt_budget",
+    "context_window": "src.core.utils.prompt_budget",
+    "RelevanceIndex": "src.core.utils.relevance_index",
+    "get_relevance_index": "src.core.utils.relevance_index",
+    "CacheMode": "src.core.utils.response_cache",
+    "ResponseCache": "src.core.utils.response_cache",
+}
 
 __all__ = [
     # Ambiente
     "get_env_var",
     "get_env_status",
+    "get_env_var_status",
     "validate_env",
     # Logging
     "logger",
@@ -29,6 +55,42 @@ __all__ = [
     "ModelManager",
     "ModelProvider",
     "ModelConfig",
+    "ModelGateway",
+    "get_model_gateway",
+    # Cache de respostas
+    "CacheMode",
+    "ResponseCache",
+    # Cache de conteúdo de arquivos
+    "FileContentCache",
+    "get_file_cache",
+    # Índice de arquivos do projeto
+    "ProjectIndex",
+    "get_project_index",
+    "RelevanceIndex",
+    "get_relevance_index",
+    # Orçamento de tokens dos prompts
+    "PromptBudgeter",
+    "TokenCounter",
+    "context_window",
     # Mascaramento de dados
     "mask_sensitive_data",
+    "mask_text",
+    "mask_stream",
 ]
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(module_name)
+    value = globals()[name] = getattr(module, name)
+    # O submódulo "logger" não deve ocultar o objeto logger exportado com o mesmo nome
+    submodule_name = module_name.rsplit(".", 1)[1]
+    if _EXPORTS.get(submodule_name) == module_name:
+        globals()[submodule_name] = getattr(module, submodule_name)
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,352 @@
+"""
+Saúde dos provedores de modelos e circuit breaker por (provedor, modelo).
+
+O ``ProviderHealthTracker`` acompanha, em uma janela móvel, a taxa de erros e
+a latência das chamadas a cada modelo. Quando a taxa de erros passa do limite
+(``CIRCUIT_ERROR_RATE``, com pelo menos ``CIRCUIT_MIN_REQUESTS`` chamadas na
+janela de ``CIRCUIT_WINDOW`` segundos), o circuito do modelo abre e as
+chamadas seguintes falham imediatamente com ``CircuitOpenError``, sem
+aguardar timeouts e novas tentativas; o ``ModelManager`` passa então ao modelo
+de elevação ou ao próximo modelo configurado saudável. Depois de
+``CIRCUIT_COOLDOWN`` segundos o circuito fica meio aberto e deixa passar uma
+chamada de teste: se ela funcionar o circuito fecha, senão abre de novo.
+
+Os circuitos abertos são gravados em ``$CACHE_DIR/provider_health.json``, de
+modo que um novo processo da CLI também evite um provedor fora do ar e que o
+``status`` os exiba. ``CIRCUIT_BREAKER=false`` desativa o circuit breaker.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from src.core.metrics import get_metrics_registry
+from src.core.utils.env import get_env_var
+from src.core.utils.rate_limit import is_retryable
+from src.core.utils.response_cache import DEFAULT_CACHE_DIR
+
+# Códigos de erro que indicam um provedor indisponível para esta conta
+UNAVAILABLE_STATUS = frozenset({401, 402, 403, 404})
+UNAVAILABLE_CODES = frozenset({"insufficient_quota", "model_not_available", "model_not_found"})
+
+# Chamadas mantidas na janela de cada modelo
+MAX_SAMPLES = 200
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Estados do circuito de um modelo."""
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+class CircuitOpenError(Exception):
+    """O circuito do modelo está aberto: a chamada não foi feita."""
+
+    def __init__(self, provider: str, model: str, retry_in: float) -> None:
+        super().__init__(
+            f"Circuito aberto para {provider}/{model}: provedor instável, nova tentativa em {retry_in:.0f}s"
+        )
+        self.provider = provider
+        self.model = model
+        self.retry_in = retry_in
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """Indica se o modelo está indisponível para esta conta (quota, autenticação ou modelo inexistente)."""
+    return getattr(error, "code", None) in UNAVAILABLE_CODES or _status(error) in UNAVAILABLE_STATUS
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    Indica se o erro conta contra a saúde do provedor.
+
+    Timeouts, falhas de conexão, erros 5xx, falta de quota e modelo
+    indisponível contam; erros da requisição (ex.: 400) e limites de taxa
+    comuns (429 com ``Retry-After``, já tratados pelo ``ModelRateLimiter``) não.
+    """
+    return is_unavailable(error) or (_status(error) != 429 and is_retryable(error))
+
+
+class ModelHealth:
+    """Janela de resultados e estado do circuito de um modelo."""
+
+    def __init__(self) -> None:
+        # (instante, sucesso, latência)
+        self.samples: Deque[Tuple[float, bool, float]] = deque(maxlen=MAX_SAMPLES)
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.last_error: Optional[str] = None
+
+    def prune(self, now: float, window: float) -> None:
+        """Descarta os resultados fora da janela."""
+        while self.samples and self.samples[0][0] < now - window:
+            self.samples.popleft()
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok, _ in self.samples if not ok) / len(self.samples)
+
+    def latency(self, percent: float = 95.0) -> Optional[float]:
+        """Latência das chamadas da janela no percentil informado."""
+        latencies = sorted(latency for _, _, latency in self.samples)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))]
+
+    @property
+    def score(self) -> float:
+        """Nota de 0 a 1: a taxa de sucesso na janela (0 com o circuito aberto)."""
+        if self.state == CircuitState.OPEN:
+            return 0.0
+        return 1.0 - self.error_rate
+
+
+class ProviderHealthTracker:
+    """Saúde e circuit breaker das chamadas a cada (provedor, modelo)."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        error_rate: Optional[float] = None,
+        min_requests: Optional[int] = None,
+        window: Optional[float] = None,
+        cooldown: Optional[float] = None,
+        path: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Inicializa o rastreador de saúde.
+
+        Args:
+            enabled: Ativa o circuit breaker. Padrão: ``$CIRCUIT_BREAKER`` (true).
+            error_rate: Taxa de erros que abre o circuito. Padrão: ``$CIRCUIT_ERROR_RATE`` (0.5).
+            min_requests: Chamadas na janela antes de avaliar a taxa. Padrão: ``$CIRCUIT_MIN_REQUESTS`` (5).
+            window: Duração da janela em segundos. Padrão: ``$CIRCUIT_WINDOW`` (60).
+            cooldown: Segundos com o circuito aberto antes da chamada de teste.
+                Padrão: ``$CIRCUIT_COOLDOWN`` (30).
+            path: Arquivo com os circuitos abertos. Padrão: ``$CACHE_DIR/provider_health.json``.
+            clock: Relógio (segundos desde a época, compartilhado entre processos).
+        """
+        if enabled is None:
+            enabled = get_env_var("CIRCUIT_BREAKER", "true").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self.error_rate = error_rate if error_rate is not None else float(get_env_var("CIRCUIT_ERROR_RATE", "0.5"))
+        self.min_requests = min_requests if min_requests is not None else int(get_env_var("CIRCUIT_MIN_REQUESTS", "5"))
+        self.window = window if window is not None else float(get_env_var("CIRCUIT_WINDOW", "60"))
+        self.cooldown = cooldown if cooldown is not None else float(get_env_var("CIRCUIT_COOLDOWN", "30"))
+        if path is None:
+            path = Path(get_env_var("CACHE_DIR", str(DEFAULT_CACHE_DIR))) / "provider_health.json"
+        self.path = Path(path)
+        self._clock = clock
+        self._models: Dict[Tuple[str, str], ModelHealth] = {}
+        self._lock = threading.Lock()
+        if self.enabled:
+            self._load()
+
+    def _get(self, provider: str, model: str) -> ModelHealth:
+        key = (provider, model)
+        health = self._models.get(key)
+        if health is None:
+            health = self._models[key] = ModelHealth()
+        return health
+
+    def before_call(self, provider: str, model: str) -> None:
+        """
+        Verifica se a chamada ao modelo pode ser feita.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto (ou meio aberto com
+                uma chamada de teste já em andamento).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            health = self._get(provider, model)
+            if health.state == CircuitState.CLOSED:
+                return
+            now = self._clock()
+            if health.state == CircuitState.OPEN:
+                retry_in = health.opened_at + self.cooldown - now
+                if retry_in > 0:
+                    self._reject(provider, model, retry_in)
+                self._transition(provider, model, health, CircuitState.HALF_OPEN)
+            elif now - health.probe_started < self.cooldown:
+                # Uma chamada de teste por vez (a que não terminar em cooldown é descartada)
+                self._reject(provider, model, health.probe_started + self.cooldown - now)
+            health.probe_started = now
+
+    def _reject(self, provider: str, model: str, retry_in: float) -> None:
+        get_metrics_registry().counter(
+            "model_circuit_rejections_total", "Chamadas recusadas por circuito aberto"
+        ).inc(provider=provider, model=model)
+        raise CircuitOpenError(provider, model, retry_in)
+
+    def record(self, provider: str, model: str, success: bool, latency: float,
+               error: Optional[BaseException] = None) -> None:
+        """
+        Registra o resultado de uma chamada ao modelo.
+
+        Args:
+            provider: Provedor do modelo.
+            model: Identificador do modelo.
+            success: Se a chamada funcionou (erros que não contam contra o
+                provedor, ver ``is_provider_failure``, devem ser registrados como sucesso).
+            latency: Duração da chamada em segundos.
+            error: Erro da chamada, exibido no ``status``.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = self._clock()
+            health = self._get(provider, model)
+            health.samples.append((now, success, latency))
+            health.prune(now, self.window)
+            if not success:
+                health.last_error = str(error)[:200] if error is not None else None
+
+            if health.state == CircuitState.HALF_OPEN:
+                if success:
+                    health.samples.clear()
+                    self._transition(provider, model, health, CircuitState.CLOSED)
+                else:
+                    self._open(provider, model, health, now)
+            elif (
+                health.state == CircuitState.CLOSED
+                and not success
+                and len(health.samples) >= self.min_requests
+                and health.error_rate >= self.error_rate
+            ):
+                self._open(provider, model, health, now)
+
+    def record_error(self, provider: str, model: str, latency: float, error: BaseException) -> None:
+        """
+        Registra uma chamada que falhou: abre o circuito de imediato se o modelo
+        estiver indisponível para a conta, conta como falha se o erro for do
+        provedor e como sucesso se for da requisição.
+        """
+        if is_unavailable(error):
+            self.trip(provider, model, error)
+        else:
+            self.record(provider, model, not is_provider_failure(error), latency, error)
+
+    def trip(self, provider: str, model: str, error: Any = None) -> None:
+        """Abre o circuito do modelo imediatamente (ex.: quota esgotada)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            health = self._get(provider, model)
+            if error is not None:
+                health.last_error = str(error)[:200]
+            self._open(provider, model, health, self._clock())
+
+    def _open(self, provider: str, model: str, health: ModelHealth, now: float) -> None:
+        health.opened_at = now
+        self._transition(provider, model, health, CircuitState.OPEN)
+
+    def _transition(self, provider: str, model: str, health: ModelHealth, state: CircuitState) -> None:
+        """Muda o estado do circuito, atualiza a métrica e grava o arquivo de estado."""
+        previous, health.state = health.state, state
+        get_metrics_registry().gauge(
+            "model_circuit_state", "Estado do circuito por modelo (0 fechado, 1 meio aberto, 2 aberto)"
+        ).set(list(CircuitState).index(state), provider=provider, model=model)
+        if previous != state:
+            message = f"Circuito de {provider}/{model}: {previous.value} -> {state.value}"
+            if state == CircuitState.OPEN:
+                logger.warning(f"ALERTA - circuit_breaker | {message} | Último erro: {health.last_error}")
+            else:
+                logger.info(f"SUCESSO - circuit_breaker | {message}")
+            self._save()
+
+    def is_available(self, provider: str, model: str) -> bool:
+        """Indica se o modelo aceitaria uma chamada agora (sem consumir a chamada de teste)."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            health = self._models.get((provider, model))
+            if health is None or health.state == CircuitState.CLOSED:
+                return True
+            since = health.opened_at if health.state == CircuitState.OPEN else health.probe_started
+            return self._clock() - since >= self.cooldown
+
+    def score(self, provider: str, model: str) -> float:
+        """Nota de saúde do modelo, de 0 a 1 (1 sem chamadas registradas)."""
+        with self._lock:
+            health = self._models.get((provider, model))
+            if health is None:
+                return 1.0
+            health.prune(self._clock(), self.window)
+            return health.score
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Estado, nota, taxa de erros e latência p95 de cada modelo acompanhado."""
+        with self._lock:
+            now = self._clock()
+            entries = []
+            for (provider, model), health in sorted(self._models.items()):
+                health.prune(now, self.window)
+                entry = {
+                    "provider": provider,
+                    "model": model,
+                    "state": health.state.value,
+                    "score": round(health.score, 3),
+                    "requests": len(health.samples),
+                    "error_rate": round(health.error_rate, 3),
+                    "p95_latency": health.latency(95.0),
+                    "last_error": health.last_error,
+                }
+                if health.state == CircuitState.OPEN:
+                    entry["retry_in"] = max(0.0, health.opened_at + self.cooldown - now)
+                entries.append(entry)
+            return entries
+
+    def _load(self) -> None:
+        """Restaura os circuitos abertos gravados por este ou outro processo."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in saved.get("open", []) if isinstance(saved, dict) else []:
+            try:
+                health = self._get(entry["provider"], entry["model"])
+                health.state = CircuitState.OPEN
+                health.opened_at = float(entry["opened_at"])
+                health.last_error = entry.get("last_error")
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def _save(self) -> None:
+        """Grava os circuitos abertos (chamado com o lock adquirido)."""
+        entries = [
+            {"provider": provider, "model": model, "opened_at": health.opened_at, "last_error": health.last_error}
+            for (provider, model), health in self._models.items()
+            if health.state != CircuitState.CLOSED
+        ]
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"open": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # O estado em disco é só uma otimização entre processos
+            pass
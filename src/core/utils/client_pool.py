@@ -0,0 +1,232 @@
+"""
+Registro de clientes de provedores com pools de conexão persistentes.
+
+Os clientes são criados uma única vez por (provedor, chave de API, base_url) e
+reutilizados entre chamadas, mantendo conexões TCP/TLS aquecidas.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.utils.env import get_env_var
+
+# URLs padrão dos provedores compatíveis com a API da OpenAI
+DEFAULT_BASE_URLS = {
+    "openai": None,
+    "openrouter": "https://openrouter.ai/api/v1",
+}
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    """Limites do pool de conexões HTTP de um provedor."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls, provider: str) -> "PoolLimits":
+        """
+        Carrega os limites do pool a partir das variáveis de ambiente do provedor.
+
+        Args:
+            provider: Nome do provedor (openai, openrouter, gemini).
+
+        Returns:
+            Limites configurados para o provedor.
+        """
+        prefix = provider.upper()
+        return cls(
+            max_connections=int(get_env_var(f"{prefix}_MAX_CONNECTIONS", str(cls.max_connections))),
+            max_keepalive_connections=int(
+                get_env_var(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", str(cls.max_keepalive_connections))
+            ),
+            keepalive_expiry=float(get_env_var(f"{prefix}_KEEPALIVE_EXPIRY", str(cls.keepalive_expiry))),
+            http2=get_env_var(f"{prefix}_HTTP2", "false").lower() in ("1", "true", "yes"),
+        )
+
+
+ClientKey = Tuple[str, str, Optional[str]]
+
+
+class ModelClientPool:
+    """
+    Registro de clientes assíncronos de longa duração, um por
+    (provedor, chave de API, base_url).
+
+    Clientes httpx ficam vinculados ao event loop em que foram criados; se o
+    loop mudar (por exemplo, entre chamadas de ``asyncio.run``), o cliente é
+    recriado de forma transparente.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, PoolLimits]] = None) -> None:
+        """
+        Inicializa o registro.
+
+        Args:
+            limits: Limites de pool por provedor. Provedores ausentes usam
+                os valores das variáveis de ambiente.
+        """
+        self._limits = dict(limits or {})
+        self._clients: Dict[ClientKey, Tuple[Any, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._gemini_models: Dict[Tuple[str, str], Any] = {}
+        self._gemini_key: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get_limits(self, provider: str) -> PoolLimits:
+        """Retorna os limites de pool configurados para o provedor."""
+        if provider not in self._limits:
+            self._limits[provider] = PoolLimits.from_env(provider)
+        return self._limits[provider]
+
+    def get_openai_compatible_client(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Obtém (ou cria) um cliente assíncrono compatível com a API da OpenAI.
+
+        Args:
+            provider: Nome do provedor (openai ou openrouter).
+            api_key: Chave da API.
+            base_url: URL base da API; se None, usa a URL padrão do provedor.
+            timeout: Tempo limite padrão das requisições do cliente. Como o cliente
+                é compartilhado pela chave, prefira informar o tempo limite em
+                cada chamada.
+
+        Returns:
+            Instância de ``openai.AsyncOpenAI`` reutilizável.
+        """
+        base_url = base_url or DEFAULT_BASE_URLS.get(provider)
+        key: ClientKey = (provider, api_key, base_url)
+        loop = self._current_loop()
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                client, client_loop = entry
+                if client_loop is loop or client_loop is None or loop is None:
+                    return client
+                self._discard(client, client_loop, loop)
+
+            client = self._build_openai_client(provider, api_key, base_url, timeout)
+            self._clients[key] = (client, loop)
+            return client
+
+    def get_gemini_model(self, api_key: str, model_id: str) -> Any:
+        """
+        Obtém (ou cria) um modelo Gemini, configurando a SDK apenas quando a
+        chave de API muda.
+
+        Args:
+            api_key: Chave da API do Gemini.
+            model_id: Identificador do modelo.
+
+        Returns:
+            Instância de ``genai.GenerativeModel`` reutilizável.
+        """
+        import google.generativeai as genai
+
+        with self._lock:
+            if self._gemini_key != api_key:
+                genai.configure(api_key=api_key)
+                self._gemini_key = api_key
+                # Modelos criados com outra chave não são reaproveitados
+                self._gemini_models = {
+                    k: v for k, v in self._gemini_models.items() if k[0] == api_key
+                }
+
+            model = self._gemini_models.get((api_key, model_id))
+            if model is None:
+                model = genai.GenerativeModel(model_id)
+                self._gemini_models[(api_key, model_id)] = model
+            return model
+
+    def _build_openai_client(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: Optional[str],
+        timeout: Optional[float],
+    ) -> Any:
+        """Cria um cliente OpenAI com pool de conexões keep-alive."""
+        import httpx
+        import openai
+
+        limits = self.get_limits(provider)
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+            ),
+            http2=limits.http2,
+        )
+        # As novas tentativas são feitas pelo ModelManager, que respeita os limites de taxa
+        options: Dict[str, Any] = {"api_key": api_key, "http_client": http_client, "max_retries": 0}
+        if base_url:
+            options["base_url"] = base_url
+        if timeout is not None:
+            options["timeout"] = timeout
+        return openai.AsyncOpenAI(**options)
+
+    @staticmethod
+    def _discard(client: Any, client_loop: asyncio.AbstractEventLoop,
+                 loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Fecha um cliente substituído por ter sido criado em outro event loop,
+        liberando as suas conexões.
+
+        O fechamento é feito no loop do cliente, se ele ainda estiver em
+        execução, ou agendado no loop atual (sem bloquear quem chamou).
+        """
+        close = getattr(client, "close", None)
+        if close is None:
+            return
+        if client_loop.is_running():
+            asyncio.run_coroutine_threadsafe(close(), client_loop)
+            return
+
+        def ignore_errors(task: asyncio.Task) -> None:
+            # Conexões do loop encerrado podem falhar ao fechar; já estão inutilizáveis
+            if not task.cancelled():
+                task.exception()
+
+        loop.create_task(close()).add_done_callback(ignore_errors)
+
+    @staticmethod
+    def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+        """Retorna o event loop em execução, se houver."""
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def aclose(self) -> None:
+        """
+        Fecha todos os clientes do registro.
+
+        Clientes vinculados a outro event loop (já encerrado) são apenas
+        descartados, pois não podem ser aguardados no loop atual.
+        """
+        loop = self._current_loop()
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+            self._gemini_models.clear()
+            self._gemini_key = None
+
+        for client, client_loop in entries:
+            if client_loop is not None and client_loop is not loop:
+                continue
+            close = getattr(client, "close", None)
+            if close is not None:
+                await close()
@@ -1,34 +1,21 @@
 """
 Funções para mascaramento de dados sensíveis.
-"""
-import re
-from typing import Any, Dict, List, Union
-
-def mask_sensitive_data(data: Union[str, Dict[str, Any], List[Any]]) -> Union[str, Dict[str, Any], List[Any]]:
-    """
-    Mascara dados sensíveis em strings, dicionários ou listas.
 
-    Args:
-        data: Dados a serem mascarados. Pode ser uma string, dicionário ou lista.
+A implementação fica em ``src.core.masking``, compartilhada com o logger e
+os agentes; este módulo mantém os nomes exportados por ``src.core.utils``.
+"""
+from src.core.masking import (
+    is_sensitive_key,
+    mask_partially,
+    mask_sensitive_data,
+    mask_stream,
+    mask_text,
+)
 
-    Returns:
-        Dados com informações sensíveis mascaradas.
-    """
-    if isinstance(data, str):
-        # Mascara tokens e chaves de API
-        patterns = [
-            (r'["\']?[a-zA-Z0-9-_]{20,}["\']?', '***API_KEY***'),  # API keys
-            (r'Bearer\s+[a-zA-Z0-9-_.]+', 'Bearer ***TOKEN***'),  # Bearer tokens
-            (r'github_pat_[a-zA-Z0-9_]+', '***GITHUB_PAT***'),  # GitHub PATs
-            (r'ghp_[a-zA-Z0-9]+', '***GITHUB_TOKEN***'),  # GitHub tokens
-            (r'sk-[a-zA-Z0-9]+', '***OPENAI_KEY***'),  # OpenAI keys
-        ]
-        masked = data
-        for pattern, replacement in patterns:
-            masked = re.sub(pattern, replacement, masked)
-        return masked
-    elif isinstance(data, dict):
-        return {k: mask_sensitive_data(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [mask_sensitive_data(item) for item in data]
-    return data 
\ No newline at end of file
+__all__ = [
+    "is_sensitive_key",
+    "mask_partially",
+    "mask_sensitive_data",
+    "mask_stream",
+    "mask_text",
+]
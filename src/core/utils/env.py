@@ -4,6 +4,8 @@ Utilitários para gerenciamento de variáveis de ambiente.
 import os
 from typing import Dict, Optional
 
+from src.core.masking import is_sensitive_key, mask_partially
+
 
 def get_env_var(name: str, default: Optional[str] = None, args_value: Optional[str] = None) -> Optional[str]:
     """
@@ -25,6 +27,24 @@ def get_env_var(name: str, default: Optional[str] = None, args_value: Optional[s
     return os.environ.get(name, default)
 
 
+def get_env_var_status(name: str) -> str:
+    """
+    Retorna o status de uma variável de ambiente sem expor seu valor.
+
+    Args:
+        name: Nome da variável.
+
+    Returns:
+        "não definido", "configurado" (variáveis sensíveis) ou o valor mascarado.
+    """
+    value = os.environ.get(name)
+    if not value:
+        return "não definido"
+    if is_sensitive_key(name):
+        return "configurado"
+    return mask_partially(value)
+
+
 def get_env_status() -> Dict[str, Dict[str, bool]]:
     """
     Verifica o status das variáveis de ambiente necessárias.
@@ -51,8 +71,30 @@ def get_env_status() -> Dict[str, Dict[str, bool]]:
         "CACHE_ENABLED": False,
         "CACHE_TTL": False,
         "CACHE_DIR": False,
+        "CACHE_MODE": False,
+        "CONTEXT_STORAGE": False,
+        "FILE_CACHE_MAX_BYTES": False,
         "LOG_LEVEL": False,
         "LOG_FILE": False,
+        "LOG_ASYNC": False,
+        "LOG_QUEUE_SIZE": False,
+        "LOG_QUEUE_POLICY": False,
+        "LOG_JSON": False,
+        "TRACE_ENABLED": False,
+        "TRACE_DIR": False,
+        "METRICS_FILE": False,
+        "METRICS_PORT": False,
+        "MODEL_COALESCE": False,
+        "MODEL_HEDGE_ENABLED": False,
+        "MODEL_HEDGE_PERCENTILE": False,
+        "MODEL_HEDGE_MAX_RATE": False,
+        "CIRCUIT_BREAKER": False,
+        "CIRCUIT_ERROR_RATE": False,
+        "CIRCUIT_COOLDOWN": False,
+        "MODEL_ROUTER": False,
+        "MODEL_PRICES_FILE": False,
+        "AGENT_DAEMON": False,
+        "AGENT_DAEMON_SOCKET": False,
     }
 
     # Verifica variáveis obrigatórias
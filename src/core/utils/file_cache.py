@@ -0,0 +1,185 @@
+"""
+Cache de conteúdo de arquivos usado na montagem de prompts.
+
+Cada entrada é validada por (caminho, mtime_ns, tamanho): se o arquivo mudou,
+é relido. Só o prefixo necessário é lido do disco; arquivos grandes são lidos
+por ``mmap``. A memória total é limitada, descartando as entradas usadas há
+mais tempo. A instância compartilhada (``get_file_cache``) é reutilizada por
+todas as etapas de uma execução e entre execuções do mesmo processo.
+"""
+import codecs
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MMAP_THRESHOLD = 1024 * 1024
+_READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class _CachedFile:
+    mtime_ns: int
+    size: int
+    text: str
+    complete: bool  # True se ``text`` contém o arquivo inteiro
+
+
+class FileContentCache:
+    """Cache de texto de arquivos com memória limitada e validação por mtime/tamanho."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        mmap_threshold: Optional[int] = None,
+        encoding: str = "utf-8",
+    ) -> None:
+        """
+        Inicializa o cache.
+
+        Args:
+            max_bytes: Limite aproximado de memória (caracteres armazenados).
+                Padrão: FILE_CACHE_MAX_BYTES ou 32 MiB.
+            mmap_threshold: Tamanho a partir do qual arquivos são lidos com mmap.
+                Padrão: FILE_CACHE_MMAP_THRESHOLD ou 1 MiB.
+            encoding: Codificação dos arquivos (erros são substituídos).
+        """
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.environ.get("FILE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+        )
+        self.mmap_threshold = mmap_threshold if mmap_threshold is not None else int(
+            os.environ.get("FILE_CACHE_MMAP_THRESHOLD", DEFAULT_MMAP_THRESHOLD)
+        )
+        self.encoding = encoding
+        self._entries: "OrderedDict[str, _CachedFile]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _decode_prefix(self, path: str, size: int, max_chars: Optional[int]) -> Tuple[str, bool]:
+        """Lê e decodifica até ``max_chars`` caracteres. Retorna (texto, arquivo completo)."""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        parts, chars, offset = [], 0, 0
+
+        with open(path, "rb") as f:
+            mapped = None
+            if size >= self.mmap_threshold and size > 0:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                while max_chars is None or chars < max_chars:
+                    # Cada caractere ocupa ao menos um byte: nunca é preciso ler mais que o que falta
+                    wanted = _READ_CHUNK if max_chars is None else max(max_chars - chars, 1)
+                    if mapped is not None:
+                        data = mapped[offset:offset + wanted]
+                    else:
+                        data = f.read(wanted)
+                    offset += len(data)
+                    eof = not data or offset >= size
+                    text = decoder.decode(data, final=eof)
+                    parts.append(text)
+                    chars += len(text)
+                    if eof:
+                        break
+            finally:
+                if mapped is not None:
+                    mapped.close()
+
+        text = "".join(parts)
+        complete = offset >= size
+        if max_chars is not None and len(text) > max_chars:
+            text = text[:max_chars]
+            complete = False
+        return text, complete
+
+    def read_prefix(self, path: str, max_chars: Optional[int] = None) -> Tuple[str, bool]:
+        """
+        Retorna o início do arquivo.
+
+        Args:
+            path: Caminho do arquivo.
+            max_chars: Número máximo de caracteres. Se None, o arquivo inteiro.
+
+        Returns:
+            Tupla (texto, truncado), em que truncado indica que o arquivo tem
+            mais conteúdo que o retornado.
+
+        Raises:
+            OSError: Se o arquivo não puder ser lido.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                if entry.complete or (max_chars is not None and len(entry.text) >= max_chars):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    text = entry.text if max_chars is None else entry.text[:max_chars]
+                    return text, not entry.complete or len(entry.text) > len(text)
+            self.misses += 1
+
+        text, complete = self._decode_prefix(key, stat.st_size, max_chars)
+        self._store(key, _CachedFile(stat.st_mtime_ns, stat.st_size, text, complete))
+        return text, not complete
+
+    def read(self, path: str, max_chars: Optional[int] = None) -> str:
+        """Retorna o conteúdo (ou os primeiros ``max_chars`` caracteres) do arquivo."""
+        return self.read_prefix(path, max_chars)[0]
+
+    def _store(self, key: str, entry: _CachedFile) -> None:
+        """Armazena a entrada e descarta as menos usadas se o limite for excedido."""
+        if len(entry.text) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total -= len(previous.text)
+            self._entries[key] = entry
+            self._total += len(entry.text)
+            while self._total > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= len(evicted.text)
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self) -> dict:
+        """Estatísticas de uso do cache."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_file_cache: Optional[FileContentCache] = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileContentCache:
+    """
+    Retorna o cache de arquivos compartilhado pelo processo.
+
+    Returns:
+        Instância única de ``FileContentCache``.
+    """
+    global _file_cache
+    with _file_cache_lock:
+        if _file_cache is None:
+            _file_cache = FileContentCache()
+        return _file_cache
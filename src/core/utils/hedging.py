@@ -0,0 +1,176 @@
+"""
+Requisições especulativas (hedging) ao modelo de elevação.
+
+Sem hedging, o modelo de elevação só é usado depois que a chamada ao modelo
+principal falha, o que pode levar o tempo limite inteiro mais as novas
+tentativas. Com uma ``HedgePolicy`` ativa, se o modelo principal não
+responder até o percentil observado da sua latência (p95 por padrão), a mesma
+chamada é feita ao modelo de elevação; vale a primeira resposta bem-sucedida
+e a outra chamada é cancelada.
+
+Para não dobrar o gasto, as chamadas especulativas consomem um orçamento
+(``HedgeBudget``): cada chamada principal acrescenta ``max_rate`` ao saldo e
+cada chamada especulativa custa 1, de modo que no máximo ~``max_rate`` das
+chamadas (10% por padrão) são duplicadas.
+
+A política é configurada por ``MODEL_HEDGE_*`` e, para um agente específico,
+por ``<AGENTE>_HEDGE_*`` (ex.: ``CONCEPT_GENERATION_AGENT_HEDGE_ENABLED=true``).
+"""
+import asyncio
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from src.core.utils.env import get_env_var
+
+
+class HedgedRequestError(Exception):
+    """A chamada principal e a especulativa falharam."""
+
+
+def _agent_env_prefix(agent: str) -> str:
+    """ConceptGenerationAgent -> CONCEPT_GENERATION_AGENT."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", agent).upper()
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """Quando e com que frequência fazer chamadas especulativas ao modelo de elevação."""
+    enabled: bool = False
+    # Percentil da latência do modelo principal após o qual a chamada é duplicada
+    percentile: float = 95.0
+    # Fração máxima das chamadas que podem ser duplicadas
+    max_rate: float = 0.1
+    # Limites do atraso antes da chamada especulativa (segundos)
+    min_delay: float = 0.5
+    max_delay: float = 30.0
+    # Latências observadas necessárias para usar o percentil
+    min_samples: int = 20
+    # Atraso usado antes de haver amostras suficientes (None: não duplica)
+    initial_delay: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, agent: Optional[str] = None) -> "HedgePolicy":
+        """
+        Carrega a política de ``<AGENTE>_HEDGE_*`` (se ``agent`` for informado)
+        ou de ``MODEL_HEDGE_*``.
+
+        Args:
+            agent: Nome da classe do agente (ex.: "ConceptGenerationAgent").
+        """
+        prefixes = ([f"{_agent_env_prefix(agent)}_HEDGE"] if agent else []) + ["MODEL_HEDGE"]
+
+        def value(name: str, default: Any) -> Any:
+            for prefix in prefixes:
+                setting = get_env_var(f"{prefix}_{name}")
+                if setting not in (None, ""):
+                    return setting
+            return default
+
+        initial_delay = value("INITIAL_DELAY", cls.initial_delay)
+        return cls(
+            enabled=str(value("ENABLED", "false")).lower() in ("1", "true", "yes"),
+            percentile=float(value("PERCENTILE", cls.percentile)),
+            max_rate=float(value("MAX_RATE", cls.max_rate)),
+            min_delay=float(value("MIN_DELAY", cls.min_delay)),
+            max_delay=float(value("MAX_DELAY", cls.max_delay)),
+            min_samples=int(value("MIN_SAMPLES", cls.min_samples)),
+            initial_delay=float(initial_delay) if initial_delay is not None else None,
+        )
+
+    def delay(self, samples: int, observed: Optional[float]) -> Optional[float]:
+        """
+        Atraso antes da chamada especulativa.
+
+        Args:
+            samples: Número de latências observadas do modelo principal.
+            observed: Latência observada no percentil da política.
+
+        Returns:
+            Segundos de espera, ou None se a chamada não deve ser duplicada.
+        """
+        if samples < self.min_samples or observed is None:
+            if self.initial_delay is None:
+                return None
+            observed = self.initial_delay
+        return min(max(observed, self.min_delay), self.max_delay)
+
+
+class HedgeBudget:
+    """Saldo de chamadas especulativas, reposto a cada chamada principal."""
+
+    def __init__(self, burst: float = 10.0) -> None:
+        """
+        Args:
+            burst: Saldo máximo acumulado (chamadas especulativas seguidas).
+        """
+        self.burst = burst
+        self.balance = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self, rate: float) -> None:
+        """Credita ``rate`` ao saldo por uma chamada principal."""
+        with self._lock:
+            self.balance = min(self.burst, self.balance + rate)
+
+    def try_spend(self) -> bool:
+        """Debita uma chamada especulativa, se houver saldo."""
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+async def hedged_call(
+    primary: Callable[[], Awaitable[Any]],
+    hedge: Callable[[], Awaitable[Any]],
+    delay: Optional[float],
+    budget: HedgeBudget,
+) -> Tuple[Any, str]:
+    """
+    Executa ``primary`` e, se não terminar em ``delay`` segundos e houver
+    saldo, também ``hedge``; retorna a primeira resposta bem-sucedida.
+
+    Args:
+        primary: Inicia a chamada ao modelo principal.
+        hedge: Inicia a mesma chamada ao modelo de elevação.
+        delay: Atraso antes da chamada especulativa (None: não duplica).
+        budget: Orçamento de chamadas especulativas.
+
+    Returns:
+        Tupla (resposta, origem), com origem "primary" ou "hedge". Se a chamada
+        principal falhar antes da especulativa ser feita, o erro é propagado.
+
+    Raises:
+        HedgedRequestError: Se as duas chamadas falharem.
+    """
+    primary_task = asyncio.ensure_future(primary())
+    hedge_task = None
+    try:
+        if delay is None:
+            return await primary_task, "primary"
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done or not budget.try_spend():
+            return await primary_task, "primary"
+
+        hedge_task = asyncio.ensure_future(hedge())
+        pending = {primary_task, hedge_task}
+        errors = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            errors.extend(task.exception() for task in done if task.exception() is not None)
+            if winners:
+                # Se as duas terminaram juntas, prefere a principal
+                task = primary_task if primary_task in winners else winners[0]
+                return task.result(), "primary" if task is primary_task else "hedge"
+        raise HedgedRequestError(
+            f"Modelo principal e modelo de elevação falharam: {'; '.join(str(error) for error in errors)}"
+        ) from errors[0]
+    finally:
+        # Cancela a chamada perdedora (ou ambas, se quem aguarda foi cancelado)
+        for task in (primary_task, hedge_task):
+            if task is not None and not task.done():
+                task.cancel()
@@ -0,0 +1,189 @@
+"""
+Gateway único de geração para os agentes.
+
+Todas as chamadas a modelos passam pelo ``ModelManager`` compartilhado, em um
+event loop dedicado executado em uma thread de fundo. Assim, cache de respostas,
+pools de conexão, limites de taxa e de concorrência por provedor, circuit
+breaker, fallback e métricas se aplicam de forma uniforme, e chamadas de vários
+agentes podem ocorrer em paralelo.
+
+Código assíncrono usa ``agenerate``; código síncrono existente usa ``generate``.
+"""
+import asyncio
+import contextlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.core.utils.model_manager import ModelManager
+from src.core.utils.response_cache import CacheMode, current_cache_mode, use_cache_mode
+
+
+class ModelGateway:
+    """Ponto único de acesso aos modelos, com interface assíncrona e síncrona."""
+
+    def __init__(self, manager: Optional[ModelManager] = None) -> None:
+        """
+        Inicializa o gateway.
+
+        Args:
+            manager: Gerenciador de modelos. Se None, cria um novo (criado sob demanda).
+        """
+        self._manager = manager
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def manager(self) -> ModelManager:
+        """Gerenciador de modelos usado pelo gateway."""
+        with self._lock:
+            if self._manager is None:
+                self._manager = ModelManager()
+            return self._manager
+
+    @contextlib.contextmanager
+    def cache_mode(self, mode: Union[CacheMode, str]) -> Iterator[None]:
+        """
+        Usa ``mode`` no cache de respostas nas chamadas feitas pelo contexto
+        atual enquanto o bloco executa (ex.: a opção ``--cache-mode`` de um
+        comando da CLI). Chamadas simultâneas de outros contextos, como outros
+        comandos do daemon, mantêm o próprio modo.
+
+        Args:
+            mode: Modo de uso do cache (off, read, write, readwrite).
+        """
+        with use_cache_mode(mode):
+            yield
+
+    @staticmethod
+    def _call_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Acrescenta o modo de cache do contexto chamador, que não chega ao event loop do gateway."""
+        mode = current_cache_mode()
+        if mode is not None:
+            kwargs.setdefault("cache_mode", mode)
+        return kwargs
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Inicia o event loop de fundo, se ainda não estiver em execução."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="model-gateway",
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
+
+    async def agenerate(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        api_key: Optional[str] = None,
+        elevation_model: Optional[str] = None,
+        force: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Gera uma resposta de forma assíncrona.
+
+        Args:
+            messages: Mensagens de chat enviadas ao modelo.
+            model: Nome do modelo.
+            api_key: Chave da API explícita (ex.: token do agente).
+            elevation_model: Modelo usado em caso de falha do principal.
+            force: Se True, não usa o modelo de elevação.
+            temperature: Temperatura da chamada.
+            max_tokens: Limite de tokens da resposta.
+            **kwargs: Argumentos adicionais para ``ModelManager.chat`` (ex.:
+                response_format, ou return_model=True para saber qual modelo respondeu).
+
+        Returns:
+            Conteúdo textual da resposta, ou a tupla (resposta, modelo) com ``return_model``.
+        """
+        loop = self._ensure_loop()
+        coro = self.manager.chat(
+            messages,
+            model_name=model,
+            elevation_model=elevation_model,
+            force=force,
+            api_key=api_key,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **self._call_options(kwargs),
+        )
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def generate(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        api_key: Optional[str] = None,
+        elevation_model: Optional[str] = None,
+        force: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Versão síncrona de ``agenerate`` para os agentes existentes.
+
+        Bloqueia apenas a thread chamadora; a chamada ao provedor ocorre no
+        event loop do gateway.
+
+        Raises:
+            RuntimeError: Se chamado a partir do próprio event loop do gateway.
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("ModelGateway.generate não pode ser chamado no event loop do gateway; use agenerate")
+
+        coro = self.manager.chat(
+            messages,
+            model_name=model,
+            elevation_model=elevation_model,
+            force=force,
+            api_key=api_key,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **self._call_options(kwargs),
+        )
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self) -> None:
+        """Encerra os clientes do gerenciador e o event loop de fundo."""
+        with self._lock:
+            loop, thread, manager = self._loop, self._thread, self._manager
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        if manager is not None:
+            asyncio.run_coroutine_threadsafe(manager.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join()
+        loop.close()
+
+
+_gateway: Optional[ModelGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_model_gateway() -> ModelGateway:
+    """
+    Retorna o gateway de modelos compartilhado pelo processo.
+
+    Returns:
+        Instância única de ``ModelGateway``.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = ModelGateway()
+        return _gateway
@@ -1,17 +1,31 @@
 """
 Gerenciador de modelos de IA com suporte a múltiplos provedores e fallback automático.
 """
+import asyncio
+import logging
+import time
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import google.generativeai as genai
-import openai
-import openrouter
-from cachetools import TTLCache
 from pydantic import BaseModel
-from tenacity import retry, stop_after_attempt, wait_exponential
 
+from src.core.metrics import get_metrics_registry
+from src.core.utils.circuit_breaker import CircuitOpenError, ProviderHealthTracker
+from src.core.utils.client_pool import ModelClientPool
 from src.core.utils.env import get_env_var
+from src.core.utils.hedging import HedgeBudget, HedgedRequestError, HedgePolicy, hedged_call
+from src.core.utils.model_router import ModelRouter
+from src.core.utils.rate_limit import (
+    ModelRateLimiter,
+    ProviderConcurrencyLimiter,
+    backoff_delay,
+    estimate_request_tokens,
+    is_retryable,
+    retry_after,
+)
+from src.core.utils.response_cache import CacheMode, ResponseCache, make_cache_key, use_cache_mode
+from src.core.utils.single_flight import SingleFlight
+from src.core.tracing import span
 
 
 class ModelProvider(str, Enum):
@@ -21,6 +35,24 @@ class ModelProvider(str, Enum):
     GEMINI = "gemini"
 
 
+logger = logging.getLogger(__name__)
+
+
+def _record_retry(model_name: str) -> None:
+    """Conta as novas tentativas de chamadas aos modelos."""
+    get_metrics_registry().counter(
+        "model_retries_total", "Novas tentativas de chamadas aos modelos"
+    ).inc(model=model_name)
+
+
+# Variáveis de ambiente com a chave de cada provedor
+PROVIDER_KEY_VARS = {
+    ModelProvider.OPENAI: "OPENAI_KEY",
+    ModelProvider.OPENROUTER: "OPENROUTER_KEY",
+    ModelProvider.GEMINI: "GEMINI_KEY",
+}
+
+
 class ModelConfig(BaseModel):
     """Configuração de um modelo."""
     provider: ModelProvider
@@ -30,19 +62,50 @@ class ModelConfig(BaseModel):
     max_retries: int = 3
     temperature: float = 0.7
     max_tokens: Optional[int] = None
+    base_url: Optional[str] = None
 
 
 class ModelManager:
     """Gerenciador de modelos de IA."""
 
-    def __init__(self) -> None:
-        """Inicializa o gerenciador de modelos."""
-        self.cache = TTLCache(
-            maxsize=int(get_env_var("CACHE_MAXSIZE", "100")),
-            ttl=int(get_env_var("CACHE_TTL", "3600"))
-        )
+    def __init__(
+        self,
+        client_pool: Optional[ModelClientPool] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[ProviderConcurrencyLimiter] = None,
+        rate_limiter: Optional[ModelRateLimiter] = None,
+        health: Optional[ProviderHealthTracker] = None,
+    ) -> None:
+        """
+        Inicializa o gerenciador de modelos.
+
+        Args:
+            client_pool: Registro de clientes compartilhado. Se None, cria um novo.
+            cache: Cache persistente de respostas. Se None, usa as variáveis CACHE_*.
+            limiter: Limite de chamadas simultâneas por provedor. Se None, usa
+                as variáveis <PROVEDOR>_MAX_CONCURRENCY.
+            rate_limiter: Limites de requisições e tokens por minuto por modelo.
+                Se None, usa as variáveis <PROVEDOR>_RPM e <PROVEDOR>_TPM.
+            health: Saúde e circuit breaker por modelo. Se None, usa as
+                variáveis CIRCUIT_*.
+        """
+        self.cache = cache or ResponseCache()
+        self.limiter = limiter or ProviderConcurrencyLimiter()
+        self.rate_limiter = rate_limiter or ModelRateLimiter()
+        self.health = health or ProviderHealthTracker()
+        # Chamadas idênticas simultâneas compartilham uma única chamada ao provedor
+        self.coalesce = get_env_var("MODEL_COALESCE", "true").lower() not in ("0", "false", "no")
+        self._in_flight = SingleFlight()
+        # Orçamento de chamadas especulativas por modelo principal
+        self._hedge_budgets: Dict[str, HedgeBudget] = {}
+        get_metrics_registry().gauge(
+            "model_in_flight_requests", "Chamadas distintas aos provedores em andamento"
+        ).labels().set_function(self._in_flight.in_flight)
+        self.client_pool = client_pool or ModelClientPool()
         self.configs: Dict[str, ModelConfig] = {}
         self._load_configs()
+        # Escolha do modelo por classe de tarefa (MODEL_ROUTER, ROUTER_<TAREFA>_*)
+        self.router = ModelRouter(self)
 
     def _load_configs(self) -> None:
         """Carrega as configurações dos modelos."""
@@ -74,6 +137,7 @@ class ModelManager:
                 provider=ModelProvider.OPENAI,
                 model_id=model_id,
                 api_key=api_key,
+                base_url=get_env_var("OPENAI_BASE_URL"),
                 timeout=int(get_env_var(f"OPENAI_{name.upper()}_TIMEOUT", get_env_var("OPENAI_TIMEOUT", "30"))),
                 max_retries=int(get_env_var(f"OPENAI_{name.upper()}_MAX_RETRIES", get_env_var("OPENAI_MAX_RETRIES", "3"))),
                 temperature=float(get_env_var(f"OPENAI_{name.upper()}_TEMPERATURE", get_env_var("OPENAI_TEMPERATURE", "0.7"))),
@@ -93,6 +157,7 @@ class ModelManager:
                 provider=ModelProvider.OPENROUTER,
                 model_id=model_id,
                 api_key=api_key,
+                base_url=get_env_var("OPENROUTER_BASE_URL"),
                 timeout=int(get_env_var(f"OPENROUTER_{name.upper().replace('/', '_')}_TIMEOUT", get_env_var("OPENROUTER_TIMEOUT", "30"))),
                 max_retries=int(get_env_var(f"OPENROUTER_{name.upper().replace('/', '_')}_MAX_RETRIES", get_env_var("OPENROUTER_MAX_RETRIES", "3"))),
                 temperature=float(get_env_var(f"OPENROUTER_{name.upper().replace('/', '_')}_TEMPERATURE", get_env_var("OPENROUTER_TEMPERATURE", "0.7"))),
@@ -125,10 +190,116 @@ class ModelManager:
         """Retorna a configuração de um modelo."""
         return self.configs.get(model_name)
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-    )
+    def is_model_available(self, model_name: str) -> bool:
+        """Indica se o modelo pode ser usado agora (configurado e com o circuito fechado)."""
+        try:
+            config = self.resolve_config(model_name)
+        except ValueError:
+            return False
+        return self.health.is_available(config.provider.value, config.model_id)
+
+    def mark_model_unavailable(self, model_name: str, error: Any = None) -> None:
+        """Abre o circuito do modelo (ex.: quota esgotada), desviando as próximas chamadas."""
+        config = self.resolve_config(model_name)
+        self.health.trip(config.provider.value, config.model_id, error)
+
+    def get_next_available_model(self, model_name: str) -> Optional[str]:
+        """
+        Retorna o modelo configurado mais saudável, além de ``model_name``,
+        com o circuito fechado; None se não houver.
+        """
+        candidates = [
+            name for name in self.configs if name != model_name and self.is_model_available(name)
+        ]
+        if not candidates:
+            return None
+        # Em caso de empate, vale a ordem das configurações
+        return max(
+            candidates,
+            key=lambda name: self.health.score(self.configs[name].provider.value, self.configs[name].model_id),
+        )
+
+    def get_error_message(self, model_name: str, error: Any) -> str:
+        """Monta a mensagem de erro de um modelo a partir dos detalhes do erro."""
+        if isinstance(error, dict):
+            error = error.get("message") or error.get("code") or error
+        return f"Modelo {model_name} indisponível: {error}"
+
+    def resolve_config(
+        self,
+        model_name: str,
+        api_key: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ) -> ModelConfig:
+        """
+        Obtém a configuração de um modelo, aplicando parâmetros da chamada.
+
+        Modelos não registrados são aceitos quando há chave disponível; o
+        provedor é inferido pelo nome (``gemini-*``, ``org/modelo`` ou OpenAI).
+
+        Args:
+            model_name: Nome do modelo.
+            api_key: Chave da API explícita (prioritária sobre as variáveis de ambiente).
+            temperature: Temperatura da chamada.
+            max_tokens: Limite de tokens da resposta.
+            timeout: Tempo limite de cada tentativa (segundos).
+            max_retries: Número máximo de novas tentativas em erros temporários.
+
+        Returns:
+            Configuração efetiva do modelo.
+
+        Raises:
+            ValueError: Se o modelo não estiver disponível.
+        """
+        config = self.get_model_config(model_name)
+        if config is None:
+            provider = self._infer_provider(model_name)
+            key = api_key or get_env_var(PROVIDER_KEY_VARS[provider])
+            if not key:
+                raise ValueError(f"Modelo {model_name} não disponível")
+            config = ModelConfig(
+                provider=provider,
+                model_id=model_name,
+                api_key=key,
+                base_url=get_env_var(f"{provider.value.upper()}_BASE_URL"),
+            )
+
+        updates: Dict[str, Any] = {}
+        if api_key:
+            updates["api_key"] = api_key
+        if temperature is not None:
+            updates["temperature"] = temperature
+        if max_tokens is not None:
+            updates["max_tokens"] = max_tokens
+        if timeout is not None:
+            updates["timeout"] = timeout
+        if max_retries is not None:
+            updates["max_retries"] = max_retries
+        return config.model_copy(update=updates) if updates else config
+
+    def _key_for(self, model_name: str, requested_model: str, api_key: Optional[str]) -> Optional[str]:
+        """Chave explícita da chamada, se ``model_name`` for do provedor do modelo pedido."""
+        if api_key and self._provider_of(model_name) != self._provider_of(requested_model):
+            return None
+        return api_key
+
+    def _provider_of(self, model_name: str) -> ModelProvider:
+        """Provedor de um modelo registrado ou inferido pelo nome."""
+        config = self.configs.get(model_name)
+        return config.provider if config else self._infer_provider(model_name)
+
+    @staticmethod
+    def _infer_provider(model_name: str) -> ModelProvider:
+        """Infere o provedor de um modelo não registrado pelo nome."""
+        if model_name.startswith("gemini"):
+            return ModelProvider.GEMINI
+        if "/" in model_name:
+            return ModelProvider.OPENROUTER
+        return ModelProvider.OPENAI
+
     async def generate(
         self,
         prompt: str,
@@ -154,66 +325,397 @@ class ModelManager:
             ValueError: Se o modelo não estiver disponível.
             Exception: Se ocorrer um erro na geração.
         """
-        # Verifica se o modelo está disponível
-        config = self.get_model_config(model_name)
-        if not config:
-            raise ValueError(f"Modelo {model_name} não disponível")
+        return await self.chat(
+            [{"role": "user", "content": prompt}],
+            model_name=model_name,
+            elevation_model=elevation_model,
+            force=force,
+            **kwargs,
+        )
 
-        # Tenta usar o cache
-        cache_key = f"{model_name}:{prompt}"
-        if cached := self.cache.get(cache_key):
-            return cached
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model_name: str = "gpt-4-turbo",
+        elevation_model: Optional[str] = None,
+        force: bool = False,
+        api_key: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        hedge: Optional[HedgePolicy] = None,
+        task: Optional[str] = None,
+        timeout: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        return_model: bool = False,
+        cache_mode: Union[CacheMode, str, None] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Gera uma resposta a partir de uma lista de mensagens de chat.
 
-        try:
-            # Gera a resposta usando o modelo apropriado
-            response = await self._generate_with_provider(config, prompt, **kwargs)
-            self.cache[cache_key] = response
-            return response
+        Args:
+            messages: Mensagens no formato ``{"role": ..., "content": ...}``.
+            model_name: Nome do modelo a ser usado.
+            elevation_model: Modelo alternativo para fallback.
+            force: Se True, força o uso do modelo especificado sem fallback.
+            api_key: Chave da API explícita para a chamada.
+            temperature: Temperatura da chamada (padrão: a do modelo).
+            max_tokens: Limite de tokens da resposta (padrão: o do modelo).
+            hedge: Política de chamadas especulativas ao modelo de elevação. Se
+                ativa, o modelo de elevação também é chamado quando o principal
+                demora mais que o percentil observado da sua latência.
+            task: Classe da tarefa (ex.: "validation", "concept"). Se informada,
+                o roteador escolhe o modelo pela política da tarefa e
+                ``model_name`` só é usado se nenhum modelo atender.
+            timeout: Tempo limite de cada tentativa (padrão: o do modelo).
+            max_retries: Novas tentativas em erros temporários (padrão: as do modelo).
+            return_model: Se True, retorna também o nome do modelo que respondeu
+                (após o roteamento, a chamada especulativa ou o fallback).
+            cache_mode: Modo de uso do cache de respostas só nesta chamada
+                (padrão: o do cache ou o definido com ``use_cache_mode``).
+            **kwargs: Argumentos adicionais para a API do modelo (ex.: response_format).
+
+        Returns:
+            A resposta gerada pelo modelo, ou a tupla (resposta, modelo) com ``return_model``.
+
+        Raises:
+            ValueError: Se o modelo não estiver disponível.
+            HedgedRequestError: Se o modelo principal e o especulativo falharem.
+            Exception: Se ocorrer um erro na geração.
+        """
+        with use_cache_mode(cache_mode):
+            if task and not force:
+                response_format = kwargs.get("response_format") or {}
+                routed = self.router.route(
+                    task, model_name, messages, max_tokens,
+                    json_mode=response_format.get("type") == "json_object",
+                )
+                # A chave explícita vale só para o provedor do modelo pedido
+                api_key = self._key_for(routed, model_name, api_key)
+                model_name = routed
+
+            config = self.resolve_config(model_name, api_key, temperature, max_tokens, timeout, max_retries)
+
+            elevation_config = None
+            if hedge and hedge.enabled and not force and elevation_model and elevation_model != model_name:
+                try:
+                    elevation_config = self.resolve_config(
+                        elevation_model, self._key_for(elevation_model, model_name, api_key),
+                        temperature, max_tokens, timeout, max_retries,
+                    )
+                except ValueError:
+                    logger.warning(f"ALERTA - chat | Modelo de elevação {elevation_model} indisponível para hedging")
+
+            try:
+                if elevation_config:
+                    response, hedge_won = await self._generate_hedged(config, elevation_config, messages, hedge, **kwargs)
+                    used = elevation_model if hedge_won else model_name
+                else:
+                    # Gera a resposta usando o modelo apropriado
+                    response, used = await self._generate_cached(config, messages, **kwargs), model_name
+
+            except HedgedRequestError:
+                # O modelo de elevação já foi tentado
+                raise
+
+            except Exception as e:
+                if elevation_model == model_name:
+                    elevation_model = None
+                if isinstance(e, CircuitOpenError) and not force and not (
+                    elevation_model and self.is_model_available(elevation_model)
+                ):
+                    # Provedor instável: segue para o próximo modelo configurado saudável
+                    elevation_model = self.get_next_available_model(model_name)
+                    if elevation_model:
+                        logger.warning(f"ALERTA - chat | {e} | Usando o modelo {elevation_model}")
+                if force or not elevation_model:
+                    raise e
+
+                # Tenta usar o modelo de elevação
+                try:
+                    elevation_config = self.resolve_config(
+                        elevation_model, self._key_for(elevation_model, model_name, api_key),
+                        temperature, max_tokens, timeout, max_retries,
+                    )
+                except ValueError:
+                    raise ValueError(f"Modelo de elevação {elevation_model} não disponível")
+
+                get_metrics_registry().counter(
+                    "model_fallbacks_total", "Chamadas repetidas com o modelo de elevação"
+                ).inc(model=model_name, elevation_model=elevation_model)
+
+                response, used = await self._generate_cached(elevation_config, messages, **kwargs), elevation_model
+
+            return (response, used) if return_model else response
+
+    async def _generate_hedged(
+        self,
+        config: ModelConfig,
+        elevation_config: ModelConfig,
+        messages: List[Dict[str, Any]],
+        policy: HedgePolicy,
+        **kwargs: Any,
+    ) -> Tuple[Union[str, Dict[str, Any]], bool]:
+        """
+        Chama o modelo principal e, se ele demorar mais que o percentil da
+        política, também o modelo de elevação; vale a primeira resposta.
+
+        Returns:
+            Tupla (resposta, se a resposta veio do modelo de elevação).
+        """
+        budget = self._hedge_budgets.setdefault(config.model_id, HedgeBudget())
+        budget.record_request(policy.max_rate)
+
+        registry = get_metrics_registry()
+        latency = registry.histogram(
+            "model_request_duration_seconds", "Latência das chamadas aos provedores"
+        ).labels(provider=config.provider.value, model=config.model_id)
+        delay = policy.delay(latency.count, latency.percentile(policy.percentile))
+
+        labels = {"model": config.model_id, "elevation_model": elevation_config.model_id}
+        hedges = registry.counter("model_hedged_requests_total", "Chamadas especulativas ao modelo de elevação")
+
+        async def hedge() -> Union[str, Dict[str, Any]]:
+            hedges.inc(**labels)
+            logger.info(
+                f"INÍCIO - chat | Modelo {config.model_id} sem resposta em {delay:.2f}s; "
+                f"chamando também {elevation_config.model_id}"
+            )
+            return await self._generate_cached(elevation_config, messages, **kwargs)
+
+        result, winner = await hedged_call(
+            lambda: self._generate_cached(config, messages, **kwargs), hedge, delay, budget
+        )
+        if winner == "hedge":
+            registry.counter(
+                "model_hedge_wins_total", "Chamadas especulativas que responderam antes do modelo principal"
+            ).inc(**labels)
+        return result, winner == "hedge"
+
+    async def _generate_cached(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> Union[str, Dict[str, Any]]:
+        """
+        Gera uma resposta consultando antes o cache persistente.
 
-        except Exception as e:
-            if force or not elevation_model:
-                raise e
+        Chamadas simultâneas com a mesma chave de cache aguardam a chamada já
+        em andamento em vez de repeti-la (``MODEL_COALESCE=false`` desativa).
+        """
+        cache_key = make_cache_key(
+            config.provider.value,
+            config.model_id,
+            messages,
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            **kwargs,
+        )
+        # O SQLite é acessado fora do event loop (a thread herda o modo de cache do contexto)
+        cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            return cached
 
-            # Tenta usar o modelo de elevação
-            elevation_config = self.get_model_config(elevation_model)
-            if not elevation_config:
-                raise ValueError(f"Modelo de elevação {elevation_model} não disponível")
+        async def generate() -> Union[str, Dict[str, Any]]:
+            response = await self._generate_with_provider(config, messages, **kwargs)
+            await asyncio.to_thread(self.cache.set, cache_key, response)
+            return response
 
-            return await self._generate_with_provider(elevation_config, prompt, **kwargs)
+        if not self.coalesce:
+            return await generate()
+        response, shared = await self._in_flight.do(cache_key, generate)
+        if shared:
+            get_metrics_registry().counter(
+                "model_coalesced_requests_total", "Chamadas atendidas por uma chamada idêntica em andamento"
+            ).inc(provider=config.provider.value, model=config.model_id)
+        return response
 
     async def _generate_with_provider(
         self,
         config: ModelConfig,
-        prompt: str,
+        messages: List[Dict[str, Any]],
         **kwargs: Any,
     ) -> Union[str, Dict[str, Any]]:
-        """Gera uma resposta usando um provedor específico."""
-        if config.provider == ModelProvider.OPENAI:
-            client = openai.AsyncClient(api_key=config.api_key)
-            response = await client.chat.completions.create(
-                model=config.model_id,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=config.temperature,
-                max_tokens=config.max_tokens,
-                **kwargs,
-            )
-            return response.choices[0].message.content
+        """
+        Gera uma resposta usando um provedor específico.
+
+        A chamada aguarda os limites de taxa do modelo e de concorrência do
+        provedor. Erros temporários são repetidos até ``config.max_retries``
+        vezes, respeitando o ``Retry-After`` do provedor ou com backoff
+        exponencial com jitter; os demais erros são propagados imediatamente.
+        """
+        provider = config.provider.value
+        # Os tokens são reservados uma vez por chamada (não a cada tentativa) e
+        # acertados ao final: pelo uso informado pelo provedor ou devolvidos
+        # integralmente em erros e cancelamentos
+        reserved_tokens = estimate_request_tokens(messages, config.max_tokens)
+        used_tokens: Optional[int] = 0
+        reserved = False
+        try:
+            with span("llm.chat", provider=provider, model=config.model_id) as llm_span:
+                attempt = 0
+                while True:
+                    attempt += 1
+                    # Com o circuito aberto, falha sem esperar limites, timeouts ou novas tentativas
+                    self.health.before_call(provider, config.model_id)
+                    # A reserva é feita assim que ``acquire`` começa, mesmo que a espera seja cancelada
+                    tokens = 0 if reserved else reserved_tokens
+                    reserved = True
+                    await self.rate_limiter.acquire(provider, config.model_id, tokens)
+                    # A latência registrada não inclui a espera pelos limites
+                    async with self.limiter.limit(provider):
+                        started = time.perf_counter()
+                        try:
+                            response, used_tokens = await self._call_provider(
+                                config, messages, started, llm_span, **kwargs
+                            )
+                        except asyncio.CancelledError:
+                            # Ex.: a chamada especulativa respondeu antes
+                            self._record_request(config, "cancelled", time.perf_counter() - started)
+                            raise
+                        except Exception as error:
+                            elapsed = time.perf_counter() - started
+                            self._record_request(config, "error", elapsed)
+                            self.health.record_error(provider, config.model_id, elapsed, error)
+                            if attempt > config.max_retries or not is_retryable(error):
+                                raise
+                            delay = retry_after(error)
+                        else:
+                            self.health.record(provider, config.model_id, True, time.perf_counter() - started)
+                            return response
 
-        elif config.provider == ModelProvider.OPENROUTER:
-            client = openrouter.AsyncClient(api_key=config.api_key)
+                    if delay is not None:
+                        # O provedor informou quando voltar: pausa todas as chamadas ao modelo
+                        self.rate_limiter.block(provider, config.model_id, delay)
+                    else:
+                        delay = backoff_delay(attempt)
+                    _record_retry(config.model_id)
+                    llm_span.set_attribute("retries", attempt)
+                    logger.warning(
+                        "Erro temporário em %s/%s; nova tentativa em %.1fs (%d/%d)",
+                        provider, config.model_id, delay, attempt, config.max_retries,
+                    )
+                    await asyncio.sleep(delay)
+        finally:
+            if reserved:
+                self.rate_limiter.settle(provider, config.model_id, reserved_tokens, used_tokens)
+
+    async def _call_provider(
+        self,
+        config: ModelConfig,
+        messages: List[Dict[str, Any]],
+        started: float,
+        llm_span: Any,
+        **kwargs: Any,
+    ) -> Tuple[Union[str, Dict[str, Any]], Optional[int]]:
+        """Executa a chamada à API do provedor do modelo e retorna a resposta e o total de tokens usados."""
+        if config.provider in (ModelProvider.OPENAI, ModelProvider.OPENROUTER):
+            client = self.client_pool.get_openai_compatible_client(
+                config.provider.value,
+                config.api_key,
+                base_url=config.base_url,
+            )
+            # O cliente é compartilhado por modelos com a mesma chave: o tempo
+            # limite de cada modelo vai na chamada
+            kwargs.setdefault("timeout", config.timeout)
             response = await client.chat.completions.create(
                 model=config.model_id,
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 temperature=config.temperature,
                 max_tokens=config.max_tokens,
                 **kwargs,
             )
-            return response.choices[0].message.content
+            usage = getattr(response, "usage", None)
+            total_tokens = getattr(usage, "total_tokens", None)
+            self._record_completion(
+                config, started, llm_span,
+                getattr(usage, "prompt_tokens", None),
+                getattr(usage, "completion_tokens", None),
+                total_tokens,
+            )
+            return response.choices[0].message.content, total_tokens
 
         elif config.provider == ModelProvider.GEMINI:
-            genai.configure(api_key=config.api_key)
-            model = genai.GenerativeModel(config.model_id)
+            model = self.client_pool.get_gemini_model(config.api_key, config.model_id)
+            # O Gemini recebe o conteúdo das mensagens como um único prompt
+            prompt = "\n\n".join(str(message["content"]) for message in messages)
+            kwargs.pop("response_format", None)
             response = await model.generate_content_async(prompt, **kwargs)
-            return response.text
+            usage = getattr(response, "usage_metadata", None)
+            total_tokens = getattr(usage, "total_token_count", None)
+            self._record_completion(
+                config, started, llm_span,
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None),
+                total_tokens,
+            )
+            return response.text, total_tokens
+
+        raise ValueError(f"Provedor {config.provider} não suportado")
+
+    def _record_completion(
+        self,
+        config: ModelConfig,
+        started: float,
+        llm_span: Any,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        total_tokens: Optional[int],
+    ) -> None:
+        """Registra a duração e o uso de tokens de uma chamada ao provedor."""
+        elapsed = time.perf_counter() - started
+        self._record_request(config, "success", elapsed, prompt_tokens, completion_tokens)
+        llm_span.set_attributes(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=total_tokens,
+        )
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        logger.info(
+            "Resposta de %s/%s em %.3fs (tokens: %s)",
+            config.provider.value, config.model_id, elapsed, total_tokens,
+            extra={
+                "provider": config.provider.value,
+                "model": config.model_id,
+                "duration": elapsed,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": total_tokens,
+            },
+        )
+
+    @staticmethod
+    def _record_request(
+        config: ModelConfig,
+        status: str,
+        elapsed: float,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+    ) -> None:
+        """Atualiza as métricas de latência, resultado e tokens por provedor/modelo."""
+        registry = get_metrics_registry()
+        labels = {"provider": config.provider.value, "model": config.model_id}
+        if status == "success":
+            # Base do atraso do hedging e da latência do roteador: só respostas completas
+            registry.histogram(
+                "model_request_duration_seconds", "Latência das chamadas aos provedores"
+            ).observe(elapsed, **labels)
+        else:
+            registry.histogram(
+                "model_failed_request_duration_seconds", "Duração das chamadas com erro ou canceladas"
+            ).observe(elapsed, status=status, **labels)
+        registry.counter(
+            "model_requests_total", "Chamadas aos provedores por resultado"
+        ).inc(status=status, **labels)
+        tokens = registry.counter("model_tokens_total", "Tokens consumidos por tipo")
+        if prompt_tokens:
+            tokens.inc(prompt_tokens, type="prompt", **labels)
+        if completion_tokens:
+            tokens.inc(completion_tokens, type="completion", **labels)
 
-        raise ValueError(f"Provedor {config.provider} não suportado") 
\ No newline at end of file
+    async def aclose(self) -> None:
+        """Encerra os clientes dos provedores e suas conexões persistentes."""
+        await self.client_pool.aclose()
+        self.cache.close()
@@ -0,0 +1,278 @@
+"""
+Escolha do modelo de cada chamada por classe de tarefa, latência e custo.
+
+Os agentes informam a classe da tarefa (ex.: "validation" no ``PlanValidator``,
+"concept" na geração de conceitos) em vez de fixar o modelo. O
+``ModelRouter`` escolhe, entre os modelos configurados no ``ModelManager``, o
+mais barato que atende à política da tarefa:
+
+- qualidade mínima (1 econômico, 2 intermediário, 3 premium);
+- suporte a ``response_format={"type": "json_object"}``, se pedido;
+- prompt e resposta cabendo na janela de contexto;
+- custo estimado pela tabela de preços local abaixo de ``max_cost``;
+- p95 observado da latência abaixo de ``max_latency``;
+- circuito do modelo fechado (ver ``circuit_breaker``).
+
+Os empates são decididos pela menor latência observada. Se nenhum modelo
+atender à política, vale o modelo padrão do agente.
+
+A política de cada tarefa pode ser ajustada por ``ROUTER_<TAREFA>_MIN_QUALITY``,
+``_MAX_LATENCY``, ``_MAX_COST`` e ``_MODEL`` (fixa o modelo). Os preços podem
+ser atualizados com um JSON em ``MODEL_PRICES_FILE`` (``{"prefixo": [entrada,
+saída]}``, em USD por milhão de tokens). ``MODEL_ROUTER=false`` desativa a
+escolha automática.
+"""
+import dataclasses
+import json
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.metrics import get_metrics_registry
+from src.core.utils.env import get_env_var
+from src.core.utils.prompt_budget import context_window
+from src.core.utils.rate_limit import DEFAULT_COMPLETION_TOKENS, estimate_request_tokens
+
+logger = logging.getLogger(__name__)
+
+# Preço (USD por milhão de tokens de entrada e de saída) por prefixo de modelo; vale o prefixo mais longo
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-32k": (60.0, 120.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4-1106": (10.0, 30.0),
+    "gpt-4-0125": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "o1": (15.0, 60.0),
+    "gemini-pro": (0.5, 1.5),
+    "gemini-1.5-flash": (0.075, 0.3),
+    "gemini-1.5-pro": (1.25, 5.0),
+    "anthropic/claude-3-haiku": (0.25, 1.25),
+    "anthropic/claude-3-sonnet": (3.0, 15.0),
+    "anthropic/claude-3-opus": (15.0, 75.0),
+}
+
+# Qualidade (1 econômico, 2 intermediário, 3 premium) por prefixo de modelo
+MODEL_QUALITY: Dict[str, int] = {
+    "gpt-3.5-turbo": 1,
+    "gpt-4": 3,
+    "gpt-4o": 3,
+    "gpt-4o-mini": 1,
+    "o1": 3,
+    "gemini-pro": 2,
+    "gemini-1.5-flash": 1,
+    "gemini-1.5-pro": 3,
+    "anthropic/claude-3-haiku": 1,
+    "anthropic/claude-3-sonnet": 2,
+    "anthropic/claude-3-opus": 3,
+}
+DEFAULT_QUALITY = 2
+
+# Suporte a response_format={"type": "json_object"} por prefixo de modelo
+MODEL_JSON_MODE: Dict[str, bool] = {
+    "gpt-3.5-turbo": True,
+    "gpt-4": False,
+    "gpt-4-turbo": True,
+    "gpt-4-1106": True,
+    "gpt-4-0125": True,
+    "gpt-4o": True,
+    "gemini-1.5": True,
+}
+
+# Latências observadas necessárias para usar o p95 de um modelo
+MIN_LATENCY_SAMPLES = 10
+
+
+def _lookup(table: Dict[str, Any], model: str, default: Any = None) -> Any:
+    """Valor do prefixo mais longo da tabela que casa com o modelo."""
+    name = (model or "").lower()
+    matches = [prefix for prefix in table if name.startswith(prefix)]
+    if not matches:
+        return default
+    return table[max(matches, key=len)]
+
+
+def model_quality(model: str) -> int:
+    """Nível de qualidade conhecido do modelo (ou o intermediário)."""
+    return _lookup(MODEL_QUALITY, model, DEFAULT_QUALITY)
+
+
+def supports_json_mode(model: str) -> bool:
+    """Indica se o modelo aceita ``response_format={"type": "json_object"}``."""
+    return _lookup(MODEL_JSON_MODE, model, False)
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """Requisitos de uma classe de tarefa para a escolha do modelo."""
+    task: str
+    # Qualidade mínima do modelo (1 a 3)
+    min_quality: int = 1
+    # p95 máximo da latência observada (segundos)
+    max_latency: Optional[float] = None
+    # Custo máximo estimado por chamada (USD)
+    max_cost: Optional[float] = None
+    # Exige suporte a response_format JSON
+    json_mode: bool = False
+    # Modelo fixo para a tarefa (ignora os demais critérios)
+    model: Optional[str] = None
+
+    @classmethod
+    def for_task(cls, task: str) -> "RoutingPolicy":
+        """Política padrão da tarefa com os ajustes de ``ROUTER_<TAREFA>_*``."""
+        policy = TASK_POLICIES.get(task) or cls(task)
+        prefix = f"ROUTER_{task.upper()}"
+        updates: Dict[str, Any] = {}
+        for name, convert in (("min_quality", int), ("max_latency", float), ("max_cost", float), ("model", str)):
+            value = get_env_var(f"{prefix}_{name.upper()}")
+            if value not in (None, ""):
+                updates[name] = convert(value)
+        return dataclasses.replace(policy, **updates) if updates else policy
+
+
+# Políticas padrão: modelos baratos e rápidos para validação e guardrails,
+# premium para a geração de conceitos
+TASK_POLICIES: Dict[str, RoutingPolicy] = {
+    "validation": RoutingPolicy("validation", min_quality=1, max_latency=15.0, json_mode=True),
+    "guardrail": RoutingPolicy("guardrail", min_quality=1, max_latency=30.0),
+    "tdd": RoutingPolicy("tdd", min_quality=2),
+    "concept": RoutingPolicy("concept", min_quality=3),
+}
+
+
+class ModelRouter:
+    """Escolhe, entre os modelos do ``ModelManager``, o modelo de cada chamada."""
+
+    def __init__(self, manager: Any, prices: Optional[Dict[str, Tuple[float, float]]] = None,
+                 enabled: Optional[bool] = None) -> None:
+        """
+        Inicializa o roteador.
+
+        Args:
+            manager: ``ModelManager`` com os modelos configurados e a saúde de cada um.
+            prices: Tabela de preços. Padrão: ``MODEL_PRICES`` atualizada por ``$MODEL_PRICES_FILE``.
+            enabled: Ativa a escolha automática. Padrão: ``$MODEL_ROUTER`` (true).
+        """
+        if enabled is None:
+            enabled = get_env_var("MODEL_ROUTER", "true").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self.manager = manager
+        self.prices = dict(MODEL_PRICES if prices is None else prices)
+        if prices is None:
+            self.prices.update(self._load_prices_file())
+
+    @staticmethod
+    def _load_prices_file() -> Dict[str, Tuple[float, float]]:
+        path = get_env_var("MODEL_PRICES_FILE")
+        if not path:
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return {prefix.lower(): (float(price[0]), float(price[1])) for prefix, price in json.load(f).items()}
+        except (OSError, ValueError, TypeError, IndexError, AttributeError) as e:
+            logger.warning(f"ALERTA - model_router | Tabela de preços inválida em {path}: {e}")
+            return {}
+
+    def estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+        """Custo estimado da chamada em USD, ou None se o preço do modelo for desconhecido."""
+        price = _lookup(self.prices, model)
+        if price is None:
+            return None
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+    def latency(self, provider: str, model: str) -> Optional[float]:
+        """p95 observado da latência do modelo, ou None com poucas amostras."""
+        child = get_metrics_registry().histogram(
+            "model_request_duration_seconds", "Latência das chamadas aos provedores"
+        ).labels(provider=provider, model=model)
+        if child.count < MIN_LATENCY_SAMPLES:
+            return None
+        return child.percentile(95.0)
+
+    def candidates(
+        self,
+        policy: RoutingPolicy,
+        messages: Any = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+    ) -> List[Tuple[str, Optional[float], Optional[float]]]:
+        """
+        Modelos que atendem à política, do preferido ao menos preferido.
+
+        Returns:
+            Lista de (modelo, custo estimado, p95 da latência).
+        """
+        completion_tokens = max_tokens or DEFAULT_COMPLETION_TOKENS
+        prompt_tokens = estimate_request_tokens(messages or [], completion_tokens) - completion_tokens
+        json_mode = json_mode or policy.json_mode
+
+        eligible = []
+        for name, config in self.manager.configs.items():
+            model_id = config.model_id
+            if model_quality(model_id) < policy.min_quality:
+                continue
+            if json_mode and not supports_json_mode(model_id):
+                continue
+            if prompt_tokens + completion_tokens > context_window(model_id):
+                continue
+            cost = self.estimate_cost(model_id, prompt_tokens, completion_tokens)
+            if policy.max_cost is not None and (cost is None or cost > policy.max_cost):
+                continue
+            latency = self.latency(config.provider.value, model_id)
+            if policy.max_latency is not None and latency is not None and latency > policy.max_latency:
+                continue
+            if not self.manager.is_model_available(name):
+                continue
+            eligible.append((name, cost, latency))
+
+        # Mais barato primeiro; no empate, o mais rápido (preço ou latência desconhecidos por último)
+        eligible.sort(key=lambda item: (
+            math.inf if item[1] is None else item[1],
+            math.inf if item[2] is None else item[2],
+        ))
+        return eligible
+
+    def route(
+        self,
+        task: str,
+        default: str,
+        messages: Any = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+    ) -> str:
+        """
+        Escolhe o modelo de uma chamada.
+
+        Args:
+            task: Classe da tarefa (ex.: "validation", "guardrail", "tdd", "concept").
+            default: Modelo usado se o roteador estiver desativado ou nenhum modelo atender.
+            messages: Mensagens da chamada (para estimar custo e janela de contexto).
+            max_tokens: Limite de tokens da resposta.
+            json_mode: Se a chamada usa ``response_format`` JSON.
+
+        Returns:
+            Nome do modelo escolhido.
+        """
+        if not self.enabled:
+            return default
+        policy = RoutingPolicy.for_task(task)
+        if policy.model:
+            return policy.model
+
+        eligible = self.candidates(policy, messages, max_tokens, json_mode)
+        if not eligible:
+            logger.warning(f"ALERTA - model_router | Nenhum modelo atende à tarefa {task}; usando {default}")
+            return default
+
+        model, cost, latency = eligible[0]
+        get_metrics_registry().counter(
+            "model_routed_requests_total", "Chamadas por tarefa e modelo escolhido pelo roteador"
+        ).inc(task=task, model=model)
+        logger.debug(
+            f"Tarefa {task} roteada para {model} | Custo estimado: "
+            f"{'?' if cost is None else f'US$ {cost:.4f}'} | p95: {'?' if latency is None else f'{latency:.2f}s'}"
+        )
+        return model
@@ -0,0 +1,257 @@
+"""
+Índice de arquivos do projeto compartilhado pelos agentes.
+
+Percorre a árvore uma única vez com ``os.scandir``, descartando cedo os
+diretórios ignorados (padrões fixos e ``.gitignore``). O resultado fica em
+cache por diretório, validado pelo mtime: em chamadas seguintes, apenas os
+diretórios alterados são relidos.
+"""
+import fnmatch
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Diretórios nunca percorridos
+DEFAULT_IGNORED_DIRS = frozenset({
+    "node_modules", ".git", "__pycache__", ".venv", "venv", "dist", "build",
+})
+
+# Extensões consideradas código-fonte pelos agentes
+DEFAULT_SOURCE_EXTENSIONS = (".py", ".js", ".ts", ".java", ".go", ".rb")
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """Arquivo indexado, com caminho relativo à raiz do projeto."""
+    path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    base: str  # Diretório (relativo à raiz) do .gitignore que definiu a regra
+    pattern: str
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def _parse_gitignore(path: str, base: str) -> List[_IgnoreRule]:
+    """Lê as regras de um ``.gitignore``."""
+    rules = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Padrões com "/" no início ou no meio são relativos ao diretório do .gitignore
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if line.startswith("**/"):
+            line = line[3:]
+            anchored = "/" in line
+        if line:
+            rules.append(_IgnoreRule(base, line, negate, dir_only, anchored))
+    return rules
+
+
+def _is_ignored(rel_path: str, is_dir: bool, rules: Iterable[_IgnoreRule]) -> bool:
+    """Aplica as regras do .gitignore (a última regra correspondente prevalece)."""
+    ignored = False
+    name = rel_path.rsplit("/", 1)[-1]
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not rel_path.startswith(rule.base + "/"):
+                continue
+            target = rel_path[len(rule.base) + 1:]
+        else:
+            target = rel_path
+        if fnmatch.fnmatchcase(target if rule.anchored else name, rule.pattern):
+            ignored = not rule.negate
+    return ignored
+
+
+@dataclass
+class _DirState:
+    mtime_ns: int
+    gitignore_mtime_ns: Optional[int]
+    parent_rules: Tuple[_IgnoreRule, ...]
+    files: List[FileEntry]
+    subdirs: List[str]
+    rules: Tuple[_IgnoreRule, ...]
+
+
+class ProjectIndex:
+    """Lista de arquivos de um projeto, mantida em cache e atualizada incrementalmente."""
+
+    def __init__(self, root: str, ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS, use_gitignore: bool = True):
+        """
+        Inicializa o índice.
+
+        Args:
+            root: Diretório raiz do projeto.
+            ignored_dirs: Nomes de diretórios nunca percorridos.
+            use_gitignore: Se True, respeita os arquivos ``.gitignore`` encontrados.
+        """
+        self.root = Path(root).resolve()
+        self.ignored_dirs = frozenset(ignored_dirs)
+        self.use_gitignore = use_gitignore
+        self._dirs: Dict[str, _DirState] = {}
+        self._lock = threading.Lock()
+        self.scanned_dirs = 0  # Diretórios relidos com scandir (para diagnóstico)
+
+    def _scan_dir(self, rel_dir: str, abs_dir: str, mtime_ns: int, parent_rules: Tuple[_IgnoreRule, ...]) -> _DirState:
+        """Lê um diretório e aplica as regras de exclusão."""
+        self.scanned_dirs += 1
+        with os.scandir(abs_dir) as it:
+            entries = list(it)
+
+        rules = parent_rules
+        gitignore_mtime_ns = None
+        gitignore = next((e for e in entries if e.name == ".gitignore"), None)
+        if self.use_gitignore and gitignore is not None:
+            gitignore_mtime_ns = gitignore.stat().st_mtime_ns
+            rules = parent_rules + tuple(_parse_gitignore(gitignore.path, rel_dir))
+
+        files, subdirs = [], []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in self.ignored_dirs or _is_ignored(rel_path, True, rules):
+                        continue
+                    subdirs.append(rel_path)
+                elif entry.is_file():
+                    if _is_ignored(rel_path, False, rules):
+                        continue
+                    stat = entry.stat()
+                    files.append(FileEntry(rel_path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+        return _DirState(mtime_ns, gitignore_mtime_ns, parent_rules, files, subdirs, rules)
+
+    @staticmethod
+    def _is_current(state: _DirState, abs_dir: str, mtime_ns: int, parent_rules: Tuple[_IgnoreRule, ...]) -> bool:
+        """Verifica se o diretório em cache ainda corresponde ao disco e às regras herdadas."""
+        if state.mtime_ns != mtime_ns or state.parent_rules != parent_rules:
+            return False
+        if state.gitignore_mtime_ns is not None:
+            # Editar o .gitignore não altera o mtime do diretório
+            try:
+                return os.stat(os.path.join(abs_dir, ".gitignore")).st_mtime_ns == state.gitignore_mtime_ns
+            except OSError:
+                return False
+        return True
+
+    def refresh(self) -> None:
+        """
+        Atualiza o índice.
+
+        Cada diretório é verificado com um ``stat``; só é relido se seu mtime
+        mudou (arquivos criados, removidos ou renomeados nele) ou se as regras
+        de ``.gitignore`` que se aplicam a ele mudaram. Diretórios removidos
+        saem do cache.
+        """
+        with self._lock:
+            seen = set()
+            stack = [("", ())]
+            while stack:
+                rel_dir, parent_rules = stack.pop()
+                abs_dir = os.path.join(self.root, rel_dir) if rel_dir else str(self.root)
+                try:
+                    mtime_ns = os.stat(abs_dir).st_mtime_ns
+                except OSError:
+                    continue
+
+                state = self._dirs.get(rel_dir)
+                if state is None or not self._is_current(state, abs_dir, mtime_ns, parent_rules):
+                    try:
+                        state = self._scan_dir(rel_dir, abs_dir, mtime_ns, parent_rules)
+                    except OSError as e:
+                        logger.warning(f"Erro ao ler diretório {abs_dir}: {str(e)}")
+                        continue
+                    self._dirs[rel_dir] = state
+                seen.add(rel_dir)
+                stack.extend((subdir, state.rules) for subdir in state.subdirs)
+
+            for rel_dir in set(self._dirs) - seen:
+                del self._dirs[rel_dir]
+
+    def files(self, extensions: Optional[Iterable[str]] = None) -> List[FileEntry]:
+        """
+        Retorna os arquivos indexados, ordenados pelo caminho.
+
+        Args:
+            extensions: Extensões aceitas (ex.: [".py"]). Se None, todas.
+
+        Returns:
+            Lista de ``FileEntry``.
+        """
+        self.refresh()
+        suffixes = tuple(extensions) if extensions is not None else None
+        with self._lock:
+            entries = [
+                entry
+                for state in self._dirs.values()
+                for entry in state.files
+                if suffixes is None or entry.path.endswith(suffixes)
+            ]
+        entries.sort(key=lambda entry: entry.path)
+        return entries
+
+    def list_files(self, extensions: Optional[Iterable[str]] = DEFAULT_SOURCE_EXTENSIONS) -> List[str]:
+        """
+        Lista caminhos relativos dos arquivos com as extensões informadas.
+
+        Args:
+            extensions: Extensões aceitas. Padrão: extensões de código-fonte.
+
+        Returns:
+            Caminhos relativos à raiz, no formato do sistema operacional.
+        """
+        return [entry.path.replace("/", os.sep) for entry in self.files(extensions)]
+
+
+_indexes: Dict[Path, ProjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_index(root: str) -> ProjectIndex:
+    """
+    Retorna o índice compartilhado do projeto, criando-o se necessário.
+
+    Todos os agentes do processo (ex.: as etapas de uma execução do
+    coordenador) usam a mesma instância para o mesmo diretório.
+
+    Args:
+        root: Diretório raiz do projeto.
+
+    Returns:
+        Instância de ``ProjectIndex``.
+    """
+    key = Path(root).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ProjectIndex(key)
+            _indexes[key] = index
+        return index
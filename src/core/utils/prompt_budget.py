@@ -0,0 +1,238 @@
+"""
+Montagem de prompts com orçamento de tokens.
+
+Os tokens são contados para o modelo de destino com o tokenizador local
+(``tiktoken``, se instalado; caso contrário, uma estimativa de ~4 caracteres
+por token). O orçamento de entrada é a janela de contexto do modelo menos os
+tokens reservados para a resposta (``max_tokens``), opcionalmente limitado.
+As seções do prompt recebem o orçamento por prioridade e o conteúdo de maior
+valor de cada seção é incluído primeiro; o prompt final nunca excede o
+orçamento.
+"""
+import functools
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Janela de contexto (tokens) por prefixo de nome de modelo; vale o prefixo mais longo
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4o": 128000,
+    "o1": 128000,
+    "o3": 200000,
+    "gemini-1.5": 1000000,
+    "gemini-2": 1000000,
+    "gemini-pro": 32768,
+    "anthropic/": 200000,
+    "claude": 200000,
+    "deepseek": 64000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+TRUNCATION_MARKER = "\n... (conteúdo truncado) ...\n"
+
+
+def context_window(model: str) -> int:
+    """Retorna a janela de contexto conhecida do modelo (ou o padrão conservador)."""
+    name = (model or "").lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model: str):
+    """Carrega o tokenizador do modelo, ou None se tiktoken não estiver disponível."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Modelos de outros provedores: cl100k_base é uma boa aproximação
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizador indisponível, usando estimativa: {str(e)}")
+        return None
+
+
+class TokenCounter:
+    """Conta e trunca texto em tokens do modelo."""
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: str = "gpt-4-turbo") -> None:
+        self.model = model
+        self.encoding = _load_encoding(model)
+
+    def count(self, text: str) -> int:
+        """Número de tokens do texto."""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // self.CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Retorna o maior prefixo do texto com no máximo ``max_tokens`` tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * self.CHARS_PER_TOKEN]
+
+
+@dataclass
+class PromptSection:
+    """
+    Seção do prompt.
+
+    ``items`` é a lista de blocos em ordem de valor (ex.: trechos de código
+    mais relevantes primeiro); blocos são incluídos inteiros enquanto couberem.
+    Seções obrigatórias são reservadas antes das demais.
+    """
+    name: str
+    items: List[str]
+    priority: int = 0
+    max_tokens: Optional[int] = None
+    required: bool = False
+    header: str = ""
+    separator: str = "\n"
+    truncate_items: bool = True  # Permite truncar um bloco que não cabe inteiro
+    rendered: str = field(default="", init=False)
+    tokens: int = field(default=0, init=False)
+    dropped: int = field(default=0, init=False)
+
+
+class PromptBudgeter:
+    """Distribui o orçamento de tokens entre as seções de um prompt."""
+
+    # Um bloco só é truncado se ainda restar ao menos esta quantidade de tokens
+    MIN_TRUNCATED_ITEM_TOKENS = 64
+
+    def __init__(
+        self,
+        model: str,
+        max_output_tokens: int = 0,
+        max_input_tokens: Optional[int] = None,
+        counter: Optional[TokenCounter] = None,
+    ) -> None:
+        """
+        Inicializa o orçamento.
+
+        Args:
+            model: Modelo de destino (define o tokenizador e a janela de contexto).
+            max_output_tokens: Tokens reservados para a resposta (``max_tokens`` da chamada).
+            max_input_tokens: Limite adicional para o prompt (ex.: para reduzir custo).
+            counter: Contador de tokens. Padrão: ``TokenCounter(model)``.
+        """
+        self.model = model
+        self.counter = counter or TokenCounter(model)
+        budget = context_window(model) - max_output_tokens
+        if max_input_tokens is not None:
+            budget = min(budget, max_input_tokens)
+        self.budget = max(budget, 0)
+        self.sections: List[PromptSection] = []
+
+    def add(self, name: str, text: str, priority: int = 0, max_tokens: Optional[int] = None,
+            required: bool = False) -> PromptSection:
+        """Adiciona uma seção de texto único (truncada se exceder o orçamento)."""
+        section = PromptSection(name, [text] if text else [], priority, max_tokens, required)
+        self.sections.append(section)
+        return section
+
+    def add_items(self, name: str, items: List[str], priority: int = 0, max_tokens: Optional[int] = None,
+                  header: str = "", separator: str = "\n", truncate_items: bool = True) -> PromptSection:
+        """Adiciona uma seção de blocos ordenados do mais ao menos valioso."""
+        section = PromptSection(
+            name, list(items), priority, max_tokens, False, header, separator, truncate_items
+        )
+        self.sections.append(section)
+        return section
+
+    def _pack(self, section: PromptSection, available: int) -> None:
+        """Inclui os blocos da seção que cabem em ``available`` tokens."""
+        limit = available if section.max_tokens is None else min(available, section.max_tokens)
+        if not section.items or limit <= 0:
+            section.dropped = len(section.items)
+            return
+
+        header_tokens = self.counter.count(section.header)
+        separator_tokens = self.counter.count(section.separator)
+        if header_tokens >= limit:
+            section.dropped = len(section.items)
+            return
+
+        used = header_tokens
+        parts = []
+        for index, item in enumerate(section.items):
+            cost = self.counter.count(item) + (separator_tokens if parts else 0)
+            if used + cost <= limit:
+                parts.append(item)
+                used += cost
+                continue
+            remaining = limit - used - (separator_tokens if parts else 0)
+            marker_tokens = self.counter.count(TRUNCATION_MARKER)
+            if section.truncate_items and remaining - marker_tokens >= min(
+                self.MIN_TRUNCATED_ITEM_TOKENS, self.counter.count(item)
+            ):
+                parts.append(self.counter.truncate(item, remaining - marker_tokens) + TRUNCATION_MARKER)
+                index += 1
+            section.dropped = len(section.items) - index
+            break
+
+        if parts:
+            section.rendered = section.header + section.separator.join(parts)
+            section.tokens = self.counter.count(section.rendered)
+
+    def build(self) -> str:
+        """
+        Monta o prompt.
+
+        Seções obrigatórias são reservadas primeiro; as demais recebem o
+        orçamento restante em ordem de prioridade (maior primeiro). O texto é
+        montado na ordem em que as seções foram adicionadas.
+
+        Returns:
+            Prompt com no máximo ``budget`` tokens.
+        """
+        remaining = self.budget
+        ordered = sorted(
+            enumerate(self.sections),
+            key=lambda item: (not item[1].required, -item[1].priority, item[0]),
+        )
+        for _, section in ordered:
+            section.rendered, section.tokens, section.dropped = "", 0, 0
+            self._pack(section, remaining)
+            remaining -= section.tokens
+
+        prompt = "".join(section.rendered for section in self.sections)
+        # Contagens por seção podem divergir da contagem do texto concatenado
+        # por um token na junção; a verificação final garante o limite
+        if self.counter.count(prompt) > self.budget:
+            prompt = self.counter.truncate(prompt, self.budget)
+
+        logger.debug(
+            f"Prompt montado para {self.model} | Orçamento: {self.budget} | "
+            + ", ".join(f"{s.name}={s.tokens} (-{s.dropped})" for s in self.sections)
+        )
+        return prompt
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        """Tokens usados e blocos descartados por seção na última montagem."""
+        return {s.name: {"tokens": s.tokens, "dropped": s.dropped} for s in self.sections}
@@ -0,0 +1,341 @@
+"""
+Limites de uso dos provedores de modelos.
+
+``ProviderConcurrencyLimiter`` limita o número de chamadas simultâneas a cada
+provedor (``<PROVEDOR>_MAX_CONCURRENCY``, ex.: ``OPENAI_MAX_CONCURRENCY=8``).
+``ModelRateLimiter`` aplica, por (provedor, modelo), baldes de fichas (token
+buckets) de requisições e de tokens por minuto (``<PROVEDOR>_RPM`` e
+``<PROVEDOR>_TPM``, ou ``<PROVEDOR>_<MODELO>_RPM``/``_TPM``). Quando várias
+execuções rodam em paralelo (ex.: ``feature-batch``), as chamadas excedentes
+aguardam a vez, em ordem de chegada, em vez de disparar erros 429 do provedor.
+
+Erros temporários (429, 5xx, timeouts e falhas de conexão) são repetidos com
+backoff exponencial com jitter; um ``Retry-After`` (ou os cabeçalhos
+``x-ratelimit-*``) devolvido pelo provedor pausa todas as chamadas ao modelo
+pelo tempo indicado.
+"""
+import asyncio
+import contextlib
+import email.utils
+import random
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from src.core.metrics import get_metrics_registry
+from src.core.utils.env import get_env_var
+
+# Chamadas simultâneas por provedor quando <PROVEDOR>_MAX_CONCURRENCY não está definido
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class ProviderConcurrencyLimiter:
+    """
+    Semáforo por provedor para as chamadas aos modelos.
+
+    Semáforos asyncio ficam vinculados ao event loop em que são usados; como no
+    ``ModelClientPool``, cada loop recebe os seus.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None) -> None:
+        """
+        Inicializa o limitador.
+
+        Args:
+            limits: Chamadas simultâneas por provedor (0 = sem limite). Provedores
+                ausentes usam ``<PROVEDOR>_MAX_CONCURRENCY``.
+        """
+        self._limits = dict(limits or {})
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get_limit(self, provider: str) -> int:
+        """Retorna o número máximo de chamadas simultâneas ao provedor."""
+        if provider not in self._limits:
+            self._limits[provider] = int(
+                get_env_var(f"{provider.upper()}_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))
+            )
+        return self._limits[provider]
+
+    def _semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        limit = self.get_limit(provider)
+        if limit <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            semaphore = semaphores.get(provider)
+            if semaphore is None:
+                semaphore = semaphores[provider] = asyncio.Semaphore(limit)
+            return semaphore
+
+    @contextlib.asynccontextmanager
+    async def limit(self, provider: str) -> AsyncIterator[None]:
+        """Aguarda uma vaga para chamar o provedor e a libera ao final do bloco."""
+        semaphore = self._semaphore(provider)
+        if semaphore is None:
+            yield
+            return
+        if semaphore.locked():
+            started = time.perf_counter()
+            await semaphore.acquire()
+            get_metrics_registry().histogram(
+                "model_rate_limit_wait_seconds", "Espera por vaga nos limites dos provedores"
+            ).observe(time.perf_counter() - started, provider=provider)
+        else:
+            await semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+# Códigos HTTP de erros temporários, que podem ser repetidos
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# Exceções temporárias sem código HTTP (SDK da OpenAI e google-api-core)
+RETRYABLE_ERRORS = frozenset({
+    "APITimeoutError", "APIConnectionError", "ResourceExhausted", "ServiceUnavailable",
+    "DeadlineExceeded", "InternalServerError", "TooManyRequests",
+})
+
+# Backoff exponencial das novas tentativas (segundos)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Tokens reservados para a resposta quando a chamada não define max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+CHARS_PER_TOKEN = 4
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def estimate_request_tokens(messages: Any, max_tokens: Optional[int] = None) -> int:
+    """
+    Estima os tokens de uma chamada (~4 caracteres por token no prompt, mais
+    ``max_tokens`` da resposta), como os provedores contam para o limite de TPM.
+    """
+    if isinstance(messages, str):
+        chars = len(messages)
+    else:
+        chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return -(-chars // CHARS_PER_TOKEN) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Indica se o erro é temporário (limite de taxa, 5xx, timeout ou conexão)."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    status = getattr(error, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "code", None)
+    return isinstance(status, int) and status in RETRYABLE_STATUS
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Converte durações como "1s", "6m0s" ou "250ms" em segundos."""
+    parts = _DURATION_PART.findall(value.strip())
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Tempo de espera pedido pelo provedor, em segundos, lido dos cabeçalhos da
+    resposta de erro (``retry-after-ms``, ``retry-after`` e ``x-ratelimit-reset-*``
+    quando o saldo restante é zero). Retorna None se não houver indicação.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after")
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                retry_at = email.utils.parsedate_to_datetime(value)
+                return max(0.0, retry_at.timestamp() - time.time())
+        delays = []
+        for kind in ("requests", "tokens"):
+            if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+                reset = headers.get(f"x-ratelimit-reset-{kind}")
+                delay = _parse_duration(reset) if reset else None
+                if delay is not None:
+                    delays.append(delay)
+        return max(delays) if delays else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Atraso antes da tentativa ``attempt + 1`` (backoff exponencial com jitter total)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _env_name(model: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "_", model.upper())
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Limites de requisições e de tokens por minuto de um modelo (0 = sem limite)."""
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+
+    @classmethod
+    def from_env(cls, provider: str, model: str) -> "RateLimits":
+        """
+        Carrega os limites de ``<PROVEDOR>_<MODELO>_RPM``/``_TPM``, ou de
+        ``<PROVEDOR>_RPM``/``_TPM`` se os do modelo não estiverem definidos.
+        """
+        prefix = provider.upper()
+        model_prefix = f"{prefix}_{_env_name(model)}"
+        return cls(
+            requests_per_minute=int(get_env_var(f"{model_prefix}_RPM", get_env_var(f"{prefix}_RPM", "0"))),
+            tokens_per_minute=int(get_env_var(f"{model_prefix}_TPM", get_env_var(f"{prefix}_TPM", "0"))),
+        )
+
+
+class TokenBucket:
+    """
+    Balde de fichas com reposição contínua de ``per_minute`` fichas por minuto.
+
+    Cada pedido reserva as fichas imediatamente, mesmo que o saldo fique
+    negativo, e recebe o tempo que deve esperar até o saldo se recompor: os
+    pedidos são atendidos em ordem de chegada e o balde não depende de um event
+    loop específico.
+    """
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1) -> float:
+        """Reserva ``amount`` fichas e retorna quantos segundos esperar antes de usá-las."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # Pedidos maiores que o balde esperam apenas enchê-lo
+            self.tokens -= min(amount, self.capacity)
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def adjust(self, amount: float) -> None:
+        """Devolve (positivo) ou cobra (negativo) fichas, ex.: após saber o uso real de tokens."""
+        with self._lock:
+            self._refill(self._clock())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ModelRateLimiter:
+    """Limites de requisições e tokens por minuto para cada (provedor, modelo)."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[Tuple[str, str], RateLimits]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Inicializa o limitador.
+
+        Args:
+            limits: Limites por (provedor, modelo). Modelos ausentes usam as
+                variáveis de ambiente (ver ``RateLimits.from_env``).
+            clock: Relógio monotônico (substituível em testes).
+        """
+        self._limits = dict(limits or {})
+        self._clock = clock
+        self._buckets: Dict[Tuple[str, str], Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._blocked_until: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def get_limits(self, provider: str, model: str) -> RateLimits:
+        """Retorna os limites configurados para o modelo."""
+        key = (provider, model)
+        if key not in self._limits:
+            self._limits[key] = RateLimits.from_env(provider, model)
+        return self._limits[key]
+
+    def _get_buckets(self, provider: str, model: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        key = (provider, model)
+        with self._lock:
+            buckets = self._buckets.get(key)
+            if buckets is None:
+                limits = self.get_limits(provider, model)
+                buckets = self._buckets[key] = (
+                    TokenBucket(limits.requests_per_minute, self._clock) if limits.requests_per_minute > 0 else None,
+                    TokenBucket(limits.tokens_per_minute, self._clock) if limits.tokens_per_minute > 0 else None,
+                )
+            return buckets
+
+    async def acquire(self, provider: str, model: str, tokens: int = 0) -> float:
+        """
+        Aguarda até a chamada caber nos limites do modelo (ou terminar uma pausa
+        pedida pelo provedor).
+
+        Args:
+            provider: Nome do provedor.
+            model: Identificador do modelo.
+            tokens: Tokens estimados da chamada (ver ``estimate_request_tokens``).
+
+        Returns:
+            Tempo de espera, em segundos.
+        """
+        key = (provider, model)
+        requests, token_bucket = self._get_buckets(provider, model)
+        delay = self._blocked_until.get(key, 0.0) - self._clock()
+        if requests is not None:
+            delay = max(delay, requests.reserve(1))
+        if token_bucket is not None and tokens:
+            delay = max(delay, token_bucket.reserve(tokens))
+
+        waited = 0.0
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            # Uma pausa pedida pelo provedor durante a espera a prolonga
+            delay = self._blocked_until.get(key, 0.0) - self._clock()
+        if waited:
+            get_metrics_registry().histogram(
+                "model_rate_limit_wait_seconds", "Espera por vaga nos limites dos provedores"
+            ).observe(waited, provider=provider)
+        return waited
+
+    def settle(self, provider: str, model: str, reserved: int, used: Optional[int]) -> None:
+        """
+        Acerta a reserva de ``reserved`` tokens com o uso real: ``0`` devolve a
+        reserva inteira (ex.: a chamada falhou) e ``None`` (uso não informado
+        pelo provedor) a mantém.
+        """
+        if used is None:
+            return
+        _, token_bucket = self._get_buckets(provider, model)
+        if token_bucket is not None:
+            token_bucket.adjust(reserved - used)
+
+    def block(self, provider: str, model: str, seconds: float) -> None:
+        """Pausa as chamadas ao modelo por ``seconds`` (Retry-After do provedor)."""
+        key = (provider, model)
+        with self._lock:
+            self._blocked_until[key] = max(self._blocked_until.get(key, 0.0), self._clock() + seconds)
@@ -0,0 +1,288 @@
+"""
+Índice lexical local (BM25) para selecionar o código relevante de um prompt.
+
+Os arquivos do ``ProjectIndex`` são divididos em trechos de linhas e
+indexados pelos termos do caminho, dos identificadores (camelCase e
+snake_case são separados) e de docstrings e comentários. O índice é
+atualizado de forma incremental: apenas arquivos novos ou com mtime/tamanho
+alterados são reindexados. As consultas retornam os trechos mais relevantes
+para o texto do conceito, respeitando um orçamento de tokens.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.logger import get_logger
+from src.core.utils.file_cache import FileContentCache, get_file_cache
+from src.core.utils.project_index import DEFAULT_SOURCE_EXTENSIONS, ProjectIndex, get_project_index
+
+logger = get_logger(__name__)
+
+# Parâmetros usuais do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+CHUNK_LINES = 60
+MAX_INDEXED_CHARS = 64 * 1024  # Apenas o início de arquivos muito grandes é indexado
+PATH_WEIGHT = 3  # Termos do caminho contam como se aparecessem várias vezes no trecho
+
+_WORD_RE = re.compile(r"[A-Za-zÀ-ÿ0-9]+")
+_CAMEL_RE = re.compile(r"[A-ZÀ-Ý]+(?=[A-ZÀ-Ý][a-zà-ÿ])|[A-ZÀ-Ý]?[a-zà-ÿ]+|[A-ZÀ-Ý]+|[0-9]+")
+
+STOPWORDS = frozenset({
+    # Inglês
+    "the", "and", "for", "with", "from", "this", "that", "are", "not", "you", "all", "can",
+    "self", "none", "true", "false", "return", "import", "def", "class", "if", "else", "in",
+    "of", "to", "is", "it", "be", "as", "or", "on", "an", "by", "at", "str", "int", "dict", "list",
+    # Português
+    "de", "da", "do", "das", "dos", "que", "para", "com", "uma", "um", "os", "as", "no", "na",
+    "em", "por", "se", "ao", "mais", "como", "ser", "deve", "sua", "seu",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide o texto em termos normalizados.
+
+    Identificadores são separados em suas partes (``parseHTTPResponse`` →
+    parse, http, response; ``list_files`` → list, files), além de mantidos
+    inteiros.
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        parts = [p.lower() for p in _CAMEL_RE.findall(word)]
+        lowered = word.lower()
+        if len(parts) > 1 and len(lowered) > 2 and lowered not in STOPWORDS:
+            terms.append(lowered)
+        terms.extend(p for p in parts if len(p) > 1 and p not in STOPWORDS)
+    return terms
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa simples de tokens (cerca de 4 caracteres por token)."""
+    return max(1, len(text) // 4)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """Trecho indexado de um arquivo."""
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Trecho retornado por uma consulta, com sua pontuação BM25."""
+    path: str
+    start_line: int
+    end_line: int
+    score: float
+    text: str
+
+
+@dataclass
+class _IndexedFile:
+    mtime_ns: int
+    size: int
+    chunks: List[Tuple[Chunk, Counter, int]]  # (trecho, frequência dos termos, comprimento)
+
+
+class RelevanceIndex:
+    """Índice BM25 de trechos de arquivos do projeto, atualizado incrementalmente."""
+
+    def __init__(
+        self,
+        project_index: ProjectIndex,
+        file_cache: Optional[FileContentCache] = None,
+        extensions: Iterable[str] = DEFAULT_SOURCE_EXTENSIONS,
+        chunk_lines: int = CHUNK_LINES,
+    ) -> None:
+        """
+        Inicializa o índice.
+
+        Args:
+            project_index: Índice de arquivos do projeto.
+            file_cache: Cache de conteúdo. Padrão: cache compartilhado.
+            extensions: Extensões indexadas.
+            chunk_lines: Número de linhas por trecho.
+        """
+        self.project_index = project_index
+        self.file_cache = file_cache or get_file_cache()
+        self.extensions = tuple(extensions)
+        self.chunk_lines = chunk_lines
+        self._files: Dict[str, _IndexedFile] = {}
+        self._doc_freq: Counter = Counter()
+        self._total_length = 0
+        self._chunk_count = 0
+        self._lock = threading.Lock()
+        self.indexed_files = 0  # Arquivos (re)indexados, para diagnóstico
+
+    def _chunk_file(self, path: str, text: str) -> List[Tuple[Chunk, Counter, int]]:
+        """Divide o arquivo em trechos e conta os termos de cada um."""
+        path_terms = tokenize(path.replace("/", " ").replace(".", " ")) * PATH_WEIGHT
+        lines = text.splitlines()
+        chunks = []
+        for start in range(0, len(lines), self.chunk_lines):
+            chunk_text = "\n".join(lines[start:start + self.chunk_lines])
+            terms = Counter(path_terms)
+            terms.update(tokenize(chunk_text))
+            chunk = Chunk(path, start + 1, min(start + self.chunk_lines, len(lines)), chunk_text)
+            chunks.append((chunk, terms, sum(terms.values())))
+        return chunks
+
+    def _remove(self, path: str) -> None:
+        indexed = self._files.pop(path)
+        for _, terms, length in indexed.chunks:
+            for term in terms:
+                self._doc_freq[term] -= 1
+                if not self._doc_freq[term]:
+                    del self._doc_freq[term]
+            self._total_length -= length
+            self._chunk_count -= 1
+
+    def _add(self, path: str, mtime_ns: int, size: int, text: str) -> None:
+        chunks = self._chunk_file(path, text)
+        for _, terms, length in chunks:
+            self._doc_freq.update(terms.keys())
+            self._total_length += length
+            self._chunk_count += 1
+        self._files[path] = _IndexedFile(mtime_ns, size, chunks)
+        self.indexed_files += 1
+
+    def update(self) -> None:
+        """Reindexa arquivos novos ou alterados e remove os que não existem mais."""
+        root = self.project_index.root
+        entries = self.project_index.files(self.extensions)
+        with self._lock:
+            current = set()
+            for entry in entries:
+                current.add(entry.path)
+                full_path = str(root / entry.path)
+                try:
+                    # Editar um arquivo não altera o mtime do diretório: valida cada arquivo
+                    stat = os.stat(full_path)
+                    indexed = self._files.get(entry.path)
+                    if indexed is not None and indexed.mtime_ns == stat.st_mtime_ns and indexed.size == stat.st_size:
+                        continue
+                    text = self.file_cache.read(full_path, MAX_INDEXED_CHARS)
+                except OSError as e:
+                    logger.warning(f"Erro ao indexar {entry.path}: {str(e)}")
+                    continue
+                if indexed is not None:
+                    self._remove(entry.path)
+                self._add(entry.path, stat.st_mtime_ns, stat.st_size, text)
+
+            for path in set(self._files) - current:
+                self._remove(path)
+
+    def _score(self, query: str) -> List[Tuple[float, Chunk]]:
+        """Pontua todos os trechos pela consulta, do mais ao menos relevante."""
+        self.update()
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            if not self._chunk_count:
+                return []
+            avg_length = self._total_length / self._chunk_count
+            idf = {
+                term: math.log(1 + (self._chunk_count - self._doc_freq[term] + 0.5) / (self._doc_freq[term] + 0.5))
+                for term in query_terms
+                if self._doc_freq.get(term)
+            }
+            scored = []
+            for indexed in self._files.values():
+                for chunk, terms, length in indexed.chunks:
+                    score = 0.0
+                    for term, weight in idf.items():
+                        freq = terms.get(term)
+                        if freq:
+                            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                            score += weight * freq * (BM25_K1 + 1) / (freq + norm)
+                    if score > 0:
+                        scored.append((score, chunk))
+
+        scored.sort(key=lambda item: (-item[0], item[1].path, item[1].start_line))
+        return scored
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        max_tokens: Optional[int] = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ) -> List[SearchResult]:
+        """
+        Retorna os trechos mais relevantes para a consulta.
+
+        Args:
+            query: Texto da consulta (ex.: título e descrição do conceito).
+            top_k: Número máximo de trechos.
+            max_tokens: Orçamento de tokens para a soma dos trechos. Trechos que
+                não cabem são ignorados em favor dos próximos da lista.
+            count_tokens: Função de contagem de tokens.
+
+        Returns:
+            Trechos em ordem decrescente de relevância.
+        """
+        results, used = [], 0
+        for score, chunk in self._score(query):
+            if len(results) >= top_k:
+                break
+            if max_tokens is not None:
+                cost = count_tokens(chunk.text)
+                if used + cost > max_tokens:
+                    continue
+                used += cost
+            results.append(SearchResult(chunk.path, chunk.start_line, chunk.end_line, round(score, 4), chunk.text))
+        return results
+
+    def rank_files(self, query: str, top_k: int = 10) -> List[str]:
+        """
+        Ordena os arquivos pela relevância de seu melhor trecho.
+
+        Args:
+            query: Texto da consulta.
+            top_k: Número máximo de arquivos.
+
+        Returns:
+            Caminhos relativos dos arquivos mais relevantes.
+        """
+        files = []
+        for _, chunk in self._score(query):
+            if chunk.path not in files:
+                files.append(chunk.path)
+                if len(files) >= top_k:
+                    break
+        return files
+
+
+_indexes: Dict[Path, RelevanceIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_relevance_index(root: str) -> RelevanceIndex:
+    """
+    Retorna o índice de relevância compartilhado do projeto.
+
+    Args:
+        root: Diretório raiz do projeto.
+
+    Returns:
+        Instância de ``RelevanceIndex`` sobre o ``ProjectIndex`` do diretório.
+    """
+    project_index = get_project_index(root)
+    with _indexes_lock:
+        index = _indexes.get(project_index.root)
+        if index is None:
+            index = RelevanceIndex(project_index)
+            _indexes[project_index.root] = index
+        return index
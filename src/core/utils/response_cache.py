@@ -0,0 +1,333 @@
+"""
+Cache persistente de respostas de modelos, endereçado por conteúdo.
+
+As respostas são armazenadas em SQLite (modo WAL), compartilhado entre
+processos. A chave é o hash SHA-256 da requisição canônica (provedor, modelo,
+temperatura, max_tokens, mensagens e demais parâmetros enviados ao modelo,
+exceto as opções de transporte).
+
+O modo de uso pode ser trocado apenas para as chamadas de um contexto (uma
+tarefa asyncio ou thread e as que ela criar) com ``use_cache_mode``, sem afetar
+outras chamadas simultâneas no mesmo processo.
+"""
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from src.core.metrics import get_metrics_registry
+from src.core.utils.env import get_env_var
+
+DEFAULT_CACHE_DIR = Path.home() / ".agent_flow_craft" / "cache"
+
+# Opções da chamada que não alteram a resposta do modelo (fora da chave do cache)
+TRANSPORT_OPTIONS = frozenset({"timeout", "max_retries", "extra_headers", "extra_query"})
+
+
+class CacheMode(str, Enum):
+    """Modos de uso do cache de respostas."""
+
+    OFF = "off"
+    READ = "read"
+    WRITE = "write"
+    READWRITE = "readwrite"
+
+    @property
+    def can_read(self) -> bool:
+        return self in (CacheMode.READ, CacheMode.READWRITE)
+
+    @property
+    def can_write(self) -> bool:
+        return self in (CacheMode.WRITE, CacheMode.READWRITE)
+
+
+# Modo de uso do cache definido para o contexto atual (sobrepõe ``ResponseCache.mode``)
+_scoped_mode: contextvars.ContextVar = contextvars.ContextVar("response_cache_mode", default=None)
+
+
+@contextlib.contextmanager
+def use_cache_mode(mode: Union[CacheMode, str, None]) -> Iterator[None]:
+    """
+    Usa ``mode`` nos caches de respostas apenas no contexto atual enquanto o
+    bloco executa. Tarefas e threads criadas no bloco (``asyncio.to_thread``,
+    ``asyncio.create_task``) herdam o modo; as demais mantêm o próprio.
+
+    Args:
+        mode: Modo de uso do cache. None mantém o modo em vigor.
+    """
+    if mode is None:
+        yield
+        return
+    token = _scoped_mode.set(CacheMode(mode))
+    try:
+        yield
+    finally:
+        _scoped_mode.reset(token)
+
+
+def current_cache_mode() -> Optional[CacheMode]:
+    """Modo definido com ``use_cache_mode`` no contexto atual, ou None."""
+    return _scoped_mode.get()
+
+
+def make_cache_key(
+    provider: str,
+    model_id: str,
+    messages: List[Dict[str, Any]],
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    **params: Any,
+) -> str:
+    """
+    Gera a chave do cache a partir dos parâmetros que determinam a resposta.
+
+    Args:
+        provider: Nome do provedor.
+        model_id: Identificador do modelo no provedor.
+        messages: Mensagens enviadas ao modelo.
+        temperature: Temperatura de geração.
+        max_tokens: Limite de tokens da resposta.
+        response_format: Formato de resposta solicitado (ex.: json_object).
+        **params: Demais parâmetros repassados ao modelo (stop, top_p, tools,
+            seed...). As opções de ``TRANSPORT_OPTIONS`` são ignoradas.
+
+    Returns:
+        Hash SHA-256 hexadecimal da requisição canônica.
+    """
+    payload = {
+        "provider": provider,
+        "model_id": model_id,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "messages": messages,
+        "response_format": response_format,
+    }
+    payload.update(
+        (name, value) for name, value in params.items()
+        if name not in TRANSPORT_OPTIONS and name not in payload and value is not None
+    )
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache de respostas em SQLite com TTL, limite de tamanho e contadores.
+
+    A remoção por tamanho descarta primeiro as entradas acessadas há mais tempo
+    e é feita a cada ``evict_every`` gravações, não em todas.
+
+    As operações são síncronas; em código assíncrono, chame-as com
+    ``asyncio.to_thread`` para não bloquear o event loop.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        mode: Union[CacheMode, str, None] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        evict_every: Optional[int] = None,
+    ) -> None:
+        """
+        Inicializa o cache.
+
+        Args:
+            path: Caminho do arquivo SQLite. Padrão: ``$CACHE_DIR/responses.sqlite3``.
+            mode: Modo de uso (off, read, write, readwrite). Padrão: ``$CACHE_MODE``.
+            ttl: Tempo de vida das entradas em segundos (0 desativa). Padrão: ``$CACHE_TTL``.
+            max_entries: Número máximo de entradas. Padrão: ``$CACHE_MAX_ENTRIES``.
+            max_bytes: Tamanho máximo das respostas armazenadas. Padrão: ``$CACHE_MAX_BYTES``.
+            evict_every: Número de gravações entre as verificações de limite e
+                TTL. Padrão: ``$CACHE_EVICT_EVERY`` (100).
+        """
+        if mode is None:
+            mode = get_env_var("CACHE_MODE", "readwrite")
+            if get_env_var("CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+                mode = CacheMode.OFF
+        self.mode = CacheMode(mode)
+        self.ttl = int(ttl if ttl is not None else get_env_var("CACHE_TTL", "3600"))
+        self.max_entries = int(
+            max_entries if max_entries is not None
+            else get_env_var("CACHE_MAX_ENTRIES", get_env_var("CACHE_MAXSIZE", "10000"))
+        )
+        self.max_bytes = int(max_bytes if max_bytes is not None else get_env_var("CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+        self.evict_every = max(1, int(evict_every if evict_every is not None else get_env_var("CACHE_EVICT_EVERY", "100")))
+
+        if path is None:
+            path = Path(get_env_var("CACHE_DIR", str(DEFAULT_CACHE_DIR))) / "responses.sqlite3"
+        self.path = Path(path)
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._writes_since_evict = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+        registry = get_metrics_registry()
+        self._requests = registry.counter("model_cache_requests_total", "Consultas ao cache de respostas por resultado")
+        registry.gauge("model_cache_hit_ratio", "Fração das consultas ao cache de respostas com acerto").labels().set_function(
+            self.hit_ratio
+        )
+
+    def hit_ratio(self) -> float:
+        """Fração das consultas com acerto desde a criação do cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def current_mode(self) -> CacheMode:
+        """Modo em vigor: o definido com ``use_cache_mode`` no contexto atual ou ``mode``."""
+        mode = _scoped_mode.get()
+        return self.mode if mode is None else mode
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre (ou reabre após fork) a conexão com o banco."""
+        if self._conn is not None and self._conn_pid == os.getpid():
+            return self._conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at)")
+        self._conn = conn
+        self._conn_pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obtém uma resposta do cache.
+
+        Args:
+            key: Chave gerada por ``make_cache_key``.
+
+        Returns:
+            Resposta armazenada ou None se ausente, expirada ou leitura desativada.
+        """
+        if not self.current_mode().can_read:
+            return None
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl > 0 and now - row[1] > self.ttl):
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                self._requests.inc(result="miss")
+                return None
+
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._requests.inc(result="hit")
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Armazena uma resposta no cache.
+
+        Args:
+            key: Chave gerada por ``make_cache_key``.
+            value: Resposta serializável em JSON.
+        """
+        if not self.current_mode().can_write:
+            return
+
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now),
+            )
+            self.writes += 1
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.evict_every:
+                self._writes_since_evict = 0
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Remove entradas expiradas e as menos usadas além dos limites."""
+        if self.ttl > 0:
+            removed = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+            self.evictions += max(removed, 0)
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do cache.
+
+        Returns:
+            Dicionário com modo, contadores de acerto/erro, entradas e bytes.
+        """
+        entries, size = 0, 0
+        if self.mode != CacheMode.OFF:
+            with self._lock:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode.value,
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._conn_pid = None
@@ -0,0 +1,79 @@
+"""
+Deduplicação de chamadas idênticas em andamento (single-flight).
+
+O cache de respostas só é preenchido quando a chamada termina; chamadas
+idênticas feitas ao mesmo tempo (ex.: etapas paralelas ou itens de um lote
+com o mesmo prompt) aguardam a chamada já em andamento em vez de repeti-la.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    Futures asyncio ficam vinculadas ao event loop em que são criadas; como no
+    ``ModelClientPool``, cada loop tem o seu registro de chamadas em andamento.
+    """
+
+    def __init__(self) -> None:
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        """Número de chamadas em andamento em todos os loops."""
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Executa ``func`` ou aguarda a execução em andamento com a mesma chave.
+
+        Args:
+            key: Chave da chamada (ex.: a chave do cache de respostas).
+            func: Função que inicia a chamada.
+
+        Returns:
+            Tupla (resultado, compartilhado), em que ``compartilhado`` indica que o
+            resultado veio da chamada de outro solicitante. Erros da chamada são
+            propagados a todos os que a aguardavam.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                calls = self._calls.setdefault(loop, {})
+                future = calls.get(key)
+                if future is None:
+                    future = calls[key] = loop.create_future()
+                    break
+            try:
+                # shield: o cancelamento de quem aguarda não cancela a chamada compartilhada
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # A chamada original foi cancelada: tenta de novo (talvez como responsável)
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            future.exception()  # Evita o aviso "exception was never retrieved" sem aguardantes
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                if calls.get(key) is future:
+                    del calls[key]
@@ -39,7 +39,14 @@ def parse_arguments():
     
     parser.add_argument(
         "prompt",
-        help="Descrição da feature a ser criada"
+        nargs="?",
+        help="Descrição da feature a ser criada (opcional com --resume)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Retoma uma execução anterior, pulando as etapas já concluídas"
     )
     
     parser.add_argument(
@@ -101,7 +108,10 @@ def parse_arguments():
         help="Força o uso direto do modelo de elevação, ignorando o modelo padrão"
     )
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.prompt and not args.resume:
+        parser.error("informe o prompt da feature ou --resume <run_id>")
+    return args
 
 def main():
     """
@@ -175,6 +185,7 @@ def main():
         # Configurar o diretório de contexto do agente
         if hasattr(agent, 'context_dir'):
             agent.context_dir = context_dir
+            agent.context_manager = context_manager
         elif hasattr(agent, 'set_context_dir'):
             agent.set_context_dir(str(context_dir))
             
@@ -231,8 +242,12 @@ def main():
                 return 1
         
         # Processar a feature
-        logger.info(f"Iniciando processamento da feature com prompt: {args.prompt}")
-        print(f"\n🚀 Iniciando criação da feature: '{args.prompt}'")
+        if args.resume:
+            logger.info(f"Retomando execução: {args.resume}")
+            print(f"\n🔁 Retomando execução: {args.resume}")
+        else:
+            logger.info(f"Iniciando processamento da feature com prompt: {args.prompt}")
+            print(f"\n🚀 Iniciando criação da feature: '{args.prompt}'")
         print(f"⚙️  Modelo OpenAI: {args.model} (será usado no agente de conceito)")
         
         if args.elevation_model:
@@ -242,15 +257,18 @@ def main():
         
         if execution_plan:
             print(f"📋 Usando plano de execução de: {args.plan_file}")
-            result = agent.create_feature(args.prompt, execution_plan)
+            result = agent.create_feature(args.prompt, execution_plan, resume_run_id=args.resume)
         else:
             print("📋 Gerando plano de execução automático...")
-            result = agent.create_feature(args.prompt)
+            result = agent.create_feature(args.prompt, resume_run_id=args.resume)
         
         # Verificar resultado
         if isinstance(result, dict) and result.get("status") == "error":
-            logger.error(f"Erro ao criar feature: {result.get('message')}")
-            print(f"❌ Erro: {result.get('message')}")
+            error_message = result.get("error", result.get("message"))
+            logger.error(f"Erro ao criar feature: {error_message}")
+            print(f"❌ Erro: {error_message}")
+            if result.get("run_id"):
+                print(f"🔁 Para retomar a partir da etapa com falha: --resume {result['run_id']}")
             return 1
         
         # Exibir resultado
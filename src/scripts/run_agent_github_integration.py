@@ -22,19 +22,6 @@ from agents.context_manager import ContextManager
 # Configurar logger
 logger = get_logger(__name__)
 
-# Mascaramento básico de dados sensíveis para logs
-try:
-    from src.core.utils import mask_sensitive_data
-    has_utils = True
-except ImportError:
-    has_utils = False
-    def mask_sensitive_data(data, mask_str='***'):
-        if isinstance(data, str) and any(s in data.lower() for s in ['token', 'key', 'secret', 'password']):
-            if len(data) > 10:
-                return f"{data[:4]}{'*' * 12}{data[-4:] if len(data) > 8 else ''}"
-            return mask_str
-        return data
-
 @log_execution
 def parse_arguments():
     """
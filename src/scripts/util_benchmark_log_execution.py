@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do custo por chamada do decorador ``log_execution``.
+
+Mede uma função trivial em três cenários:
+- sem decorador (referência)
+- decorada, com o nível de log desabilitado (caso comum em produção)
+- decorada, com o nível habilitado e registros emitidos para /dev/null
+
+Os argumentos imitam uma chamada típica de agente: um token e um conceito
+completo em dicionário. Exibe o tempo médio por chamada e o custo adicional
+em relação à referência.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+from pathlib import Path
+
+# Adicionar o diretório base ao path para permitir importações
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR.parent))
+
+from src.core.logger import log_execution
+
+BENCHMARK_LOGGER = "benchmark.log_execution"
+
+SAMPLE_TOKEN = "sk-" + "a" * 48
+SAMPLE_CONCEPT = {
+    "branch_type": "feat",
+    "issue_title": "Adicionar autenticação",
+    "issue_description": "Descrição detalhada da feature " * 50,
+    "execution_plan": {"steps": [f"Passo {i}" for i in range(50)]},
+    "api_key": "chave-secreta",
+}
+
+
+def target(token, concept, model=None):
+    return model
+
+
+def measure(func, calls, repeat):
+    """Menor tempo médio por chamada (em microssegundos) entre as repetições."""
+    timer = timeit.Timer(lambda: func(SAMPLE_TOKEN, SAMPLE_CONCEPT, model="gpt-4"))
+    return min(timer.repeat(repeat=repeat, number=calls)) / calls * 1e6
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Custo por chamada do decorador log_execution")
+    parser.add_argument("--calls", type=int, default=20000, help="Chamadas por repetição (padrão: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Número de repetições (padrão: 5)")
+    args = parser.parse_args()
+
+    logger = logging.getLogger(BENCHMARK_LOGGER)
+    logger.propagate = False
+    devnull = open(os.devnull, "w")
+    logger.addHandler(logging.StreamHandler(devnull))
+
+    target.__module__ = BENCHMARK_LOGGER
+    decorated = log_execution(target)
+
+    try:
+        baseline = measure(target, args.calls, args.repeat)
+
+        logger.setLevel(logging.WARNING)
+        disabled = measure(decorated, args.calls, args.repeat)
+
+        logger.setLevel(logging.INFO)
+        enabled = measure(decorated, max(args.calls // 10, 1), args.repeat)
+    finally:
+        devnull.close()
+
+    print(f"{'Sem decorador':<32} {baseline:8.2f}µs/chamada")
+    print(f"{'Decorada, nível desabilitado':<32} {disabled:8.2f}µs/chamada (+{disabled - baseline:.2f}µs)")
+    print(f"{'Decorada, nível habilitado':<32} {enabled:8.2f}µs/chamada (+{enabled - baseline:.2f}µs)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
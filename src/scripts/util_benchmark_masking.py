@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark do mascaramento de dados sensíveis em payloads grandes.
+
+Gera uma resposta de LLM sintética (texto, código e JSON com alguns tokens)
+e um arquivo de contexto JSON com vários megabytes, e compara:
+- antes: os padrões aplicados um a um com ``re.search``/``re.sub``, como no
+  mascaramento anterior do logger
+- depois: ``mask_text`` (texto inteiro), ``mask_stream`` (arquivo lido em
+  blocos) e ``mask_sensitive_data`` (contexto já carregado como dict)
+
+Exibe o tempo e a vazão (MB/s) de cada cenário.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adicionar o diretório base ao path para permitir importações
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR.parent))
+
+from src.core.masking import TOKEN_PATTERNS, mask_partially, mask_sensitive_data, mask_stream, mask_text
+
+PARAGRAPH = (
+    "## Critérios de aceitação\n"
+    "O agente deve validar o plano de execução e registrar cada etapa concluída.\n"
+    "```python\n"
+    "def test_feature_flow(client):\n"
+    "    response = client.post('/features', json={'name': 'login'})\n"
+    "    assert response.status_code == 201\n"
+    "```\n"
+    '{"issue_title": "Adicionar autenticação", "max_tokens": 4000, "steps": ["criar", "testar"]}\n'
+)
+SECRET_LINE = "Configuração: OPENAI_API_KEY=sk-" + "a1B2c3D4" * 6 + " token ghp_" + "z" * 36 + "\n"
+
+
+def build_payload(size_mb):
+    """Texto sintético com o tamanho aproximado informado e um segredo a cada 50 parágrafos."""
+    block = PARAGRAPH * 50 + SECRET_LINE
+    return block * max(1, int(size_mb * 1024 * 1024 / len(block)))
+
+
+def legacy_mask(text, mask_str="***"):
+    """Mascaramento anterior: cada padrão é compilado sob demanda e aplicado em sequência."""
+    masked = text
+    for pattern in TOKEN_PATTERNS:
+        if re.search(pattern, masked):
+            masked = re.sub(pattern, lambda m: mask_partially(m.group(0), mask_str), masked)
+    return masked
+
+
+def timed(label, size, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:9.1f}ms {size / 1024 / 1024 / elapsed:8.1f} MB/s")
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark do mascaramento de dados sensíveis")
+    parser.add_argument("--size-mb", type=float, default=8, help="Tamanho do payload em MB (padrão: 8)")
+    args = parser.parse_args()
+
+    text = build_payload(args.size_mb)
+    size = len(text.encode("utf-8"))
+    context = {
+        "id": "feature_concept_benchmark",
+        "prompt": PARAGRAPH,
+        "responses": [{"role": "assistant", "content": chunk, "api_key": "segredo"}
+                      for chunk in text.split("## ")],
+    }
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(context, f, ensure_ascii=False)
+        context_path = f.name
+
+    def stream_file():
+        with open(context_path, "r", encoding="utf-8") as source:
+            for _ in mask_stream(iter(lambda: source.read(64 * 1024), "")):
+                pass
+
+    try:
+        context_size = os.path.getsize(context_path)
+        print(f"Resposta sintética: {size / 1024 / 1024:.1f} MB | Contexto JSON: {context_size / 1024 / 1024:.1f} MB")
+        timed("Antes (padrões em sequência)", size, lambda: legacy_mask(text))
+        timed("mask_text (texto inteiro)", size, lambda: mask_text(text))
+        timed("mask_stream (arquivo de contexto)", context_size, stream_file)
+        timed("mask_sensitive_data (contexto em dict)", context_size, lambda: mask_sensitive_data(context))
+    finally:
+        os.unlink(context_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
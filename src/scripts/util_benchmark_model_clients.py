@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark do custo por chamada dos clientes de modelos.
+
+Sobe um servidor HTTP local que imita o endpoint ``/v1/chat/completions`` e
+compara duas estratégias:
+- antes: um cliente novo por chamada (como o ModelManager fazia)
+- depois: clientes persistentes do ModelClientPool (conexões keep-alive)
+
+Para cada estratégia, exibe a latência média/p50/p95 por chamada e o número de
+conexões TCP abertas no servidor.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Adicionar o diretório base ao path para permitir importações
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR.parent))
+
+from src.core.logger import get_logger, log_execution
+
+logger = get_logger(__name__)
+
+STUB_RESPONSE = {
+    "id": "chatcmpl-benchmark",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub-model",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "ok"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 com keep-alive que responde como a API de chat."""
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubChatHandler.lock:
+            StubChatHandler.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps(STUB_RESPONSE).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Silenciar o log de acesso do servidor de benchmark
+        return
+
+
+def start_stub_server():
+    """Inicia o servidor stub em uma thread e retorna (servidor, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubChatHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/v1"
+
+
+def summarize(label, durations, connections):
+    """Formata as estatísticas de uma estratégia."""
+    ordered = sorted(durations)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return (
+        f"{label:<28} média={statistics.mean(ordered) * 1000:7.2f}ms "
+        f"p50={statistics.median(ordered) * 1000:7.2f}ms "
+        f"p95={p95 * 1000:7.2f}ms conexões={connections}"
+    )
+
+
+async def run_per_call_clients(base_url, calls):
+    """Estratégia antiga: constrói um cliente novo a cada chamada."""
+    import openai
+
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = openai.AsyncOpenAI(api_key="sk-benchmark", base_url=base_url)
+        await client.chat.completions.create(
+            model="stub-model",
+            messages=[{"role": "user", "content": "ping"}],
+        )
+        durations.append(time.perf_counter() - start)
+        await client.close()
+    return durations
+
+
+async def run_pooled_clients(base_url, calls):
+    """Estratégia nova: chamadas via ModelManager com o pool compartilhado."""
+    from src.core.utils.model_manager import ModelConfig, ModelManager, ModelProvider
+
+    manager = ModelManager()
+    config = ModelConfig(
+        provider=ModelProvider.OPENAI,
+        model_id="stub-model",
+        api_key="sk-benchmark",
+        base_url=base_url,
+    )
+    durations = []
+    try:
+        for _ in range(calls):
+            start = time.perf_counter()
+            await manager._generate_with_provider(config, [{"role": "user", "content": "ping"}])
+            durations.append(time.perf_counter() - start)
+    finally:
+        await manager.aclose()
+    return durations
+
+
+@log_execution
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description="Benchmark de clientes de modelos com servidor stub local")
+    parser.add_argument("--calls", type=int, default=50, help="Número de chamadas por estratégia (padrão: 50)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    logger.info(f"Servidor stub iniciado em {base_url}")
+
+    try:
+        StubChatHandler.connections = 0
+        before = asyncio.run(run_per_call_clients(base_url, args.calls))
+        before_connections = StubChatHandler.connections
+
+        StubChatHandler.connections = 0
+        after = asyncio.run(run_pooled_clients(base_url, args.calls))
+        after_connections = StubChatHandler.connections
+    finally:
+        server.shutdown()
+
+    print(summarize("Antes (cliente por chamada)", before, before_connections))
+    print(summarize("Depois (pool persistente)", after, after_connections))
+    print(f"Redução por chamada: {(statistics.mean(before) - statistics.mean(after)) * 1000:.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import io
+import logging
+import unittest
+
+from src.core.log_queue import (
+    POLICY_BLOCK,
+    POLICY_DROP,
+    AsyncLogPipeline,
+    BoundedQueueHandler,
+    DeferredFlushStreamHandler,
+)
+from src.core.metrics import get_metrics_registry
+
+
+class CountingStreamHandler(DeferredFlushStreamHandler):
+    """Handler que conta os flushes efetivos (um por lote)."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.batch_flushes = 0
+
+    def flush_batch(self):
+        self.batch_flushes += 1
+        super().flush_batch()
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+class TestAsyncLogging(unittest.TestCase):
+
+    def setUp(self):
+        get_metrics_registry().clear()
+
+    def test_records_are_written_in_batches_and_flushed_on_stop(self):
+        """O listener escreve todos os registros em ordem, com um flush por lote"""
+        stream = io.StringIO()
+        handler = CountingStreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        pipeline = AsyncLogPipeline([handler], queue_size=1000, batch_size=100)
+        logger = make_logger("test_async_logging_batches", pipeline.queue_handler)
+
+        # Registros enfileirados antes do início do listener formam lotes completos
+        for i in range(500):
+            logger.info("registro %d", i)
+        try:
+            raise ValueError("falha")
+        except ValueError:
+            logger.exception("erro no registro")
+        pipeline.start()
+        pipeline.stop()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[:500], [f"INFO registro {i}" for i in range(500)])
+        self.assertIn("ERROR erro no registro", stream.getvalue())
+        self.assertIn("ValueError: falha", stream.getvalue())
+        self.assertLessEqual(handler.batch_flushes, 7)
+
+    def test_drop_policy_discards_low_levels_only(self):
+        """Na política drop, registros abaixo de WARNING são descartados e contados"""
+        pipeline = AsyncLogPipeline([logging.NullHandler()], queue_size=2, policy=POLICY_DROP,
+                                    block_timeout=0.01)
+        logger = make_logger("test_async_logging_drop", pipeline.queue_handler)
+
+        for i in range(5):
+            logger.info("registro %d", i)
+        logger.error("erro com a fila cheia")
+
+        self.assertEqual(pipeline.queue.qsize(), 2)
+        dropped = get_metrics_registry().get("log_records_dropped_total")
+        self.assertEqual(dropped.value(level="INFO"), 3)
+        self.assertEqual(dropped.value(level="ERROR"), 1)
+
+    def test_block_policy_waits_for_space(self):
+        """Na política block, o registro é enfileirado quando o listener libera espaço"""
+        stream = io.StringIO()
+        handler = DeferredFlushStreamHandler(stream)
+        pipeline = AsyncLogPipeline([handler], queue_size=1, policy=POLICY_BLOCK, block_timeout=5)
+        logger = make_logger("test_async_logging_block", pipeline.queue_handler)
+
+        logger.info("primeiro")
+        pipeline.start()
+        logger.info("segundo")
+        pipeline.stop()
+
+        self.assertEqual(stream.getvalue().splitlines(), ["primeiro", "segundo"])
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(None, policy="ignorar")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from src.core.utils.circuit_breaker import (
+    CircuitOpenError,
+    ProviderHealthTracker,
+    is_provider_failure,
+)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, code=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.code = code
+
+
+class TestProviderHealthTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "provider_health.json")
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def tracker(self):
+        return ProviderHealthTracker(
+            enabled=True, error_rate=0.5, min_requests=4, window=60, cooldown=30,
+            path=self.path, clock=lambda: self.now,
+        )
+
+    def test_opens_and_recovers(self):
+        """Abre após a taxa de erros, recusa chamadas e fecha após a chamada de teste"""
+        health = self.tracker()
+        health.record("openai", "gpt-4", True, 1.0)
+        for _ in range(3):
+            health.before_call("openai", "gpt-4")
+            health.record_error("openai", "gpt-4", 30.0, TimeoutError("timeout"))
+
+        with self.assertRaises(CircuitOpenError):
+            health.before_call("openai", "gpt-4")
+        self.assertFalse(health.is_available("openai", "gpt-4"))
+        self.assertEqual(health.score("openai", "gpt-4"), 0.0)
+        # Outros modelos não são afetados
+        health.before_call("openai", "gpt-4o")
+
+        self.now += 31
+        health.before_call("openai", "gpt-4")  # Chamada de teste
+        with self.assertRaises(CircuitOpenError):
+            health.before_call("openai", "gpt-4")  # Só uma por vez
+        health.record("openai", "gpt-4", True, 1.0)
+        health.before_call("openai", "gpt-4")
+        self.assertEqual(health.snapshot()[0]["state"], "closed")
+
+    def test_failed_probe_reopens(self):
+        health = self.tracker()
+        health.trip("gemini", "gemini-pro", FakeAPIError(429, "insufficient_quota"))
+        self.now += 31
+        health.before_call("gemini", "gemini-pro")
+        health.record_error("gemini", "gemini-pro", 1.0, FakeAPIError(503))
+        with self.assertRaises(CircuitOpenError):
+            health.before_call("gemini", "gemini-pro")
+
+    def test_request_errors_do_not_open(self):
+        health = self.tracker()
+        for _ in range(10):
+            health.record_error("openai", "gpt-4", 0.1, FakeAPIError(400))
+        health.before_call("openai", "gpt-4")
+        self.assertEqual(health.score("openai", "gpt-4"), 1.0)
+
+    def test_open_circuits_are_shared_between_processes(self):
+        self.tracker().trip("openai", "gpt-4", TimeoutError("timeout"))
+
+        health = self.tracker()
+        with self.assertRaises(CircuitOpenError):
+            health.before_call("openai", "gpt-4")
+        snapshot = health.snapshot()
+        self.assertEqual((snapshot[0]["state"], snapshot[0]["retry_in"]), ("open", 30.0))
+
+    def test_is_provider_failure(self):
+        self.assertTrue(is_provider_failure(TimeoutError()))
+        self.assertTrue(is_provider_failure(FakeAPIError(503)))
+        self.assertTrue(is_provider_failure(FakeAPIError(429, "insufficient_quota")))
+        self.assertFalse(is_provider_failure(FakeAPIError(429)))
+        self.assertFalse(is_provider_failure(FakeAPIError(400)))
+
+
+if __name__ == "__main__":
+    unittest.main()
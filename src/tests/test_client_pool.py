@@ -0,0 +1,121 @@
+import asyncio
+import os
+import threading
+import unittest
+from unittest import mock
+
+from src.core.utils.client_pool import ModelClientPool, PoolLimits
+
+
+class FakeClient:
+    """Cliente falso que registra quando é fechado."""
+
+    def __init__(self, provider, api_key, base_url):
+        self.key = (provider, api_key, base_url)
+        self.closed = 0
+        self.closed_in = None
+
+    async def close(self):
+        self.closed += 1
+        self.closed_in = threading.current_thread().name
+
+
+class FakeClientPool(ModelClientPool):
+    """Registro que cria clientes falsos em vez de ``openai.AsyncOpenAI``."""
+
+    def __init__(self):
+        super().__init__()
+        self.built = []
+
+    def _build_openai_client(self, provider, api_key, base_url, timeout):
+        client = FakeClient(provider, api_key, base_url)
+        self.built.append(client)
+        return client
+
+
+class TestModelClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = FakeClientPool()
+
+    def test_clients_are_reused_per_provider_key_and_url(self):
+        """Um cliente por (provedor, chave, base_url), reutilizado entre chamadas"""
+        async def run():
+            first = self.pool.get_openai_compatible_client("openai", "sk-a")
+            self.assertIs(self.pool.get_openai_compatible_client("openai", "sk-a"), first)
+            self.assertIsNot(self.pool.get_openai_compatible_client("openai", "sk-b"), first)
+            self.assertIsNot(
+                self.pool.get_openai_compatible_client("openai", "sk-a", base_url="http://proxy/v1"), first
+            )
+            # A URL padrão do provedor e a mesma URL explícita compartilham o cliente
+            router = self.pool.get_openai_compatible_client("openrouter", "sk-a")
+            self.assertIs(
+                self.pool.get_openai_compatible_client("openrouter", "sk-a", base_url="https://openrouter.ai/api/v1"),
+                router,
+            )
+            self.assertEqual(router.key, ("openrouter", "sk-a", "https://openrouter.ai/api/v1"))
+
+        asyncio.run(run())
+        self.assertEqual(len(self.pool.built), 4)
+        self.assertEqual(len(self.pool), 4)
+
+    def test_new_loop_gets_new_client_and_closes_old(self):
+        """Em outro event loop o cliente é recriado e o anterior é fechado"""
+        async def get_client():
+            client = self.pool.get_openai_compatible_client("openai", "sk-a")
+            # Dá ao fechamento agendado a chance de executar
+            await asyncio.sleep(0)
+            return client
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.closed, 1)
+        self.assertEqual(second.closed, 0)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_discard_closes_on_running_client_loop(self):
+        """Se o loop do cliente ainda executa, o fechamento ocorre nele"""
+        client_loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=client_loop.run_forever, name="loop-do-cliente", daemon=True)
+        thread.start()
+        try:
+            client = FakeClient("openai", "sk-a", None)
+
+            async def discard():
+                ModelClientPool._discard(client, client_loop, asyncio.get_running_loop())
+
+            asyncio.run(discard())
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), client_loop).result(5)
+        finally:
+            client_loop.call_soon_threadsafe(client_loop.stop)
+            thread.join(5)
+            client_loop.close()
+
+        self.assertEqual(client.closed, 1)
+        self.assertEqual(client.closed_in, "loop-do-cliente")
+
+    def test_aclose_closes_all_clients(self):
+        async def run():
+            clients = [
+                self.pool.get_openai_compatible_client("openai", "sk-a"),
+                self.pool.get_openai_compatible_client("openrouter", "sk-b"),
+            ]
+            await self.pool.aclose()
+            return clients
+
+        clients = asyncio.run(run())
+        self.assertEqual([client.closed for client in clients], [1, 1])
+        self.assertEqual(len(self.pool), 0)
+
+    def test_limits_from_env(self):
+        with mock.patch.dict(os.environ, {"OPENAI_MAX_CONNECTIONS": "5", "OPENAI_HTTP2": "true"}):
+            limits = PoolLimits.from_env("openai")
+        self.assertEqual(limits.max_connections, 5)
+        self.assertTrue(limits.http2)
+        self.assertEqual(limits.max_keepalive_connections, PoolLimits.max_keepalive_connections)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from src.agents.context_manager import ContextManager
+from src.agents.context_storage import (
+    JsonFileContextStorage,
+    SQLiteContextStorage,
+    has_fcntl,
+    new_context_id,
+)
+
+
+def _increment_counter(base_dir, backend, context_id, times):
+    """Incrementa um contador do contexto em outro processo."""
+    manager = ContextManager(base_dir=base_dir, storage=backend(Path(base_dir)))
+    for _ in range(times):
+        with manager.locks.hold(context_id):
+            count = manager.get_context(context_id)["data"]["count"]
+            manager.update_context(context_id, {"count": count + 1})
+
+
+class ContextStorageTests:
+    """Testes comuns aos backends de armazenamento de contextos."""
+
+    backend = None
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = self.backend(Path(self.temp_dir))
+        self.manager = ContextManager(base_dir=self.temp_dir, storage=self.storage)
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_create_update_and_delete(self):
+        """Contextos podem ser criados, atualizados e removidos"""
+        context_id = self.manager.create_context({"a": 1}, context_type="concept")
+        self.assertTrue(self.manager.update_context(context_id, {"b": 2}))
+
+        context = self.manager.get_context(context_id)
+        self.assertEqual(context["data"], {"a": 1, "b": 2})
+        self.assertIn("updated_at", context)
+
+        self.assertTrue(self.manager.delete_context(context_id))
+        self.assertIsNone(self.manager.get_context(context_id))
+        self.assertFalse(self.manager.delete_context(context_id))
+
+    def test_type_filter_is_applied_before_limit(self):
+        """O filtro por tipo não é afetado por contextos mais recentes de outros tipos"""
+        self.manager.create_context({}, context_type="feature_concept", context_id="feature_concept_1")
+        for i in range(5):
+            self.manager.create_context({}, context_type="concept", context_id=f"concept_{i}")
+
+        contexts = self.manager.list_contexts(context_type="feature_concept", limit=2)
+
+        self.assertEqual([c["id"] for c in contexts], ["feature_concept_1"])
+        self.assertIn("timestamp", contexts[0])
+
+    def test_files_written_by_agents_are_listed(self):
+        """Arquivos JSON gravados diretamente pelos agentes aparecem na listagem"""
+        record = {
+            "id": "feature_concept_20240101_120000",
+            "type": "feature_concept",
+            "timestamp": "20240101_120000",
+            "original_concept_id": "concept_20240101_115900",
+            "branch_type": "feat",
+        }
+        with open(Path(self.temp_dir) / f"{record['id']}.json", "w", encoding="utf-8") as f:
+            json.dump(record, f)
+
+        contexts = self.manager.list_contexts(parent_id="concept_20240101_115900")
+
+        self.assertEqual([c["id"] for c in contexts], [record["id"]])
+        self.assertEqual(self.manager.get_context(record["id"])["branch_type"], "feat")
+
+    def test_clean_old_contexts(self):
+        """Contextos sem modificação há mais dias que o limite são removidos"""
+        old_path = Path(self.temp_dir) / "old.json"
+        with open(old_path, "w", encoding="utf-8") as f:
+            json.dump({"id": "old", "type": "concept"}, f)
+        old_time = time.time() - 10 * 24 * 60 * 60
+        os.utime(old_path, (old_time, old_time))
+        self.manager.create_context({}, context_type="concept", context_id="new")
+
+        self.assertEqual(self.manager.clean_old_contexts(days=7), 1)
+        self.assertEqual([c["id"] for c in self.manager.list_contexts()], ["new"])
+
+    def test_concurrent_creates_do_not_collide(self):
+        """Contextos do mesmo tipo criados ao mesmo tempo recebem IDs distintos"""
+        ids = []
+
+        def create():
+            for _ in range(20):
+                ids.append(self.manager.create_context({}, context_type="concept"))
+
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(ids)), 80)
+        self.assertEqual(len(self.manager.list_contexts(context_type="concept", limit=None)), 80)
+
+    def test_concurrent_updates_are_not_lost(self):
+        """Atualizações simultâneas de etapas diferentes são todas preservadas"""
+        self.manager.create_context({"stages": {}}, context_type="pipeline_run", context_id="pipeline_run_r1")
+
+        threads = [
+            threading.Thread(target=self.manager.save_stage_checkpoint, args=("r1", f"stage_{i}", "k", i))
+            for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stages = self.manager.get_context("pipeline_run_r1")["data"]["stages"]
+        self.assertEqual(sorted(stages), sorted(f"stage_{i}" for i in range(10)))
+
+    @unittest.skipUnless(has_fcntl, "locks entre processos exigem fcntl")
+    def test_updates_from_multiple_processes(self):
+        """Processos diferentes compartilham o mesmo diretório sem perder atualizações"""
+        context_id = self.manager.create_context({"count": 0}, context_type="counter")
+        ctx = multiprocessing.get_context("fork")
+        processes = [
+            ctx.Process(target=_increment_counter, args=(self.temp_dir, self.backend, context_id, 10))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual(self.manager.get_context(context_id)["data"]["count"], 30)
+
+
+class TestContextIds(unittest.TestCase):
+
+    def test_ids_are_unique_and_time_ordered(self):
+        """IDs gerados em sequência são únicos e crescentes"""
+        ids = [new_context_id("concept") for _ in range(1000)]
+
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(i) == len("concept_") + 26 for i in ids))
+
+
+class TestJsonFileContextStorage(ContextStorageTests, unittest.TestCase):
+    backend = JsonFileContextStorage
+
+
+class TestSQLiteContextStorage(ContextStorageTests, unittest.TestCase):
+    backend = SQLiteContextStorage
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import unittest
+
+from src.cli.daemon import AgentDaemon, DaemonError, DaemonUnavailable, daemon_available, send_command
+
+
+class TestAgentDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, "daemon.sock")
+        self.daemon = AgentDaemon(self.socket_path, warm=False)
+        self.created = 0
+
+        def build():
+            self.created += 1
+            return object()
+
+        async def echo(args):
+            logging.getLogger("src.agents.test").info("INÍCIO - echo | token=sk-abcdefghijklmnopqrstuvwxyz")
+            agent, _ = self.daemon.agent(("echo",), build)
+            # Logs emitidos em threads também são encaminhados ao cliente
+            await asyncio.to_thread(logging.getLogger("src.agents.test").info, "SUCESSO - echo")
+            return {"text": args["text"], "agent": id(agent)}
+
+        async def fail(args):
+            raise ValueError("falha no comando")
+
+        self.daemon.register("echo", echo)
+        self.daemon.register("fail", fail)
+        self.thread = threading.Thread(target=self.daemon.run, daemon=True)
+        self.thread.start()
+        self.assertTrue(self.daemon.wait_ready(10))
+
+    def tearDown(self):
+        if daemon_available(self.socket_path):
+            send_command("shutdown", socket_path=self.socket_path, timeout=5)
+        self.thread.join(10)
+        self.tmp_dir.cleanup()
+
+    def test_command_streams_progress_and_reuses_agents(self):
+        """O progresso chega antes do resultado e os agentes ficam em memória entre comandos"""
+        progress = []
+        first = send_command("echo", {"text": "olá"}, socket_path=self.socket_path,
+                             on_progress=progress.append, timeout=10)
+        second = send_command("echo", {"text": "de novo"}, socket_path=self.socket_path, timeout=10)
+
+        self.assertEqual(first["text"], "olá")
+        self.assertEqual(first["agent"], second["agent"])
+        self.assertEqual(self.created, 1)
+        messages = [event["message"] for event in progress]
+        self.assertEqual(len(messages), 2)
+        self.assertTrue(messages[0].startswith("INÍCIO - echo"))
+        self.assertNotIn("sk-abcdefghijklmnopqrstuvwxyz", messages[0])
+        self.assertEqual(messages[1], "SUCESSO - echo")
+
+        ping = send_command("ping", socket_path=self.socket_path, timeout=10)
+        self.assertEqual(ping["commands_served"], 3)
+
+    def test_errors_and_shutdown(self):
+        with self.assertRaisesRegex(DaemonError, "falha no comando"):
+            send_command("fail", socket_path=self.socket_path, timeout=10)
+        with self.assertRaisesRegex(DaemonError, "desconhecido"):
+            send_command("missing", socket_path=self.socket_path, timeout=10)
+        with self.assertRaises(DaemonError):
+            asyncio.run(AgentDaemon(self.socket_path, warm=False).serve())
+
+        send_command("shutdown", socket_path=self.socket_path, timeout=10)
+        self.thread.join(10)
+        self.assertFalse(os.path.exists(self.socket_path))
+        with self.assertRaises(DaemonUnavailable):
+            send_command("ping", socket_path=self.socket_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
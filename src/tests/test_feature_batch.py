@@ -0,0 +1,208 @@
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.agents.agent_github_integration import GitHubIntegrationAgent
+from src.agents.context_storage import atomic_write_json
+from src.agents.feature_batch import FeatureBatchRunner, load_results, read_batch, run_feature_batch
+from src.core.utils.rate_limit import ProviderConcurrencyLimiter
+
+
+class FakeCoordinator:
+    """Coordenador falso: cada execução leva ``delay`` segundos em uma thread."""
+
+    def __init__(self, state, delay=0.05, fail_once=()):
+        self.state = state
+        self.delay = delay
+        self.fail_once = fail_once
+
+    async def execute_feature_creation(self, prompt_text, execution_plan=None, resume_run_id=None):
+        with self.state["lock"]:
+            self.state["running"] += 1
+            self.state["max_running"] = max(self.state["max_running"], self.state["running"])
+            self.state["calls"].append((prompt_text, resume_run_id))
+        try:
+            await asyncio.to_thread(time.sleep, self.delay)
+        finally:
+            with self.state["lock"]:
+                self.state["running"] -= 1
+        run_id = resume_run_id or f"run-{prompt_text}"
+        if prompt_text in self.fail_once and not resume_run_id:
+            return {"status": "error", "run_id": run_id, "error": "timeout do gh", "failed_stage": "github"}
+        return {"status": "success", "run_id": run_id, "total_duration": self.delay}
+
+
+class TestFeatureBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp_dir.name, "prompts.jsonl")
+        self.output_path = os.path.join(self.tmp_dir.name, "results.jsonl")
+        self.state = {"lock": threading.Lock(), "running": 0, "max_running": 0, "calls": []}
+        lines = [json.dumps({"id": f"f{i}", "prompt": f"p{i}"}) for i in range(8)]
+        lines += ["", '"prompt sem id"', "{invalido"]
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_batch(self):
+        items = list(read_batch(self.input_path))
+        self.assertEqual(len(items), 10)
+        self.assertEqual(items[0], {"id": "f0", "prompt": "p0"})
+        self.assertEqual(items[8], {"id": "line-10", "prompt": "prompt sem id"})
+        self.assertIn("JSON inválido", items[9]["error"])
+
+    def test_bounded_concurrency_and_resume(self):
+        """Executa com concorrência limitada e, ao repetir o lote, retoma apenas as falhas"""
+        factory = lambda: FakeCoordinator(self.state, fail_once=("p3",))  # noqa: E731
+
+        started = time.perf_counter()
+        summary = run_feature_batch(self.input_path, self.output_path, concurrency=4, coordinator_factory=factory)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual((summary["success"], summary["error"], summary["skipped"]), (8, 2, 0))
+        self.assertEqual(self.state["max_running"], 4)
+        self.assertLess(elapsed, 9 * 0.05)  # Mais rápido que a execução sequencial
+        results = load_results(self.output_path)
+        self.assertEqual(results["f3"]["failed_stage"], "github")
+        self.assertEqual(results["line-10"]["status"], "success")
+
+        self.state["calls"].clear()
+        summary = run_feature_batch(self.input_path, self.output_path, concurrency=4, coordinator_factory=factory)
+
+        self.assertEqual((summary["success"], summary["error"], summary["skipped"]), (1, 1, 8))
+        self.assertEqual(self.state["calls"], [("p3", "run-p3")])
+        self.assertEqual(load_results(self.output_path)["f3"]["status"], "success")
+
+    def test_no_resume_discards_previous_results(self):
+        factory = lambda: FakeCoordinator(self.state, delay=0)  # noqa: E731
+        items = list(read_batch(self.input_path))[:2]
+        asyncio.run(FeatureBatchRunner(self.output_path, coordinator_factory=factory).run(items))
+        asyncio.run(FeatureBatchRunner(self.output_path, coordinator_factory=factory, resume=False).run(items))
+
+        with open(self.output_path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+
+class TestProviderConcurrencyLimiter(unittest.TestCase):
+
+    def test_limit_per_provider(self):
+        limiter = ProviderConcurrencyLimiter({"openai": 2, "gemini": 0})
+        running = {"openai": 0, "gemini": 0}
+        peak = {"openai": 0, "gemini": 0}
+
+        async def call(provider):
+            async with limiter.limit(provider):
+                running[provider] += 1
+                peak[provider] = max(peak[provider], running[provider])
+                await asyncio.sleep(0.01)
+                running[provider] -= 1
+
+        async def run():
+            await asyncio.gather(*(call("openai") for _ in range(6)), *(call("gemini") for _ in range(6)))
+
+        asyncio.run(run())
+        # Um novo event loop recebe novos semáforos
+        asyncio.run(run())
+        self.assertEqual(peak, {"openai": 2, "gemini": 6})
+
+
+def git(*args, cwd):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+class GitHubCoordinator:
+    """Coordenador que executa só a etapa GitHub de cada feature, em uma thread."""
+
+    def __init__(self, repo_dir, context_dir, results):
+        self.agent = GitHubIntegrationAgent(github_token="token", target_dir=repo_dir)
+        self.agent.context_dir = Path(context_dir)
+        self.results = results
+
+    async def execute_feature_creation(self, prompt_text, execution_plan=None, resume_run_id=None):
+        context_id = f"feature_concept_{prompt_text}"
+        atomic_write_json(self.agent.context_dir / f"{context_id}.json", {
+            "prompt": prompt_text,
+            "feature_concept": {"issue_title": prompt_text, "generated_branch_suffix": prompt_text},
+        })
+        result = await asyncio.to_thread(self.agent.process_concept, context_id)
+        self.results[prompt_text] = result
+        return {"status": "success", "run_id": f"run-{prompt_text}"}
+
+
+class TestFeatureBatchGitHubStage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        self.repo = os.path.join(root, "repo")
+        self.context_dir = os.path.join(root, "agent_context")
+        os.makedirs(self.context_dir)
+        remote = os.path.join(root, "remote.git")
+        git("init", "-q", "--bare", remote, cwd=root)
+        git("init", "-q", "-b", "main", self.repo, cwd=root)
+        for key, value in (("user.name", "Teste"), ("user.email", "teste@example.com"), ("commit.gpgsign", "false")):
+            git("config", key, value, cwd=self.repo)
+        git("commit", "-q", "--allow-empty", "-m", "Inicial", cwd=self.repo)
+        git("remote", "add", "origin", remote, cwd=self.repo)
+        git("push", "-q", "-u", "origin", "main", cwd=self.repo)
+
+        self.input_path = os.path.join(root, "prompts.jsonl")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps({"id": p, "prompt": p}) for p in ("alpha", "beta")) + "\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parallel_items_keep_branches_and_commits_separate(self):
+        """Duas features em paralelo: cada branch parte da main e tem só o commit do próprio plano"""
+        issues = itertools.count(1)
+        real_run = subprocess.run
+
+        def run_subprocess(args, **kwargs):
+            if args[0] == "gh":
+                # gh simulado e lento o bastante para as etapas se sobreporem
+                time.sleep(0.05)
+                return subprocess.CompletedProcess(args, 0, stdout=f"https://github.com/o/r/issues/{next(issues)}\n")
+            kwargs.setdefault("capture_output", True)
+            return real_run(args, **kwargs)
+
+        results = {}
+        output_path = os.path.join(self.tmp_dir.name, "results.jsonl")
+        factory = lambda: GitHubCoordinator(self.repo, self.context_dir, results)  # noqa: E731
+        with mock.patch("src.agents.agent_github_integration.run_subprocess", side_effect=run_subprocess):
+            summary = run_feature_batch(self.input_path, output_path, concurrency=2, coordinator_factory=factory)
+
+        # Falhas ao criar o agente ou na etapa GitHub aparecem nos resultados do lote
+        self.assertEqual(summary["success"], 2, load_results(output_path))
+        self.assertEqual(sorted(results), ["alpha", "beta"])
+        self.assertEqual(git("rev-parse", "--abbrev-ref", "HEAD", cwd=self.repo), "main")
+        branches = set()
+        for prompt, result in results.items():
+            self.assertTrue(result["branch_created"] and result["plan_created"], result)
+            branch, issue = result["branch_name"], result["issue_number"]
+            branches.add(branch)
+            self.assertTrue(branch.endswith(f"/{prompt}"))
+            self.assertEqual(
+                git("log", "--format=%s", f"main..origin/{branch}", cwd=self.repo),
+                f"Add PR plan file for issue #{issue}",
+            )
+            self.assertEqual(
+                git("diff", "--name-only", "main", f"origin/{branch}", cwd=self.repo),
+                f"docs/pr/{issue}_feature_plan.md",
+            )
+        self.assertEqual(len(branches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -44,9 +44,9 @@ class TestFeatureConceptAgent(unittest.TestCase):
         self.assertEqual(result, "gpt-3.5-turbo")
         self.assertEqual(self.agent.model, "gpt-3.5-turbo")
     
-    @patch("src.agents.agent_feature_concept.OpenAI")
-    def test_process_concept(self, mock_openai):
-        """Testa processamento de conceito quando OpenAI responde corretamente."""
+    @patch("src.agents.agent_feature_concept.get_model_gateway")
+    def test_process_concept(self, mock_get_gateway):
+        """Testa processamento de conceito quando o modelo responde corretamente."""
         # Criar um conceito de teste no diretório de contexto
         concept_id = "concept_20240415_123456"
         test_concept = {
@@ -70,10 +70,9 @@ class TestFeatureConceptAgent(unittest.TestCase):
         with open(self.test_dir / f"{concept_id}.json", "w") as f:
             json.dump(concept_data, f)
         
-        # Mock da resposta da OpenAI
-        mock_response = MagicMock()
-        mock_message = MagicMock()
-        mock_message.content = json.dumps({
+        # Mock da resposta do gateway de modelos
+        mock_gateway = MagicMock()
+        mock_gateway.generate.return_value = json.dumps({
             "branch_type": "feat",
             "issue_title": "Implementar sistema de autenticação com JWT",
             "issue_description": "Adicionar autenticação via JWT",
@@ -87,18 +86,14 @@ class TestFeatureConceptAgent(unittest.TestCase):
                 "affected_components": ["auth", "api"]
             }
         })
-        mock_response.choices = [MagicMock(message=mock_message)]
-        
-        # Configurar o mock do cliente OpenAI
-        mock_client = MagicMock()
-        mock_client.chat.completions.create.return_value = mock_response
-        mock_openai.return_value = mock_client
+        mock_get_gateway.return_value = mock_gateway
         
         # Executar o método
         result = self.agent.process_concept(concept_id)
         
-        # Verificar se o método OpenAI foi chamado
-        mock_client.chat.completions.create.assert_called_once()
+        # Verificar se o gateway foi chamado com o token do agente
+        mock_gateway.generate.assert_called_once()
+        self.assertEqual(mock_gateway.generate.call_args.kwargs["api_key"], "test_token")
         
         # Verificar resultado
         self.assertIn("branch_type", result)
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.agents.agent_feature_coordinator import FeatureCoordinatorAgent
+
+
+class TestFeatureCoordinatorOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {
+            "OPENAI_KEY": "sk-env-openai",
+            "GITHUB_REPO": "repo-do-ambiente",
+            "AGENT_CONTEXT_DIR": os.path.join(self.tmp_dir.name, "agent_context"),
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_model_options_reach_agents(self):
+        """As opções da CLI chegam aos agentes criados pelo coordenador"""
+        agent = FeatureCoordinatorAgent(
+            target_dir=self.tmp_dir.name,
+            repo_name="repo-da-cli",
+            model_options={
+                "model": "gpt-3.5-turbo",
+                "elevation_model": "gpt-4",
+                "force": False,
+                "timeout": 12,
+                "max_retries": 1,
+                "temperature": 0.2,
+                "max_tokens": None,
+            },
+        )
+
+        concept = agent.concept_agent
+        self.assertEqual(
+            (concept.model, concept.elevation_model, concept.timeout, concept.max_retries, concept.temperature),
+            ("gpt-3.5-turbo", "gpt-4", 12, 1, 0.2),
+        )
+        self.assertIsNone(concept.routing_task)
+        # Valores ausentes mantêm o padrão do agente
+        self.assertEqual(concept.max_tokens, 2000)
+        self.assertEqual(agent.agent_tdd_criteria_agent.model, "gpt-3.5-turbo")
+        self.assertEqual(agent.feature_concept_agent.model, "gpt-3.5-turbo")
+        self.assertEqual(agent.repo_name, "repo-da-cli")
+        self.assertEqual(agent.target_dir, self.tmp_dir.name)
+
+    def test_defaults_without_options(self):
+        agent = FeatureCoordinatorAgent(target_dir=self.tmp_dir.name)
+
+        self.assertEqual(agent.repo_name, "repo-do-ambiente")
+        self.assertEqual(agent.concept_agent.routing_task, "concept")
+        self.assertEqual(agent.feature_concept_agent.model, "gpt-4")
+
+
+if __name__ == "__main__":
+    unittest.main()
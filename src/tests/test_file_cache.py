@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.core.utils.file_cache import FileContentCache
+
+
+class TestFileContentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = Path(self.temp_dir) / "module.py"
+        self.path.write_text("ação = 1\n" * 100, encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_prefix_reads_and_hits(self):
+        """Prefixos são servidos do cache enquanto o arquivo não muda"""
+        cache = FileContentCache()
+
+        text, truncated = cache.read_prefix(str(self.path), 10)
+        self.assertEqual(text, "ação = 1\na")
+        self.assertTrue(truncated)
+
+        self.assertEqual(cache.read(str(self.path), 5), "ação ")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+        # Um prefixo maior que o armazenado exige nova leitura
+        full, truncated = cache.read_prefix(str(self.path))
+        self.assertEqual(full, self.path.read_text(encoding="utf-8"))
+        self.assertFalse(truncated)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_changed_file_is_reread(self):
+        """Alterações de tamanho ou mtime invalidam a entrada"""
+        cache = FileContentCache()
+        cache.read(str(self.path))
+
+        self.path.write_text("novo", encoding="utf-8")
+        os.utime(self.path, ns=(0, 10**18))
+
+        self.assertEqual(cache.read(str(self.path)), "novo")
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_mmap_reads_and_memory_bound(self):
+        """Arquivos grandes são lidos por mmap e o cache respeita o limite de memória"""
+        cache = FileContentCache(max_bytes=1500, mmap_threshold=100)
+        other = Path(self.temp_dir) / "other.py"
+        other.write_text("b" * 1000, encoding="utf-8")
+
+        self.assertEqual(cache.read(str(self.path), 9), "ação = 1\n")
+        self.assertEqual(cache.read(str(other)), "b" * 1000)
+        cache.read(str(self.path))  # ~900 caracteres: descarta a entrada mais antiga
+
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 1500)
+        self.assertEqual(stats["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
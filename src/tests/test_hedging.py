@@ -0,0 +1,100 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+from src.core.utils.hedging import HedgeBudget, HedgedRequestError, HedgePolicy, hedged_call
+
+
+def call(result, delay, calls, name):
+    async def run():
+        calls.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            calls.append(f"{name}-cancelled")
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return run
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def test_from_env_with_agent_override(self):
+        env = {
+            "MODEL_HEDGE_ENABLED": "true",
+            "MODEL_HEDGE_MAX_RATE": "0.05",
+            "CONCEPT_GENERATION_AGENT_HEDGE_PERCENTILE": "99",
+        }
+        with mock.patch.dict(os.environ, env):
+            policy = HedgePolicy.from_env("ConceptGenerationAgent")
+            self.assertTrue(policy.enabled)
+            self.assertEqual((policy.percentile, policy.max_rate), (99.0, 0.05))
+            self.assertEqual(HedgePolicy.from_env("TddGuardrailAgent").percentile, 95.0)
+        self.assertFalse(HedgePolicy().enabled)
+
+    def test_delay(self):
+        policy = HedgePolicy(enabled=True, min_delay=0.5, max_delay=10, min_samples=20)
+        self.assertIsNone(policy.delay(5, 2.0))
+        self.assertEqual(policy.delay(50, 2.0), 2.0)
+        self.assertEqual(policy.delay(50, 0.1), 0.5)
+        self.assertEqual(policy.delay(50, 60.0), 10)
+        self.assertEqual(HedgePolicy(initial_delay=3.0).delay(0, None), 3.0)
+
+    def test_budget_caps_hedge_rate(self):
+        budget = HedgeBudget(burst=2)
+        spent = 0
+        for _ in range(100):
+            budget.record_request(0.25)
+            spent += budget.try_spend()
+        self.assertEqual(spent, 25)
+
+
+class TestHedgedCall(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.budget = HedgeBudget()
+        self.budget.record_request(1)
+
+    def test_hedge_wins_and_primary_is_cancelled(self):
+        result = asyncio.run(hedged_call(
+            call("lento", 1, self.calls, "primary"), call("rápido", 0.01, self.calls, "hedge"), 0.01, self.budget
+        ))
+        self.assertEqual(result, ("rápido", "hedge"))
+        self.assertEqual(self.calls, ["primary", "hedge", "primary-cancelled"])
+
+    def test_fast_primary_does_not_hedge(self):
+        result = asyncio.run(hedged_call(
+            call("ok", 0, self.calls, "primary"), call("x", 0, self.calls, "hedge"), 0.5, self.budget
+        ))
+        self.assertEqual(result, ("ok", "primary"))
+        self.assertEqual(self.calls, ["primary"])
+        self.assertEqual(self.budget.balance, 1)
+
+    def test_exhausted_budget_waits_for_primary(self):
+        result = asyncio.run(hedged_call(
+            call("ok", 0.05, self.calls, "primary"), call("x", 0, self.calls, "hedge"), 0.01, HedgeBudget()
+        ))
+        self.assertEqual(result, ("ok", "primary"))
+        self.assertEqual(self.calls, ["primary"])
+
+    def test_primary_error_is_masked_by_hedge(self):
+        result = asyncio.run(hedged_call(
+            call(TimeoutError("principal"), 0.05, self.calls, "primary"),
+            call("ok", 0.1, self.calls, "hedge"), 0.01, self.budget,
+        ))
+        self.assertEqual(result, ("ok", "hedge"))
+
+    def test_both_fail(self):
+        with self.assertRaises(HedgedRequestError):
+            asyncio.run(hedged_call(
+                call(TimeoutError("principal"), 0.05, self.calls, "primary"),
+                call(RuntimeError("elevação"), 0.01, self.calls, "hedge"), 0.01, self.budget,
+            ))
+
+
+if __name__ == "__main__":
+    unittest.main()
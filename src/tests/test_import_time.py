@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tempo máximo para importar os pacotes (ajustável em máquinas lentas)
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", 1.0))
+
+# Módulos que não devem ser carregados só por importar os pacotes
+HEAVY_MODULES = (
+    "openai", "google.generativeai", "openrouter", "autogen", "rope", "yaml",
+    "cachetools", "tenacity", "pydantic", "rich", "typer", "httpx", "tiktoken",
+    "src.agents.agent_feature_coordinator", "src.core.utils.model_manager",
+)
+
+IMPORT_SCRIPT = """
+import json, logging, os, sys, time
+created = []
+makedirs = os.makedirs
+os.makedirs = lambda path, *args, **kwargs: (created.append(str(path)), makedirs(path, *args, **kwargs))[1]
+start = time.perf_counter()
+import src, src.agents, src.core, src.core.utils, src.core.logger
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+    "created": created,
+    "root_handlers": len(logging.getLogger().handlers),
+    "dir_agents": dir(src.agents),
+    "get_env_var": src.core.utils.get_env_var.__module__,
+}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+
+    def run_script(self, script):
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT_DIR, capture_output=True, text=True, timeout=60,
+            env={**os.environ, "PYTHONPATH": ROOT_DIR},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_package_import_is_lazy(self):
+        """Importar os pacotes não carrega agentes, SDKs nem configura os logs"""
+        report = json.loads(self.run_script(IMPORT_SCRIPT % (HEAVY_MODULES,)))
+
+        self.assertEqual(report["loaded"], [])
+        self.assertEqual(report["created"], [])
+        self.assertEqual(report["root_handlers"], 0)
+        self.assertIn("FeatureCoordinatorAgent", report["dir_agents"])
+        self.assertEqual(report["get_env_var"], "src.core.utils.env")
+        self.assertLess(report["elapsed"], IMPORT_TIME_BUDGET)
+
+    def test_unknown_attribute(self):
+        output = self.run_script(
+            "import src.agents\n"
+            "try:\n"
+            "    src.agents.MissingAgent\n"
+            "except AttributeError as e:\n"
+            "    print(e)\n"
+        )
+        self.assertIn("MissingAgent", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import logging
+import unittest
+
+from src.core.logger import log_execution
+from src.core.metrics import get_metrics_registry
+
+LOGGER_NAME = "test_log_execution_target"
+
+
+class ReprCounter:
+    """Objeto que conta quantas vezes sua representação foi calculada."""
+    calls = 0
+
+    def __repr__(self):
+        ReprCounter.calls += 1
+        return "ReprCounter()"
+
+
+def make_function(func):
+    """Aplica o decorador como se a função pertencesse ao módulo de teste."""
+    func.__module__ = LOGGER_NAME
+    return log_execution(func)
+
+
+class TestLogExecution(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = logging.StreamHandler(self.stream)
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.propagate = True
+        self.logger.setLevel(logging.NOTSET)
+
+    def test_disabled_level_skips_formatting(self):
+        """Com o nível desabilitado, os argumentos não são representados"""
+        self.logger.setLevel(logging.WARNING)
+        func = make_function(lambda value: "ok")
+        ReprCounter.calls = 0
+
+        self.assertEqual(func(ReprCounter()), "ok")
+
+        self.assertEqual(ReprCounter.calls, 0)
+        self.assertEqual(self.stream.getvalue(), "")
+
+    def test_masks_and_caps_arguments(self):
+        """Tokens e chaves sensíveis são mascarados e argumentos grandes limitados"""
+        def call(token, payload, api_key=None):
+            return len(payload)
+
+        func = make_function(call)
+        func("sk-" + "a" * 40, {"password": "segredo", "text": "x" * 50000}, api_key="abc")
+
+        output = self.stream.getvalue()
+        self.assertIn("Iniciando", output)
+        self.assertIn("Concluído", output)
+        self.assertNotIn("a" * 40, output)
+        self.assertNotIn("segredo", output)
+        self.assertNotIn("'abc'", output)
+        self.assertLess(len(output), 5000)
+
+    def test_records_duration_and_errors(self):
+        """Duração e falhas são registradas no registro de métricas"""
+        def failing():
+            raise ValueError("falha com sk-" + "b" * 40)
+
+        func = make_function(failing)
+        registry = get_metrics_registry()
+        name = failing.__qualname__
+        before = registry.counter("log_execution_errors_total").value(function=name)
+
+        with self.assertRaises(ValueError):
+            func()
+
+        self.assertEqual(registry.counter("log_execution_errors_total").value(function=name), before + 1)
+        samples = registry.histogram("log_execution_duration_seconds").snapshot()
+        self.assertGreaterEqual(samples[(("function", name),)]["count"], 1)
+        error_line = next(line for line in self.stream.getvalue().splitlines() if line.startswith("Erro em"))
+        self.assertNotIn("b" * 40, error_line)
+
+    def test_async_functions_are_awaited(self):
+        """Funções assíncronas são medidas até o fim da corrotina"""
+        async def compute(value):
+            await asyncio.sleep(0)
+            return value * 2
+
+        func = make_function(compute)
+        self.assertTrue(asyncio.iscoroutinefunction(func))
+        self.assertEqual(asyncio.run(func(21)), 42)
+        self.assertIn("Concluído", self.stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
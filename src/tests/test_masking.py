@@ -0,0 +1,94 @@
+import unittest
+
+from src.core.masking import (
+    is_sensitive_key,
+    mask_partially,
+    mask_sensitive_data,
+    mask_stream,
+    mask_text,
+)
+
+OPENAI_KEY = "sk-" + "A1b2C3d4" * 5
+GITHUB_TOKEN = "ghp_" + "x" * 36
+
+
+class TestMasking(unittest.TestCase):
+
+    def test_masks_tokens_in_text(self):
+        """Tokens conhecidos são mascarados parcialmente em uma única passada"""
+        text = f"Usando {OPENAI_KEY} e {GITHUB_TOKEN} para a chamada"
+        masked = mask_text(text)
+
+        self.assertNotIn(OPENAI_KEY, masked)
+        self.assertNotIn(GITHUB_TOKEN, masked)
+        self.assertIn(mask_partially(OPENAI_KEY), masked)
+        self.assertTrue(masked.startswith("Usando sk-A"))
+
+    def test_masks_sensitive_assignments(self):
+        """Valores de chaves sensíveis são omitidos; campos parecidos são preservados"""
+        text = (
+            'OPENAI_API_KEY=abc123\n'
+            '{"password": "hunter2", "max_tokens": 4000, "token_count": 12}\n'
+            'Authorization: Bearer abc.def.ghi\n'
+        )
+        masked = mask_text(text)
+
+        self.assertIn("OPENAI_API_KEY=***", masked)
+        self.assertIn('"password": "***"', masked)
+        self.assertIn('"max_tokens": 4000', masked)
+        self.assertIn('"token_count": 12', masked)
+        self.assertIn("Authorization: Bearer ***", masked)
+
+    def test_structures_are_masked_without_mutation(self):
+        """Dicionários, listas e tuplas são copiados com chaves sensíveis omitidas"""
+        data = {
+            "api_key": "valor",
+            "config": ({"secret_token": "x", "model": "gpt-4"}, [OPENAI_KEY, 42]),
+            "name": "feature",
+        }
+        masked = mask_sensitive_data(data)
+
+        self.assertEqual(masked["api_key"], "***")
+        self.assertIsInstance(masked["config"], tuple)
+        self.assertEqual(masked["config"][0], {"secret_token": "***", "model": "gpt-4"})
+        self.assertEqual(masked["config"][1], [mask_partially(OPENAI_KEY), 42])
+        self.assertEqual(masked["name"], "feature")
+        self.assertEqual(data["api_key"], "valor")
+        self.assertEqual(mask_sensitive_data(("a", (OPENAI_KEY,))), ("a", (mask_partially(OPENAI_KEY),)))
+        self.assertIs(mask_sensitive_data(None), None)
+
+    def test_deeply_nested_structures(self):
+        """Aninhamentos profundos não estouram a pilha de recursão"""
+        data = current = []
+        for _ in range(50000):
+            child = []
+            current.append(child)
+            current = child
+        current.append({"password": "x"})
+
+        masked = mask_sensitive_data(data)
+
+        for _ in range(50000):
+            masked = masked[0]
+        self.assertEqual(masked, [{"password": "***"}])
+
+    def test_stream_matches_full_text(self):
+        """O modo de streaming produz o mesmo resultado que o texto inteiro"""
+        line = f'log {OPENAI_KEY} token: segredo texto comum {GITHUB_TOKEN}\n'
+        text = line * 2000 + "sem quebra final " + OPENAI_KEY
+
+        chunks = (text[i:i + 97] for i in range(0, len(text), 97))
+        streamed = "".join(mask_stream(chunks, max_carry=256))
+
+        self.assertEqual(streamed, mask_text(text))
+        self.assertNotIn(OPENAI_KEY, streamed)
+        self.assertNotIn("segredo", streamed)
+
+    def test_sensitive_keys(self):
+        self.assertTrue(is_sensitive_key("GITHUB_TOKEN"))
+        self.assertTrue(is_sensitive_key("client_secret"))
+        self.assertFalse(is_sensitive_key("model"))
+
+
+if __name__ == "__main__":
+    unittest.main()
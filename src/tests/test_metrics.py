@@ -0,0 +1,92 @@
+import math
+import os
+import random
+import tempfile
+import unittest
+import urllib.request
+
+from src.core.metrics import (
+    MetricsRegistry,
+    render_prometheus,
+    start_metrics_server,
+    write_prometheus_file,
+)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_percentiles(self):
+        """Os percentis têm erro relativo abaixo de 1% em várias ordens de grandeza"""
+        histogram = self.registry.histogram("model_request_duration_seconds")
+        rng = random.Random(42)
+        values = sorted(rng.lognormvariate(0, 2) for _ in range(20000))
+        for value in values:
+            histogram.observe(value, provider="openai")
+
+        for percent in (50, 90, 99):
+            expected = values[math.ceil(len(values) * percent / 100) - 1]
+            actual = histogram.percentile(percent, provider="openai")
+            self.assertAlmostEqual(actual / expected, 1, delta=0.01)
+
+        snapshot = histogram.snapshot()[(("provider", "openai"),)]
+        self.assertEqual(snapshot["count"], 20000)
+        self.assertEqual(snapshot["max"], values[-1])
+        self.assertIn("p95", snapshot)
+        self.assertIsNone(histogram.percentile(50, provider="gemini"))
+
+    def test_gauge(self):
+        gauge = self.registry.gauge("model_cache_hit_ratio")
+        gauge.set(0.25)
+        self.assertEqual(gauge.value(), 0.25)
+        gauge.labels(cache="responses").set_function(lambda: 0.75)
+        self.assertEqual(gauge.value(cache="responses"), 0.75)
+        with self.assertRaises(ValueError):
+            self.registry.counter("model_cache_hit_ratio")
+
+    def test_prometheus_text_format(self):
+        """Contadores, gauges e histogramas seguem o formato de texto do Prometheus"""
+        self.registry.counter("model_tokens_total", "Tokens consumidos").inc(
+            120, model='gpt-4"o', type="prompt"
+        )
+        self.registry.gauge("model_cache_hit_ratio").set(0.5)
+        histogram = self.registry.histogram("subprocess_duration_seconds", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, command="git push")
+
+        text = render_prometheus(self.registry)
+
+        self.assertIn("# HELP model_tokens_total Tokens consumidos\n", text)
+        self.assertIn("# TYPE model_tokens_total counter\n", text)
+        self.assertIn('model_tokens_total{model="gpt-4\\"o",type="prompt"} 120\n', text)
+        self.assertIn("model_cache_hit_ratio 0.5\n", text)
+        self.assertIn('subprocess_duration_seconds_bucket{command="git push",le="0.1"} 2\n', text)
+        self.assertIn('subprocess_duration_seconds_bucket{command="git push",le="1"} 3\n', text)
+        self.assertIn('subprocess_duration_seconds_bucket{command="git push",le="+Inf"} 4\n', text)
+        self.assertIn('subprocess_duration_seconds_count{command="git push"} 4\n', text)
+        self.assertIn('subprocess_duration_seconds_sum{command="git push"} 3.65\n', text)
+
+    def test_file_and_endpoint(self):
+        self.registry.counter("model_requests_total").inc(provider="openai", status="success")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_prometheus_file(os.path.join(tmp_dir, "metrics", "agent.prom"), self.registry)
+            with open(path, encoding="utf-8") as f:
+                self.assertIn('model_requests_total{provider="openai",status="success"} 1', f.read())
+
+        server = start_metrics_server(port=0, registry=self.registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode("utf-8")
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(body, render_prometheus(self.registry))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import unittest
+
+from src.core.utils.model_gateway import ModelGateway
+from src.core.utils.response_cache import CacheMode
+
+
+class FakeModelManager:
+    """Gerenciador falso que registra em qual thread a geração ocorreu."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def chat(self, messages, model_name, **kwargs):
+        self.calls.append((model_name, kwargs, threading.current_thread().name))
+        await asyncio.sleep(0)
+        return f"{model_name}:{messages[-1]['content']}"
+
+    async def aclose(self):
+        pass
+
+
+class TestModelGateway(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = FakeModelManager()
+        self.gateway = ModelGateway(manager=self.manager)
+
+    def tearDown(self):
+        self.gateway.close()
+
+    def test_generate_runs_on_gateway_loop(self):
+        """A versão síncrona executa a chamada no event loop do gateway"""
+        result = self.gateway.generate(
+            messages=[{"role": "user", "content": "olá"}],
+            model="gpt-4",
+            api_key="sk-teste",
+            temperature=0.2,
+        )
+        self.assertEqual(result, "gpt-4:olá")
+        model_name, kwargs, thread_name = self.manager.calls[0]
+        self.assertEqual(kwargs["api_key"], "sk-teste")
+        self.assertEqual(kwargs["temperature"], 0.2)
+        self.assertEqual(thread_name, "model-gateway")
+
+    def test_agenerate_overlaps_calls(self):
+        """Chamadas assíncronas de vários agentes podem ser sobrepostas"""
+        async def run():
+            return await asyncio.gather(
+                self.gateway.agenerate([{"role": "user", "content": "a"}], model="gpt-4"),
+                self.gateway.agenerate([{"role": "user", "content": "b"}], model="gpt-3.5-turbo"),
+            )
+
+        self.assertEqual(asyncio.run(run()), ["gpt-4:a", "gpt-3.5-turbo:b"])
+        self.assertEqual(len(self.manager.calls), 2)
+
+    def test_cache_mode_is_scoped(self):
+        """O modo de cache de um comando vale só para as chamadas do seu contexto"""
+        messages = [{"role": "user", "content": "olá"}]
+        with self.gateway.cache_mode("off"):
+            self.gateway.generate(messages, model="gpt-4")
+            # Threads e tarefas criadas no bloco herdam o modo
+            asyncio.run(self.gateway.agenerate(messages, model="gpt-4"))
+            # Outra thread (ex.: outro comando do daemon) mantém o próprio modo
+            other = threading.Thread(target=self.gateway.generate, args=(messages, "gpt-4"))
+            other.start()
+            other.join()
+        self.gateway.generate(messages, model="gpt-4")
+
+        modes = [kwargs.get("cache_mode") for _, kwargs, _ in self.manager.calls]
+        self.assertEqual(modes, [CacheMode.OFF, CacheMode.OFF, None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
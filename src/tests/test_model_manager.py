@@ -0,0 +1,189 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.cli.daemon import AgentDaemon
+from src.core.metrics import get_metrics_registry
+from src.core.utils.circuit_breaker import ProviderHealthTracker
+from src.core.utils.hedging import HedgePolicy
+from src.core.utils.model_gateway import ModelGateway
+from src.core.utils.model_manager import ModelManager
+from src.core.utils.rate_limit import ModelRateLimiter, RateLimits
+from src.core.utils.response_cache import CacheMode, ResponseCache
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeClientPool:
+    """Provedores falsos: cada chamada registra (provedor, chave, modelo)."""
+
+    def __init__(self, delays=None, errors=None):
+        self.calls = []
+        self.delays = delays or {}
+        self.errors = errors or {}
+
+    def get_openai_compatible_client(self, provider, api_key, base_url=None):
+        async def create(model, messages, **kwargs):
+            self.calls.append((provider, api_key, model))
+            await asyncio.sleep(self.delays.get(model, 0))
+            if model in self.errors:
+                raise self.errors[model]
+            message = SimpleNamespace(content=f"resposta de {model}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def aclose(self):
+        pass
+
+
+class TestModelManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        env = mock.patch.dict(os.environ, {
+            "OPENAI_KEY": "sk-env-openai",
+            "OPENROUTER_KEY": "sk-env-openrouter",
+            "GEMINI_KEY": "",
+            "OPENAI_MAX_RETRIES": "0",
+            "OPENROUTER_MAX_RETRIES": "0",
+            "MODEL_ROUTER": "false",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        get_metrics_registry().clear()
+        self.messages = [{"role": "user", "content": "Gere o conceito"}]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def manager(self, **pool_options):
+        self.pool = FakeClientPool(**pool_options)
+        return ModelManager(
+            client_pool=self.pool,
+            cache=ResponseCache(path=os.path.join(self.tmp_dir.name, "cache.db"), mode=CacheMode.OFF),
+            health=ProviderHealthTracker(
+                enabled=True, error_rate=0.5, min_requests=1, window=60, cooldown=30,
+                path=os.path.join(self.tmp_dir.name, "provider_health.json"),
+            ),
+        )
+
+    def test_latency_histogram_counts_only_successes(self):
+        """Erros ficam fora da latência usada pelo hedging e pelo roteador"""
+        manager = self.manager(errors={"gpt-4": FakeAPIError(400)})
+        with self.assertRaises(FakeAPIError):
+            asyncio.run(manager.chat(self.messages, model_name="gpt-4", force=True))
+        asyncio.run(manager.chat(self.messages, model_name="gpt-3.5-turbo", force=True))
+
+        registry = get_metrics_registry()
+        latency = registry.histogram("model_request_duration_seconds")
+        self.assertEqual(latency.labels(provider="openai", model="gpt-4").count, 0)
+        self.assertEqual(latency.labels(provider="openai", model="gpt-3.5-turbo").count, 1)
+        failed = registry.histogram("model_failed_request_duration_seconds")
+        self.assertEqual(failed.labels(provider="openai", model="gpt-4", status="error").count, 1)
+
+    def test_hedge_on_other_provider_drops_explicit_key(self):
+        """A chamada especulativa a outro provedor usa a chave dele, não a explícita"""
+        manager = self.manager(delays={"gpt-4": 1.0})
+        hedge = HedgePolicy(enabled=True, max_rate=1.0, min_delay=0.01, initial_delay=0.01)
+        response, model = asyncio.run(manager.chat(
+            self.messages, model_name="gpt-4", elevation_model="openrouter/auto",
+            api_key="sk-explicit", hedge=hedge, return_model=True,
+        ))
+
+        self.assertEqual((response, model), ("resposta de auto", "openrouter/auto"))
+        self.assertEqual(self.pool.calls, [
+            ("openai", "sk-explicit", "gpt-4"),
+            ("openrouter", "sk-env-openrouter", "auto"),
+        ])
+        # A chamada principal cancelada não entra na latência do modelo
+        registry = get_metrics_registry()
+        self.assertEqual(
+            registry.histogram("model_request_duration_seconds").labels(provider="openai", model="gpt-4").count, 0
+        )
+        self.assertEqual(
+            registry.histogram("model_failed_request_duration_seconds").labels(
+                provider="openai", model="gpt-4", status="cancelled"
+            ).count,
+            1,
+        )
+
+    def test_open_circuit_moves_to_next_healthy_model(self):
+        """Com o circuito do modelo aberto, a chamada segue para o próximo modelo saudável"""
+        manager = self.manager(errors={"gpt-4": FakeAPIError(503)})
+        with self.assertRaises(FakeAPIError):
+            asyncio.run(manager.chat(self.messages, model_name="gpt-4", api_key="sk-explicit"))
+        self.assertFalse(manager.is_model_available("gpt-4"))
+
+        response, model = asyncio.run(
+            manager.chat(self.messages, model_name="gpt-4", api_key="sk-explicit", return_model=True)
+        )
+
+        self.assertEqual((response, model), ("resposta de gpt-4-turbo-preview", "gpt-4-turbo"))
+        # Mesmo provedor: a chave explícita é mantida
+        self.assertEqual(self.pool.calls, [
+            ("openai", "sk-explicit", "gpt-4"),
+            ("openai", "sk-explicit", "gpt-4-turbo-preview"),
+        ])
+
+    def test_next_model_on_other_provider_drops_explicit_key(self):
+        manager = self.manager()
+        for name in ("gpt-4-turbo", "gpt-4", "gpt-3.5-turbo"):
+            manager.mark_model_unavailable(name, FakeAPIError(503))
+
+        response = asyncio.run(manager.chat(self.messages, model_name="gpt-4", api_key="sk-explicit"))
+
+        self.assertEqual(response, "resposta de auto")
+        self.assertEqual(self.pool.calls, [("openrouter", "sk-env-openrouter", "auto")])
+
+    def test_reserved_tokens_are_refunded_after_retries(self):
+        """Os tokens são reservados uma vez por chamada e devolvidos quando ela falha"""
+        rate_limiter = ModelRateLimiter(
+            {("openai", "gpt-4"): RateLimits(tokens_per_minute=100000)}, clock=lambda: 0.0
+        )
+        manager = ModelManager(
+            client_pool=FakeClientPool(errors={"gpt-4": FakeAPIError(503)}),
+            cache=ResponseCache(path=os.path.join(self.tmp_dir.name, "cache.db"), mode=CacheMode.OFF),
+            health=ProviderHealthTracker(enabled=False, path=os.path.join(self.tmp_dir.name, "health.json")),
+            rate_limiter=rate_limiter,
+        )
+        acquired = []
+        acquire = rate_limiter.acquire
+
+        async def spy(provider, model, tokens=0):
+            acquired.append(tokens)
+            return await acquire(provider, model, tokens)
+
+        with mock.patch.object(rate_limiter, "acquire", spy), \
+                mock.patch("src.core.utils.model_manager.backoff_delay", return_value=0):
+            with self.assertRaises(FakeAPIError):
+                asyncio.run(manager.chat(self.messages, model_name="gpt-4", force=True, max_retries=2))
+
+        self.assertEqual(len(acquired), 3)
+        self.assertGreater(acquired[0], 0)
+        self.assertEqual(acquired[1:], [0, 0])
+        _, tokens = rate_limiter._get_buckets("openai", "gpt-4")
+        self.assertEqual(tokens.tokens, 100000)
+
+    def test_open_circuit_in_status(self):
+        """O status do daemon mostra os circuitos do ModelManager usado pelos agentes"""
+        manager = self.manager()
+        manager.mark_model_unavailable("gpt-4", FakeAPIError(503))
+
+        with mock.patch("src.core.utils.model_gateway.get_model_gateway", return_value=ModelGateway(manager)):
+            status = asyncio.run(AgentDaemon(warm=False)._status({}))
+
+        circuits = {(circuit["provider"], circuit["model"]): circuit for circuit in status["circuits"]}
+        self.assertEqual(circuits[("openai", "gpt-4")]["state"], "open")
+        self.assertIn("gpt-4", status["models"])
+
+
+if __name__ == "__main__":
+    unittest.main()
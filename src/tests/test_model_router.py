@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from src.core.metrics import get_metrics_registry
+from src.core.utils.model_router import ModelRouter, RoutingPolicy, supports_json_mode
+
+
+def config(provider, model_id):
+    return SimpleNamespace(provider=SimpleNamespace(value=provider), model_id=model_id)
+
+
+class FakeManager:
+    """Modelos configurados como no ModelManager com as chaves da OpenAI e do OpenRouter."""
+
+    def __init__(self, unavailable=()):
+        self.configs = {
+            "gpt-4-turbo": config("openai", "gpt-4-turbo-preview"),
+            "gpt-4": config("openai", "gpt-4"),
+            "gpt-3.5-turbo": config("openai", "gpt-3.5-turbo"),
+            "openrouter/auto": config("openrouter", "auto"),
+            "anthropic/claude-3-opus": config("openrouter", "anthropic/claude-3-opus"),
+        }
+        self.unavailable = set(unavailable)
+
+    def is_model_available(self, name):
+        return name not in self.unavailable
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def setUp(self):
+        get_metrics_registry().clear()
+        self.messages = [{"role": "user", "content": "Valide o plano"}]
+
+    def test_routes_by_task(self):
+        """Modelos econômicos para validação e guardrails, premium para conceitos"""
+        router = ModelRouter(FakeManager(), enabled=True)
+        self.assertEqual(router.route("validation", "gpt-4", self.messages, 1000), "gpt-3.5-turbo")
+        self.assertEqual(router.route("guardrail", "gpt-4", self.messages, 4000), "gpt-3.5-turbo")
+        self.assertEqual(router.route("concept", "gpt-4", self.messages, 2000), "gpt-4-turbo")
+
+    def test_constraints(self):
+        router = ModelRouter(FakeManager(unavailable={"gpt-3.5-turbo"}), enabled=True)
+        # Circuito aberto: o próximo modelo mais barato com modo JSON
+        self.assertEqual(router.route("validation", "gpt-4", self.messages, 1000), "gpt-4-turbo")
+        # Prompt maior que a janela de contexto do gpt-3.5-turbo
+        router = ModelRouter(FakeManager(), enabled=True)
+        long_prompt = [{"role": "user", "content": "x" * 4 * 20000}]
+        self.assertEqual(router.route("guardrail", "gpt-4", long_prompt, 1000), "gpt-4-turbo")
+        # Modelo lento acima da latência máxima da tarefa
+        for _ in range(20):
+            get_metrics_registry().histogram("model_request_duration_seconds").observe(
+                40.0, provider="openai", model="gpt-3.5-turbo"
+            )
+        self.assertEqual(router.route("guardrail", "gpt-4", self.messages, 1000), "gpt-4-turbo")
+
+    def test_env_overrides_and_fallback(self):
+        router = ModelRouter(FakeManager(), enabled=True)
+        with mock.patch.dict(os.environ, {"ROUTER_CONCEPT_MAX_COST": "0.0001"}):
+            self.assertEqual(RoutingPolicy.for_task("concept").max_cost, 0.0001)
+            self.assertEqual(router.route("concept", "gpt-4", self.messages, 2000), "gpt-4")
+        with mock.patch.dict(os.environ, {"ROUTER_VALIDATION_MODEL": "gpt-4o-mini"}):
+            self.assertEqual(router.route("validation", "gpt-4", self.messages), "gpt-4o-mini")
+        self.assertEqual(ModelRouter(FakeManager(), enabled=False).route("concept", "gpt-4"), "gpt-4")
+
+    def test_prices_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "prices.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"auto": [0.01, 0.01]}, f)
+            with mock.patch.dict(os.environ, {"MODEL_PRICES_FILE": path}):
+                router = ModelRouter(FakeManager(), enabled=True)
+        # Com preço conhecido, o openrouter/auto (qualidade intermediária) passa a ser o mais barato
+        self.assertEqual(router.route("tdd", "gpt-4", self.messages, 1000), "openrouter/auto")
+        self.assertAlmostEqual(router.estimate_cost("gpt-4", 1000, 1000), 0.09)
+
+    def test_json_mode_table(self):
+        self.assertTrue(supports_json_mode("gpt-4-turbo-preview"))
+        self.assertTrue(supports_json_mode("gpt-4o-mini"))
+        self.assertFalse(supports_json_mode("gpt-4"))
+        self.assertFalse(supports_json_mode("anthropic/claude-3-opus"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.core.utils.project_index import ProjectIndex, get_project_index
+
+
+class TestProjectIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = Path(self.temp_dir)
+        for rel_path in [
+            "app/main.py",
+            "app/utils.js",
+            "app/README.md",
+            "node_modules/lib/index.js",
+            "app/__pycache__/main.cpython-39.pyc",
+            "generated/schema.py",
+            "logs/debug.py",
+            "logs/keep.py",
+        ]:
+            path = self.root / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("x = 1\n", encoding="utf-8")
+        (self.root / ".gitignore").write_text("generated/\nlogs/*.py\n!logs/keep.py\n", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def paths(self, index, extensions=(".py", ".js")):
+        return [p.replace(os.sep, "/") for p in index.list_files(extensions)]
+
+    def test_ignored_directories_and_gitignore(self):
+        """Diretórios padrão e regras do .gitignore (incluindo negação) são respeitados"""
+        index = ProjectIndex(self.temp_dir)
+
+        self.assertEqual(self.paths(index), ["app/main.py", "app/utils.js", "logs/keep.py"])
+        self.assertEqual(self.paths(index, [".md"]), ["app/README.md"])
+
+    def test_only_changed_directories_are_rescanned(self):
+        """Chamadas seguintes só releem diretórios cujo mtime mudou"""
+        index = ProjectIndex(self.temp_dir)
+        index.list_files()
+        scanned = index.scanned_dirs
+
+        index.list_files()
+        self.assertEqual(index.scanned_dirs, scanned)
+
+        new_file = self.root / "app" / "feature.py"
+        new_file.write_text("", encoding="utf-8")
+        os.utime(self.root / "app", ns=(0, 10**18))
+        self.assertIn("app/feature.py", self.paths(index))
+        self.assertEqual(index.scanned_dirs, scanned + 1)
+
+        shutil.rmtree(self.root / "app")
+        self.assertEqual(self.paths(index), ["logs/keep.py"])
+
+    def test_shared_instance_per_root(self):
+        """Agentes que usam o mesmo diretório compartilham o índice"""
+        self.assertIs(get_project_index(self.temp_dir), get_project_index(str(self.root / ".")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from src.core.utils.prompt_budget import (
+    DEFAULT_CONTEXT_WINDOW,
+    PromptBudgeter,
+    TokenCounter,
+    context_window,
+)
+
+
+def estimating_counter():
+    """Contador determinístico (estimativa de 4 caracteres por token), com ou sem tiktoken."""
+    counter = TokenCounter("gpt-4")
+    counter.encoding = None
+    return counter
+
+
+class TestPromptBudget(unittest.TestCase):
+
+    def test_context_window_uses_longest_prefix(self):
+        self.assertEqual(context_window("gpt-4"), 8192)
+        self.assertEqual(context_window("gpt-4-turbo-preview"), 128000)
+        self.assertEqual(context_window("gpt-4o-mini"), 128000)
+        self.assertEqual(context_window("modelo-desconhecido"), DEFAULT_CONTEXT_WINDOW)
+
+    def test_counter_truncate_respects_limit(self):
+        counter = TokenCounter("gpt-4")
+        text = "def função_exemplo(x):\n    return x * 2\n" * 200
+        truncated = counter.truncate(text, 50)
+        self.assertLessEqual(counter.count(truncated), 50)
+        self.assertTrue(text.startswith(truncated))
+        self.assertEqual(counter.truncate("curto", 50), "curto")
+
+    def test_budget_reserves_output_tokens(self):
+        budgeter = PromptBudgeter("gpt-4", max_output_tokens=4000)
+        self.assertEqual(budgeter.budget, 8192 - 4000)
+        capped = PromptBudgeter("gpt-4", max_output_tokens=4000, max_input_tokens=1000)
+        self.assertEqual(capped.budget, 1000)
+
+    def test_required_sections_are_kept_and_priority_wins(self):
+        counter = estimating_counter()
+        budgeter = PromptBudgeter("gpt-4", max_input_tokens=300, counter=counter)
+        budgeter.add("concept", "C" * 400, required=True)  # 100 tokens
+        budgeter.add_items("file_list", ["L" * 200] * 3, priority=1, truncate_items=False)
+        budgeter.add_items("file_bodies", ["B" * 400, "b" * 400], priority=2, separator="")
+        budgeter.add("instructions", "I" * 200, required=True)  # 50 tokens
+
+        prompt = budgeter.build()
+        report = budgeter.report()
+
+        self.assertLessEqual(counter.count(prompt), 300)
+        self.assertIn("C" * 400, prompt)
+        self.assertTrue(prompt.endswith("I" * 200))
+        # 150 tokens restantes: o trecho de maior valor entra antes da listagem,
+        # que fica com o que sobra
+        self.assertIn("B" * 400, prompt)
+        self.assertEqual(report["file_bodies"]["dropped"], 1)
+        self.assertEqual(report["file_list"]["dropped"], 2)
+
+    def test_items_are_truncated_only_with_enough_room(self):
+        counter = estimating_counter()
+        budgeter = PromptBudgeter("gpt-4", max_input_tokens=200, counter=counter)
+        budgeter.add_items("file_bodies", ["x" * 400, "y" * 800], separator="")
+
+        prompt = budgeter.build()
+
+        self.assertIn("x" * 400, prompt)
+        self.assertIn("y" * 100, prompt)
+        self.assertNotIn("y" * 800, prompt)
+        self.assertIn("conteúdo truncado", prompt)
+        self.assertLessEqual(counter.count(prompt), 200)
+
+    def test_section_limit_and_insertion_order(self):
+        counter = estimating_counter()
+        budgeter = PromptBudgeter("gpt-4", counter=counter)
+        budgeter.add("concept", "conceito\n", required=True)
+        budgeter.add_items("file_list", ["- a.py", "- b.py", "- c.py"], priority=1, max_tokens=5,
+                           header="## Arquivos\n", truncate_items=False)
+        budgeter.add("instructions", "\ninstruções", required=True)
+
+        prompt = budgeter.build()
+
+        self.assertTrue(prompt.startswith("conceito\n## Arquivos\n- a.py"))
+        self.assertNotIn("- c.py", prompt)
+        self.assertTrue(prompt.endswith("instruções"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import unittest
+
+from src.core.utils.rate_limit import (
+    ModelRateLimiter,
+    RateLimits,
+    TokenBucket,
+    backoff_delay,
+    estimate_request_tokens,
+    is_retryable,
+    retry_after,
+)
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers or {})
+
+
+class APIConnectionError(Exception):
+    """Mesmo nome da exceção de conexão do SDK da OpenAI."""
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.clock = lambda: self.now
+
+    def test_requests_queue_in_order(self):
+        """Com o balde vazio, cada pedido espera a sua vez em vez de falhar"""
+        bucket = TokenBucket(60, clock=self.clock)
+        self.assertEqual([bucket.reserve() for _ in range(60)], [0.0] * 60)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+        self.assertAlmostEqual(bucket.reserve(), 2.0)
+
+        self.now = 2.0
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+    def test_token_usage_is_settled(self):
+        limiter = ModelRateLimiter({("openai", "gpt-4"): RateLimits(tokens_per_minute=6000)}, clock=self.clock)
+        self.assertEqual(asyncio.run(limiter.acquire("openai", "gpt-4", 6000)), 0.0)
+        # A chamada usou só 1200 tokens: o restante volta ao balde
+        limiter.settle("openai", "gpt-4", reserved=6000, used=1200)
+        _, tokens = limiter._get_buckets("openai", "gpt-4")
+        self.assertEqual(tokens.reserve(4800), 0.0)
+        self.assertAlmostEqual(tokens.reserve(100), 1.0)
+
+    def test_failed_call_refunds_reservation(self):
+        """Uso 0 devolve a reserva inteira; uso não informado a mantém"""
+        limiter = ModelRateLimiter({("openai", "gpt-4"): RateLimits(tokens_per_minute=6000)}, clock=self.clock)
+        asyncio.run(limiter.acquire("openai", "gpt-4", 6000))
+        limiter.settle("openai", "gpt-4", reserved=6000, used=0)
+        _, tokens = limiter._get_buckets("openai", "gpt-4")
+        self.assertEqual(tokens.tokens, 6000)
+
+        asyncio.run(limiter.acquire("openai", "gpt-4", 6000))
+        limiter.settle("openai", "gpt-4", reserved=6000, used=None)
+        self.assertEqual(tokens.tokens, 0)
+
+
+class TestModelRateLimiter(unittest.TestCase):
+
+    def test_retry_after_pauses_model(self):
+        """Um Retry-After pausa as chamadas seguintes ao mesmo modelo, mesmo sem limites configurados"""
+        limiter = ModelRateLimiter({("openai", "gpt-4"): RateLimits(), ("openai", "gpt-4o"): RateLimits()})
+        limiter.block("openai", "gpt-4", 0.1)
+
+        async def run():
+            started = time.perf_counter()
+            await asyncio.gather(limiter.acquire("openai", "gpt-4"), limiter.acquire("openai", "gpt-4"))
+            blocked = time.perf_counter() - started
+            started = time.perf_counter()
+            await limiter.acquire("openai", "gpt-4o")
+            return blocked, time.perf_counter() - started
+
+        blocked, other = asyncio.run(run())
+        self.assertGreaterEqual(blocked, 0.09)
+        self.assertLess(other, 0.05)
+
+    def test_limits_from_env(self):
+        import os
+        from unittest import mock
+
+        with mock.patch.dict(os.environ, {"OPENAI_RPM": "500", "OPENAI_GPT_4O_MINI_TPM": "200000"}):
+            self.assertEqual(RateLimits.from_env("openai", "gpt-4o-mini"), RateLimits(500, 200000))
+            self.assertEqual(RateLimits.from_env("openai", "gpt-4"), RateLimits(500, 0))
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(FakeAPIError(429)))
+        self.assertTrue(is_retryable(FakeAPIError(503)))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertTrue(is_retryable(APIConnectionError()))
+        self.assertFalse(is_retryable(FakeAPIError(400)))
+        self.assertFalse(is_retryable(ValueError("Modelo gpt-5 não disponível")))
+
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after(FakeAPIError(429, {"retry-after": "7"})), 7.0)
+        self.assertEqual(retry_after(FakeAPIError(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(retry_after(FakeAPIError(429, {
+            "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m6s",
+            "x-ratelimit-remaining-tokens": "10", "x-ratelimit-reset-tokens": "2s",
+        })), 66.0)
+        self.assertIsNone(retry_after(FakeAPIError(503)))
+        self.assertIsNone(retry_after(TimeoutError()))
+
+    def test_backoff_and_estimate(self):
+        for attempt in range(1, 10):
+            self.assertLessEqual(backoff_delay(attempt), min(30.0, 2 ** (attempt - 1)))
+        self.assertEqual(estimate_request_tokens([{"role": "user", "content": "x" * 400}], 500), 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.core.utils.file_cache import FileContentCache
+from src.core.utils.project_index import ProjectIndex
+from src.core.utils.relevance_index import RelevanceIndex, tokenize
+
+
+class TestRelevanceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.root = Path(self.temp_dir)
+        self.write("src/auth/login_service.py", '''
+class LoginService:
+    """Autentica usuários com senha e token JWT."""
+
+    def authenticate(self, username, password):
+        return self.token_provider.issue(username)
+''')
+        self.write("src/billing/invoice.py", '''
+def generate_invoice(order):
+    """Gera a fatura de um pedido."""
+    return {"total": order.total}
+''')
+        self.write("src/cli.py", "def main():\n    print('cli')\n" * 50)
+        self.index = RelevanceIndex(ProjectIndex(self.temp_dir), file_cache=FileContentCache(), chunk_lines=20)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, rel_path, content):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def test_tokenize_splits_identifiers(self):
+        """Identificadores em camelCase e snake_case são separados em termos"""
+        terms = tokenize("parseHTTPResponse generate_invoice")
+        self.assertIn("parsehttpresponse", terms)
+        self.assertTrue({"parse", "http", "response", "generate", "invoice"} <= set(terms))
+
+    def test_ranks_relevant_chunks(self):
+        """Trechos com termos do conceito aparecem primeiro"""
+        results = self.index.search("Adicionar autenticação de login com token JWT", top_k=2)
+
+        self.assertEqual(results[0].path, "src/auth/login_service.py")
+        self.assertIn("LoginService", results[0].text)
+        self.assertEqual(self.index.rank_files("fatura do pedido (invoice)", top_k=1), ["src/billing/invoice.py"])
+
+    def test_token_budget(self):
+        """Trechos que excedem o orçamento de tokens são descartados"""
+        # Cada trecho de src/cli.py tem 20 linhas (cerca de 72 tokens)
+        results = self.index.search("cli main", top_k=5, max_tokens=100, count_tokens=lambda text: len(text) // 4)
+
+        self.assertEqual(len(results), 1)
+        self.assertLessEqual(len(results[0].text) // 4, 100)
+
+    def test_incremental_update(self):
+        """Apenas arquivos novos ou alterados são reindexados"""
+        self.index.update()
+        indexed = self.index.indexed_files
+
+        self.index.update()
+        self.assertEqual(self.index.indexed_files, indexed)
+
+        path = self.write("src/billing/invoice.py", "def refund_payment(order):\n    pass\n")
+        os.utime(path, ns=(0, 10**18))
+        self.assertEqual(self.index.rank_files("refund", top_k=1), ["src/billing/invoice.py"])
+        self.assertEqual(self.index.indexed_files, indexed + 1)
+        self.assertEqual(self.index.search("fatura"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from src.core.utils.response_cache import CacheMode, ResponseCache, make_cache_key, use_cache_mode
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "responses.sqlite3"
+        self.messages = [{"role": "user", "content": "Crie um conceito"}]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_cache_key_depends_on_request_parameters(self):
+        """A chave muda com qualquer parâmetro que afete a resposta"""
+        base = make_cache_key("openai", "gpt-4", self.messages, temperature=0.7)
+        self.assertEqual(base, make_cache_key("openai", "gpt-4", list(self.messages), temperature=0.7))
+        self.assertNotEqual(base, make_cache_key("openai", "gpt-4", self.messages, temperature=0.2))
+        self.assertNotEqual(base, make_cache_key("openrouter", "gpt-4", self.messages, temperature=0.7))
+        self.assertNotEqual(
+            base,
+            make_cache_key("openai", "gpt-4", self.messages, temperature=0.7,
+                           response_format={"type": "json_object"}),
+        )
+        self.assertNotEqual(base, make_cache_key("openai", "gpt-4", self.messages, temperature=0.7, stop=["\n"]))
+        self.assertNotEqual(base, make_cache_key("openai", "gpt-4", self.messages, temperature=0.7, seed=42))
+        # Opções de transporte não mudam a resposta
+        self.assertEqual(base, make_cache_key("openai", "gpt-4", self.messages, temperature=0.7, timeout=10))
+
+    def test_hit_and_miss_are_shared_across_instances(self):
+        """Respostas gravadas por um processo são lidas por outro"""
+        key = make_cache_key("openai", "gpt-4", self.messages)
+        writer = ResponseCache(path=self.path, mode=CacheMode.READWRITE)
+        self.assertIsNone(writer.get(key))
+        writer.set(key, "resposta")
+        writer.close()
+
+        reader = ResponseCache(path=self.path, mode=CacheMode.READ)
+        self.assertEqual(reader.get(key), "resposta")
+        stats = reader.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(writer.stats()["misses"], 1)
+        reader.close()
+
+    def test_modes_restrict_reads_and_writes(self):
+        """Os modos off/read/write limitam o acesso ao cache"""
+        key = make_cache_key("openai", "gpt-4", self.messages)
+        ResponseCache(path=self.path, mode=CacheMode.READ).set(key, "ignorado")
+        self.assertIsNone(ResponseCache(path=self.path, mode=CacheMode.READWRITE).get(key))
+
+        ResponseCache(path=self.path, mode=CacheMode.WRITE).set(key, "gravado")
+        self.assertIsNone(ResponseCache(path=self.path, mode=CacheMode.WRITE).get(key))
+        self.assertIsNone(ResponseCache(path=self.path, mode=CacheMode.OFF).get(key))
+        self.assertEqual(ResponseCache(path=self.path, mode=CacheMode.READ).get(key), "gravado")
+
+    def test_scoped_mode_overrides_cache_mode(self):
+        """O modo definido no contexto vale só dentro do bloco"""
+        cache = ResponseCache(path=self.path, mode=CacheMode.READWRITE)
+        key = make_cache_key("openai", "gpt-4", self.messages)
+        cache.set(key, "gravado")
+        with use_cache_mode(CacheMode.OFF):
+            self.assertIsNone(cache.get(key))
+            cache.set(key, "ignorado")
+        with use_cache_mode("read"):
+            self.assertEqual(cache.get(key), "gravado")
+        self.assertEqual(cache.mode, CacheMode.READWRITE)
+        self.assertEqual(cache.stats()["writes"], 1)
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        """Entradas além do TTL não são retornadas"""
+        cache = ResponseCache(path=self.path, mode=CacheMode.READWRITE, ttl=1)
+        key = make_cache_key("openai", "gpt-4", self.messages)
+        cache.set(key, {"conteudo": 1})
+        self.assertEqual(cache.get(key), {"conteudo": 1})
+        time.sleep(1.1)
+        self.assertIsNone(cache.get(key))
+        cache.close()
+
+    def test_eviction_removes_least_recently_used(self):
+        """O limite de entradas descarta primeiro as menos acessadas"""
+        cache = ResponseCache(path=self.path, mode=CacheMode.READWRITE, ttl=0, max_entries=2, evict_every=1)
+        cache.set("a", "A")
+        time.sleep(0.01)
+        cache.set("b", "B")
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+    def test_eviction_runs_every_n_writes(self):
+        """Os limites são verificados a cada ``evict_every`` gravações"""
+        cache = ResponseCache(path=self.path, mode=CacheMode.READWRITE, ttl=0, max_entries=2, evict_every=3)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.set("c", "C")
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.set("d", "D")
+        cache.set("e", "E")
+        self.assertEqual(cache.stats()["entries"], 4)
+        cache.set("f", "F")
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["evictions"], 4)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
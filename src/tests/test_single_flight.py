@@ -0,0 +1,68 @@
+import asyncio
+import unittest
+
+from src.core.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.calls = 0
+
+    async def slow_call(self, value="resposta", error=None):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if error:
+            raise error
+        return value
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        """Chamadas simultâneas com a mesma chave executam a função uma única vez"""
+        async def run():
+            return await asyncio.gather(
+                *(self.flight.do("chave", self.slow_call) for _ in range(5)),
+                self.flight.do("outra", lambda: self.slow_call("outra resposta")),
+            )
+
+        results = asyncio.run(run())
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual([shared for _, shared in results[:5]].count(False), 1)
+        self.assertEqual({value for value, _ in results[:5]}, {"resposta"})
+        self.assertEqual(results[5], ("outra resposta", False))
+        self.assertEqual(self.flight.in_flight(), 0)
+
+        # Chamadas posteriores (não simultâneas) executam de novo
+        asyncio.run(self.flight.do("chave", self.slow_call))
+        self.assertEqual(self.calls, 3)
+
+    def test_errors_are_shared(self):
+        async def run():
+            return await asyncio.gather(
+                *(self.flight.do("chave", lambda: self.slow_call(error=ValueError("429"))) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_cancelled_leader_hands_over(self):
+        """Se a chamada original é cancelada, quem aguardava executa a própria chamada"""
+        async def run():
+            leader = asyncio.create_task(self.flight.do("chave", self.slow_call))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(self.flight.do("chave", self.slow_call))
+            await asyncio.sleep(0.005)
+            leader.cancel()
+            return await follower, leader
+
+        (value, shared), leader = asyncio.run(run())
+        self.assertTrue(leader.cancelled())
+        self.assertEqual((value, shared), ("resposta", False))
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.agents.stage_scheduler import CheckpointStore, Stage, StageExecutionError, StageScheduler
+
+
+class MemoryCheckpoints(CheckpointStore):
+    """Checkpoints em memória para os testes."""
+
+    def __init__(self):
+        self.saved = {}
+
+    def load(self, stage, input_key):
+        if (stage, input_key) in self.saved:
+            return True, self.saved[(stage, input_key)]
+        return False, None
+
+    def save(self, stage, input_key, output):
+        self.saved[(stage, input_key)] = output
+
+
+class TestStageScheduler(unittest.TestCase):
+
+    def test_independent_stages_run_concurrently(self):
+        """Etapas sem dependência entre si são executadas em paralelo"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def branch(name):
+            def run(outputs):
+                # Só passa se as duas etapas estiverem em execução ao mesmo tempo
+                barrier.wait()
+                return f"{name}:{outputs['root']}"
+            return run
+
+        scheduler = StageScheduler([
+            Stage("root", lambda outputs: "r"),
+            Stage("left", branch("left"), ["root"]),
+            Stage("right", branch("right"), ["root"]),
+            Stage("join", lambda outputs: outputs["left"] + "+" + outputs["right"], ["left", "right"]),
+        ])
+        result = asyncio.run(scheduler.run())
+
+        self.assertEqual(result["outputs"]["join"], "left:r+right:r")
+        self.assertEqual(set(result["timings"]), {"root", "left", "right", "join"})
+        self.assertTrue(all(t["status"] == "success" for t in result["timings"].values()))
+
+    def test_async_stage_and_initial_outputs(self):
+        """Etapas assíncronas são aguardadas e saídas iniciais não são reexecutadas"""
+        calls = []
+
+        async def second(outputs):
+            calls.append("second")
+            await asyncio.sleep(0)
+            return outputs["first"] * 2
+
+        def first(outputs):
+            calls.append("first")
+            return 1
+
+        scheduler = StageScheduler([Stage("first", first), Stage("second", second, ["first"])])
+        result = asyncio.run(scheduler.run(initial_outputs={"first": 21}))
+
+        self.assertEqual(result["outputs"]["second"], 42)
+        self.assertEqual(calls, ["second"])
+        self.assertEqual(result["timings"]["first"]["status"], "skipped")
+
+    def test_failure_stops_dependents(self):
+        """Uma falha interrompe o pipeline e preserva as saídas concluídas"""
+        def fail(outputs):
+            raise RuntimeError("falhou")
+
+        scheduler = StageScheduler([
+            Stage("ok", lambda outputs: "ok"),
+            Stage("fail", fail, ["ok"]),
+            Stage("after", lambda outputs: time.sleep(0) or "nunca", ["fail"]),
+        ])
+        with self.assertRaises(StageExecutionError) as ctx:
+            asyncio.run(scheduler.run())
+
+        self.assertEqual(ctx.exception.stage, "fail")
+        self.assertEqual(ctx.exception.outputs, {"ok": "ok"})
+        self.assertEqual(ctx.exception.timings["fail"]["status"], "error")
+        self.assertNotIn("after", ctx.exception.timings)
+
+    def test_resume_skips_completed_stages(self):
+        """Ao retomar, etapas com checkpoint para as mesmas entradas não são reexecutadas"""
+        checkpoints = MemoryCheckpoints()
+        calls = []
+        attempts = {"deploy": 0}
+
+        def concept(outputs):
+            calls.append("concept")
+            return {"id": "c1"}
+
+        def deploy(outputs):
+            calls.append("deploy")
+            attempts["deploy"] += 1
+            if attempts["deploy"] == 1:
+                raise TimeoutError("gh expirou")
+            return f"deploy:{outputs['concept']['id']}"
+
+        def build():
+            return StageScheduler(
+                [Stage("concept", concept, inputs={"prompt": "p"}), Stage("deploy", deploy, ["concept"])],
+                checkpoints=checkpoints,
+            )
+
+        with self.assertRaises(StageExecutionError):
+            asyncio.run(build().run())
+        result = asyncio.run(build().run())
+
+        self.assertEqual(result["outputs"]["deploy"], "deploy:c1")
+        self.assertEqual(calls, ["concept", "deploy", "deploy"])
+        self.assertEqual(result["timings"]["concept"]["status"], "checkpoint")
+
+        # Entradas diferentes invalidam o checkpoint
+        changed = StageScheduler([Stage("concept", concept, inputs={"prompt": "outro"})], checkpoints=checkpoints)
+        asyncio.run(changed.run())
+        self.assertEqual(calls.count("concept"), 2)
+
+    def test_invalid_graph(self):
+        """Dependências inexistentes e ciclos são rejeitados"""
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage("a", lambda o: None, ["missing"])])
+        with self.assertRaises(ValueError):
+            StageScheduler([Stage("a", lambda o: None, ["b"]), Stage("b", lambda o: None, ["a"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
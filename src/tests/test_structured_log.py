@@ -0,0 +1,104 @@
+import asyncio
+import io
+import json
+import logging
+import unittest
+
+from src.core.log_queue import AsyncLogPipeline, DeferredFlushStreamHandler
+from src.core.structured_log import (
+    JsonFormatter,
+    LogContextFilter,
+    bind_log_context,
+    get_log_context,
+    log_context,
+)
+
+OPENAI_KEY = "sk-" + "A1b2C3d4" * 5
+
+
+class TestStructuredLog(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = logging.StreamHandler(self.stream)
+        self.handler.setFormatter(JsonFormatter())
+        self.handler.addFilter(LogContextFilter())
+        self.logger = logging.getLogger("test_structured_log")
+        self.logger.handlers.clear()
+        self.logger.addHandler(self.handler)
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def records(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_context_and_extra_fields(self):
+        """Campos de correlação e métricas de extra viram campos do JSON"""
+        with log_context(run_id="01RUN", agent="Coordinator"):
+            with log_context(stage="concept"):
+                self.logger.info("Resposta com %s", OPENAI_KEY, extra={
+                    "model": "gpt-4o", "duration": 1.25, "prompt_tokens": 10,
+                    "completion_tokens": 5, "total_tokens": 15,
+                })
+            self.logger.warning("fora da etapa")
+        self.logger.info("sem contexto")
+
+        first, second, third = self.records()
+        self.assertEqual(first["run_id"], "01RUN")
+        self.assertEqual(first["stage"], "concept")
+        self.assertEqual(first["agent"], "Coordinator")
+        self.assertEqual(first["model"], "gpt-4o")
+        self.assertEqual(first["duration"], 1.25)
+        self.assertEqual(first["total_tokens"], 15)
+        self.assertNotIn(OPENAI_KEY, first["message"])
+        self.assertEqual(second["level"], "WARNING")
+        self.assertNotIn("stage", second)
+        self.assertEqual(second["run_id"], "01RUN")
+        self.assertNotIn("run_id", third)
+        self.assertEqual(get_log_context(), {})
+
+    def test_context_propagates_to_threads_and_tasks(self):
+        """O contexto vale para tarefas asyncio e funções em asyncio.to_thread"""
+        def in_thread():
+            self.logger.info("na thread")
+
+        async def stage(name):
+            with log_context(stage=name):
+                await asyncio.to_thread(in_thread)
+
+        async def run():
+            with log_context(run_id="01RUN"):
+                await asyncio.gather(stage("a"), stage("b"))
+
+        asyncio.run(run())
+
+        records = self.records()
+        self.assertEqual(sorted(record["stage"] for record in records), ["a", "b"])
+        self.assertTrue(all(record["run_id"] == "01RUN" for record in records))
+
+    def test_context_is_captured_before_queue(self):
+        """Com a fila de logs, os campos são lidos na thread de origem"""
+        handler = DeferredFlushStreamHandler(self.stream)
+        handler.setFormatter(JsonFormatter())
+        pipeline = AsyncLogPipeline([handler])
+        pipeline.queue_handler.addFilter(LogContextFilter())
+        self.logger.handlers = [pipeline.queue_handler]
+        pipeline.start()
+
+        with log_context(run_id="01RUN"):
+            bind_log_context(stage="github", agent=None)
+            try:
+                raise RuntimeError("falha")
+            except RuntimeError:
+                self.logger.exception("erro")
+        pipeline.stop()
+
+        record, = self.records()
+        self.assertEqual(record["run_id"], "01RUN")
+        self.assertEqual(record["stage"], "github")
+        self.assertNotIn("agent", record)
+        self.assertIn("RuntimeError: falha", record["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
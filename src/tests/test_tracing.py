@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from src.core import tracing
+from src.core.tracing import NOOP_SPAN, Tracer, run_subprocess, traced
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.previous_tracer = tracing._tracer
+        self.tracer = tracing._tracer = Tracer(enabled=True)
+
+    def tearDown(self):
+        tracing._tracer = self.previous_tracer
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span("stage.concept") as span:
+            span.set_attribute("model", "gpt-4o")
+        self.assertIs(span, NOOP_SPAN)
+        self.assertEqual(tracer.spans(), [])
+
+    def test_spans_nest_across_tasks_and_threads(self):
+        """Spans em tarefas asyncio e em asyncio.to_thread são filhos do span que os iniciou"""
+        @traced(name="context.get")
+        def read_context():
+            return "ok"
+
+        async def stage(name):
+            with tracing.span(f"stage.{name}"):
+                await asyncio.to_thread(read_context)
+
+        async def run():
+            with tracing.span("feature_creation", run_id="01RUN") as root:
+                await asyncio.gather(stage("a"), stage("b"))
+            return root
+
+        root = asyncio.run(run())
+
+        spans = {span.span_id: span for span in self.tracer.spans(root.trace_id)}
+        by_name = {}
+        for span in spans.values():
+            by_name.setdefault(span.name, []).append(span)
+        self.assertEqual(len(by_name["context.get"]), 2)
+        for span in by_name["context.get"]:
+            self.assertTrue(spans[span.parent_id].name.startswith("stage."))
+        for span in by_name["stage.a"] + by_name["stage.b"]:
+            self.assertEqual(span.parent_id, root.span_id)
+        self.assertTrue(all(span.trace_id == root.trace_id for span in spans.values()))
+        self.assertGreaterEqual(root.duration, 0)
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(ValueError):
+            with tracing.span("llm.chat"):
+                raise ValueError("falha")
+        span, = self.tracer.spans()
+        self.assertEqual(span.attributes["error"], "ValueError")
+
+    def test_root_span_is_exported_as_chrome_trace(self):
+        """Com TRACE_DIR, o span raiz exportável é gravado e removido da memória"""
+        with tempfile.TemporaryDirectory() as trace_dir:
+            tracer = Tracer(trace_dir=trace_dir)
+            with tracer.span("feature_creation", export=True) as root:
+                root.set_attribute("run_id", "01RUN")
+                with tracer.span("llm.chat", model="gpt-4o"):
+                    pass
+
+            with open(os.path.join(trace_dir, "trace_01RUN.json"), encoding="utf-8") as f:
+                trace = json.load(f)
+
+        events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        self.assertEqual(sorted(event["name"] for event in events), ["feature_creation", "llm.chat"])
+        llm = next(event for event in events if event["name"] == "llm.chat")
+        self.assertEqual(llm["args"]["model"], "gpt-4o")
+        self.assertEqual(llm["args"]["parent_id"], root.span_id)
+        self.assertTrue(any(event["ph"] == "M" for event in trace["traceEvents"]))
+        self.assertEqual(tracer.spans(), [])
+
+    def test_run_subprocess(self):
+        result = run_subprocess([sys.executable, "-c", "print('ok')"], capture_output=True, text=True)
+
+        self.assertEqual(result.stdout.strip(), "ok")
+        span, = self.tracer.spans()
+        self.assertEqual(span.name, f"subprocess.{os.path.basename(sys.executable)}")
+        self.assertEqual(span.attributes["returncode"], 0)
+        self.assertNotIn("print", span.attributes["command"])
+
+
+if __name__ == "__main__":
+    unittest.main()